@@ -0,0 +1,184 @@
+import threading
+
+from ResourceMonitor import ResourceMonitor
+from ResourceHistory import ResourceHistory
+
+
+class AdmissionController():
+    """
+        Decides whether the render pool can start another Nuke process without running the machine out of memory
+        or past the CPU load it can take.
+
+        A job is only started when the memory it is predicted to need at its peak, plus `memory_headroom` MB, fits
+        in the memory free now less what the renders already running are still expected to grow by. New jobs also
+        wait while the CPUs are busier than `max_cpu_load` percent with work other than the renders started here.
+        Nuke uses every core it can, and the number of renders is already held to the workers set, so counting their
+        own load would stop a second render from ever starting alongside the first. The first job is always let
+        through, so a job that needs more memory than the machine has still renders, and fails, on its own.
+
+        Every render is measured whether or not jobs are held back, and its peak memory, CPU cores, disk reads and
+        writes and, if it rendered, its time per frame are added to the script's profile in a ResourceHistory. The
+        predictions so follow how each script actually renders. A render that ran out of memory (exit code 202) is
+        recorded as needing at least MEMORY_ERROR_FACTOR times the memory it was predicted to need, as its real peak
+        was never reached. A render killed outright is taken to have been killed by the system for running out of
+        memory, and is recorded the same way.
+
+        Attributes:
+            settings (Settings): The settings the limits are taken from.
+            history (ResourceHistory): The learned resource profile of each script.
+            monitor (ResourceMonitor): Samples the machine and the running renders.
+            predictions (dict): The predicted peak memory of each job running, by job.
+            lock (threading.Lock): Guards the predictions, as they are shared with the pool's threads.
+            waiting_on (str): What the last job asked about was held back by, "cpu" or "memory". None if it was
+                started.
+
+        Methods:
+            __init__(settings, history, monitor): Initializes the AdmissionController object.
+            start(): Loads the history and starts sampling.
+            stop(): Stops sampling and saves the history.
+            predict_memory(script_path): Returns the memory a script is expected to need.
+            can_start(job): Returns whether a job can be started now.
+            job_started(job, get_pid): Starts measuring a job.
+            job_finished(job, exit_code): Stops measuring a job and records what it used.
+    """
+
+    DEFAULT_JOB_MEMORY = 1024
+    MEMORY_ERROR_FACTOR = 1.5
+    EXIT_MEMORY_ERROR = 202
+    #the exit code of a process killed by SIGKILL, which is what the kernel's out of memory killer sends
+    EXIT_KILLED = -9
+
+
+    def __init__(self, settings, history = None, monitor = None):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings the limits are taken from.
+                history (ResourceHistory, optional): The history to predict from. One kept in
+                    `resource_history_filepath` is made if not given. Defaults to None.
+                monitor (ResourceMonitor, optional): The monitor to sample with. A new one is made if not given.
+                    Defaults to None.
+        """
+        self.settings = settings
+        self.history = history if history is not None else ResourceHistory(settings.resource_history_filepath)
+        self.monitor = monitor if monitor is not None else ResourceMonitor()
+        self.predictions = {}
+        self.lock = threading.Lock()
+        self.waiting_on = None
+
+
+    def start(self):
+        """
+            Loads the history and starts sampling the machine.
+        """
+        self.history.load()
+        self.monitor.start()
+
+
+    def stop(self):
+        """
+            Stops sampling and saves the history.
+        """
+        self.monitor.stop()
+        self.history.save()
+
+
+    def predict_memory(self, script_path):
+        """
+            Args:
+                script_path (str): The path of the .nk script, None for a script not known yet.
+
+            Returns:
+                float: The memory in MB the script is expected to need at its peak, DEFAULT_JOB_MEMORY if nothing has
+                    been measured yet.
+        """
+        if script_path is None:
+            predicted_mb = self.history.get_typical_memory()
+        else:
+            predicted_mb = self.history.predict_memory(script_path)
+        return predicted_mb if predicted_mb is not None else self.DEFAULT_JOB_MEMORY
+
+
+    def can_start(self, job):
+        """
+            Checks whether a job can be started now. Called by the render pool before each job it starts while
+            others are running. The first time a job is held back for a new reason the reason is printed.
+
+            Args:
+                job (RenderJob): The job waiting to start, None for a job not known yet.
+
+            Returns:
+                bool: True if the job's predicted memory fits and the CPUs are not saturated by other work, or if
+                    nothing could be measured on this machine.
+        """
+        script_path = job.script if job is not None else None
+        predicted_mb = self.predict_memory(script_path)
+        with self.monitor.lock:
+            available_memory_mb = self.monitor.available_memory_mb
+            cpu_load = self.monitor.cpu_load
+            if cpu_load is not None:
+                cpu_load = max(0.0, cpu_load - self.monitor.tracked_cpu_load)
+
+        waiting_on = None
+        if self.settings.max_cpu_load and cpu_load is not None and cpu_load * 100 >= self.settings.max_cpu_load:
+            waiting_on = "cpu"
+            reason = f"the CPUs are {cpu_load * 100:.0f}% busy with other work"
+        elif available_memory_mb is not None:
+            #running renders that have not reached their peak yet will take more of what is free now
+            with self.lock:
+                running_predictions = list(self.predictions.items())
+            growth_mb = sum(max(0.0, running_predicted_mb - self.monitor.get_memory_mb(running_job))
+                            for running_job, running_predicted_mb in running_predictions)
+            free_mb = available_memory_mb - growth_mb
+            if predicted_mb + self.settings.memory_headroom > free_mb:
+                name = job.script if job is not None else "the next script"
+                waiting_on = "memory"
+                reason = (f"{name} needs about {predicted_mb:.0f}MB, with {self.settings.memory_headroom}MB kept "
+                          f"free, and only {max(0.0, free_mb):.0f}MB is free for it")
+
+        if waiting_on is not None and waiting_on != self.waiting_on:
+            print(f"Holding back the next render, {reason}")
+        self.waiting_on = waiting_on
+        return waiting_on is None
+
+
+    def job_started(self, job, get_pid):
+        """
+            Starts measuring a job that has just started rendering.
+
+            Args:
+                job (RenderJob): The job.
+                get_pid (callable): Returns the id of the process rendering the job, or None if it is not running.
+        """
+        with self.lock:
+            self.predictions[job] = self.predict_memory(job.script)
+        self.monitor.track(job, get_pid)
+
+
+    def job_finished(self, job, exit_code):
+        """
+            Stops measuring a job and records what it used against its script. The time per frame is only recorded
+            for a job that rendered, from the frames it wrote. Jobs that were stopped or cancelled are not recorded,
+            as they did not render long enough to say anything.
+
+            Args:
+                job (RenderJob): The job.
+                exit_code (int): The exit code of the job.
+
+            Returns:
+                dict: The usage recorded, None if nothing was.
+        """
+        with self.lock:
+            predicted_mb = self.predictions.pop(job, None)
+        usage = self.monitor.untrack(job)
+        if usage is None or exit_code is None or (exit_code < 0 and exit_code != self.EXIT_KILLED):
+            return None
+        if exit_code in (self.EXIT_MEMORY_ERROR, self.EXIT_KILLED) and predicted_mb is not None:
+            usage["peak_memory_mb"] = max(usage["peak_memory_mb"], round(predicted_mb * self.MEMORY_ERROR_FACTOR, 1))
+        #a whole script's frames are only known from its output, a chunk's from its range
+        frame_count = job.frames_done or job.get_frame_count()
+        if exit_code == 0 and frame_count > 0:
+            usage["seconds_per_frame"] = round(usage["elapsed_time"] / frame_count, 3)
+        self.history.record(job.script, usage)
+        return usage
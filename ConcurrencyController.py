@@ -0,0 +1,204 @@
+import time
+import threading
+
+
+class ConcurrencyController():
+    """
+        Works out how many renders the render pool runs at once from the frames per second the machine keeps up,
+        rather than a fixed number. Light scripts can run many at once, while heavy ones slow each other down past a
+        few.
+
+        The frames written by every render are counted over windows of `adjust_interval` seconds in which the pool
+        had as many renders running as it was allowed. After a steady window one more render is tried. If the frames
+        per second rise by at least MIN_IMPROVEMENT the count is raised again, otherwise it goes back down and stays
+        there for PROBE_AFTER windows before more renders are tried again. Windows in which the pool ran out of jobs
+        or held jobs back say nothing about the count, and are started again.
+
+        The count is lowered straight away, one render at a time, while the machine is short of memory: less than
+        `memory_headroom` MB free, or processes stalled on memory more than MAX_MEMORY_PRESSURE of the time. The same
+        is done while processes are stalled on the disk more than MAX_IO_PRESSURE of the time. Renders that are
+        already running are never stopped, the pool only waits to start the next one.
+
+        The count always stays between `min_render_workers` and `max_render_workers`. Every change is printed, with
+        its reason, and kept in `adjustments`.
+
+        Attributes:
+            settings (Settings): The settings the limits are taken from.
+            monitor (ResourceMonitor): Samples the memory and disk pressure of the machine.
+            get_frames_written (callable): Returns the frames written by every render so far.
+            adjust_interval (float): Seconds of rendering each measurement is taken over.
+            min_workers (int): The fewest renders run at once.
+            max_workers (int): The most renders run at once.
+            worker_limit (int): The number of renders run at once now.
+            fps_by_workers (dict): The frames per second last measured at each number of renders.
+            probing (bool): True if the last change added a render, so the next window decides whether it helped.
+            steady_windows (int): The windows measured since the count last went down.
+            window_start (float): When the current window started, None if it has not.
+            window_frames (int): The frames written when the current window started.
+            window_saturated (bool): False once the pool has run fewer renders than allowed in the current window.
+            last_adjust_time (float): When the count last changed.
+            adjustments (list): The "time", "from", "to", "reason" and "fps" of every change.
+            lock (threading.Lock): Guards the count, as it is read from the render pool's threads.
+
+        Methods:
+            __init__(settings, monitor, get_frames_written, adjust_interval): Initializes the ConcurrencyController object.
+            start(): Starts measuring.
+            get_worker_limit(running_count, pending_count): Returns the number of renders to run at once.
+            get_pressure_reason(): Returns why the machine is under pressure.
+            adjust(worker_limit, reason, fps): Changes the number of renders run at once.
+            restart_window(): Starts a new measuring window.
+    """
+
+    ADJUST_INTERVAL = 60.0
+    MIN_IMPROVEMENT = 0.05
+    PROBE_AFTER = 5
+    MAX_MEMORY_PRESSURE = 0.1
+    MAX_IO_PRESSURE = 0.3
+
+
+    def __init__(self, settings, monitor, get_frames_written, adjust_interval = ADJUST_INTERVAL):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings the limits are taken from. `render_workers` is the number of renders
+                    started with.
+                monitor (ResourceMonitor): Samples the memory and disk pressure of the machine. It is started and
+                    stopped by whoever owns it.
+                get_frames_written (callable): Returns the frames written by every render so far.
+                adjust_interval (float, optional): Seconds of rendering each measurement is taken over. Defaults to
+                    ADJUST_INTERVAL.
+        """
+        self.settings = settings
+        self.monitor = monitor
+        self.get_frames_written = get_frames_written
+        self.adjust_interval = adjust_interval
+        self.min_workers = max(1, settings.min_render_workers)
+        self.max_workers = max(self.min_workers, settings.max_render_workers)
+        self.worker_limit = min(self.max_workers, max(self.min_workers, settings.render_workers))
+        self.fps_by_workers = {}
+        self.probing = False
+        #the first steady window tries one more render straight away
+        self.steady_windows = self.PROBE_AFTER
+        self.window_start = None
+        self.window_frames = 0
+        self.window_saturated = True
+        self.last_adjust_time = 0.0
+        self.adjustments = []
+        self.lock = threading.Lock()
+
+
+    def start(self):
+        """
+            Starts measuring, at the number of renders the last render list ended on.
+        """
+        with self.lock:
+            self.restart_window()
+
+
+    def get_worker_limit(self, running_count, pending_count):
+        """
+            Called by the render pool after it has started every job it can, to get the number of renders it may run
+            at once from then on. The count is changed here when a window has been measured, or the machine is under
+            pressure.
+
+            Args:
+                running_count (int): The renders running.
+                pending_count (int): The jobs waiting to start.
+
+            Returns:
+                int: The number of renders to run at once.
+        """
+        with self.lock:
+            now = time.time()
+            if self.window_start is None:
+                self.restart_window()
+            if running_count < self.worker_limit:
+                self.window_saturated = False
+
+            pressure_reason = self.get_pressure_reason()
+            if pressure_reason is not None:
+                #one render at a time, leaving the last change long enough to show in the pressure
+                if self.worker_limit > self.min_workers and now - self.last_adjust_time >= self.adjust_interval / 4:
+                    self.probing = False
+                    self.steady_windows = 0
+                    self.adjust(self.worker_limit - 1, pressure_reason, None)
+                return self.worker_limit
+
+            if now - self.window_start < self.adjust_interval:
+                return self.worker_limit
+            if not self.window_saturated or pending_count == 0:
+                self.restart_window()
+                return self.worker_limit
+
+            fps = (self.get_frames_written() - self.window_frames) / (now - self.window_start)
+            last_fps = self.fps_by_workers.get(self.worker_limit - 1)
+            self.fps_by_workers[self.worker_limit] = fps
+            if self.probing:
+                self.probing = False
+                if last_fps is not None and fps < last_fps * (1 + self.MIN_IMPROVEMENT):
+                    self.steady_windows = 0
+                    self.adjust(self.worker_limit - 1, f"no gain from {last_fps:.2f} to {fps:.2f} frames per second",
+                                fps)
+                elif self.worker_limit < self.max_workers:
+                    self.probing = True
+                    self.adjust(self.worker_limit + 1, f"frames per second rose to {fps:.2f}", fps)
+                else:
+                    self.restart_window()
+            else:
+                self.steady_windows += 1
+                if self.steady_windows >= self.PROBE_AFTER and self.worker_limit < self.max_workers:
+                    self.probing = True
+                    self.adjust(self.worker_limit + 1, f"trying one more render at {fps:.2f} frames per second", fps)
+                else:
+                    self.restart_window()
+            return self.worker_limit
+
+
+    def get_pressure_reason(self):
+        """
+            Returns:
+                str: Why the machine is short of memory or disk, None if it is not or it could not be measured.
+        """
+        with self.monitor.lock:
+            available_memory_mb = self.monitor.available_memory_mb
+            memory_pressure = self.monitor.memory_pressure
+            io_pressure = self.monitor.io_pressure
+        if available_memory_mb is not None and available_memory_mb < self.settings.memory_headroom:
+            return f"only {available_memory_mb:.0f}MB of memory is free"
+        if memory_pressure is not None and memory_pressure > self.MAX_MEMORY_PRESSURE:
+            return f"processes were waiting on memory {memory_pressure * 100:.0f}% of the time"
+        if io_pressure is not None and io_pressure > self.MAX_IO_PRESSURE:
+            return f"processes were waiting on the disk {io_pressure * 100:.0f}% of the time"
+        return None
+
+
+    def adjust(self, worker_limit, reason, fps):
+        """
+            Changes the number of renders run at once, prints the change and starts a new window. Called with the lock
+            held.
+
+            Args:
+                worker_limit (int): The new number of renders.
+                reason (str): Why it changed.
+                fps (float): The frames per second measured before the change, None if it was not measured.
+        """
+        worker_limit = min(self.max_workers, max(self.min_workers, worker_limit))
+        if worker_limit == self.worker_limit:
+            self.restart_window()
+            return
+        print(f"Render workers {self.worker_limit} -> {worker_limit}, {reason}")
+        self.adjustments.append({"time": time.time(), "from": self.worker_limit, "to": worker_limit,
+                                 "reason": reason, "fps": round(fps, 2) if fps is not None else None})
+        self.worker_limit = worker_limit
+        self.last_adjust_time = time.time()
+        self.restart_window()
+
+
+    def restart_window(self):
+        """
+            Starts a new measuring window from the frames written so far. Called with the lock held.
+        """
+        self.window_start = time.time()
+        self.window_frames = self.get_frames_written()
+        self.window_saturated = True
@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+
+class DaemonClient(QObject):
+    """
+        Talks to the render daemon (RenderDaemon) over its local socket. The window and the headless command line
+        both use it, so a render started from one can be followed or cancelled from the other.
+
+        The daemon's address and token are read from `daemon_info_filepath` for each request, so a client made
+        before the daemon started (or after it restarted) still finds it. A daemon that is not running can be
+        started with `start_daemon`, it then runs on its own after the client has gone.
+
+        Signals:
+            event_received (dict): Signal emitted for every event from the daemon while listening. It is emitted from
+                the listening thread, so connected QObjects get it queued on their own thread.
+            connection_lost: Signal emitted if the daemon goes away while listening.
+
+        Attributes:
+            settings (Settings): The settings the daemon's files are found from.
+            subscription (socket.socket): The connection events are read from, None when not subscribed.
+            listen_thread (threading.Thread): The thread emitting `event_received`, None when not listening.
+            listening (bool): True while the events should be emitted.
+
+        Methods:
+            __init__(settings): Initializes the DaemonClient object.
+            read_info(): Reads the daemon's address and token.
+            open_connection(): Opens a connection to the daemon.
+            send(connection, reader, token, cmd, args): Sends a request on a connection and reads the reply.
+            request(cmd, **args): Sends a request on a connection of its own and returns the reply.
+            is_running(): Checks the daemon is up.
+            start_daemon(): Starts the daemon if it is not running.
+            get_daemon_command(): Returns the command that starts the daemon.
+            submit(script_paths, write_node_name, priority, force_render, priorities, dependencies): Adds scripts to the daemon's queue.
+            list_jobs(states, job_ids): Returns the jobs in the daemon's queue.
+            cancel(job_ids): Cancels jobs.
+            reprioritize(job_ids, priority): Changes the priority of jobs.
+            shutdown(): Stops the daemon.
+            subscribe(): Starts receiving events, returning them one at a time.
+            read_events(connection, reader): Yields the events read from a subscribed connection.
+            start_listening(): Emits `event_received` for every event from a thread of its own.
+            stop_listening(): Stops receiving events.
+    """
+
+    event_received = Signal(dict)
+    connection_lost = Signal()
+
+    CONNECT_TIMEOUT = 5.0
+    START_TIMEOUT = 20.0
+
+
+    def __init__(self, settings):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings the daemon's files are found from.
+        """
+        super().__init__()
+        self.settings = settings
+        self.subscription = None
+        self.listen_thread = None
+        self.listening = False
+
+
+    def read_info(self):
+        """
+            Returns:
+                dict: The "host", "port", "pid" and "token" of the daemon, None if it has not written them.
+        """
+        try:
+            with open(self.settings.daemon_info_filepath, "r") as info_file:
+                info = json.load(info_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(info, dict) or "port" not in info or "token" not in info:
+            return None
+        return info
+
+
+    def open_connection(self):
+        """
+            Opens a connection to the daemon.
+
+            Returns:
+                tuple: The (connection, reader, token) of the new connection.
+
+            Raises:
+                ConnectionError: If the daemon is not running.
+        """
+        info = self.read_info()
+        if info is None:
+            raise ConnectionError("The render daemon is not running")
+        try:
+            connection = socket.create_connection((info.get("host", "127.0.0.1"), info["port"]),
+                                                  timeout=self.CONNECT_TIMEOUT)
+        except OSError as e:
+            raise ConnectionError(f"Unable to reach the render daemon: {e}") from e
+        return connection, connection.makefile("rb"), info["token"]
+
+
+    def send(self, connection, reader, token, cmd, args):
+        """
+            Sends one request on a connection and reads the reply.
+
+            Args:
+                connection (socket.socket): The connection to the daemon.
+                reader (file): Reads the replies from the connection.
+                token (str): The token from the info file.
+                cmd (str): The command.
+                args (dict): The rest of the request.
+
+            Returns:
+                dict: The reply.
+
+            Raises:
+                ConnectionError: If the daemon could not be reached.
+                RuntimeError: If the daemon turned the request down.
+        """
+        request = {"cmd": cmd, "token": token}
+        request.update(args)
+        try:
+            connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            line = reader.readline()
+        except OSError as e:
+            raise ConnectionError(f"Lost the render daemon: {e}") from e
+        if not line:
+            raise ConnectionError("The render daemon closed the connection")
+        try:
+            reply = json.loads(line)
+        except ValueError as e:
+            raise ConnectionError(f"Bad reply from the render daemon: {e}") from e
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "The render daemon turned the request down"))
+        return reply
+
+
+    def request(self, cmd, **args):
+        """
+            Sends a request to the daemon on a connection of its own and returns the reply.
+
+            Args:
+                cmd (str): The command, see RenderDaemon.
+                **args: The rest of the request.
+
+            Returns:
+                dict: The reply.
+
+            Raises:
+                ConnectionError: If the daemon is not running or could not be reached.
+                RuntimeError: If the daemon turned the request down.
+        """
+        connection, reader, token = self.open_connection()
+        with connection, reader:
+            return self.send(connection, reader, token, cmd, args)
+
+
+    def is_running(self):
+        """
+            Returns:
+                bool: True if the daemon is running and answering.
+        """
+        try:
+            self.request("ping")
+        except (ConnectionError, RuntimeError):
+            return False
+        return True
+
+
+    def start_daemon(self):
+        """
+            Starts the daemon in a process of its own if it is not running, and waits for it to answer. The daemon's
+            output goes to `daemon_log_filepath`.
+
+            Returns:
+                bool: True if the daemon is running.
+        """
+        if self.is_running():
+            return True
+
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            #its own session, so closing the terminal or the window does not take it down
+            kwargs["start_new_session"] = True
+        try:
+            with open(self.settings.daemon_log_filepath, "a") as log_file:
+                subprocess.Popen(self.get_daemon_command(), stdin=subprocess.DEVNULL, stdout=log_file,
+                                 stderr=subprocess.STDOUT, cwd=os.path.dirname(self.settings.render_queue_folder),
+                                 **kwargs)
+        except OSError as e:
+            print(f"Unable to start the render daemon: {e}")
+            return False
+
+        give_up_time = time.time() + self.START_TIMEOUT
+        while time.time() < give_up_time:
+            if self.is_running():
+                return True
+            time.sleep(0.2)
+        print(f"The render daemon did not start, see {self.settings.daemon_log_filepath}")
+        return False
+
+
+    def get_daemon_command(self):
+        """
+            Returns:
+                list: The command that starts the daemon, with the packaged executable or with RenderQ.py.
+        """
+        if getattr(sys, "frozen", False):
+            return [sys.executable, "--daemon"]
+        #unbuffered so the log is up to date while it runs
+        return [sys.executable, "-u", os.path.join(os.path.dirname(os.path.abspath(__file__)), "RenderQ.py"),
+                "--daemon"]
+
+
+    def submit(self, script_paths, write_node_name = None, priority = 0, force_render = False, priorities = None,
+               dependencies = None):
+        """
+            Adds scripts to the end of the daemon's queue.
+
+            Args:
+                script_paths (list): The paths of the scripts, in order.
+                write_node_name (str, optional): The write node to render, None for the daemon's default.
+                    Defaults to None.
+                priority (int, optional): Higher priorities render first. Defaults to 0.
+                force_render (bool, optional): Render every frame, even if nothing has changed. Defaults to False.
+                priorities (dict, optional): The priority of scripts that do not take `priority`, by script path.
+                    Defaults to None.
+                dependencies (dict, optional): The script paths each script has to render after, by script path.
+                    Defaults to None.
+
+            Returns:
+                list: The ids of the new jobs, in the order of the scripts.
+        """
+        return self.request("submit", scripts=[os.path.abspath(path) for path in script_paths],
+                            write_node=write_node_name, priority=priority, force=force_render,
+                            priorities={os.path.abspath(path): value for path, value in (priorities or {}).items()},
+                            dependencies={os.path.abspath(path): [os.path.abspath(dependency) for dependency in after]
+                                          for path, after in (dependencies or {}).items()})["job_ids"]
+
+
+    def list_jobs(self, states = None, job_ids = None):
+        """
+            Args:
+                states (list, optional): The states of the jobs to return, None for every job. Defaults to None.
+                job_ids (list, optional): The ids of the jobs to return, None for every job. Defaults to None.
+
+            Returns:
+                list: The jobs, in the order they will render.
+        """
+        return self.request("list", states=states, job_ids=job_ids)["jobs"]
+
+
+    def cancel(self, job_ids = None):
+        """
+            Args:
+                job_ids (list, optional): The ids of the jobs to cancel, None for every waiting and running job.
+                    Defaults to None.
+
+            Returns:
+                list: The ids of the jobs cancelled.
+        """
+        return self.request("cancel", job_ids=job_ids)["job_ids"]
+
+
+    def reprioritize(self, job_ids, priority):
+        """
+            Args:
+                job_ids (list): The ids of the jobs.
+                priority (int): The new priority, higher renders first.
+
+            Returns:
+                int: The number of jobs changed.
+        """
+        return self.request("reprioritize", job_ids=job_ids, priority=priority)["changed"]
+
+
+    def shutdown(self):
+        """
+            Stops the daemon. The jobs it was rendering render again the next time it starts.
+        """
+        self.request("shutdown")
+
+
+    def subscribe(self):
+        """
+            Starts receiving events from the daemon. The subscription is in place when this returns, so nothing
+            that happens after it is missed. Heartbeats are left out.
+
+            Returns:
+                generator: Yields each event dict as it comes in, and ends when the daemon goes away or
+                    `stop_listening` is called.
+
+            Raises:
+                ConnectionError: If the daemon is not running or could not be reached.
+        """
+        connection, reader, token = self.open_connection()
+        try:
+            self.send(connection, reader, token, "subscribe", {})
+        except (ConnectionError, RuntimeError) as e:
+            reader.close()
+            connection.close()
+            raise ConnectionError(f"Unable to subscribe to the render daemon: {e}") from e
+        #events only come when something happens, the heartbeat keeps the line from timing out
+        connection.settimeout(None)
+        self.subscription = connection
+        return self.read_events(connection, reader)
+
+
+    def read_events(self, connection, reader):
+        """
+            Args:
+                connection (socket.socket): The subscribed connection.
+                reader (file): Reads the events from the connection.
+
+            Yields:
+                dict: Each event, in order.
+        """
+        with connection, reader:
+            while True:
+                try:
+                    line = reader.readline()
+                except (OSError, ValueError):
+                    return
+                if not line:
+                    return
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get("event") != "heartbeat":
+                    yield event
+
+
+    def start_listening(self):
+        """
+            Subscribes to the daemon and emits `event_received` for every event from a thread of its own, until
+            `stop_listening` is called.
+
+            Raises:
+                ConnectionError: If the daemon is not running or could not be reached.
+        """
+        events = self.subscribe()
+        self.listening = True
+
+        def emit_events():
+            for event in events:
+                if not self.listening:
+                    return
+                self.event_received.emit(event)
+            if self.listening:
+                self.listening = False
+                self.connection_lost.emit()
+
+        self.listen_thread = threading.Thread(target=emit_events, daemon=True)
+        self.listen_thread.start()
+
+
+    def stop_listening(self):
+        """
+            Stops receiving events. The daemon carries on rendering.
+        """
+        self.listening = False
+        subscription = self.subscription
+        self.subscription = None
+        if subscription is not None:
+            try:
+                subscription.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
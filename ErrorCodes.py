@@ -13,23 +13,31 @@ class ErrorCodes():
             settings (Settings): The Settings object.
             error_codes (dict): A dictionary that maps error codes to their corresponding error messages.
             nuke_error_messages (dict): A dictionary that maps specific Nuke error codes to their error messages.
+            script_error_codes (set): Error codes caused by the script itself, which rendering again will not fix.
 
         Methods:
-            __init__(): Initializes the ErrorCodes object.
+            __init__(settings): Initializes the ErrorCodes object.
             get_error_message(output, script): Returns the error message based on the provided output code and script name.
             check_error_codes(code): Checks if the provided code exists in the error_codes dictionary.
+            is_retryable(code): Checks if a failed render with the provided code is worth rendering again.
     """
     
 
-    def __init__(self):    
+    def __init__(self, settings = None):    
         """
             Initialization method.
 
             Sets up error code dictionary.
+
+            Args:
+                settings (Settings, optional): The settings already loaded, the saved settings are loaded if not
+                    given. Defaults to None.
         """
         super().__init__()
-        self.settings = Settings()
-        self.settings.load_settings()
+        if settings is None:
+            settings = Settings()
+            settings.load_settings()
+        self.settings = settings
 
         self.error_codes = {
             103: "There are no write nodes in this script",
@@ -41,6 +49,8 @@ class ErrorCodes():
             204: "There was a licensing error for Nuke.",
             205: "The User aborted the render.",
             206: "Unknown Render error occured.",
+            207: "A script this one depends on did not render.",
+            208: "This script waits on scripts in the queue that wait on each other.",
             
             404: None #defined in "get_error_message()"
         }
@@ -49,6 +59,8 @@ class ErrorCodes():
             103: "no active Write operators"
         }
 
+        self.script_error_codes = {103, 104, 207, 208, 404}
+
     def get_error_message(self, output, script):
         """
         Retrieves the error message based on the provided output code and script name.
@@ -80,4 +92,19 @@ class ErrorCodes():
             return False
         elif code in self.error_codes:
             return True
-        return False
\ No newline at end of file
+        return False
+
+    def is_retryable(self, code):
+        """
+        Checks if a render that ended with the provided code is worth rendering again.
+
+        Args:
+            code (int): The exit code of the render.
+
+        Returns:
+            bool: True if the render failed for a reason other than the script itself, False otherwise.
+
+        """
+        if code is None or code == 0:
+            return False
+        return code not in self.script_error_codes
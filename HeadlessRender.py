@@ -0,0 +1,684 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import concurrent.futures
+
+from Settings import Settings
+from ErrorCodes import ErrorCodes
+from ScriptMetadataCache import ScriptMetadataCache
+from ScriptValidator import ScriptValidator
+from RenderCache import RenderCache
+from ResourceHistory import ResourceHistory
+from RenderEstimator import RenderEstimator
+from DaemonClient import DaemonClient
+
+from PySide6.QtCore import Qt, QObject, QThread, QTimer, QCoreApplication, QEventLoop
+
+
+class HeadlessRender(QObject):
+    """
+        Renders a queue of scripts from the command line, without building any widgets.
+
+        This is what `python RenderQ.py --headless queue.json` runs. It uses the same settings, script checks and
+        render engine (SeparateThread) as the window, so a queue renders the same way in both. The settings can be
+        changed for the one run with command line options, they are never saved.
+
+        Every script is checked first. Scripts that fail the checks are not rendered, the rest are. Unlike the window
+        a failed script does not stop the others, so an overnight run gets as much done as it can. The queue file can
+        give each script a priority and the scripts it has to render after, a script that has to wait for one that
+        failed its checks is not rendered either.
+
+        Progress is written to stdout as one json object per line, each with an "event" and a "time". Anything else
+        BNRQ prints goes to stderr, so stdout can be read by another program. The events are:
+            queued: the scripts read from the queue file.
+            validated: a script was checked, with its "status", "errors" and "warnings".
+            cached: a script was skipped as nothing about it has changed since it last rendered.
+            progress: frames were written, with "frames_done", "frames_total" and "fps". At most one a second per script.
+                Once there is something to estimate from, it also has the "eta", the seconds until every script is
+                expected to be done, and the "eta_range" that should fall in.
+            script_done: a script finished rendering, with its "exit_code" and "elapsed_time".
+            done: the run is over, with the number of scripts in each state and the "exit_code".
+
+        With --submit the scripts that pass their checks are handed to the render daemon (started if it is not
+        running) instead of being rendered here. The same progress lines are written as the daemon renders them,
+        after a "submitted" line with their "job_ids". With --detach it returns as soon as they are handed over, and
+        Ctrl+C stops following them without stopping the renders. The daemon's queue can be looked at and changed
+        with --list, --cancel and --reprioritize, and the daemon stopped with --stop-daemon.
+
+        Exit codes:
+            0: Every script rendered or was up to date.
+            1: At least one script failed to render, or was never rendered.
+            2: Every script that passed its checks rendered, but at least one failed its checks.
+            3: The queue file or the options could not be used, or the render daemon could not be reached.
+            130: The run was cancelled with Ctrl+C.
+
+        Attributes:
+            settings (Settings): The settings used for the run.
+            output (file): Where the progress lines are written.
+            output_lock (threading.Lock): Keeps the progress lines written from the render thread and this one whole.
+            script_cache (ScriptMetadataCache): The cache of parsed script details.
+            validator (ScriptValidator): Checks each script before it is rendered.
+            render_cache (RenderCache): The successful renders, used to skip unchanged scripts.
+            error_obj (ErrorCodes): Reads the exit codes of the renders.
+            results (dict): The state of each queued script, by path.
+            script_priorities (dict): The priority of each script given one in the queue file, by path.
+            script_dependencies (dict): The scripts each script has to render after, from the queue file, by path.
+            last_progress_times (dict): When the last progress line was written for each script.
+            estimator (RenderEstimator): Estimates when the scripts rendering will be done, None until they start.
+            render_worker (SeparateThread): The render engine, None until the render starts.
+            render_thread (QThread): The thread the render engine runs in.
+            event_loop (QEventLoop): Runs while the scripts render.
+            cancelled (bool): True if the run was cancelled.
+
+        Methods:
+            __init__(settings, output): Initializes the HeadlessRender object.
+            main(argv): Reads the command line, runs the queue and returns the exit code.
+            run_command_line(argv, output): Sets up the settings from the command line and renders the queue.
+            parse_arguments(argv): Reads the command line options.
+            load_queue(queue_filepath): Reads the scripts to render from a queue file.
+            run_daemon_command(args, settings, output): Carries out a render daemon option.
+            run(script_paths, force_render): Checks and renders the scripts and returns the exit code.
+            skip_unmet_dependencies(script_paths): Takes out the scripts that wait on a script that failed its checks.
+            submit_to_daemon(client, script_paths, priority, force_render, detach): Checks the scripts and hands them to the render daemon.
+            start_estimate(script_paths): Starts estimating when the scripts will be done.
+            send_done(): Writes the line summing up the run and returns the exit code.
+            validate_scripts(script_paths): Checks every script, returning those that can render.
+            render_scripts(script_paths, force_render): Renders the scripts and waits for them to finish.
+            handle_script_cached(script): Records a script skipped as unchanged.
+            handle_frame_progress(script, frames_done, frames_total, fps): Writes a progress line.
+            handle_render_update(script, exit_code, elapsed_time): Records a script that finished rendering.
+            handle_render_finish(): Stops waiting once the render is done.
+            cancel(): Stops the render.
+            get_exit_code(): Works out the exit code from the results.
+            send_event(event_type, **info): Writes a progress line.
+    """
+
+    EXIT_OK = 0
+    EXIT_RENDER_FAILED = 1
+    EXIT_INVALID_SCRIPTS = 2
+    EXIT_BAD_QUEUE = 3
+    EXIT_CANCELLED = 130
+
+    PROGRESS_INTERVAL = 1.0
+    #the exit code SeparateThread fails a script with when a script it waits on did not render
+    ERROR_DEPENDENCY_FAILED = 207
+
+    STATE_QUEUED = "queued"
+    STATE_INVALID = "invalid"
+    STATE_RENDERED = "rendered"
+    STATE_CACHED = "cached"
+    STATE_FAILED = "failed"
+
+
+    def __init__(self, settings, output = None):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings to render with.
+                output (file, optional): Where to write the progress lines. Defaults to sys.stdout.
+        """
+        super().__init__()
+        self.settings = settings
+        self.output = output if output is not None else sys.stdout
+        self.output_lock = threading.Lock()
+        os.makedirs(self.settings.temp_folder, exist_ok=True)
+        self.script_cache = ScriptMetadataCache(self.settings.script_cache_filepath, self.settings.script_cache_size)
+        self.script_cache.load()
+        self.validator = ScriptValidator(self.script_cache)
+        self.render_cache = RenderCache(self.settings.render_cache_filepath, self.script_cache,
+                                        self.validator.input_scanner)
+        self.render_cache.load()
+        self.error_obj = ErrorCodes(self.settings)
+        self.results = {}
+        self.script_priorities = {}
+        self.script_dependencies = {}
+        self.last_progress_times = {}
+        self.estimator = None
+        self.render_worker = None
+        self.render_thread = None
+        self.event_loop = None
+        self.cancelled = False
+
+
+    @classmethod
+    def main(cls, argv):
+        """
+            Reads the command line, renders the queue and returns the exit code. Nothing but the progress lines is
+            written to stdout, everything else printed while rendering goes to stderr.
+
+            Args:
+                argv (list): The command line arguments, without the program name.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        output = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            return cls.run_command_line(argv, output)
+        finally:
+            sys.stdout = output
+
+
+    @classmethod
+    def run_command_line(cls, argv, output):
+        """
+            Sets up the settings from the command line options and renders the queue.
+
+            Args:
+                argv (list): The command line arguments, without the program name.
+                output (file): Where to write the progress lines.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        try:
+            args = cls.parse_arguments(argv)
+        except SystemExit as e:
+            return cls.EXIT_BAD_QUEUE if e.code else cls.EXIT_OK
+
+        app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+        settings = Settings()
+        settings.load_settings()
+        #the saved settings are only in QSettings while the window is open, the json file always has them
+        settings.load_settings_from_json()
+        if args.workers is not None:
+            settings.render_workers = max(1, args.workers)
+        if args.chunk_size is not None:
+            settings.chunk_size = max(0, args.chunk_size)
+        if args.write_node:
+            settings.write_node_name = args.write_node
+        if args.nuke_exe:
+            settings.nuke_exe = args.nuke_exe
+        if args.single_instance:
+            settings.render_nuke_open = True
+        settings.render_nuke_open = settings.render_nuke_open in (True, "true")
+
+        if args.submit or args.list or args.cancel is not None or args.reprioritize or args.stop_daemon:
+            return cls.run_daemon_command(args, settings, output)
+
+        headless = cls(settings, output)
+        if args.queue is None:
+            headless.send_event("error", message="No queue file given")
+            return cls.EXIT_BAD_QUEUE
+        if not settings.nuke_exe or not os.path.isfile(settings.nuke_exe):
+            headless.send_event("error", message=f"Nuke executable not found: {settings.nuke_exe}")
+            return cls.EXIT_BAD_QUEUE
+        try:
+            script_paths, headless.script_priorities, headless.script_dependencies = cls.load_queue(args.queue)
+        except (OSError, ValueError) as e:
+            headless.send_event("error", message=f"Unable to read the queue {args.queue}: {e}")
+            return cls.EXIT_BAD_QUEUE
+
+        #ctrl+c only reaches python between qt events, so the timer makes sure it gets a look in
+        signal.signal(signal.SIGINT, lambda signum, frame: headless.cancel())
+        interrupt_timer = QTimer()
+        interrupt_timer.timeout.connect(lambda: None)
+        interrupt_timer.start(200)
+        try:
+            return headless.run(script_paths, args.force)
+        finally:
+            interrupt_timer.stop()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+
+    @staticmethod
+    def parse_arguments(argv):
+        """
+            Args:
+                argv (list): The command line arguments, without the program name.
+
+            Returns:
+                argparse.Namespace: The options read.
+
+            Raises:
+                SystemExit: If the options are not valid, or help was asked for.
+        """
+        parser = argparse.ArgumentParser(prog="RenderQ.py --headless",
+                                         description="Render a queue of Nuke scripts without the window.")
+        parser.add_argument("queue", nargs="?",
+                            help="a json file holding a list of .nk scripts, or an object with a \"scripts\" list")
+        parser.add_argument("--workers", type=int, help="the number of Nuke processes to render with at once")
+        parser.add_argument("--chunk-size", type=int, help="the frames per chunk, 0 renders each script in one piece")
+        parser.add_argument("--write-node", help="the name of the write node to render")
+        parser.add_argument("--nuke-exe", help="the Nuke executable to render with")
+        parser.add_argument("--single-instance", action="store_true",
+                            help="render every script in one instance of Nuke")
+        parser.add_argument("--force", action="store_true",
+                            help="render every frame of every script, even if nothing has changed")
+        daemon_group = parser.add_argument_group("render daemon")
+        daemon_group.add_argument("--submit", action="store_true",
+                                  help="hand the queue to the render daemon, starting it if it is not running")
+        daemon_group.add_argument("--detach", action="store_true",
+                                  help="with --submit, return once the queue is handed over")
+        daemon_group.add_argument("--priority", type=int, default=0,
+                                  help="the priority of submitted or reprioritized jobs, higher renders first")
+        daemon_group.add_argument("--list", action="store_true", help="list the jobs waiting or rendering")
+        daemon_group.add_argument("--cancel", nargs="*", type=int, metavar="JOB_ID",
+                                  help="cancel jobs, every waiting and rendering job if no ids are given")
+        daemon_group.add_argument("--reprioritize", nargs="+", type=int, metavar="JOB_ID",
+                                  help="set the priority of jobs to --priority")
+        daemon_group.add_argument("--stop-daemon", action="store_true",
+                                  help="stop the render daemon, its running jobs render when it is next started")
+        argv = [arg for arg in argv if arg != "--headless"]
+        return parser.parse_args(argv)
+
+
+    @classmethod
+    def run_daemon_command(cls, args, settings, output):
+        """
+            Carries out the render daemon option given on the command line, writing the result as a progress line.
+            Only --submit starts the daemon, the other options need it to be running.
+
+            Args:
+                args (argparse.Namespace): The options read.
+                settings (Settings): The settings, used to find the daemon.
+                output (file): Where to write the progress lines.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        headless = cls(settings, output)
+        client = DaemonClient(settings)
+        try:
+            if args.list:
+                headless.send_event("jobs", jobs=client.list_jobs(["queued", "running"]))
+            elif args.cancel is not None:
+                headless.send_event("cancelled", job_ids=client.cancel(args.cancel or None))
+            elif args.reprioritize:
+                changed_count = client.reprioritize(args.reprioritize, args.priority)
+                headless.send_event("reprioritized", job_ids=args.reprioritize, priority=args.priority,
+                                    changed=changed_count)
+            elif args.stop_daemon:
+                client.shutdown()
+                headless.send_event("shutdown")
+            else:
+                if args.queue is None:
+                    headless.send_event("error", message="No queue file given")
+                    return cls.EXIT_BAD_QUEUE
+                try:
+                    script_paths, headless.script_priorities, headless.script_dependencies = cls.load_queue(args.queue)
+                except (OSError, ValueError) as e:
+                    headless.send_event("error", message=f"Unable to read the queue {args.queue}: {e}")
+                    return cls.EXIT_BAD_QUEUE
+                return headless.submit_to_daemon(client, script_paths, args.priority, args.force, args.detach)
+        except (ConnectionError, RuntimeError) as e:
+            headless.send_event("error", message=str(e))
+            return cls.EXIT_BAD_QUEUE
+        return cls.EXIT_OK
+
+
+    @staticmethod
+    def load_queue(queue_filepath):
+        """
+            Reads the scripts to render from a queue file. Relative paths are taken from the folder of the queue file.
+
+            Each script in the list is either its path, or an object with its "script" path and optionally its
+            "priority" (higher renders first) and the scripts it has to render "after".
+
+            Args:
+                queue_filepath (str): A json file holding a list of scripts, or an object with a "scripts" list.
+
+            Returns:
+                tuple: The absolute paths of the scripts, in order, each only once. The priority of each script
+                    given one, and the scripts each script has to render after, by path.
+
+            Raises:
+                OSError: If the queue file could not be read.
+                ValueError: If the queue file is not in one of the formats above.
+        """
+        with open(queue_filepath, "r") as queue_file:
+            queue = json.load(queue_file)
+        if isinstance(queue, dict):
+            queue = queue.get("scripts")
+        if not isinstance(queue, list):
+            raise ValueError("expected a list of scripts")
+
+        queue_directory = os.path.dirname(os.path.abspath(queue_filepath))
+        script_paths = []
+        priorities = {}
+        dependencies = {}
+        for entry in queue:
+            if isinstance(entry, str):
+                entry = {"script": entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get("script"), str):
+                raise ValueError("expected each script to be a path, or an object with a \"script\" path")
+            script = os.path.normpath(os.path.join(queue_directory, entry["script"]))
+            if "priority" in entry:
+                if not isinstance(entry["priority"], int):
+                    raise ValueError(f"the priority of {entry['script']} is not a whole number")
+                priorities[script] = entry["priority"]
+            after = entry.get("after", [])
+            if not isinstance(after, list) or not all(isinstance(path, str) for path in after):
+                raise ValueError(f"the scripts {entry['script']} renders after are not a list of paths")
+            if after:
+                dependencies.setdefault(script, []).extend(os.path.normpath(os.path.join(queue_directory, path))
+                                                           for path in after)
+            script_paths.append(script)
+        return list(dict.fromkeys(script_paths)), priorities, dependencies
+
+
+    def run(self, script_paths, force_render = False):
+        """
+            Checks the scripts, renders those that passed and returns the exit code.
+
+            Args:
+                script_paths (list): The paths of the scripts to render.
+                force_render (bool, optional): Render every frame of every script, even those that have not changed.
+                    Defaults to False.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        self.results = {script: self.STATE_QUEUED for script in script_paths}
+        self.send_event("queued", scripts=script_paths, write_node=self.settings.write_node_name,
+                        workers=1 if self.settings.render_nuke_open else self.settings.render_workers)
+        try:
+            scripts_to_render = self.skip_unmet_dependencies(self.validate_scripts(script_paths))
+            if scripts_to_render and not self.cancelled:
+                self.start_estimate(scripts_to_render)
+                self.render_scripts(scripts_to_render, force_render)
+        finally:
+            self.validator.input_scanner.shutdown()
+            self.script_cache.save()
+            self.render_cache.save()
+
+        return self.send_done()
+
+
+    def skip_unmet_dependencies(self, script_paths):
+        """
+            Takes out the scripts that have to render after a script that failed its checks, and those waiting on
+            them in turn, reporting each as failed.
+
+            Args:
+                script_paths (list): The scripts that passed their checks.
+
+            Returns:
+                list: The scripts left, in the order they were given.
+        """
+        skipped = True
+        while skipped:
+            skipped = False
+            for script in script_paths:
+                unmet = [dependency for dependency in self.script_dependencies.get(script, [])
+                         if self.results.get(dependency) in (self.STATE_INVALID, self.STATE_FAILED)]
+                if unmet and self.results[script] == self.STATE_QUEUED:
+                    print(f"{script} renders after {unmet[0]}, which can not render, skipping it")
+                    self.handle_render_update(script, self.ERROR_DEPENDENCY_FAILED, 0.0)
+                    skipped = True
+        return [script for script in script_paths if self.results[script] == self.STATE_QUEUED]
+
+
+    def start_estimate(self, script_paths):
+        """
+            Starts estimating when the scripts will be done, from the resource history as it was last saved.
+
+            Args:
+                script_paths (list): The scripts about to render, in queue order.
+        """
+        history = ResourceHistory(self.settings.resource_history_filepath)
+        history.load()
+        workers = 1 if self.settings.render_nuke_open else self.settings.render_workers
+        chunk_size = 0 if self.settings.render_nuke_open else self.settings.chunk_size
+        self.estimator = RenderEstimator(history, workers, chunk_size)
+        self.estimator.start(script_paths, self.script_cache)
+
+
+    def submit_to_daemon(self, client, script_paths, priority = 0, force_render = False, detach = False):
+        """
+            Checks the scripts and hands those that passed to the render daemon, then writes the progress lines of
+            their jobs until they have all finished. Ctrl+C stops following them, the daemon carries on rendering.
+
+            Args:
+                client (DaemonClient): The client to talk to the daemon with.
+                script_paths (list): The paths of the scripts to render.
+                priority (int, optional): The priority of the jobs, higher renders first. Defaults to 0.
+                force_render (bool, optional): Render every frame of every script. Defaults to False.
+                detach (bool, optional): Return as soon as the scripts are handed over. Defaults to False.
+
+            Returns:
+                int: The exit code for the process.
+
+            Raises:
+                ConnectionError: If the daemon could not be started or reached.
+                RuntimeError: If the daemon turned the scripts down.
+        """
+        self.results = {script: self.STATE_QUEUED for script in script_paths}
+        self.send_event("queued", scripts=script_paths, write_node=self.settings.write_node_name)
+        try:
+            scripts_to_render = self.skip_unmet_dependencies(self.validate_scripts(script_paths))
+        finally:
+            self.validator.input_scanner.shutdown()
+            self.script_cache.save()
+        if not scripts_to_render:
+            return self.send_done()
+
+        if not client.start_daemon():
+            raise ConnectionError(f"The render daemon did not start, see {self.settings.daemon_log_filepath}")
+        #subscribed before submitting, so no event of the new jobs is missed
+        events = None if detach else client.subscribe()
+        job_ids = client.submit(scripts_to_render, self.settings.write_node_name, priority, force_render,
+                                self.script_priorities, self.script_dependencies)
+        self.send_event("submitted", job_ids=job_ids, scripts=scripts_to_render, priority=priority)
+        if detach:
+            return self.EXIT_INVALID_SCRIPTS if self.STATE_INVALID in self.results.values() else self.EXIT_OK
+        self.start_estimate(scripts_to_render)
+
+        jobs = dict(zip(job_ids, scripts_to_render))
+        try:
+            for event in events:
+                if event.get("event") == "shutdown":
+                    break
+                script = jobs.get(event.get("job_id"))
+                if script is None:
+                    continue
+                if event["event"] == "progress":
+                    self.handle_frame_progress(script, event["frames_done"], event["frames_total"], event["fps"])
+                elif event["event"] == "cached":
+                    del jobs[event["job_id"]]
+                    self.handle_script_cached(script)
+                elif event["event"] == "script_done":
+                    del jobs[event["job_id"]]
+                    self.handle_render_update(script, event["exit_code"], event["elapsed_time"])
+                elif event["event"] == "cancelled":
+                    del jobs[event["job_id"]]
+                if not jobs:
+                    break
+        except KeyboardInterrupt:
+            self.cancelled = True
+            self.send_event("detached", job_ids=list(jobs))
+        finally:
+            client.stop_listening()
+        return self.send_done()
+
+
+    def send_done(self):
+        """
+            Writes the "done" line with the number of scripts in each state.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        exit_code = self.get_exit_code()
+        counts = {state: list(self.results.values()).count(state) for state in
+                  (self.STATE_RENDERED, self.STATE_CACHED, self.STATE_FAILED, self.STATE_INVALID, self.STATE_QUEUED)}
+        self.send_event("done", rendered=counts[self.STATE_RENDERED], cached=counts[self.STATE_CACHED],
+                        failed=counts[self.STATE_FAILED], invalid=counts[self.STATE_INVALID],
+                        not_rendered=counts[self.STATE_QUEUED], cancelled=self.cancelled, exit_code=exit_code)
+        return exit_code
+
+
+    def validate_scripts(self, script_paths):
+        """
+            Checks every script in a pool of threads, writing a line for each as it is checked.
+
+            Args:
+                script_paths (list): The paths of the scripts to check.
+
+            Returns:
+                list: The scripts that passed, in the order they were given.
+        """
+        #a script reading what another script writes renders after it, so those frames do not have to be there yet
+        queued_outputs = {}
+        if self.settings.infer_dependencies == True:
+            queued_outputs = self.validator.get_queued_outputs(script_paths, self.settings.write_node_name)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.settings.validation_workers) as executor:
+            futures = {executor.submit(self.validator.validate, script, self.settings.write_node_name, queued_outputs):
+                       script for script in script_paths}
+            for future in concurrent.futures.as_completed(futures):
+                script = futures[future]
+                result = future.result()
+                self.send_event("validated", script=script, status=result["status"],
+                                errors=result["errors"], warnings=result["warnings"])
+                if result["status"] == ScriptValidator.STATUS_ERROR:
+                    self.results[script] = self.STATE_INVALID
+                #kept as dependencies, so the script is skipped if a script writing what it reads can not render
+                for read_key in result["queued_reads"]:
+                    writers = sorted(queued_outputs[read_key] - {script})
+                    self.script_dependencies[script] = list(dict.fromkeys(self.script_dependencies.get(script, [])
+                                                                          + writers))
+        return [script for script in script_paths if self.results[script] == self.STATE_QUEUED]
+
+
+    def render_scripts(self, script_paths, force_render = False):
+        """
+            Renders the scripts with SeparateThread in a thread of its own, waiting until they are done.
+
+            Args:
+                script_paths (list): The paths of the scripts to render.
+                force_render (bool, optional): Render every frame of every script. Defaults to False.
+        """
+        #imported here so checking a queue never has to load the render engine
+        from SeparateThread import SeparateThread
+
+        self.settings.remove_temp_files()
+        self.render_thread = QThread()
+        self.render_worker = SeparateThread(self.script_cache, self.render_cache, self.settings)
+        self.render_worker.script_priorities = self.script_priorities
+        self.render_worker.script_dependencies = self.script_dependencies
+        self.render_worker.moveToThread(self.render_thread)
+        if self.settings.render_nuke_open:
+            self.render_thread.started.connect(lambda: self.render_worker.render_script_list(script_paths, force_render))
+        else:
+            self.render_thread.started.connect(lambda: self.render_worker.render_list(script_paths, force_render))
+        #handled in the render thread as they happen, so every line is written before `render_done` stops the wait
+        self.render_worker.script_cached.connect(self.handle_script_cached, Qt.DirectConnection)
+        self.render_worker.frame_progress.connect(self.handle_frame_progress, Qt.DirectConnection)
+        self.render_worker.render_script_update.connect(self.handle_render_update, Qt.DirectConnection)
+        self.render_worker.render_done.connect(self.handle_render_finish)
+        self.render_worker.render_cancelled.connect(self.handle_render_finish)
+
+        self.event_loop = QEventLoop()
+        self.render_thread.start()
+        self.event_loop.exec()
+        self.render_thread.quit()
+        self.render_thread.wait()
+
+
+    def handle_script_cached(self, script):
+        """
+            Args:
+                script (str): The script skipped as unchanged.
+        """
+        self.results[script] = self.STATE_CACHED
+        if self.estimator is not None:
+            self.estimator.script_done(script)
+        self.send_event("cached", script=script)
+
+
+    def handle_frame_progress(self, script, frames_done, frames_total, fps):
+        """
+            Writes a progress line for a script, at most once every `PROGRESS_INTERVAL` seconds and always for its
+            last frame.
+
+            Args:
+                script (str): The script being rendered.
+                frames_done (int): The frames written so far.
+                frames_total (int): The frames to render, 0 if not known.
+                fps (float): The frames written per second.
+        """
+        if self.estimator is not None:
+            self.estimator.frame_progress(script, frames_done, frames_total, fps)
+        now = time.time()
+        if now - self.last_progress_times.get(script, 0) < self.PROGRESS_INTERVAL and frames_done != frames_total:
+            return
+        self.last_progress_times[script] = now
+        info = {"script": script, "frames_done": frames_done, "frames_total": frames_total, "fps": round(fps, 2)}
+        estimate = self.estimator.estimate() if self.estimator is not None else None
+        if estimate is not None:
+            info["eta"] = round(estimate[0], 1)
+            info["eta_range"] = [round(estimate[1], 1), round(estimate[2], 1)]
+        self.send_event("progress", **info)
+
+
+    def handle_render_update(self, script, exit_code, elapsed_time):
+        """
+            Args:
+                script (str): The script that finished rendering.
+                exit_code (int): The exit code of the render.
+                elapsed_time (float): How long the script took to render, in seconds.
+        """
+        #any exit code but 0 is a failure here, not only the ones BNRQ has a message for
+        failed = exit_code != 0
+        self.results[script] = self.STATE_FAILED if failed else self.STATE_RENDERED
+        if self.estimator is not None:
+            self.estimator.script_done(script, None if failed else elapsed_time)
+        info = {"script": script, "exit_code": exit_code, "elapsed_time": round(elapsed_time, 3)}
+        if self.error_obj.check_error_codes(exit_code):
+            info["message"] = self.error_obj.get_error_message(exit_code, script)
+        elif failed:
+            info["message"] = f"Nuke exited with {exit_code}"
+        self.send_event("script_done", **info)
+
+
+    def handle_render_finish(self):
+        """
+            Stops waiting on the render once it is done or cancelled.
+        """
+        if self.event_loop is not None:
+            self.event_loop.quit()
+
+
+    def cancel(self):
+        """
+            Stops the render, killing the Nuke processes that are running.
+        """
+        self.cancelled = True
+        if self.render_worker is not None:
+            self.render_worker.stop()
+
+
+    def get_exit_code(self):
+        """
+            Returns:
+                int: The exit code summing up the results, see the class description.
+        """
+        states = set(self.results.values())
+        if self.cancelled:
+            return self.EXIT_CANCELLED
+        if self.STATE_FAILED in states or self.STATE_QUEUED in states:
+            return self.EXIT_RENDER_FAILED
+        if self.STATE_INVALID in states:
+            return self.EXIT_INVALID_SCRIPTS
+        return self.EXIT_OK
+
+
+    def send_event(self, event_type, **info):
+        """
+            Writes a progress line: a json object with the "event" type, the "time" and the rest of the info.
+
+            Args:
+                event_type (str): The type of event.
+                **info: The rest of the event, such as the script path.
+        """
+        event = {"event": event_type, "time": round(time.time(), 3)}
+        event.update(info)
+        with self.output_lock:
+            self.output.write(json.dumps(event) + "\n")
+            self.output.flush()
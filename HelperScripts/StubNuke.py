@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+A stand-in for the Nuke executable, used to run BNRQ without Nuke (or a Nuke license) installed.
+
+Point the Nuke executable setting at this file and BNRQ will run its render scripts through it. It takes the
+same command line as Nuke (`-t`, `-ti`, `-V <level>`, then the python script and its arguments) and runs the
+python script with a fake `nuke` module. The fake module reads node names, the Root frame range and Write node
+file paths out of the .nk file, and "renders" by writing a small file for every frame. Like Nuke, the lines
+it prints for each frame written are only printed in verbose mode, `-V` with a level of 1 or more (`-V` on its own
+is level 1).
+
+Environment variables:
+    STUB_NUKE_FRAME_TIME: Seconds to sleep for each frame, defaults to 0.01.
+    STUB_NUKE_FAIL_FRAME: A frame number that fails to render, raising a RuntimeError like a render error.
+    STUB_NUKE_NO_OUTPUT: Set to 1 to skip writing the frame files.
+"""
+import os
+import re
+import sys
+import time
+import types
+import runpy
+
+
+class StubNode():
+    """
+        A node read out of a .nk file. Only the knobs the render scripts use are supported.
+    """
+
+    def __init__(self, node_class, knobs):
+        self.node_class = node_class
+        self.knobs = knobs
+
+    def Class(self):
+        return self.node_class
+
+    def name(self):
+        return self.knobs.get("name", "")
+
+    def knob(self, name):
+        return StubKnob(self.knobs.get(name))
+
+    def __getitem__(self, name):
+        return self.knob(name)
+
+    def firstFrame(self):
+        return int(self.knobs.get("first_frame", 1))
+
+    def lastFrame(self):
+        return int(self.knobs.get("last_frame", 100))
+
+
+class StubKnob():
+    def __init__(self, value):
+        self.value_ = value
+
+    def value(self):
+        return self.value_
+
+    def getValue(self):
+        return self.value_
+
+    def evaluate(self):
+        return self.value_
+
+
+class StubNuke():
+    """
+        The state behind the fake `nuke` module: the open script and its nodes.
+    """
+
+    def __init__(self, verbosity = 0):
+        self.root_node = StubNode("Root", {})
+        self.nodes = {}
+        self.current_frame = 1
+        self.verbosity = verbosity
+
+    def scriptOpen(self, path):
+        if not os.path.isfile(path):
+            raise RuntimeError(f"{path}: No such file or directory")
+        self.root_node = StubNode("Root", {"name": path})
+        self.nodes = {}
+        node_class = None
+        knobs = {}
+        depth = 0
+        with open(path, "r") as script:
+            for line in script:
+                stripped = line.strip()
+                match = re.match(r"^(\w+)\s*\{\s*$", stripped)
+                if match and depth == 0:
+                    node_class = match.group(1)
+                    knobs = {}
+                    depth = 1
+                    continue
+                if depth == 0:
+                    continue
+                depth += stripped.count("{") - stripped.count("}")
+                if depth <= 0:
+                    depth = 0
+                    if node_class == "Root":
+                        knobs.setdefault("name", path)
+                        self.root_node = StubNode("Root", knobs)
+                    elif "name" in knobs:
+                        self.nodes[knobs["name"]] = StubNode(node_class, knobs)
+                    continue
+                parts = stripped.split(None, 1)
+                if depth == 1 and len(parts) == 2:
+                    knobs[parts[0]] = parts[1].strip('"')
+
+    def scriptClose(self, *args):
+        self.root_node = StubNode("Root", {})
+        self.nodes = {}
+
+    def root(self):
+        return self.root_node
+
+    def Root(self):
+        return self.root_node
+
+    def toNode(self, name):
+        return self.nodes.get(name)
+
+    def allNodes(self, node_class = None):
+        return [node for node in self.nodes.values() if node_class is None or node.Class() == node_class]
+
+    def frame(self):
+        return self.current_frame
+
+    def execute(self, node, start = None, end = None, incr = 1, *args, **kwargs):
+        if start is None:
+            start = self.root_node.firstFrame()
+        if end is None:
+            end = self.root_node.lastFrame()
+        frame_time = float(os.environ.get("STUB_NUKE_FRAME_TIME", "0.01"))
+        fail_frame = os.environ.get("STUB_NUKE_FAIL_FRAME")
+        pattern = node.knobs.get("file", "")
+        total = len(range(start, end + 1, incr))
+        for count, frame in enumerate(range(start, end + 1, incr)):
+            self.current_frame = frame
+            frame_start = time.time()
+            time.sleep(frame_time)
+            if fail_frame is not None and int(fail_frame) == frame:
+                raise RuntimeError(f"{node.name()}: Render failed on frame {frame}")
+            output = self.frame_path(pattern, frame)
+            if output and os.environ.get("STUB_NUKE_NO_OUTPUT") != "1":
+                os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+                with open(output, "w") as frame_file:
+                    frame_file.write(f"frame {frame}\n")
+            if self.verbosity >= 1:
+                print(f"Frame {frame} ({count + 1} of {total})")
+                print(f"Writing {output} took {time.time() - frame_start:.2f} seconds")
+                sys.stdout.flush()
+
+    def frame_path(self, pattern, frame):
+        pattern = re.sub(r"%0?(\d*)d", lambda match: str(frame).zfill(int(match.group(1) or 0)), pattern)
+        return re.sub(r"#+", lambda match: str(frame).zfill(len(match.group(0))), pattern)
+
+
+def make_nuke_module(verbosity = 0):
+    """
+    Builds the fake `nuke` module out of a StubNuke object.
+    """
+    stub = StubNuke(verbosity)
+    module = types.ModuleType("nuke")
+    for name in ("scriptOpen", "scriptClose", "root", "Root", "toNode", "allNodes", "frame", "execute"):
+        setattr(module, name, getattr(stub, name))
+    module.env = {"NukeVersionString": "0.0v0-stub"}
+    module.NUKE_VERSION_STRING = "0.0v0"
+    return module
+
+
+def main():
+    args = sys.argv[1:]
+    verbosity = 0
+    while args and args[0].startswith("-"):
+        flag = args.pop(0)
+        if flag == "-V":
+            verbosity = int(args.pop(0)) if args and args[0].isdigit() else 1
+    if not args:
+        print("StubNuke: no python script given")
+        sys.exit(1)
+
+    sys.modules["nuke"] = make_nuke_module(verbosity)
+    script = os.path.abspath(args[0])
+    sys.argv = [script] + args[1:]
+    sys.path.insert(0, os.path.dirname(script))
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
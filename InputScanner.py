@@ -0,0 +1,204 @@
+import os
+import re
+import concurrent.futures
+
+
+class InputScanner():
+    """
+        Finds the frames the Read nodes of a script need that are missing or empty on disk.
+
+        Checking a frame at a time means a stat per frame, which over NFS is a round trip per frame. Instead each
+        folder is listed once with os.scandir and the frame file names are looked up in that listing. Only the
+        files that are needed are stat-ed for their size, and on Windows scandir already has the size so none are.
+        Folders are listed in a pool of threads, as on a high latency drive most of the time is spent waiting.
+
+        File names can use Nuke's padding (`plate.####.exr`) or printf padding (`plate.%04d.exr`). A file name with
+        neither is a single file and only has to exist.
+
+        Attributes:
+            executor (ThreadPoolExecutor): The threads the folders are listed in.
+
+        Methods:
+            __init__(max_workers): Initializes the InputScanner object.
+            scan_reads(reads, frame_range, base_directory): Checks the frames of every Read node.
+            list_directory(directory): Lists a folder into a dict of file names.
+            check_read(read, frame_range, listing): Finds the missing and empty frames of one Read node's sequence.
+            get_needed_frames(read, frame_range): Returns the frames of a Read node the render uses.
+            get_frame_name(basename, frame): Fills in the padding of a file name with a frame number.
+            get_file_size(entry): Returns the size of a listed file.
+            format_frames(frames): Writes a list of frames as short ranges.
+            shutdown(): Stops the pool's threads.
+    """
+
+    PADDING_PATTERN = re.compile(r"#+|%0?(\d*)d")
+
+
+    def __init__(self, max_workers = 16):
+        """
+            Initialization method.
+
+            Args:
+                max_workers (int, optional): The most folders to list at once. Defaults to 16.
+        """
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                                              thread_name_prefix="BNRQInputScan")
+
+
+    def scan_reads(self, reads, frame_range, base_directory):
+        """
+            Checks the frames every Read node needs are on disk, listing each folder once.
+
+            Args:
+                reads (list): The Read nodes from the script cache, each a dict of "name", "file", "first" and "last".
+                frame_range (tuple): The (first_frame, last_frame) of the script.
+                base_directory (str): The folder relative file paths are taken from, the folder of the script.
+
+            Returns:
+                list: A dict for each Read node checked, holding its "name", "directory", the "missing" and "empty"
+                    frames found (lists of frame numbers) and an "error" for a folder or single file that is missing
+                    or empty (None if there is no such problem).
+        """
+        read_directories = []
+        for read in reads:
+            directory = os.path.dirname(read["file"])
+            if not os.path.isabs(directory):
+                directory = os.path.join(base_directory, directory)
+            read_directories.append((read, os.path.normpath(directory)))
+
+        directories = list(dict.fromkeys(directory for _, directory in read_directories))
+        listings = dict(zip(directories, self.executor.map(self.list_directory, directories)))
+
+        results = []
+        for read, directory in read_directories:
+            result = {"name": read["name"], "directory": directory, "missing": [], "empty": [], "error": None}
+            basename = os.path.basename(read["file"])
+            if listings[directory] is None:
+                result["error"] = f"{read['name']} reads from {directory}, which does not exist"
+            elif self.PADDING_PATTERN.search(basename):
+                result["missing"], result["empty"] = self.check_read(read, frame_range, listings[directory])
+            elif basename not in listings[directory]:
+                result["error"] = f"{read['name']} reads {basename}, which does not exist"
+            elif self.get_file_size(listings[directory][basename]) == 0:
+                result["error"] = f"{read['name']} reads {basename}, which is empty"
+            results.append(result)
+        return results
+
+
+    def list_directory(self, directory):
+        """
+            Lists a folder in one go.
+
+            Args:
+                directory (str): The folder to list.
+
+            Returns:
+                dict: The os.DirEntry of each file, by file name. None if the folder could not be listed.
+        """
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name: entry for entry in entries}
+        except OSError:
+            return None
+
+
+    def check_read(self, read, frame_range, listing):
+        """
+            Finds the frames of a Read node's sequence that are not in the folder listing or are empty.
+
+            Args:
+                read (dict): The Read node from the script cache.
+                frame_range (tuple): The (first_frame, last_frame) of the script.
+                listing (dict): The listing of the folder the Read node reads from.
+
+            Returns:
+                tuple: The missing frames and the empty frames, each a list of frame numbers.
+        """
+        basename = os.path.basename(read["file"])
+        missing = []
+        empty = []
+        for frame in self.get_needed_frames(read, frame_range):
+            entry = listing.get(self.get_frame_name(basename, frame))
+            if entry is None:
+                missing.append(frame)
+            elif self.get_file_size(entry) == 0:
+                empty.append(frame)
+        return missing, empty
+
+
+    def get_needed_frames(self, read, frame_range):
+        """
+            Works out which frames of a Read node the render uses: its own range cut down to the script's. Frames
+            outside the Read node's range are held by Nuke rather than read, so are not needed.
+
+            Args:
+                read (dict): The Read node from the script cache.
+                frame_range (tuple): The (first_frame, last_frame) of the script.
+
+            Returns:
+                range: The frames needed, all of the Read node's range if it is entirely outside the script's.
+        """
+        first_frame = max(read["first"], frame_range[0])
+        last_frame = min(read["last"], frame_range[1])
+        if last_frame < first_frame:
+            return range(read["first"], read["last"] + 1)
+        return range(first_frame, last_frame + 1)
+
+
+    def get_frame_name(self, basename, frame):
+        """
+            Args:
+                basename (str): The file name with padding, such as "plate.####.exr" or "plate.%04d.exr".
+                frame (int): The frame number.
+
+            Returns:
+                str: The file name of the frame, such as "plate.1001.exr".
+        """
+        def pad(match):
+            width = len(match.group(0)) if match.group(0).startswith("#") else int(match.group(1) or 0)
+            return str(frame).zfill(width)
+        return self.PADDING_PATTERN.sub(pad, basename)
+
+
+    def get_file_size(self, entry):
+        """
+            Args:
+                entry (os.DirEntry): The listed file.
+
+            Returns:
+                int: The size of the file, None if it could not be read.
+        """
+        try:
+            return entry.stat().st_size
+        except OSError:
+            return None
+
+
+    @staticmethod
+    def format_frames(frames, max_ranges = 5):
+        """
+            Writes a list of frames as short ranges, such as "1001-1010, 1050".
+
+            Args:
+                frames (list): The frame numbers, in order.
+                max_ranges (int, optional): The most ranges to write before cutting the text short. Defaults to 5.
+
+            Returns:
+                str: The frames as ranges.
+        """
+        ranges = []
+        for frame in frames:
+            if ranges and frame == ranges[-1][1] + 1:
+                ranges[-1][1] = frame
+            else:
+                ranges.append([frame, frame])
+        text = ", ".join(f"{first}-{last}" if first != last else f"{first}" for first, last in ranges[:max_ranges])
+        if len(ranges) > max_ranges:
+            text += f" and {len(ranges) - max_ranges} more"
+        return text
+
+
+    def shutdown(self):
+        """
+            Stops the pool's threads once the listings already running have finished.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,321 @@
+import os
+import heapq
+import threading
+
+from InputScanner import InputScanner
+
+
+class JobScheduler():
+    """
+        Decides the order the jobs of a render list are started in, from the priority of each script and the scripts
+        it depends on.
+
+        A script can depend on other scripts of the list explicitly, and when `infer` is on a script that reads the
+        files another script's write node writes depends on that script too, so precomps render before the comps that
+        read them. A script's jobs are only ready to start once every script it depends on has rendered. Dependencies
+        on scripts that are not in the list, such as scripts skipped as up to date, are taken to be met.
+
+        Jobs are started highest priority first, then in queue order, with the jobs of the same priority that render
+        with the same Nuke executable kept together from the first of them. Scripts saved with different Nuke
+        versions can render with different executables, and starting them in batches lets the persistent Nuke
+        workers go on from job to job rather than restarting for another version. A script that others depend on is
+        given the highest priority of those that wait on it, so a high priority comp does not sit behind the low
+        priority precomp it needs. The render pool starts the first job that is ready rather than waiting on the
+        first job in line, so the workers are kept busy while a script waits on its dependencies.
+
+        Scripts whose dependencies loop back to them can never be ready. They are found when the list is set, and are
+        failed along with every script waiting on them. A script that fails fails the scripts waiting on it too.
+
+        Attributes:
+            script_cache (ScriptMetadataCache): The cache of parsed script details, used to infer dependencies.
+            scripts (list): The scripts of the list, in queue order.
+            priorities (dict): The priority of each script, by its place in the queue, raised to that of the
+                scripts waiting on it.
+            dependencies (dict): The places in the queue each script waits on, by its place in the queue.
+            dependents (dict): The places in the queue waiting on each script, by its place in the queue.
+            done (set): The places in the queue of the scripts that have rendered.
+            lock (threading.Lock): Guards the scripts done, as they are changed from other threads.
+
+        Methods:
+            __init__(script_cache): Initializes the JobScheduler object.
+            set_queue(scripts, write_node_name, priorities, dependencies, infer): Works out the order of a render list.
+            infer_dependencies(write_node_name): Finds the scripts that read what other scripts write.
+            get_file_key(file_path, base_directory): Returns a file path in a form that can be compared.
+            find_cycles(): Returns the scripts whose dependencies can never be met.
+            describe_cycle(queue_index, blocked): Returns the scripts of one loop, for printing.
+            raise_priorities(): Gives each script the highest priority of the scripts waiting on it.
+            sort_jobs(jobs): Sorts jobs into the order they should start in, batched by Nuke executable.
+            get_script_order(): Returns the scripts in an order that renders each after those it waits on.
+            is_ready(job): Returns whether a job's dependencies have rendered.
+            script_done(queue_index): Marks a script as rendered.
+            script_failed(queue_index): Returns the scripts that can no longer render as a script failed.
+    """
+
+    def __init__(self, script_cache = None):
+        """
+            Initialization method.
+
+            Args:
+                script_cache (ScriptMetadataCache, optional): The cache of parsed script details. Dependencies are
+                    only inferred when there is one. Defaults to None.
+        """
+        self.script_cache = script_cache
+        self.scripts = []
+        self.priorities = {}
+        self.dependencies = {}
+        self.dependents = {}
+        self.done = set()
+        self.lock = threading.Lock()
+
+
+    def set_queue(self, scripts, write_node_name, priorities = None, dependencies = None, infer = True):
+        """
+            Works out the dependencies and priorities of a render list.
+
+            Args:
+                scripts (list): The scripts to render, in queue order.
+                write_node_name (str): The write node the scripts are rendered with.
+                priorities (dict, optional): The priority of scripts, by script path. Higher renders first, scripts
+                    not in it have a priority of 0. Defaults to None.
+                dependencies (dict, optional): The script paths each script has to wait for, by script path.
+                    Defaults to None.
+                infer (bool, optional): Also wait for the scripts that write the files a script reads. Defaults to True.
+
+            Returns:
+                dict: The scripts that can never render as their dependencies loop back to them, by their place in
+                    the queue, each with a description of the loop. Empty if there are none.
+        """
+        priorities = priorities or {}
+        dependencies = dependencies or {}
+        self.scripts = list(scripts)
+        self.done = set()
+        queue_indexes = {}
+        for queue_index, script in enumerate(self.scripts):
+            queue_indexes.setdefault(os.path.normcase(os.path.normpath(script)), []).append(queue_index)
+
+        self.dependencies = {queue_index: set() for queue_index in range(len(self.scripts))}
+        for queue_index, script in enumerate(self.scripts):
+            for dependency in dependencies.get(script, []):
+                for dependency_index in queue_indexes.get(os.path.normcase(os.path.normpath(dependency)), []):
+                    if dependency_index != queue_index:
+                        self.dependencies[queue_index].add(dependency_index)
+        if infer and self.script_cache is not None:
+            for queue_index, dependency_indexes in self.infer_dependencies(write_node_name).items():
+                self.dependencies[queue_index].update(dependency_indexes)
+
+        self.dependents = {queue_index: set() for queue_index in range(len(self.scripts))}
+        for queue_index, dependency_indexes in self.dependencies.items():
+            for dependency_index in dependency_indexes:
+                self.dependents[dependency_index].add(queue_index)
+
+        self.priorities = {queue_index: int(priorities.get(script, 0)) for queue_index, script in enumerate(self.scripts)}
+        blocked = self.find_cycles()
+        self.raise_priorities()
+        return {queue_index: self.describe_cycle(queue_index, blocked) for queue_index in blocked}
+
+
+    def infer_dependencies(self, write_node_name):
+        """
+            Finds the scripts of the list that read the files another script of the list writes. Scripts that can not
+            be read, and output paths with an expression in them, are left out.
+
+            Args:
+                write_node_name (str): The write node the scripts are rendered with.
+
+            Returns:
+                dict: The places in the queue each script reads from, by its place in the queue.
+        """
+        writers = {}
+        reads = {}
+        for queue_index, script in enumerate(self.scripts):
+            try:
+                metadata = self.script_cache.get(script)
+            except OSError:
+                continue
+            base_directory = os.path.dirname(script)
+            write_knobs = metadata["write_nodes"].get(write_node_name)
+            if write_knobs:
+                output_key = self.get_file_key(write_knobs.get("file"), base_directory)
+                if output_key is not None:
+                    writers.setdefault(output_key, []).append(queue_index)
+            reads[queue_index] = {self.get_file_key(read["file"], base_directory) for read in metadata["reads"]}
+
+        dependencies = {}
+        for queue_index, read_keys in reads.items():
+            for read_key in read_keys:
+                for writer_index in writers.get(read_key, []):
+                    #a script reading back its own output is not waiting on anything
+                    if writer_index != queue_index:
+                        dependencies.setdefault(queue_index, set()).add(writer_index)
+        return dependencies
+
+
+    @staticmethod
+    def get_file_key(file_path, base_directory):
+        """
+            Puts a file path into a form that is the same for every way of writing it: absolute, with the case and
+            separators of the system, and the frame padding written as printf padding, so `plate.####.exr` and
+            `plate.%04d.exr` match.
+
+            Args:
+                file_path (str): The file knob of a Read or Write node.
+                base_directory (str): The folder relative paths are taken from, the folder of the script.
+
+            Returns:
+                str: The key of the path, None if it is empty or holds an expression that can not be worked out here.
+        """
+        if not file_path or "[" in file_path:
+            return None
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(base_directory, file_path)
+        file_path = os.path.normcase(os.path.normpath(file_path))
+
+        def pad(match):
+            if match.group(0).startswith("#"):
+                width = len(match.group(0))
+            else:
+                width = int(match.group(1) or 0)
+            return "%d" if width <= 1 else f"%0{width}d"
+        return InputScanner.PADDING_PATTERN.sub(pad, file_path)
+
+
+    def find_cycles(self):
+        """
+            Finds the scripts that can never be ready: those in a loop of dependencies, and those waiting on one. The
+            scripts that can be ready are taken off one at a time, each once everything it waits on has been taken
+            off, and whatever is left is blocked.
+
+            Returns:
+                set: The places in the queue of the blocked scripts.
+        """
+        waiting_counts = {queue_index: len(dependency_indexes)
+                          for queue_index, dependency_indexes in self.dependencies.items()}
+        ready = [queue_index for queue_index, waiting_count in waiting_counts.items() if waiting_count == 0]
+        while ready:
+            queue_index = ready.pop()
+            for dependent_index in self.dependents[queue_index]:
+                waiting_counts[dependent_index] -= 1
+                if waiting_counts[dependent_index] == 0:
+                    ready.append(dependent_index)
+        return {queue_index for queue_index, waiting_count in waiting_counts.items() if waiting_count > 0}
+
+
+    def describe_cycle(self, queue_index, blocked):
+        """
+            Follows the blocked dependencies of a script until one comes round again.
+
+            Args:
+                queue_index (int): The place in the queue of a blocked script.
+                blocked (set): The places in the queue of every blocked script.
+
+            Returns:
+                str: The scripts of the loop, such as "a.nk -> b.nk -> a.nk".
+        """
+        path = [queue_index]
+        while True:
+            queue_index = min(self.dependencies[queue_index] & blocked)
+            if queue_index in path:
+                path = path[path.index(queue_index):] + [queue_index]
+                return " -> ".join(os.path.basename(self.scripts[index]) for index in path)
+            path.append(queue_index)
+
+
+    def raise_priorities(self):
+        """
+            Gives each script the highest priority of the scripts that wait on it, directly or further down. A
+            priority is only ever raised to one already in the list, so this ends even with loops.
+        """
+        changed = True
+        while changed:
+            changed = False
+            for queue_index, dependent_indexes in self.dependents.items():
+                highest = max((self.priorities[index] for index in dependent_indexes), default=None)
+                if highest is not None and highest > self.priorities[queue_index]:
+                    self.priorities[queue_index] = highest
+                    changed = True
+
+
+    def sort_jobs(self, jobs):
+        """
+            Args:
+                jobs (list): The jobs of the list, each with its `queue_index` and `nuke_exe` set.
+
+            Returns:
+                list: The jobs, highest priority first, then in queue order. Among jobs of the same priority, those
+                    with the same Nuke executable follow on from the first of them. The chunks of a script keep their
+                    order.
+        """
+        batch_starts = {}
+        for job in jobs:
+            batch = (self.priorities.get(job.queue_index, 0), job.nuke_exe)
+            batch_starts[batch] = min(batch_starts.get(batch, job.queue_index), job.queue_index)
+
+        def get_order(job):
+            priority = self.priorities.get(job.queue_index, 0)
+            return -priority, batch_starts[(priority, job.nuke_exe)], job.queue_index
+        return sorted(jobs, key=get_order)
+
+
+    def get_script_order(self):
+        """
+            Puts the scripts in the order they would render in one after another, as they are in a single Nuke
+            instance: each after the scripts it waits on, and otherwise highest priority first, then in queue order.
+
+            Returns:
+                list: The places in the queue of the scripts, leaving out those whose dependencies loop.
+        """
+        waiting_counts = {queue_index: len(dependency_indexes)
+                          for queue_index, dependency_indexes in self.dependencies.items()}
+        ready = [(-self.priorities[queue_index], queue_index)
+                 for queue_index, waiting_count in waiting_counts.items() if waiting_count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, queue_index = heapq.heappop(ready)
+            order.append(queue_index)
+            for dependent_index in self.dependents[queue_index]:
+                waiting_counts[dependent_index] -= 1
+                if waiting_counts[dependent_index] == 0:
+                    heapq.heappush(ready, (-self.priorities[dependent_index], dependent_index))
+        return order
+
+
+    def is_ready(self, job):
+        """
+            Args:
+                job (RenderJob): A job waiting to start.
+
+            Returns:
+                bool: True if every script the job's script waits on has rendered.
+        """
+        with self.lock:
+            return self.dependencies.get(job.queue_index, set()) <= self.done
+
+
+    def script_done(self, queue_index):
+        """
+            Marks a script as rendered, so the scripts waiting on it can start.
+
+            Args:
+                queue_index (int): The place in the queue of the script.
+        """
+        with self.lock:
+            self.done.add(queue_index)
+
+
+    def script_failed(self, queue_index):
+        """
+            Args:
+                queue_index (int): The place in the queue of a script that failed or was cancelled.
+
+            Returns:
+                list: The places in the queue of the scripts waiting on it, directly or further down, in queue order.
+        """
+        failed = set()
+        waiting = [queue_index]
+        while waiting:
+            for dependent_index in self.dependents.get(waiting.pop(), set()):
+                if dependent_index not in failed:
+                    failed.add(dependent_index)
+                    waiting.append(dependent_index)
+        return sorted(failed)
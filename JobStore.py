@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class JobStore():
+    """
+        Keeps the render queue in a SQLite database so it survives BNRQ closing, crashing or the machine restarting.
+
+        Every queued script is a job row holding its state, its place in the queue, the frames it has rendered and
+        the exit code of its last render. The database is in WAL mode, so each change is a small append to the log
+        that is safe the moment the transaction commits, and reading the queue never waits on a write.
+
+        Jobs move from queued to running when a render starts, and from running to done or failed when it ends, or
+        to cancelled if they are called off. A job still marked running when BNRQ starts again was cut off part way
+        through, `recover` puts it back in the queue so it is rendered again (only its missing frames, when
+        incremental rendering is on). Waiting jobs are rendered highest priority first, then in the order they were
+        added. A job can list the scripts it has to render after, kept as json in its `depends_on` column.
+
+        Finished jobs are kept for `max_age_days` so there is a record of them, then dropped.
+
+        Attributes:
+            db_filepath (str): The path of the database, ":memory:" to keep it in memory only.
+            connection (sqlite3.Connection): The open database.
+            lock (threading.Lock): Guards the connection, which may be shared with other threads.
+            max_age_days (float): How long finished jobs are kept for, in days.
+            last_progress_times (dict): When the frame progress of each job was last written.
+
+        Methods:
+            __init__(db_filepath, max_age_days): Opens the database, creating it if needed.
+            create_tables(): Creates the jobs table if it is not there.
+            add_jobs(script_paths, write_node_name, priority, force_render, priorities, dependencies): Adds scripts to the end of the queue in one transaction.
+            get_jobs(states, job_ids): Returns the jobs, in queue order.
+            get_queued_scripts(): Returns the scripts of the jobs waiting or cut off, in queue order.
+            set_script_state(script_path, state, from_states, exit_code): Moves the first matching job of a script to a new state.
+            set_states(from_states, state): Moves every job in some states to a new state.
+            set_job_state(job_ids, state, from_states, exit_code): Moves jobs, by id, to a new state.
+            set_priority(job_ids, priority): Changes the priority of jobs.
+            update_progress(script_path, frames_done, frames_total, min_interval): Records the frames a running job has written.
+            remove_script(script_path): Removes the first waiting job of a script.
+            clear_queue(): Removes every waiting and running job.
+            recover(): Puts jobs cut off by a crash back in the queue.
+            prune(): Drops finished jobs older than `max_age_days`.
+            close(): Closes the database.
+    """
+
+    STATE_QUEUED = "queued"
+    STATE_RUNNING = "running"
+    STATE_DONE = "done"
+    STATE_FAILED = "failed"
+    STATE_CANCELLED = "cancelled"
+
+    SCHEMA_VERSION = 3
+
+
+    def __init__(self, db_filepath, max_age_days = 30):
+        """
+            Initialization method. Opens the database, creating it if needed, and drops old finished jobs.
+
+            Args:
+                db_filepath (str): The path of the database, ":memory:" to keep it in memory only.
+                max_age_days (float, optional): How long finished jobs are kept for, in days. Defaults to 30.
+
+            Raises:
+                sqlite3.Error: If the database could not be opened.
+        """
+        self.db_filepath = db_filepath
+        self.max_age_days = max_age_days
+        self.last_progress_times = {}
+        self.lock = threading.Lock()
+        if db_filepath != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_filepath)), exist_ok=True)
+        #transactions are managed here rather than by the sqlite3 module, so a bulk insert is one commit
+        self.connection = sqlite3.connect(db_filepath, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        #in WAL mode a crash can not corrupt the database with this, only a power cut can lose the last commit
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+        self.prune()
+
+
+    def create_tables(self):
+        """
+            Creates the jobs table and its index if they are not there yet.
+        """
+        with self.lock:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    script TEXT NOT NULL,
+                    write_node TEXT,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    position INTEGER NOT NULL,
+                    frames_done INTEGER NOT NULL DEFAULT 0,
+                    frames_total INTEGER NOT NULL DEFAULT 0,
+                    exit_code INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    added REAL NOT NULL,
+                    started REAL,
+                    finished REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_state_position ON jobs (state, position);
+            """)
+            #columns added after the first version of the table
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+            if "priority" not in columns:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            if "force_render" not in columns:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN force_render INTEGER NOT NULL DEFAULT 0")
+            if "depends_on" not in columns:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN depends_on TEXT")
+            self.connection.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+
+    def add_jobs(self, script_paths, write_node_name = None, priority = 0, force_render = False, priorities = None,
+                 dependencies = None):
+        """
+            Adds scripts to the end of the queue. They are all added in a single transaction, so adding thousands
+            of scripts costs one commit.
+
+            Args:
+                script_paths (list): The paths of the scripts to add, in order.
+                write_node_name (str, optional): The write node they will be rendered with. Defaults to None.
+                priority (int, optional): Higher priority jobs are rendered first. Defaults to 0.
+                force_render (bool, optional): Render every frame, even if nothing has changed. Defaults to False.
+                priorities (dict, optional): The priority of scripts that do not take `priority`, by script path.
+                    Defaults to None.
+                dependencies (dict, optional): The script paths each script has to render after, by script path.
+                    Defaults to None.
+
+            Returns:
+                list: The ids of the new jobs, in the same order as the scripts.
+        """
+        if not script_paths:
+            return []
+        priorities = priorities or {}
+        dependencies = dependencies or {}
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                last_position = self.connection.execute("SELECT COALESCE(MAX(position), 0) FROM jobs").fetchone()[0]
+                first_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM jobs").fetchone()[0] + 1
+                self.connection.executemany(
+                    "INSERT INTO jobs (script, write_node, state, position, priority, force_render, depends_on, added) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((script_path, write_node_name, self.STATE_QUEUED, last_position + offset,
+                      priorities.get(script_path, priority), int(force_render),
+                      json.dumps(dependencies[script_path]) if dependencies.get(script_path) else None, now)
+                     for offset, script_path in enumerate(script_paths, 1)))
+                job_ids = [row[0] for row in self.connection.execute(
+                    "SELECT id FROM jobs WHERE id >= ? ORDER BY id", (first_id,))]
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+        return job_ids
+
+
+    def get_jobs(self, states = None, job_ids = None):
+        """
+            Args:
+                states (list, optional): The states of the jobs to return, None for every job. Defaults to None.
+                job_ids (list, optional): The ids of the jobs to return, None for every job. Defaults to None.
+
+            Returns:
+                list: A dict of each job's columns, in queue order: highest priority first, then oldest first.
+        """
+        conditions = []
+        params = []
+        if states is not None:
+            conditions.append(f"state IN ({', '.join('?' for _ in states)})")
+            params.extend(states)
+        if job_ids is not None:
+            conditions.append(f"id IN ({', '.join('?' for _ in job_ids)})")
+            params.extend(job_ids)
+        query = "SELECT * FROM jobs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.lock:
+            return [dict(row) for row in
+                    self.connection.execute(query + " ORDER BY priority DESC, position", params)]
+
+
+    def get_queued_scripts(self):
+        """
+            Returns:
+                list: The scripts of the jobs waiting to render or cut off part way through, in queue order.
+        """
+        return [job["script"] for job in self.get_jobs([self.STATE_QUEUED, self.STATE_RUNNING])]
+
+
+    def set_script_state(self, script_path, state, from_states, exit_code = None):
+        """
+            Moves the first job of a script that is in one of `from_states` to a new state. Jobs are matched by
+            script as the same script can be queued more than once.
+
+            Args:
+                script_path (str): The path of the script.
+                state (str): The state to move the job to.
+                from_states (list): The states the job can be in.
+                exit_code (int, optional): The exit code of the render, for a finished job. Defaults to None.
+
+            Returns:
+                int: The id of the job moved, None if there was no such job.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT id FROM jobs WHERE script = ? AND state IN ({', '.join('?' for _ in from_states)}) "
+                "ORDER BY position LIMIT 1", [script_path, *from_states]).fetchone()
+            if row is None:
+                return None
+            if state == self.STATE_RUNNING:
+                self.connection.execute("UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                                        (state, now, row[0]))
+            elif state in (self.STATE_DONE, self.STATE_FAILED, self.STATE_CANCELLED):
+                self.connection.execute("UPDATE jobs SET state = ?, finished = ?, exit_code = ? WHERE id = ?",
+                                        (state, now, exit_code, row[0]))
+            else:
+                self.connection.execute("UPDATE jobs SET state = ? WHERE id = ?", (state, row[0]))
+        return row[0]
+
+
+    def set_states(self, from_states, state):
+        """
+            Moves every job in one of `from_states` to a new state, such as every running job back to queued when
+            a render is cancelled.
+
+            Args:
+                from_states (list): The states of the jobs to move.
+                state (str): The state to move them to.
+
+            Returns:
+                int: The number of jobs moved.
+        """
+        now = time.time()
+        with self.lock:
+            if state == self.STATE_RUNNING:
+                cursor = self.connection.execute(
+                    f"UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1 "
+                    f"WHERE state IN ({', '.join('?' for _ in from_states)})", [state, now, *from_states])
+            else:
+                cursor = self.connection.execute(
+                    f"UPDATE jobs SET state = ? WHERE state IN ({', '.join('?' for _ in from_states)})",
+                    [state, *from_states])
+            return cursor.rowcount
+
+
+    def set_job_state(self, job_ids, state, from_states = None, exit_code = None):
+        """
+            Moves jobs to a new state by their ids.
+
+            Args:
+                job_ids (list): The ids of the jobs.
+                state (str): The state to move them to.
+                from_states (list, optional): Only move jobs in one of these states, None for any. Defaults to None.
+                exit_code (int, optional): The exit code of the render, for finished jobs. Defaults to None.
+
+            Returns:
+                list: The ids of the jobs moved.
+        """
+        if not job_ids:
+            return []
+        now = time.time()
+        query = f"SELECT id FROM jobs WHERE id IN ({', '.join('?' for _ in job_ids)})"
+        params = list(job_ids)
+        if from_states is not None:
+            query += f" AND state IN ({', '.join('?' for _ in from_states)})"
+            params.extend(from_states)
+        with self.lock:
+            moved_ids = [row[0] for row in self.connection.execute(query, params)]
+            if not moved_ids:
+                return []
+            id_list = ", ".join("?" for _ in moved_ids)
+            if state == self.STATE_RUNNING:
+                self.connection.execute(f"UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1 "
+                                        f"WHERE id IN ({id_list})", [state, now, *moved_ids])
+            elif state in (self.STATE_DONE, self.STATE_FAILED, self.STATE_CANCELLED):
+                self.connection.execute(f"UPDATE jobs SET state = ?, finished = ?, exit_code = ? "
+                                        f"WHERE id IN ({id_list})", [state, now, exit_code, *moved_ids])
+            else:
+                self.connection.execute(f"UPDATE jobs SET state = ? WHERE id IN ({id_list})", [state, *moved_ids])
+        return moved_ids
+
+
+    def set_priority(self, job_ids, priority):
+        """
+            Changes the priority of jobs. It only changes the order of jobs still waiting to render.
+
+            Args:
+                job_ids (list): The ids of the jobs.
+                priority (int): The new priority, higher renders first.
+
+            Returns:
+                int: The number of jobs changed.
+        """
+        if not job_ids:
+            return 0
+        with self.lock:
+            return self.connection.execute(
+                f"UPDATE jobs SET priority = ? WHERE id IN ({', '.join('?' for _ in job_ids)})",
+                [priority, *job_ids]).rowcount
+
+
+    def update_progress(self, script_path, frames_done, frames_total, min_interval = 1.0):
+        """
+            Records the frames the running job of a script has written. Frames come in quickly, so this only writes
+            once every `min_interval` seconds per script, and always for the last frame.
+
+            Args:
+                script_path (str): The path of the script.
+                frames_done (int): The frames written so far.
+                frames_total (int): The frames to render, 0 if not known.
+                min_interval (float, optional): The fewest seconds between writes for a script. Defaults to 1.0.
+        """
+        now = time.time()
+        if now - self.last_progress_times.get(script_path, 0) < min_interval and frames_done != frames_total:
+            return
+        self.last_progress_times[script_path] = now
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET frames_done = ?, frames_total = ? WHERE id = "
+                "(SELECT id FROM jobs WHERE script = ? AND state = ? ORDER BY position LIMIT 1)",
+                (frames_done, frames_total, script_path, self.STATE_RUNNING))
+
+
+    def remove_script(self, script_path):
+        """
+            Removes the first waiting job of a script, as when it is taken off the queue.
+
+            Args:
+                script_path (str): The path of the script.
+        """
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM jobs WHERE id = (SELECT id FROM jobs WHERE script = ? AND state IN (?, ?) "
+                "ORDER BY position LIMIT 1)", (script_path, self.STATE_QUEUED, self.STATE_RUNNING))
+
+
+    def clear_queue(self):
+        """
+            Removes every waiting and running job, leaving the record of the finished ones.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM jobs WHERE state IN (?, ?)", (self.STATE_QUEUED, self.STATE_RUNNING))
+        self.last_progress_times = {}
+
+
+    def recover(self):
+        """
+            Puts the jobs that were running when BNRQ last stopped back in the queue. Their frame progress is kept.
+
+            Returns:
+                int: The number of jobs put back.
+        """
+        return self.set_states([self.STATE_RUNNING], self.STATE_QUEUED)
+
+
+    def prune(self):
+        """
+            Drops finished jobs older than `max_age_days`.
+        """
+        oldest_allowed = time.time() - self.max_age_days * 24 * 60 * 60
+        with self.lock:
+            self.connection.execute("DELETE FROM jobs WHERE state IN (?, ?, ?) AND finished < ?",
+                                    (self.STATE_DONE, self.STATE_FAILED, self.STATE_CANCELLED, oldest_allowed))
+
+
+    def close(self):
+        """
+            Closes the database, folding the WAL back into it.
+        """
+        with self.lock:
+            try:
+                self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+            self.connection.close()
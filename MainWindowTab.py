@@ -1,16 +1,17 @@
-import sys
 import os
-import subprocess
-import concurrent.futures
-import threading
 import time
-import pdb
-import statistics
-import re
+import sqlite3
 
 from CodecLookup import FourCCTranslator
-from SeparateThread import SeparateThread
 from ErrorCodes import ErrorCodes
+from ScriptMetadataCache import ScriptMetadataCache
+from ScriptValidator import ScriptValidator
+from RenderCache import RenderCache
+from ResourceHistory import ResourceHistory
+from RenderEstimator import RenderEstimator
+from ValidationPool import ValidationPool
+from JobStore import JobStore
+from DaemonClient import DaemonClient
 
 from functools import partial
 
@@ -18,11 +19,11 @@ from PySide6 import QtWidgets, QtGui, QtCore
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QHBoxLayout,
     QLabel, QLineEdit, QVBoxLayout, QGridLayout, QFileDialog,
-    QMainWindow, QListWidget, QMessageBox, QTabWidget
+    QMainWindow, QListWidget, QMessageBox, QTabWidget, QStyle, QCheckBox
 )
 from PySide6.QtCore import(
     QSettings, QCoreApplication, QThread, QObject, QTimer,
-    QFile, QXmlStreamReader, QDir, QFileSystemWatcher
+    QFile, QDir
 )
 
 
@@ -39,7 +40,6 @@ class MainWindowTab(QWidget):
             file_paths (list): A list of file paths to be rendered.
             file_info (dict): A dictionary containing information about the files.
             py_render_script (str): The path to the RenderScript.py file.
-            max_num_threads (int): The maximum number of threads to use for rendering.
             continue_rendering (bool): Flag indicating whether rendering should continue.
             done_rendering (bool): Flag indicating whether rendering has completed.
             full_filepath_name (str): The full file path name.
@@ -51,30 +51,65 @@ class MainWindowTab(QWidget):
             write_details (QLabel): Label for displaying write details.
             translator (FourCCTranslator): An instance of the FourCCTranslator class for translating FourCC codes.
             timer (QTimer): Timer for updating the application.
-            remove_timer: Timer for removing temporary files.
             render_queue_folder (str): The folder path for the render queue.
             temp_folder (str): The folder path for temporary files.
-            xml_filepath (str): The file path for the CurrentRenderScriptInfo.xml file.
-            directory (QDir): QDir object representing the temporary folder.
-            watcher (QFileSystemWatcher): File system watcher for monitoring file changes.
-            file_change_count (int): The number of file changes detected.
+            script_cache (ScriptMetadataCache): The parsed details of the queued scripts, kept between runs.
+            validator (ScriptValidator): Checks each queued script can be rendered.
+            validation_pool (ValidationPool): Runs the checks in a pool of threads.
+            validation_results (dict): The latest check result of each script, by path.
+            render_requested (bool): Flag indicating the render should start once the checks are done.
+            render_cache (RenderCache): The successful renders, used to skip scripts that have not changed.
+            force_render_checkbox (QCheckBox): Checkbox for rendering every script, even those that have not changed.
+            job_store (JobStore): The queue as saved on disk, so it can be picked up again after a crash.
+            daemon_client (DaemonClient): Talks to the render daemon, when renders are handed to it.
+            daemon_jobs (dict): The script of each render daemon job being followed, by job id.
+            daemon_render (bool): Flag indicating the render being shown is running in the render daemon.
+            work_threads (QThread): The thread the render runs in, None until a render is started here.
+            resource_history (ResourceHistory): The learned profiles of the scripts, read to estimate the time left.
+            estimator (RenderEstimator): Estimates when the render being shown will be done.
+            skipped_scripts (dict): The exit code of each script of the render being shown that was not rendered as
+                the scripts it waits on did not render or wait on each other, by path.
 
         Methods:
             add_script_to_q(): Add a Nuke script to the list.
             remove_script_from_q(): Remove the selected Nuke scripts from the list.
             update_file_list(): Update the file list widget with the current list of Nuke scripts.
             clear_file_list(): Clear the list of Nuke scripts.
-            run_render(): Runs the render of the nuke scripts in a separate thread.
+            run_render(): Checks the queue and then runs the render of the nuke scripts in a separate thread.
             handle_render_update(script, exit_code, elapsed_time): Called on signal recieved, updates the progress bar.
+            handle_frame_progress(script, frames_done, frames_total, fps): Called as frames are written, updates the progress text.
+            handle_script_cached(script): Called for a script skipped as unchanged, counts it as done.
+            handle_script_skipped(script, exit_code): Called for a script skipped for its dependencies, counts it as done.
             handle_render_finish(): Called when render is complete, performs cleanup tasks.
             handle_render_cancelled(): Called when the rendered is cancelled by the user.
-            get_estimated_times(render_times, items_left): Find the average(mean) time of each render to show the user an estimated finish time.
-            get_write_info(): Reads the script as a text file and finds the write info through the text file.
+            stop_render(): Stops the render, in this process or in the render daemon.
+            open_progress_dialog(scripts): Resets the progress counts and the estimate, and shows the progress dialog.
+            start_daemon_render(force_render): Hands the queue to the render daemon and follows its progress.
+            attach_to_daemon(): Follows the renders the render daemon is running, if there are any.
+            detach_from_daemon(): Stops following the render daemon, which carries on rendering.
+            handle_daemon_event(event): Called for each event from the render daemon, updates the progress.
+            cancel_daemon_render(): Called when the user cancels a render running in the render daemon.
+            handle_daemon_lost(): Called if the render daemon goes away while its progress is being shown.
+            get_progress_text(): Builds the progress dialog text from the finished and running script counts.
+            get_estimated_time(): Builds the estimated time left and finish time text from the render estimator.
+            format_duration(total_seconds): Writes a number of seconds out in hours, minutes and seconds.
+            get_write_info(): Looks up the script in the script cache and shows the details of its write node.
+            validate_scripts(scripts): Starts checking scripts in the background.
+            get_dependency_scripts(): Returns the queued scripts whose outputs others may read before they render.
+            forget_removed_scripts(): Cancels the checks of scripts taken off the queue.
+            handle_script_validated(script, result): Called as each script is checked, updates its badge.
+            handle_validation_done(): Called when every script is checked, starts the render if it was asked for.
+            start_render(): Starts the render thread once the queue has been checked.
+            get_failed_scripts(): Returns the queued scripts whose checks found errors.
+            set_item_badge(row): Sets the status icon and tooltip of a list item from its check result.
+            restore_queue(): Loads the queue saved in the job store and resumes a render that was cut off.
             update(): method called on a timer to update the look of the list, primarily for the filename view change.
-            handle_new_info_file(): Called when a new file is made in the designated folder. Used for updating progress bar.
-            file_changed(): Called when a file changes in the designated folder.
     """
 
+    #the exit codes SeparateThread skips a script with, when a script it waits on did not render or the scripts it
+    #waits on wait on each other
+    DEPENDENCY_ERROR_CODES = {207, 208}
+
 
     def __init__(self, settings):
         """
@@ -87,16 +122,15 @@ class MainWindowTab(QWidget):
         super().__init__()
        
 
+        #the settings are loaded once on launch and shared, not read again here
         self.settings = settings
-        self.settings.load_settings()
         self.file_paths = []
         self.file_info = {}
         self.py_render_script = r"./RenderScript.py"
-        #careful using this value as the max workers, it can cause all the scripts to be rendered at once
-        self.max_num_threads = os.cpu_count()
 
         self.continue_rendering = True
         self.done_rendering = False
+        self.skipped_scripts = {}
         
 
         #update variables
@@ -107,6 +141,8 @@ class MainWindowTab(QWidget):
         self.clear_files = QPushButton("Clear")
         self.clear_files.setStyleSheet("background-color: red;")
         self.render_button = QPushButton("Render")
+        self.force_render_checkbox = QCheckBox("Force Render")
+        self.force_render_checkbox.setToolTip("Render every script, even those that have not changed since their last render")
         self.file_list = QListWidget()
         self.write_details = QLabel("")
         self.write_details.setWordWrap(True)
@@ -121,6 +157,7 @@ class MainWindowTab(QWidget):
         button_layout = QVBoxLayout()
         button_layout.addLayout(add_minus_layout)
         button_layout.addWidget(self.render_button)
+        button_layout.addWidget(self.force_render_checkbox)
         button_layout.addWidget(self.clear_files)
         button_layout.addWidget(self.write_details)
         #button_layout.setSizeConstraint(QVBoxLayout.SetFixedSize)
@@ -146,33 +183,52 @@ class MainWindowTab(QWidget):
         self.timer.timeout.connect(self.update)
         self.timer.start(500)
 
-        self.remove_timer = None
-
-        #file watching stuff
         self.render_queue_folder = self.settings.render_queue_folder
         self.temp_folder = self.settings.temp_folder
-        self.xml_filepath = os.path.join(self.temp_folder, "CurrentRenderScriptInfo.xml")
 
         if not QDir(self.temp_folder).exists():
             QDir().mkpath(self.temp_folder)
-        elif os.path.exists(self.xml_filepath):
-            os.remove(self.xml_filepath)
 
-        self.directory = QDir(self.temp_folder)
-        self.watcher = QFileSystemWatcher()
-        self.watcher.addPath(self.directory.absolutePath())
-        self.file_change_count = 0
-        self.watcher.directoryChanged.connect(self.handle_new_info_file)
-        self.watcher.fileChanged.connect(self.file_changed)
+        self.script_cache = ScriptMetadataCache(self.settings.script_cache_filepath, self.settings.script_cache_size)
+        self.script_cache.load()
+
+        self.validation_results = {}
+        self.render_requested = False
+        self.validator = ScriptValidator(self.script_cache)
+        self.validation_pool = ValidationPool(self.validator, self.settings.validation_workers)
+        self.validation_pool.script_validated.connect(self.handle_script_validated)
+        self.validation_pool.validation_done.connect(self.handle_validation_done)
+
+        self.render_cache = RenderCache(self.settings.render_cache_filepath, self.script_cache,
+                                        self.validator.input_scanner)
+        self.render_cache.load()
+        self.resource_history = ResourceHistory(self.settings.resource_history_filepath)
+        self.estimator = RenderEstimator()
 
-        self.wrong_write_node_name_list = []
+        try:
+            self.job_store = JobStore(self.settings.job_store_filepath)
+        except sqlite3.Error as e:
+            print(f"Unable to open the saved queue, it will not be kept: {e}")
+            self.job_store = JobStore(":memory:")
+
+        self.work_threads = None
+        self.daemon_jobs = {}
+        self.daemon_render = False
+        self.daemon_client = DaemonClient(self.settings)
+        self.daemon_client.event_received.connect(self.handle_daemon_event)
+        self.daemon_client.connection_lost.connect(self.handle_daemon_lost)
+
+        self.restore_queue()
+        if self.settings.render_daemon:
+            QTimer.singleShot(0, self.attach_to_daemon)
 
 
     def add_script_to_q(self):
         """   
             This method opens a file dialog to allow the user to select a Nuke script file. If a file is selected, its path
             is added to the list of file paths in the instance variable `self.file_paths`. The method then calls the
-            `update_file_list` method to refresh the file list displayed in the user interface.
+            `update_file_list` method to refresh the file list displayed in the user interface, and starts checking
+            the script in the background so it is ready by the time Render is pressed.
         """
         file_dialog = QFileDialog()
         file_path, _ = file_dialog.getOpenFileName(self, 
@@ -189,9 +245,12 @@ class MainWindowTab(QWidget):
 
                 if self.add_confirmation_box == QMessageBox.Yes:
                     self.file_paths.append(file_path)
+                    self.job_store.add_jobs([file_path], self.settings.write_node_name)
                     self.update_file_list()
             else:
                 self.file_paths.append(file_path)
+                self.job_store.add_jobs([file_path], self.settings.write_node_name)
+                self.validate_scripts([file_path])
                 self.update_file_list()
             
     
@@ -200,17 +259,19 @@ class MainWindowTab(QWidget):
             This method removes the selected file paths from the file path list and the file list view.
             It first gets the list of selected items from the file list view. Then, it iterates through
             the selected items and removes their corresponding file paths from the file path list and the
-            file list view. If no items are selected, this method does nothing.
+            file list view. Any checks still running for scripts no longer in the queue are cancelled.
+            If no items are selected, this method does nothing.
         """
         selected_items = self.file_list.selectedItems()
 
         for item in selected_items:
-            if item.text() in self.file_info:
-                self.file_paths.remove(self.file_info[item.text()])
-            else:
-                self.file_paths.remove(item.text())
+            script = self.file_info.get(item.text(), item.text())
+            self.file_paths.remove(script)
+            self.job_store.remove_script(script)
             self.file_list.takeItem(self.file_list.row(item))
 
+        self.forget_removed_scripts()
+
 
     #could optimize this by not making it update the list every update call
     def update_file_list(self):
@@ -228,6 +289,9 @@ class MainWindowTab(QWidget):
                 self.file_list.addItem(os.path.basename(file_path))
                 self.file_info[os.path.basename(file_path)] = file_path 
 
+        for row in range(self.file_list.count()):
+            self.set_item_badge(row)
+
 
     def clear_file_list(self, finish_clear = False):
         """
@@ -257,6 +321,9 @@ class MainWindowTab(QWidget):
             self.file_paths = []
             self.update_file_list()
         self.file_info = {}
+        if not self.file_paths:
+            self.job_store.clear_queue()
+        self.forget_removed_scripts()
 
 
     def run_render(self):
@@ -264,19 +331,117 @@ class MainWindowTab(QWidget):
         Executes the rendering process for the queued files.
 
         If there are no files in the queue, it displays a warning message and returns.
-        Otherwise, it initializes the necessary variables and objects for rendering,
-        including the error object, progress dialog, and render worker thread.
+        Otherwise, every queued script is checked in the validation pool, with the results showing on the list
+        as they come in. The render starts from handle_validation_done once the checks are finished.
         """
         self.file_list.clearSelection()
 
         if not self.file_paths:
             QtWidgets.QMessageBox.warning(self, "Warning", "There are no files in the queue!")
             return
-        
-        if self.check_write_nodes():
-            message_text = "The following scripts have the wrong write node name"
-            for script in self.wrong_write_node_name_list:
-                message_text += f"<br>{script}"
+
+        if self.render_requested:
+            return
+        self.render_requested = True
+
+        #scripts are checked when they are queued, only those that changed since (or failed) are checked again
+        write_node_name = self.settings.write_node_name
+        queued_outputs = self.validator.get_queued_outputs(self.get_dependency_scripts(), write_node_name)
+        stale_scripts = [script for script in dict.fromkeys(self.file_paths)
+                         if not self.validation_pool.is_pending(script)
+                         and not self.validator.is_current(self.validation_results.get(script), write_node_name,
+                                                           queued_outputs)]
+        if not stale_scripts and not self.validation_pool.is_busy():
+            self.handle_validation_done()
+            return
+
+        self.render_button.setEnabled(False)
+        self.render_button.setText("Checking...")
+        self.validate_scripts(stale_scripts)
+
+
+    def validate_scripts(self, scripts):
+        """
+        Starts checking scripts in the validation pool, showing them as being checked in the list.
+
+        Args:
+            scripts (list): The paths of the scripts to check.
+        """
+        for script in scripts:
+            self.validation_results[script] = {"status": ScriptValidator.STATUS_PENDING}
+            for row, file_path in enumerate(self.file_paths):
+                if file_path == script:
+                    self.set_item_badge(row)
+        self.validation_pool.validate(list(dict.fromkeys(scripts)), self.settings.write_node_name,
+                                      self.get_dependency_scripts())
+
+
+    def get_dependency_scripts(self):
+        """
+        Returns:
+            list: The queued scripts whose outputs are rendered before the scripts that read them, none if
+                dependencies are not inferred.
+        """
+        if self.settings.infer_dependencies == True:
+            return list(dict.fromkeys(self.file_paths))
+        return []
+
+
+    def forget_removed_scripts(self):
+        """
+        Cancels the checks of scripts that are no longer in the queue and drops their results.
+        """
+        removed_scripts = [script for script in self.validation_results if script not in self.file_paths]
+        for script in removed_scripts:
+            del self.validation_results[script]
+        self.validation_pool.cancel(removed_scripts)
+
+
+    def handle_script_validated(self, script, result):
+        """
+        Handles a script being checked, storing the result and updating the badge of its list items.
+
+        Args:
+            script (str): The path of the script that was checked.
+            result (dict): The result from ScriptValidator.validate.
+        """
+        #the result may have been on its way when the script was taken off the queue
+        if script not in self.file_paths:
+            return
+        self.validation_results[script] = result
+        for row, file_path in enumerate(self.file_paths):
+            if file_path == script:
+                self.set_item_badge(row)
+
+
+    def handle_validation_done(self):
+        """
+        Handles every queued script being checked. If a render was asked for it is started, unless a script
+        has errors, which are listed for the user instead.
+        """
+        if not self.render_requested:
+            self.script_cache.save()
+            return
+
+        #checks started when a script was queued may have been for a write node name changed since
+        write_node_name = self.settings.write_node_name
+        outdated_scripts = [script for script in dict.fromkeys(self.file_paths)
+                            if self.validation_results.get(script, {}).get("write_node") != write_node_name]
+        if outdated_scripts:
+            self.validate_scripts(outdated_scripts)
+            return
+
+        self.render_requested = False
+        self.render_button.setEnabled(True)
+        self.render_button.setText("Render")
+        self.script_cache.save()
+
+        failed_scripts = self.get_failed_scripts()
+        if failed_scripts:
+            message_text = "The following scripts can not be rendered"
+            for script in failed_scripts:
+                problems = "<br>&nbsp;&nbsp;".join(self.validation_results[script]["errors"])
+                message_text += f"<br><b>{os.path.basename(script)}</b><br>&nbsp;&nbsp;{problems}"
             message_text += "<br>Rendering will not happen"
             message_box = QMessageBox()
             message_box.setIcon(QMessageBox.Warning)
@@ -285,50 +450,251 @@ class MainWindowTab(QWidget):
             message_box.setStandardButtons(QMessageBox.Ok)
             message_box.exec_()
             return
-        
+
+        self.start_render()
+
+
+    def start_render(self):
+        """
+        Starts rendering the queued files once they have been checked.
+
+        It initializes the necessary variables and objects for rendering,
+        including the error object, progress dialog, and render worker thread.
+        """
+        if not self.file_paths:
+            return
+
         self.done_rendering = False
+        self.job_store.set_states([JobStore.STATE_QUEUED], JobStore.STATE_RUNNING)
         
         self.settings.remove_temp_files()
 
         self.work_threads = QThread(self)
-        self.total_script_count = len(self.file_paths)
-        self.render_times = []
-        self.progress = 0
+        self.open_progress_dialog(self.file_paths)
 
-        self.error_obj = ErrorCodes()
-        
-        self.progress_dialog = QtWidgets.QProgressDialog("Rendering scripts...", None, 0, len(self.file_paths), self)
-        self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
-        self.progress_dialog.setMinimumDuration(0)
-        self.progress_dialog.setRange(0,self.total_script_count)
-        self.progress_dialog.setValue(int(self.progress))
-        self.progress_dialog.setLabelText(f"Rendering script {self.progress+1} of {self.total_script_count}"+
-                                        f"\nEstimated Time: {self.get_estimated_time(self.render_times, self.total_script_count-self.progress)}")
-        QtWidgets.QApplication.processEvents()
+        force_render = self.force_render_checkbox.isChecked()
+        if self.settings.render_daemon:
+            self.start_daemon_render(force_render)
+            return
 
-        self.remove_timer = time.time()
-        
-        self.nuke_render_worker = SeparateThread()
+        #the render engine is only imported once something is rendered here, so it does not slow down the start up
+        from SeparateThread import SeparateThread
+        self.nuke_render_worker = SeparateThread(self.script_cache, self.render_cache, self.settings)
         self.nuke_render_worker.moveToThread(self.work_threads)
 
         if self.settings.render_nuke_open:
-            self.work_threads.started.connect(partial(self.nuke_render_worker.render_script_list, self.file_paths))
+            self.work_threads.started.connect(partial(self.nuke_render_worker.render_script_list, self.file_paths, force_render))
         else:
-            self.work_threads.started.connect(partial(self.nuke_render_worker.render_list, self.file_paths))
+            self.work_threads.started.connect(partial(self.nuke_render_worker.render_list, self.file_paths, force_render))
+        self.nuke_render_worker.script_cached.connect(self.handle_script_cached)
         self.nuke_render_worker.render_script_update.connect(self.handle_render_update)
         self.nuke_render_worker.render_done.connect(self.handle_render_finish)
+        self.nuke_render_worker.frame_progress.connect(self.handle_frame_progress)
         self.nuke_render_worker.update_gui.connect(self.update)
-        self.progress_dialog.canceled.connect(self.nuke_render_worker.stop)
+        #direct connection as the worker thread is busy running the pool and would never get to a queued call
+        self.progress_dialog.canceled.connect(self.nuke_render_worker.stop, QtCore.Qt.DirectConnection)
         self.nuke_render_worker.render_cancelled.connect(self.handle_render_cancelled) #this is added as a signal, maybe its not needed and just link it to the progress bar being cancelled?
         self.work_threads.start()
 
 
+    def open_progress_dialog(self, scripts):
+        """
+        Resets the progress counts and the estimated time for a render of some scripts and shows the progress dialog.
+        The resource history is read again each time, as the render daemon may have added to it.
+
+        Args:
+            scripts (list): The scripts being rendered, in queue order.
+        """
+        script_count = len(scripts)
+        self.total_script_count = script_count
+        self.progress = 0
+        self.frame_status = {}
+        self.cached_count = 0
+        self.skipped_scripts = {}
+        #single nuke instance renders one script at a time no matter the worker count
+        self.render_workers = 1 if self.settings.render_nuke_open else self.settings.render_workers
+        self.resource_history.load()
+        self.estimator = RenderEstimator(self.resource_history, self.render_workers,
+                                         0 if self.settings.render_nuke_open else self.settings.chunk_size)
+        self.estimator.start(scripts, self.script_cache)
+
+        self.error_obj = ErrorCodes(self.settings)
+        
+        self.progress_dialog = QtWidgets.QProgressDialog("Rendering scripts...", None, 0, script_count, self)
+        self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.setRange(0,self.total_script_count)
+        self.progress_dialog.setValue(int(self.progress))
+        self.progress_dialog.setLabelText(self.get_progress_text())
+        QtWidgets.QApplication.processEvents()
+
+
+    def start_daemon_render(self, force_render):
+        """
+        Hands the queue to the render daemon, starting it if it is not running, and follows its progress. The daemon
+        keeps its own queue from then on, so the scripts are taken out of the job store and closing the window
+        leaves them rendering.
+
+        Args:
+            force_render (bool): Render every frame of every script, even those that have not changed.
+        """
+        try:
+            if not self.daemon_client.start_daemon():
+                raise ConnectionError(f"It did not start, see {self.settings.daemon_log_filepath}")
+            #listening first, so no event of the new jobs is missed
+            self.daemon_client.start_listening()
+            job_ids = self.daemon_client.submit(self.file_paths, self.settings.write_node_name, 0, force_render)
+        except (ConnectionError, RuntimeError) as e:
+            self.daemon_client.stop_listening()
+            self.job_store.set_states([JobStore.STATE_RUNNING], JobStore.STATE_QUEUED)
+            self.done_rendering = True
+            self.progress_dialog.close()
+            QMessageBox.critical(self, "Error", f"Unable to hand the queue to the render daemon:\n{e}")
+            return
+
+        self.daemon_render = True
+        self.daemon_jobs = dict(zip(job_ids, self.file_paths))
+        self.job_store.clear_queue()
+        self.progress_dialog.canceled.connect(self.cancel_daemon_render)
+
+
+    def attach_to_daemon(self):
+        """
+        Follows the renders of the render daemon, if it is running and has anything queued, so a render handed to
+        it before the window was last closed shows its progress again. Its scripts are put at the top of the list.
+        """
+        if self.daemon_render or not self.daemon_client.is_running():
+            return
+        try:
+            self.daemon_client.start_listening()
+            jobs = self.daemon_client.list_jobs([JobStore.STATE_QUEUED, JobStore.STATE_RUNNING])
+        except (ConnectionError, RuntimeError) as e:
+            print(f"Unable to follow the render daemon: {e}")
+            self.daemon_client.stop_listening()
+            return
+        if not jobs:
+            self.daemon_client.stop_listening()
+            return
+
+        self.done_rendering = False
+        self.daemon_render = True
+        self.daemon_jobs = {job["id"]: job["script"] for job in jobs}
+        self.file_paths = [job["script"] for job in jobs] + self.file_paths
+        self.update_file_list()
+        self.open_progress_dialog([job["script"] for job in jobs])
+        self.progress_dialog.canceled.connect(self.cancel_daemon_render)
+
+
+    def detach_from_daemon(self):
+        """
+        Stops following the render daemon. It carries on rendering whatever it has queued.
+        """
+        self.daemon_client.stop_listening()
+        self.daemon_jobs = {}
+
+
+    def handle_daemon_event(self, event):
+        """
+        Handles an event from the render daemon, passing those of the jobs being followed on to the same handlers a
+        render in this process uses. Scripts cancelled from somewhere else are taken off the list.
+
+        Args:
+            event (dict): The event, see RenderDaemon.
+        """
+        script = self.daemon_jobs.get(event.get("job_id"))
+        if script is None or self.done_rendering:
+            return
+        event_type = event.get("event")
+        if event_type == "progress":
+            self.handle_frame_progress(script, event["frames_done"], event["frames_total"], event["fps"])
+            return
+        if event_type == "cached":
+            del self.daemon_jobs[event["job_id"]]
+            self.handle_script_cached(script)
+        elif event_type == "script_done":
+            del self.daemon_jobs[event["job_id"]]
+            if self.error_obj.check_error_codes(event["exit_code"]):
+                #the script stays on the list to be fixed, so it goes back in the job store
+                self.job_store.add_jobs([script], self.settings.write_node_name)
+            self.handle_render_update(script, event["exit_code"], event["elapsed_time"])
+        elif event_type == "cancelled":
+            del self.daemon_jobs[event["job_id"]]
+            if script in self.file_paths:
+                self.file_list.takeItem(self.file_paths.index(script))
+                self.file_paths.remove(script)
+            self.estimator.script_done(script)
+            self.total_script_count -= 1
+            self.progress_dialog.setMaximum(max(1, self.total_script_count))
+        else:
+            return
+
+        if not self.daemon_jobs and not self.done_rendering:
+            self.handle_render_finish()
+
+
+    def cancel_daemon_render(self):
+        """
+        Cancels the jobs of the render daemon being followed. Their scripts stay on the list, waiting to be rendered
+        again.
+        """
+        if not self.daemon_jobs:
+            return
+        job_ids = list(self.daemon_jobs)
+        scripts = list(self.daemon_jobs.values())
+        self.detach_from_daemon()
+        self.daemon_render = False
+        self.done_rendering = True
+        try:
+            self.daemon_client.cancel(job_ids)
+        except (ConnectionError, RuntimeError) as e:
+            print(f"Unable to cancel the render daemon jobs: {e}")
+        self.job_store.add_jobs(scripts, self.settings.write_node_name)
+        self.progress_dialog.close()
+
+
+    def handle_daemon_lost(self):
+        """
+        Handles the render daemon going away while its progress is shown. Its unfinished jobs are still in its
+        queue and render when it is next started, so they are taken off the list here.
+        """
+        if not self.daemon_jobs:
+            return
+        for script in self.daemon_jobs.values():
+            if script in self.file_paths:
+                self.file_list.takeItem(self.file_paths.index(script))
+                self.file_paths.remove(script)
+        self.detach_from_daemon()
+        self.daemon_render = False
+        self.done_rendering = True
+        self.progress_dialog.close()
+        QMessageBox.warning(self, "Warning", "The render daemon stopped. Its unfinished scripts will render the next "
+                                             "time it is started.")
+
+
+    def stop_render(self):
+        """
+        Stops the render, cancelling the jobs that are left when it is running in the render daemon.
+        """
+        if self.daemon_render:
+            job_ids = list(self.daemon_jobs)
+            scripts = list(self.daemon_jobs.values())
+            self.detach_from_daemon()
+            try:
+                self.daemon_client.cancel(job_ids)
+            except (ConnectionError, RuntimeError) as e:
+                print(f"Unable to cancel the render daemon jobs: {e}")
+            self.job_store.add_jobs(scripts, self.settings.write_node_name)
+        else:
+            self.nuke_render_worker.stop()
+
+
     def handle_render_update(self, script, exit_code, elapsed_time):
         """
         Handles updating the progress bar while application is rendering.
 
         If the given exit code indicates an error, the method terminates work threads,
-        displays an error message box, and performs necessary cleanup.
+        displays an error message box, and performs necessary cleanup. A script skipped as the scripts it waits
+        on did not render is counted without stopping the others (see handle_script_skipped).
         Otherwise, it handles the successful update by removing the script from the file paths and file list,
         updating the progress, and displaying the progress in the progress dialog.
 
@@ -337,9 +703,16 @@ class MainWindowTab(QWidget):
             exit_code (int or None): The exit code of the render process. None if not available.
             elapsed_time (float): The elapsed time of the render process.
         """
-        if self.error_obj.check_error_codes(exit_code):
-            #self.nuke_render_worker.quit_rt()
-            self.work_threads.terminate()
+        #a script that is no longer queued has already been counted
+        if self.done_rendering or script not in self.file_paths or script in self.skipped_scripts:
+            return
+
+        if exit_code in self.DEPENDENCY_ERROR_CODES:
+            self.handle_script_skipped(script, exit_code)
+        elif self.error_obj.check_error_codes(exit_code):
+            self.job_store.set_script_state(script, JobStore.STATE_FAILED, [JobStore.STATE_RUNNING], exit_code)
+            #stops the other workers' nuke processes as well, the thread then finishes on its own
+            self.stop_render()
             error_box = QMessageBox()
             error_box.setIcon(QMessageBox.Critical)
             error_box.setText(self.error_obj.get_error_message(exit_code, script))
@@ -355,94 +728,203 @@ class MainWindowTab(QWidget):
                 render_item = self.file_list.findItems(os.path.basename(script), QtCore.Qt.MatchExactly)
 
             self.file_paths.remove(script)
+            self.job_store.set_script_state(script, JobStore.STATE_DONE, [JobStore.STATE_RUNNING], exit_code)
             self.file_list.takeItem(self.file_list.row(render_item[0]))
+            self.frame_status.pop(script, None)
                         
             self.progress += 1
-            self.render_times.append(elapsed_time)
+            self.estimator.script_done(script, elapsed_time)
             self.progress_dialog.setValue(int(self.progress))
-            self.progress_dialog.setLabelText(f"Rendering script {self.progress+1} of {self.total_script_count}"+
-                                        f"\nEstimated Time: {self.get_estimated_time(self.render_times, self.total_script_count-self.progress)}")
+            self.progress_dialog.setLabelText(self.get_progress_text())
             QtWidgets.QApplication.processEvents()  
 
 
+    def handle_script_cached(self, script):
+        """
+        Handles a script being skipped as it has not changed since its last successful render. It is taken off the
+        list and counted as done, but its time is not measured so it does not throw off the estimated time.
+
+        Args:
+            script (str): The script that was skipped.
+        """
+        if self.done_rendering or script not in self.file_paths:
+            return
+        row = self.file_paths.index(script)
+        self.file_paths.pop(row)
+        self.job_store.set_script_state(script, JobStore.STATE_DONE, [JobStore.STATE_RUNNING], 0)
+        self.file_list.takeItem(row)
+
+        self.progress += 1
+        self.cached_count += 1
+        self.estimator.script_done(script)
+        self.progress_dialog.setValue(int(self.progress))
+        self.progress_dialog.setLabelText(self.get_progress_text())
+
+
+    def handle_script_skipped(self, script, exit_code):
+        """
+        Handles a script that is not rendered as a script it waits on did not render, or as the scripts it waits on
+        wait on each other. Unlike a failed render, the rest of the list carries on rendering. The script is counted
+        as done but stays on the list to be rendered again, and the scripts skipped are shown once the render is done.
+
+        Args:
+            script (str): The script that was skipped.
+            exit_code (int): Why it was skipped, one of DEPENDENCY_ERROR_CODES.
+        """
+        self.skipped_scripts[script] = exit_code
+        self.job_store.set_script_state(script, JobStore.STATE_FAILED, [JobStore.STATE_RUNNING], exit_code)
+        self.frame_status.pop(script, None)
+
+        self.progress += 1
+        self.estimator.script_done(script)
+        self.progress_dialog.setValue(int(self.progress))
+        self.progress_dialog.setLabelText(self.get_progress_text())
+
+
+    def handle_frame_progress(self, script, frames_done, frames_total, fps):
+        """
+        Handles a frame being written by one of the scripts rendering, updating the progress text with the
+        frames done and the render speed of that script, and the estimated time with both.
+
+        Args:
+            script (str): The script the frame belongs to.
+            frames_done (int): The frames of the script written so far.
+            frames_total (int): The frames the script renders, 0 if not known yet.
+            fps (float): The current frames per second of the script.
+        """
+        if self.done_rendering:
+            return
+        self.frame_status[script] = (frames_done, frames_total, fps)
+        self.estimator.frame_progress(script, frames_done, frames_total, fps)
+        self.job_store.update_progress(script, frames_done, frames_total)
+        self.progress_dialog.setLabelText(self.get_progress_text())
+
+
     def handle_render_finish(self):
         """
         Handles the rendering finishing. Performs final cleanups and quits the render thread.
         """
         self.done_rendering = True
-        self.work_threads.quit()
+        if self.work_threads is not None:
+            self.work_threads.quit()
         self.progress_dialog.setValue(100)
-        #making double sure
-        self.clear_file_list(True)
+        if self.daemon_render:
+            #the list may hold scripts queued here after the daemon's, only the daemon's are taken off as they finish
+            self.detach_from_daemon()
+            self.daemon_render = False
+        else:
+            #making double sure, other than the scripts skipped for their dependencies, which stay to be rendered again
+            skipped = [script for script in self.file_paths if script in self.skipped_scripts]
+            self.clear_file_list(True)
+            if skipped:
+                self.file_paths = skipped
+                self.update_file_list()
+                self.job_store.add_jobs(skipped, self.settings.write_node_name)
         self.progress_dialog.close()
+        if self.skipped_scripts:
+            skipped_text = "\n".join(f"{os.path.basename(script)}: {self.error_obj.get_error_message(exit_code, script)}"
+                                     for script, exit_code in self.skipped_scripts.items())
+            self.skipped_scripts = {}
+            QMessageBox.warning(self, "Warning", f"These scripts were not rendered and are left in the queue:\n{skipped_text}")
 
     
     def handle_render_cancelled(self):
         """
-        Called when the thread needs to be stopped (from user cancelling). 
+        Called when the thread needs to be stopped (from user cancelling). The scripts that were rendering go back
+        to waiting in the queue.
         """
+        self.job_store.set_states([JobStore.STATE_RUNNING], JobStore.STATE_QUEUED)
         self.work_threads.quit()
         self.progress_dialog.close()
           
 
-    def get_estimated_time(self, render_times, items_left):
-        """This method gets how much time is estimated for the render to complete. It does this by gathering an
-            average of each render time and then multiplying it by the number of scripts left to render.
+    def get_progress_text(self):
+        """
+        Builds the text shown in the progress dialog. Progress is counted by finished scripts, so it stays correct
+        when scripts finish out of order.
 
-        Args:
-            render_times (List[]): The list of times each script took to render
-            items_left (): The count of scripts that have yet to be rendered
+        Returns:
+            str: The progress text with the finished, running and total script counts, the frame progress of the
+                scripts rendering and the estimated time.
+        """
+        items_left = self.total_script_count - self.progress
+        running = min(self.render_workers, items_left)
+        cached_text = f"{self.cached_count} unchanged, " if self.cached_count else ""
+        progress_text = f"Rendered {self.progress} of {self.total_script_count} scripts ({cached_text}{running} rendering)"
+        for script, (frames_done, frames_total, fps) in list(self.frame_status.items())[:4]:
+            frames_text = f"{frames_done} of {frames_total}" if frames_total else f"{frames_done}"
+            progress_text += f"\n{os.path.basename(script)}: frame {frames_text} ({fps:.1f} fps)"
+        return progress_text + f"\nEstimated Time: {self.get_estimated_time()}"
+
+
+    def get_estimated_time(self):
+        """This method gets how much time is estimated for the render to complete. The render estimator works it
+            out from the frames each script has left, how long its frames took in past renders and are taking now,
+            and how many scripts are rendered at once.
 
         Returns:
             str: the method either returns that it is estimating how much time is left
                 for the rendering to be complete or returns the estimated time till 
-                completion
-        """
-        if render_times:
-            total_time_left = items_left * statistics.mean(render_times)
-            hours, remainder = divmod(total_time_left, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            hours = round(hours)
-            minutes = round(minutes)
-            seconds = round(seconds)
-            
-            #just seconds
-            if hours == 0 and (minutes < 1):
-                return f"{seconds:02} seconds"
-            
-            #1 minutes and x seconds
-            elif hours == 0 and (minutes >= 1 and minutes <=2):
-                return f"{minutes:02} minute, {seconds:02} seconds"
-            
-            #y minutes and x seconds
-            elif hours == 0 and minutes >= 2:
-                return f"{minutes:02} minutes, {seconds:02} seconds"
-            
-            #1 hour and x seconds
-            elif (hours >= 1 and hours <=2) and minutes < 1:
-                return f"{hours:02} hour, {seconds:02} seconds"
-            
-            #y hours and x seconds
-            elif hours >= 2 and minutes < 1:
-                return f"{hours:02} hours, {seconds:02} seconds"
+                completion, the time it should finish at and the range it should finish in
+        """
+        estimate = self.estimator.estimate()
+        if estimate is None:
+            return "Estimating...."
+        seconds_left, fewest_seconds, most_seconds = estimate
+        finish_time = time.strftime("%H:%M", time.localtime(time.time() + seconds_left))
+        return (f"{self.format_duration(seconds_left)}, finishing around {finish_time}"
+                f"\n(between {self.format_duration(fewest_seconds)} and {self.format_duration(most_seconds)})")
+
+
+    def format_duration(self, total_seconds):
+        """
+        Args:
+            total_seconds (float): A number of seconds.
+
+        Returns:
+            str: The seconds written out in hours, minutes and seconds.
+        """
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        hours = round(hours)
+        minutes = round(minutes)
+        seconds = round(seconds)
+        
+        #just seconds
+        if hours == 0 and (minutes < 1):
+            return f"{seconds:02} seconds"
+        
+        #1 minutes and x seconds
+        elif hours == 0 and (minutes >= 1 and minutes <=2):
+            return f"{minutes:02} minute, {seconds:02} seconds"
+        
+        #y minutes and x seconds
+        elif hours == 0 and minutes >= 2:
+            return f"{minutes:02} minutes, {seconds:02} seconds"
+        
+        #1 hour and x seconds
+        elif (hours >= 1 and hours <=2) and minutes < 1:
+            return f"{hours:02} hour, {seconds:02} seconds"
+        
+        #y hours and x seconds
+        elif hours >= 2 and minutes < 1:
+            return f"{hours:02} hours, {seconds:02} seconds"
            
-            #1 hour and 1 minute and x seconds
-            elif (hours >= 1 and hours <=2) and (minutes >= 1 and minutes <=2):
-                return f"{hours:02} hour, {minutes:02} minute, {seconds:02} seconds"
-            
-            #1 hour and y minutes and x seconds
-            elif (hours >= 1 and hours <=2) and minutes >= 2:
-                return f"{hours:02} hour, {minutes:02} minutes, {seconds:02} seconds"
-            
-            #y hours and 1 minute and x seconds
-            elif hours >= 2 and (minutes >= 1 and minutes <=2):
-                return f"{hours:02} hours, {minutes:02} minute, {seconds:02} seconds"
-            
-            #y hours and z minutes and x seconds
-            else:
-                return f"{hours:02} hours, {minutes:02} minutes, {seconds:02} seconds"
-            
-        return "Estimating...."
+        #1 hour and 1 minute and x seconds
+        elif (hours >= 1 and hours <=2) and (minutes >= 1 and minutes <=2):
+            return f"{hours:02} hour, {minutes:02} minute, {seconds:02} seconds"
+        
+        #1 hour and y minutes and x seconds
+        elif (hours >= 1 and hours <=2) and minutes >= 2:
+            return f"{hours:02} hour, {minutes:02} minutes, {seconds:02} seconds"
+        
+        #y hours and 1 minute and x seconds
+        elif hours >= 2 and (minutes >= 1 and minutes <=2):
+            return f"{hours:02} hours, {minutes:02} minute, {seconds:02} seconds"
+        
+        #y hours and z minutes and x seconds
+        else:
+            return f"{hours:02} hours, {minutes:02} minutes, {seconds:02} seconds"
 
 
     #could potentially make the output look nicer    
@@ -460,47 +942,43 @@ class MainWindowTab(QWidget):
             return
             
         index = self.file_list.row(self.file_list.selectedItems()[0])
-        selected_script = open(self.file_paths[index], 'r').read()
-        
-        extra_info = ""
-        write_line = selected_script.splitlines()[1]
-
-        if "#write_info" in write_line:
-            format_match = re.search(r'format:\s*"(\d+\s\d+\s\d+)"', write_line)
-            channel_match = re.search(r'chans:"(.+?)"', write_line)
-            colorspace_match = re.search(r'colorspace:"(.+?)"', write_line)
-
-            format_value = format_match.group(1) if format_match else "N/A"
-            channel_value = channel_match.group(1).strip(":").replace(":", ",") if channel_match else "N/A"
-            colorspace_value = colorspace_match.group(1) if colorspace_match else "N/A"
+        try:
+            metadata = self.script_cache.get(self.file_paths[index])
+        except OSError as e:
+            print(f"Unable to read {self.file_paths[index]}: {e}")
+            self.write_details.setText("<br><i><b>UNABLE TO READ THIS PROJECT</b><i>")
+            return
 
-            extra_info = f"<br><b>Format:</b> {format_value}" \
-                        f"<br><b>Channels:</b> {channel_value}" \
-                        f"<br><b>Colorspace:</b> {colorspace_value}"
-        else:
+        if not metadata["write_nodes"]:
             self.write_details.setText("<br><i><b>NO WRITE NODE EXISTS IN THIS PROJECT</b><i>")
             return
 
-        write_node_pattern = r'Write\s*{\s*((?:.*\n)*?)\s*}'
-        write_nodes = re.findall(write_node_pattern, selected_script)
-
-        write_node_index = next((i for i, wn in enumerate(write_nodes) if self.settings.write_node_name in wn), None)
-
-        if write_node_index is None:
+        write_knobs = metadata["write_nodes"].get(self.settings.write_node_name)
+        if not write_knobs or not write_knobs.get("file"):
             self.write_details.setText(f"<b>NO WRITE NODE BY {self.settings.write_node_name} EXISTS <i>FILLED OUT</i> IN THIS PROJECT!</b>")
             return
 
-        write_node = write_nodes[write_node_index]
-        output_name = re.search(r'file\s+"(.+\..+?)"', write_node).group(1)
-        file_type = re.search(r'file_type\s+(\w+)', write_node).group(1)
-        colorspace_type = re.search(r'(?:colorspace|out_colorspace)\s+(.+)', write_node, re.IGNORECASE).group(1) if re.search(r'(?:colorspace|out_colorspace)\s+(.+)', write_node, re.IGNORECASE) else ""
+        #the write info line is only there if nuke saved the script, it is not needed for the output itself
+        extra_info = ""
+        write_info = metadata["write_info"].get(self.settings.write_node_name)
+        if write_info is None and metadata["write_info"]:
+            write_info = next(iter(metadata["write_info"].values()))
+        if write_info is not None:
+            format_value = write_info.get("format", "N/A")
+            channel_value = write_info["chans"].strip(":").replace(":", ",") if "chans" in write_info else "N/A"
+            colorspace_value = write_info.get("colorspace", "N/A")
 
-        codec = ""
-        words = write_node.split()
+            extra_info = f"<br><b>Format:</b> {format_value}" \
+                        f"<br><b>Channels:</b> {channel_value}" \
+                        f"<br><b>Colorspace:</b> {colorspace_value}"
 
-        if "mov64_codec" in write_node:
-            index = words.index("mov64_codec")
-            codec_four_cc = words[index+1]
+        output_name = write_knobs["file"]
+        file_type = write_knobs.get("file_type", os.path.splitext(output_name)[1].lstrip("."))
+        colorspace_type = write_knobs.get("colorspace", write_knobs.get("out_colorspace", ""))
+
+        codec = ""
+        if write_knobs.get("mov64_codec"):
+            codec_four_cc = write_knobs["mov64_codec"].split()[0]
             codec = "<br><b>Codec:</b> " + self.translator.get_codec(codec_four_cc)
 
         colorspace_line = f"<br><b>Colorspace:</b> {colorspace_type}" if colorspace_type else ""
@@ -511,23 +989,60 @@ class MainWindowTab(QWidget):
                                     f"{codec}")
         
 
-    def check_write_nodes(self):
+    def get_failed_scripts(self):
         """
-            Checks to see if there are any scripts missing the proper write node name.
-
             Returns:
-                True if every script does not have the proper name. False if every script does not. 
+                list: The queued scripts whose checks found errors, without repeats.
         """
-        self.wrong_write_node_name_list = []
-        for script in self.file_paths:
-            selected_script = open(script, 'r').read()
-            write_node_pattern = r'Write\s*{\s*((?:.*\n)*?)\s*}'
-            write_nodes = re.findall(write_node_pattern, selected_script)
+        return [script for script in dict.fromkeys(self.file_paths)
+                if self.validation_results.get(script, {}).get("status") == ScriptValidator.STATUS_ERROR]
+
+
+    def set_item_badge(self, row):
+        """
+            Sets the icon of a list item to the status of its script's check, with the problems found in its tooltip.
+
+            Args:
+                row (int): The row of the item in the file list.
+        """
+        item = self.file_list.item(row)
+        if item is None or row >= len(self.file_paths):
+            return
+        result = self.validation_results.get(self.file_paths[row])
+        if result is None:
+            item.setIcon(QtGui.QIcon())
+            item.setToolTip("")
+            return
+
+        icons = {
+            ScriptValidator.STATUS_PENDING: QStyle.SP_BrowserReload,
+            ScriptValidator.STATUS_OK: QStyle.SP_DialogApplyButton,
+            ScriptValidator.STATUS_WARNING: QStyle.SP_MessageBoxWarning,
+            ScriptValidator.STATUS_ERROR: QStyle.SP_MessageBoxCritical
+        }
+        item.setIcon(self.style().standardIcon(icons[result["status"]]))
+        if result["status"] == ScriptValidator.STATUS_PENDING:
+            item.setToolTip("Checking...")
+        else:
+            problems = result["errors"] + result["warnings"]
+            item.setToolTip("\n".join(problems) if problems else f"Ready, {result['frame_count']} frames")
+
+    def restore_queue(self):
+        """
+        Loads the queue saved in the job store, so the scripts queued when BNRQ was last closed (or crashed) are
+        there again. If a render was cut off part way through, its scripts are put back in the queue and the render
+        is started again once the window is up.
+        """
+        interrupted_count = self.job_store.recover()
+        self.file_paths = self.job_store.get_queued_scripts()
+        if not self.file_paths:
+            return
+        self.update_file_list()
+        self.validate_scripts(list(dict.fromkeys(self.file_paths)))
+        if interrupted_count:
+            print(f"Resuming {interrupted_count} scripts from a render that was cut off")
+            QTimer.singleShot(0, self.run_render)
 
-            write_node_index = next((i for i, wn in enumerate(write_nodes) if self.settings.write_node_name in wn), None)
-            if write_node_index is None:
-                self.wrong_write_node_name_list.append(os.path.basename(script))
-        return bool(self.wrong_write_node_name_list)
 
     def update(self):
         """
@@ -541,60 +1056,3 @@ class MainWindowTab(QWidget):
             self.full_filepath_name = self.settings.full_filepath_name
             self.update_file_list()
         QtWidgets.QApplication.processEvents()
-
-
-    def handle_new_info_file(self):
-        """
-        Handles the processing of a new info file.
-
-        If the rendering is already done or the specified time interval since the last removal has not elapsed,
-        the method returns and exits the system. This is to catch any file being read twice
-
-        Otherwise, it reads the XML files in the directory and extracts relevant information, such as the script name
-        and execution time. The extracted information is then passed to the handle_render_update method.
-        """
-
-        if self.done_rendering or time.time() - self.remove_timer <= 0.01:
-            return
-            sys.exit()
-        
-        self.remove_timer = time.time()
-        self.files = self.directory.entryList()
-        #This loop reads all files that are xml
-        for file in self.files:
-            if file == "." or file == "..":
-                continue
-            file_path = os.path.join(self.directory.absolutePath(), file)
-            #file_info = QFileInfo(file_path)
-            if file_path.lower().endswith(".xml"):
-                qfile = QFile(file_path)
-                if qfile.open(QFile.ReadOnly | QFile.Text):
-                    reader = QXmlStreamReader(qfile)
-
-                    while not reader.atEnd():
-                        reader.readNext()
-                        if reader.isStartElement() and reader.name() == "Script":
-                            if reader.readNextStartElement() and reader.name() == "Info":
-                                attributes = reader.attributes()
-                                script = attributes.value("name")
-                                execute_time = float(attributes.value("execute_time"))
-                                self.handle_render_update(script, None, execute_time)
-
-                    qfile.close()
-
-
-    def file_changed(self):
-        """
-        Handles a file being changed.
-        """
-        self.handle_new_info_file()
-
-        """if self.file_change_count == 9:
-            self.handle_new_info_file()
-            self.file_change_count += 1
-        elif self.file_change_count == 10:
-            self.file_change_count = 0
-        else:
-            self.file_change_count += 1"""
-
-
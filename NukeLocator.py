@@ -0,0 +1,363 @@
+import os
+import re
+import sys
+import json
+import glob
+import threading
+
+
+class NukeLocator():
+    """
+        Finds the Nuke executables installed on the machine without walking every folder of the disk.
+
+        Only the folders Nuke is installed to are searched: Program Files on Windows, /Applications on macOS and
+        /usr/local and /opt on Linux, along with any extra roots given. Below a root only folders that are named after
+        Nuke or The Foundry are gone into, and inside a Nuke folder only the way down to the executable of a macOS
+        app bundle, never more than MAX_DEPTH folders deep. The plugins, libraries and Python of each install are
+        never looked at.
+
+        Versions are read as (major, minor, patch) triples from the name of the executable and the folders above it,
+        such as (13, 2, 5) from ".../Nuke13.2v5/Nuke13.2.exe", so 13.10 is newer than 13.2 and 13.2v5 is newer than
+        13.2v4.
+
+        What each root holds is cached in a json file, along with the modification time of every folder that was
+        searched. A folder's modification time changes when something is installed to or removed from it, so a
+        root is only searched again when one of them has changed, and otherwise a lookup costs a few stats.
+
+        Attributes:
+            cache_filepath (str): The path of the json file the results are cached in, None to keep them in memory only.
+            roots (list): The folders searched for installs.
+            entries (dict): The searched folders with their modification times and the (path, version) of each
+                executable found, by root.
+            dirty (bool): True if the entries have changed since they were last saved.
+            lock (threading.Lock): Guards the entries, as the preferences and the launch can search at once.
+
+        Methods:
+            __init__(cache_filepath, extra_roots): Initializes the NukeLocator object.
+            get_default_roots(): Returns the folders Nuke is installed to on this system.
+            find_all(on_directory): Returns every Nuke executable found, newest first.
+            find_latest(on_directory): Returns the newest Nuke executable found.
+            choose_executable(version, executables): Returns the executable to render a script of a version with.
+            is_current(entry): Returns whether nothing has changed in a root since it was searched.
+            search_root(root, on_directory): Searches a root for Nuke executables.
+            should_enter(name, inside_install): Returns whether a folder could lead to an executable.
+            is_executable(directory, name): Returns whether a file is a Nuke executable.
+            parse_version(text): Returns the version triple in a path or version string.
+            get_version(nuke_exe): Returns the version triple of an executable.
+            format_version(version): Returns a version triple as Nuke writes it.
+            load(): Loads the cached results from the json file.
+            save(): Saves the cached results to the json file if they have changed.
+    """
+
+    CACHE_VERSION = 1
+    MAX_DEPTH = 5
+    VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)(?:\s*v(\d+))?", re.IGNORECASE)
+    EXECUTABLE_PATTERN = re.compile(r"^Nuke\d+\.\d+(v\d+)?(\.exe)?$", re.IGNORECASE)
+    #the folders of a macOS app bundle between the Nuke folder and its executable
+    BUNDLE_FOLDERS = ("contents", "macos")
+
+
+    def __init__(self, cache_filepath = None, extra_roots = None):
+        """
+            Initialization method. The cache is loaded straight away.
+
+            Args:
+                cache_filepath (str, optional): The json file to cache the results in, None to keep them in memory only.
+                    Defaults to None.
+                extra_roots (list, optional): More folders to search, before the default ones. Defaults to None.
+        """
+        self.cache_filepath = cache_filepath
+        self.roots = []
+        for root in list(extra_roots or []) + self.get_default_roots():
+            root = os.path.normpath(root)
+            if root not in self.roots:
+                self.roots.append(root)
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+
+    @staticmethod
+    def get_default_roots():
+        """
+            Returns:
+                list: The folders Nuke is installed to on this system, whether they exist or not. Nuke installs
+                    straight into /usr/local on Linux, so each Nuke folder there is its own root.
+        """
+        if sys.platform.startswith("win"):
+            roots = [os.environ.get(name) for name in ("ProgramW6432", "ProgramFiles", "ProgramFiles(x86)")]
+            return [root for root in roots if root] + ["C:\\Program Files\\"]
+        if sys.platform == "darwin":
+            return ["/Applications"]
+        return sorted(glob.glob("/usr/local/Nuke*")) + ["/opt/Foundry", "/opt"]
+
+
+    def find_all(self, on_directory = None):
+        """
+            Finds every Nuke executable in the roots, searching only the roots that have changed since they were
+            cached.
+
+            Args:
+                on_directory (callable, optional): Called with each folder searched, to show the search going.
+                    Defaults to None.
+
+            Returns:
+                list: The (path, version) of each executable, the newest version first.
+        """
+        executables = {}
+        for root in self.roots:
+            with self.lock:
+                entry = self.entries.get(root)
+            if entry is None or not self.is_current(entry):
+                entry = self.search_root(root, on_directory)
+                with self.lock:
+                    self.entries[root] = entry
+                    self.dirty = True
+            for nuke_exe, version in entry["executables"]:
+                executables.setdefault(nuke_exe, tuple(version))
+        self.save()
+        return sorted(executables.items(), key=lambda executable: (executable[1], executable[0]), reverse=True)
+
+
+    def find_latest(self, on_directory = None):
+        """
+            Args:
+                on_directory (callable, optional): Called with each folder searched. Defaults to None.
+
+            Returns:
+                str: The path of the newest Nuke executable, None if there is none.
+        """
+        executables = self.find_all(on_directory)
+        return executables[0][0] if executables else None
+
+
+    @staticmethod
+    def choose_executable(version, executables):
+        """
+            Picks the executable closest to the version a script was saved with. Nuke opens scripts from older
+            versions, so when the exact version is not installed the nearest patch of the same release is used, then
+            the nearest newer release of the same major version. A script is never opened in an older release or
+            another major version, as it may use what that version does not have.
+
+            Args:
+                version (tuple): The (major, minor, patch) version the script was saved with.
+                executables (list): The (path, version) of each executable to choose from, the one to prefer first
+                    when two have the same version.
+
+            Returns:
+                str: The path of the executable to render with, None if none is compatible.
+        """
+        def distance(executable):
+            executable_version = executable[1]
+            if executable_version[:2] == version[:2]:
+                #a newer patch has the fixes of the older one, an older patch is only used if there is no newer
+                patch_distance = executable_version[2] - version[2]
+                return (0, patch_distance if patch_distance >= 0 else 1000 - patch_distance)
+            return (1, executable_version[1] - version[1], executable_version[2])
+
+        compatible = [executable for executable in executables
+                      if executable[1][0] == version[0] and executable[1][:2] >= version[:2]]
+        if not compatible:
+            return None
+        return min(compatible, key=distance)[0]
+
+
+    def is_current(self, entry):
+        """
+            Args:
+                entry (dict): The cached search of a root.
+
+            Returns:
+                bool: True if every folder searched still has the modification time it had, and every executable
+                    found is still there.
+        """
+        for directory, mtime in entry["directories"].items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return False
+            except OSError:
+                #a root that did not exist still does not
+                if mtime is not None:
+                    return False
+        return all(os.path.isfile(nuke_exe) for nuke_exe, _ in entry["executables"])
+
+
+    def search_root(self, root, on_directory = None):
+        """
+            Searches a root for Nuke executables, going only into the folders that could lead to one.
+
+            Args:
+                root (str): The folder to search.
+                on_directory (callable, optional): Called with each folder searched. Defaults to None.
+
+            Returns:
+                dict: The "directories" searched with their modification times (None for a root that does not
+                    exist), and the [path, version] of each "executables" found.
+        """
+        directories = {}
+        executables = []
+        #each folder to search, its depth below the root, and whether it is inside a Nuke install
+        waiting = [(root, 0, self.VERSION_PATTERN.search(os.path.basename(root)) is not None)]
+        while waiting:
+            directory, depth, inside_install = waiting.pop()
+            try:
+                directories[directory] = os.stat(directory).st_mtime
+                with os.scandir(directory) as scan:
+                    dir_entries = list(scan)
+            except OSError:
+                directories.setdefault(directory, None)
+                continue
+            if on_directory is not None:
+                on_directory(directory)
+            for dir_entry in dir_entries:
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    if depth < self.MAX_DEPTH and self.should_enter(dir_entry.name, inside_install):
+                        waiting.append((dir_entry.path, depth + 1,
+                                        inside_install or self.VERSION_PATTERN.search(dir_entry.name) is not None))
+                elif inside_install and self.is_executable(directory, dir_entry.name):
+                    version = self.get_version(dir_entry.path)
+                    if version is not None:
+                        executables.append([dir_entry.path, list(version)])
+        return {"directories": directories, "executables": executables}
+
+
+    def should_enter(self, name, inside_install):
+        """
+            Args:
+                name (str): The name of a folder.
+                inside_install (bool): True if the folder is inside a Nuke install.
+
+            Returns:
+                bool: True if the folder is a Nuke install, The Foundry's folder, or the way into the executable of
+                    an install's app bundle.
+        """
+        name = name.lower()
+        if inside_install:
+            return name.endswith(".app") or name in self.BUNDLE_FOLDERS
+        return name.startswith("nuke") or "foundry" in name
+
+
+    def is_executable(self, directory, name):
+        """
+            Args:
+                directory (str): The folder the file is in.
+                name (str): The name of the file.
+
+            Returns:
+                bool: True if the file is named like a Nuke executable, and is an .exe on Windows or can be run
+                    elsewhere.
+        """
+        if not self.EXECUTABLE_PATTERN.match(name):
+            return False
+        if sys.platform.startswith("win"):
+            return name.lower().endswith(".exe")
+        return os.access(os.path.join(directory, name), os.X_OK)
+
+
+    @classmethod
+    def parse_version(cls, text):
+        """
+            Args:
+                text (str): A folder or file name, or a version as written in a script, such as "Nuke13.2v5" or
+                    "13.2 v5".
+
+            Returns:
+                tuple: The (major, minor, patch) version, the patch 0 if it is not given. None if there is no version.
+        """
+        match = cls.VERSION_PATTERN.search(text or "")
+        if match is None:
+            return None
+        return int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+
+
+    @classmethod
+    def get_version(cls, nuke_exe):
+        """
+            Reads the version of an executable from its name and the folders above it. The executable itself is
+            usually only named with the major and minor version, and the folder it is installed in has the patch.
+
+            Args:
+                nuke_exe (str): The path of the Nuke executable.
+
+            Returns:
+                tuple: The (major, minor, patch) version, None if the path has no version in it.
+        """
+        file_version = cls.parse_version(os.path.basename(nuke_exe))
+        directory = os.path.dirname(nuke_exe)
+        while directory and os.path.dirname(directory) != directory:
+            name = os.path.basename(directory)
+            match = cls.VERSION_PATTERN.search(name)
+            if match is not None and match.group(3) is not None:
+                version = cls.parse_version(name)
+                if file_version is None or version[:2] == file_version[:2]:
+                    return version
+            directory = os.path.dirname(directory)
+        return file_version
+
+
+    @staticmethod
+    def format_version(version):
+        """
+            Args:
+                version (tuple): A (major, minor, patch) version.
+
+            Returns:
+                str: The version as Nuke writes it, such as "13.2v5". None if there is no version.
+        """
+        if version is None:
+            return None
+        return f"{version[0]}.{version[1]}v{version[2]}"
+
+
+    def load(self):
+        """
+            Loads the cached results from the json file. A missing, unreadable or out of date file leaves the cache
+            empty, so every root is searched.
+        """
+        if not self.cache_filepath or not os.path.isfile(self.cache_filepath):
+            return
+        try:
+            with open(self.cache_filepath, "r") as cache_file:
+                cache_data = json.load(cache_file)
+        except (OSError, ValueError):
+            print("Unable to load Nuke cache")
+            return
+        if not isinstance(cache_data, dict) or cache_data.get("version") != self.CACHE_VERSION:
+            return
+
+        with self.lock:
+            self.entries = {}
+            for root, entry in cache_data.get("roots", {}).items():
+                if isinstance(entry, dict) and "directories" in entry and "executables" in entry:
+                    self.entries[root] = entry
+            self.dirty = False
+
+
+    def save(self):
+        """
+            Saves the cached results to the json file if they have changed, swapping the new file in so a crash part
+            way through never leaves a broken cache behind.
+        """
+        if not self.cache_filepath:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            cache_data = {"version": self.CACHE_VERSION, "roots": dict(self.entries)}
+            self.dirty = False
+
+        temp_filepath = self.cache_filepath + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_filepath)), exist_ok=True)
+            with open(temp_filepath, "w") as cache_file:
+                json.dump(cache_data, cache_file)
+            os.replace(temp_filepath, self.cache_filepath)
+        except OSError:
+            print("Unable to save Nuke cache")
+            with self.lock:
+                self.dirty = True
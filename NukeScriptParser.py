@@ -0,0 +1,391 @@
+import re
+
+
+class NukeNode():
+    """
+        A lightweight node read out of a .nk script.
+
+        Attributes:
+            node_class (str): The class of the node, such as "Write" or "Read".
+            name (str): The name of the node. Empty if the node has no name knob.
+            knobs (dict): The knob values of the node as strings, with quotes and outer braces taken off.
+            inputs (list): The names of the nodes connected to each input, None for an empty input.
+            parent (str): The full name of the group the node is in, None for nodes at the top of the script.
+            line_number (int): The line of the script the node starts on.
+
+        Methods:
+            __init__(node_class, parent, line_number): Initializes the NukeNode object.
+            knob(name, default): Returns the value of a knob.
+            get_full_name(): Returns the name of the node including the groups it is in.
+    """
+
+    def __init__(self, node_class, parent = None, line_number = 0):
+        """
+            Initialization method.
+
+            Args:
+                node_class (str): The class of the node.
+                parent (str, optional): The full name of the group the node is in. Defaults to None.
+                line_number (int, optional): The line of the script the node starts on. Defaults to 0.
+        """
+        self.node_class = node_class
+        self.name = ""
+        self.knobs = {}
+        self.inputs = []
+        self.parent = parent
+        self.line_number = line_number
+
+
+    def knob(self, name, default = None):
+        """
+            Args:
+                name (str): The name of the knob.
+                default (optional): What to return if the knob is not set. Defaults to None.
+
+            Returns:
+                str: The value of the knob, or the default if the knob is not set in the script.
+        """
+        return self.knobs.get(name, default)
+
+
+    def get_full_name(self):
+        """
+            Returns:
+                str: The name of the node with the groups it is in, such as "Group1.Blur1".
+        """
+        if self.parent:
+            return f"{self.parent}.{self.name}"
+        return self.name
+
+
+    def __repr__(self):
+        return f"{self.node_class}({self.get_full_name()})"
+
+
+class NukeScriptParser():
+    """
+        Reads a .nk script into a list of lightweight nodes.
+
+        The script is read one line at a time, so the whole file is never held in memory. Knob values that open a
+        brace are followed across lines until the brace is closed, which keeps nested values (curves, lookup tables,
+        the window layout) from being mistaken for the end of a node. Groups are followed through their
+        `Group {...}` to `end_group` lines, and the `push`, `set` and `[stack]` commands are followed to work out
+        what each node's inputs are connected to. The top of the stack is taken as input 0.
+
+        Nuke only writes the inputs knob when a node does not have its usual number of inputs. Nodes without it are
+        taken to have one input, other than the classes in `NO_INPUT_CLASSES`.
+
+        Attributes:
+            filepath (str): The path to the .nk script.
+            nodes (list): Every node in the script, in the order they are written, including those in groups.
+            root (NukeNode): The Root node of the script, None if the script has none.
+            header (str): The "#!" line at the top of the script, naming the Nuke that saved it.
+            version (str): The Nuke version from the version line, such as "13.2 v4". Empty if there is none.
+            write_info (dict): The details Nuke writes about each Write node at the top of the script, by node name.
+
+        Methods:
+            __init__(filepath): Initializes the NukeScriptParser object.
+            parse(root_only): Reads the script.
+            get_nodes(node_class, top_level_only): Returns the nodes of a class.
+            get_node(name): Returns a node by its full name.
+            get_frame_range(): Returns the first and last frame from the Root node.
+            read_value(text): Takes the quotes or outer braces off a knob value.
+            count_braces(text, depth): Counts the braces in a line, skipping quoted and escaped ones.
+    """
+
+    NODE_START_PATTERN = re.compile(r"^\s*(\w+)\s*\{\s*$")
+    CLONE_START_PATTERN = re.compile(r"^\s*clone\s+\$(\S+)\s*\{\s*$")
+    SPECIAL_CHARACTER_PATTERN = re.compile(r'[{}"\\]')
+    WRITE_INFO_PATTERN = re.compile(r'(\w+):"((?:[^"\\]|\\.)*)"')
+    GROUP_CLASSES = {"Group", "LiveGroup"}
+    NO_INPUT_CLASSES = {"Root", "Read", "ReadGeo", "ReadGeo2", "DeepRead", "Constant", "ColorBars", "ColorWheel",
+                        "CheckerBoard2", "Input", "BackdropNode", "StickyNote", "Camera", "Camera2", "Camera3",
+                        "Light", "Light2", "Light3", "Axis", "Axis2", "Axis3"}
+
+
+    def __init__(self, filepath):
+        """
+            Initialization method.
+
+            Args:
+                filepath (str): The path to the .nk script.
+        """
+        self.filepath = filepath
+        self.nodes = []
+        self.root = None
+        self.header = ""
+        self.version = ""
+        self.write_info = {}
+
+
+    def parse(self, root_only = False):
+        """
+            Reads the script, filling in the nodes, the Root node, the header, the version and the write info.
+
+            Args:
+                root_only (bool, optional): Stop reading once the Root node has been read. Defaults to False.
+
+            Returns:
+                list: The nodes of the script.
+
+            Raises:
+                OSError: If the script could not be opened.
+        """
+        self.nodes = []
+        self.root = None
+        variables = {}
+        #each group gets its own stack, the outer ones are kept to return to at end_group
+        stacks = [[]]
+        groups = [None]
+
+        node = None
+        knob_name = None
+        knob_lines = []
+        depth = 0
+
+        with open(self.filepath, "r", encoding="utf-8", errors="replace") as script:
+            for line_number, line in enumerate(script, 1):
+                if line_number == 1 and line.startswith("#!"):
+                    self.header = line[2:].strip()
+                    continue
+
+                #a multi line knob value (or top level command) that has not been closed yet
+                if depth > 0:
+                    depth = self.count_braces(line, depth)
+                    knob_lines.append(line)
+                    if depth == 0:
+                        self.finish_knob(node, knob_name, knob_lines)
+                        knob_name = None
+                        knob_lines = []
+                    continue
+
+                stripped = line.strip()
+                if node is not None:
+                    if stripped == "}":
+                        self.finish_node(node, stacks, variables)
+                        if node.node_class == "Root":
+                            self.root = node
+                            if root_only:
+                                return self.nodes
+                        elif node.node_class in self.GROUP_CLASSES:
+                            stacks.append([])
+                            groups.append(node.get_full_name())
+                        node = None
+                        continue
+                    if not stripped:
+                        continue
+                    parts = stripped.split(None, 1)
+                    knob_name = parts[0]
+                    knob_lines = [parts[1] if len(parts) > 1 else ""]
+                    depth = self.count_braces(knob_lines[0], 0)
+                    if depth == 0:
+                        self.finish_knob(node, knob_name, knob_lines)
+                        knob_name = None
+                        knob_lines = []
+                    continue
+
+                if not stripped:
+                    continue
+                if stripped.startswith("#write_info"):
+                    self.read_write_info(stripped)
+                    continue
+                if stripped.startswith("#"):
+                    continue
+
+                match = self.NODE_START_PATTERN.match(line)
+                if match:
+                    node = NukeNode(match.group(1), groups[-1], line_number)
+                    continue
+
+                match = self.CLONE_START_PATTERN.match(line)
+                if match:
+                    original = variables.get(match.group(1))
+                    node = NukeNode(original.node_class if original is not None else "clone", groups[-1], line_number)
+                    if original is not None:
+                        node.knobs.update(original.knobs)
+                    continue
+
+                self.run_command(stripped, stacks, groups, variables)
+                #commands like define_window_layout_xml open a brace that can run over many lines
+                depth = self.count_braces(stripped, 0)
+                if depth > 0:
+                    knob_name = None
+                    knob_lines = [stripped]
+                    node = None
+
+        return self.nodes
+
+
+    def run_command(self, command, stacks, groups, variables):
+        """
+            Follows a top level command that is not a node: version, push, set and end_group.
+
+            Args:
+                command (str): The command line, stripped.
+                stacks (list): The node stack of each group level.
+                groups (list): The full name of each group level, None for the top of the script.
+                variables (dict): The nodes saved by `set` commands, by variable name.
+        """
+        parts = command.split()
+        if not parts:
+            return
+        stack = stacks[-1]
+        if parts[0] == "version":
+            self.version = " ".join(parts[1:])
+        elif parts[0] == "push" and len(parts) > 1:
+            stack.append(variables.get(parts[1][1:]) if parts[1].startswith("$") else None)
+        elif parts[0] == "set" and len(parts) > 1:
+            match = re.search(r"\[stack (\d+)\]", command)
+            index = int(match.group(1)) if match else 0
+            variables[parts[1]] = stack[-1 - index] if len(stack) > index else None
+        elif parts[0] == "end_group" and len(stacks) > 1:
+            #the group was put on the outer stack when its node closed, so it is already the top of it again
+            stacks.pop()
+            groups.pop()
+
+
+    def finish_node(self, node, stacks, variables):
+        """
+            Finishes reading a node: connects its inputs from the stack and puts it on the stack.
+
+            Args:
+                node (NukeNode): The node that was just read.
+                stacks (list): The node stack of each group level.
+                variables (dict): The nodes saved by `set` commands, by variable name.
+        """
+        self.nodes.append(node)
+        if node.node_class == "Root":
+            return
+        stack = stacks[-1]
+        default_inputs = 0 if node.node_class in self.NO_INPUT_CLASSES else 1
+        try:
+            #a mask input is written as "inputs 2+1"
+            input_count = sum(int(count) for count in node.knob("inputs", str(default_inputs)).split()[0].split("+"))
+        except (ValueError, IndexError):
+            input_count = default_inputs
+
+        for _ in range(input_count):
+            input_node = stack.pop() if stack else None
+            node.inputs.append(input_node.get_full_name() if input_node is not None else None)
+        stack.append(node)
+
+
+    def finish_knob(self, node, knob_name, knob_lines):
+        """
+            Stores a knob value that has been read in full.
+
+            Args:
+                node (NukeNode): The node the knob belongs to, None for a top level command.
+                knob_name (str): The name of the knob.
+                knob_lines (list): The lines the value was written over.
+        """
+        if node is None or knob_name is None:
+            return
+        value = self.read_value("".join(knob_lines).strip())
+        node.knobs[knob_name] = value
+        if knob_name == "name":
+            node.name = value
+
+
+    def read_write_info(self, line):
+        """
+            Reads a "#write_info" line, which Nuke writes for each Write node at the top of the script.
+
+            Args:
+                line (str): The line, such as '#write_info Write1 file:"out.####.exr" format:"1920 1080 1"'.
+        """
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            return
+        self.write_info[parts[1]] = dict(self.WRITE_INFO_PATTERN.findall(line))
+
+
+    def get_nodes(self, node_class = None, top_level_only = False):
+        """
+            Args:
+                node_class (str, optional): The class of node to return, None for every node. Defaults to None.
+                top_level_only (bool, optional): Leave out the nodes in groups. Defaults to False.
+
+            Returns:
+                list: The matching nodes, in the order they are written in the script.
+        """
+        return [node for node in self.nodes
+                if (node_class is None or node.node_class == node_class)
+                and not (top_level_only and node.parent)]
+
+
+    def get_node(self, name):
+        """
+            Args:
+                name (str): The full name of the node, such as "Write1" or "Group1.Blur1".
+
+            Returns:
+                NukeNode: The node, or None if there is no node by that name.
+        """
+        return next((node for node in self.nodes if node.node_class != "Root" and node.get_full_name() == name), None)
+
+
+    def get_frame_range(self):
+        """
+            Returns:
+                tuple: The (first_frame, last_frame) from the Root node, Nuke's default of (1, 100) if it is not set.
+        """
+        first_frame = 1
+        last_frame = 100
+        if self.root is not None:
+            try:
+                first_frame = int(self.root.knob("first_frame", first_frame))
+                last_frame = int(self.root.knob("last_frame", last_frame))
+            except ValueError:
+                pass
+        return first_frame, last_frame
+
+
+    def read_value(self, text):
+        """
+            Takes the quotes off a quoted knob value (undoing its escapes) or the outer braces off a braced one.
+
+            Args:
+                text (str): The knob value as written in the script.
+
+            Returns:
+                str: The value.
+        """
+        if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+            return re.sub(r"\\(.)", lambda match: {"n": "\n", "t": "\t"}.get(match.group(1), match.group(1)), text[1:-1])
+        if len(text) >= 2 and text[0] == "{" and text[-1] == "}" and self.count_braces(text[:-1], 0) == 1:
+            return text[1:-1].strip()
+        return text
+
+
+    def count_braces(self, text, depth):
+        """
+            Follows the brace depth through a line. Braces inside a quoted value (when not already inside braces)
+            and escaped braces are skipped. Only the braces, quotes and backslashes are looked at, so the many plain
+            lines in a script cost very little.
+
+            Args:
+                text (str): The line.
+                depth (int): The brace depth at the start of the line.
+
+            Returns:
+                int: The brace depth at the end of the line.
+        """
+        in_quotes = False
+        escaped_at = -1
+        for match in self.SPECIAL_CHARACTER_PATTERN.finditer(text):
+            character = match.group(0)
+            position = match.start()
+            if position == escaped_at:
+                continue
+            if character == "\\":
+                escaped_at = position + 1
+            elif character == '"' and depth == 0:
+                in_quotes = not in_quotes
+            elif in_quotes:
+                continue
+            elif character == "{":
+                depth += 1
+            elif character == "}":
+                depth = max(0, depth - 1)
+        return depth
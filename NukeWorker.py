@@ -0,0 +1,333 @@
+import json
+import queue
+import subprocess
+import threading
+import time
+
+
+class NukeWorker():
+    """
+        A long running `nuke -t` process that renders one job after another.
+
+        Starting Nuke for every job means paying for the license checkout, the plugin scan and Python start up every
+        time. The worker starts Nuke once with NukeWorkerScript.py and then sends it render requests over stdin as
+        single lines of json, reading the replies back from stdout. Anything else Nuke prints is passed through to
+        `on_output` so it is not lost.
+
+        The worker is restarted before a job when it has rendered `max_jobs` jobs, when its memory use is above
+        `max_memory_mb`, or when it does not answer a ping. A worker whose Nuke process dies mid job reports that
+        job with the unknown render error code (206) and is started fresh for the next one.
+
+        Attributes:
+            nuke_exe (str): The path to the Nuke executable.
+            worker_script (str): The path to NukeWorkerScript.py.
+            max_jobs (int): How many jobs to render before the Nuke process is restarted, 0 for no limit.
+            max_memory_mb (int): The memory use (in MB) above which the Nuke process is restarted, 0 for no limit.
+            response_timeout (float): How long (in seconds) to wait for a ping or start up reply.
+            on_output (callable): Called with every line Nuke prints that is not a reply. Defaults to printing it.
+            process (subprocess.Popen): The running Nuke process, None when it is not running.
+            process_lock (threading.Lock): Guards `process`, as a render can be cancelled from another thread while the
+                worker stops or restarts it.
+            jobs_done (int): The number of jobs rendered by the current Nuke process.
+            replies (queue.Queue): The replies read from the Nuke process, filled by the reader thread.
+
+        Methods:
+            __init__(nuke_exe, worker_script, max_jobs, max_memory_mb): Initializes the NukeWorker object.
+            start(): Starts the Nuke process and waits for it to be ready.
+            read_output(process, replies): Reads the Nuke output in its own thread, sorting out the replies.
+            wait_for_reply(command, request_id, timeout): Waits for a reply from the Nuke process.
+            send(request): Sends a request to the Nuke process.
+            stop(): Asks the Nuke process to quit, killing it if it does not.
+            terminate(): Kills the Nuke process straight away.
+            restart(): Stops and starts the Nuke process.
+            is_alive(): Returns whether the Nuke process is running.
+            get_pid(): Returns the process id of the Nuke process.
+            ping(): Checks that the Nuke process is answering.
+            needs_restart(): Checks the job count, memory use and health of the Nuke process.
+            render(job, write_node_name): Renders a job and returns its exit code.
+            get_memory_mb(): Returns the memory use of the Nuke process in MB.
+    """
+
+    RESPONSE_PREFIX = "BNRQ_WORKER "
+    EXIT_UNKNOWN_RENDER_ERROR = 206
+
+
+    def __init__(self, nuke_exe, worker_script, max_jobs = 50, max_memory_mb = 0):
+        """
+            Initialization method.
+
+            Args:
+                nuke_exe (str): The path to the Nuke executable.
+                worker_script (str): The path to NukeWorkerScript.py.
+                max_jobs (int, optional): Jobs to render before restarting, 0 for no limit. Defaults to 50.
+                max_memory_mb (int, optional): Memory use (MB) that forces a restart, 0 for no limit. Defaults to 0.
+        """
+        self.nuke_exe = nuke_exe
+        self.worker_script = worker_script
+        self.max_jobs = max_jobs
+        self.max_memory_mb = max_memory_mb
+        self.response_timeout = 120
+        self.on_output = print
+
+        self.process = None
+        self.process_lock = threading.Lock()
+        self.jobs_done = 0
+        self.next_id = 0
+        self.replies = queue.Queue()
+        self.reader_thread = None
+
+
+    def start(self):
+        """
+            Starts the Nuke process and waits until it says it is ready.
+
+            Returns:
+                bool: True if the worker is ready, False if Nuke did not start.
+        """
+        #verbose mode, level 2, so Nuke prints the frames it writes the same as it does for a render on its own
+        cmd = [self.nuke_exe, "-t", "-V", "2", self.worker_script]
+        print(cmd)
+        try:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, text=True, bufsize=1)
+        except OSError as e:
+            print(f"Unable to start Nuke worker: {e}")
+            return False
+
+        with self.process_lock:
+            self.process = process
+        self.jobs_done = 0
+        self.replies = queue.Queue()
+        self.reader_thread = threading.Thread(target=self.read_output, args=(process, self.replies), daemon=True)
+        self.reader_thread.start()
+
+        reply = self.wait_for_reply("ready", None, self.response_timeout)
+        if reply is None:
+            self.terminate()
+            return False
+        return True
+
+
+    def read_output(self, process, replies):
+        """
+            Reads the output of the Nuke process line by line in its own thread. Replies are put in the queue and
+            everything else is passed to `on_output`. A None is put in the queue once the output closes.
+
+            Args:
+                process (subprocess.Popen): The Nuke process to read from.
+                replies (queue.Queue): The queue to put the replies in.
+        """
+        for line in process.stdout:
+            if line.startswith(self.RESPONSE_PREFIX):
+                try:
+                    replies.put(json.loads(line[len(self.RESPONSE_PREFIX):]))
+                except ValueError:
+                    self.on_output(line.rstrip("\n"))
+            else:
+                self.on_output(line.rstrip("\n"))
+        replies.put(None)
+
+
+    def wait_for_reply(self, command, request_id, timeout = None):
+        """
+            Waits for a reply of the given command (and id) from the Nuke process.
+
+            Args:
+                command (str): The "cmd" of the reply to wait for.
+                request_id (int): The id of the request being answered, None to accept any.
+                timeout (float, optional): How long to wait in seconds, None to wait for as long as Nuke runs.
+
+            Returns:
+                dict: The reply, or None if the process closed or the wait timed out.
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None if end_time is None else max(0, end_time - time.time())
+            try:
+                reply = self.replies.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if reply is None:
+                return None
+            if reply.get("cmd") == "error":
+                print(f"Nuke worker error: {reply.get('message')}")
+            if reply.get("cmd") == command and (request_id is None or reply.get("id") == request_id):
+                return reply
+
+
+    def send(self, request):
+        """
+            Sends a request to the Nuke process.
+
+            Args:
+                request (dict): The request to send.
+
+            Returns:
+                bool: True if it was sent, False if the process is not there to receive it.
+        """
+        with self.process_lock:
+            process = self.process
+        if process is None or process.poll() is not None:
+            return False
+        try:
+            process.stdin.write(json.dumps(request) + "\n")
+            process.stdin.flush()
+            return True
+        except (OSError, ValueError):
+            return False
+
+
+    def stop(self):
+        """
+            Asks the Nuke process to quit and waits for it, killing it if it does not quit in time. The process is
+            only let go of once it has exited, so `terminate` can still kill it while it is waited on.
+        """
+        with self.process_lock:
+            process = self.process
+        if process is None:
+            return
+        self.send({"cmd": "quit"})
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        with self.process_lock:
+            if self.process is process:
+                self.process = None
+
+
+    def terminate(self):
+        """
+            Kills the Nuke process straight away. Used when the render is cancelled.
+        """
+        with self.process_lock:
+            process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+
+    def restart(self):
+        """
+            Stops the Nuke process and starts a fresh one.
+
+            Returns:
+                bool: True if the fresh worker is ready.
+        """
+        self.stop()
+        return self.start()
+
+
+    def is_alive(self):
+        """
+            Returns:
+                bool: True if the Nuke process is running.
+        """
+        with self.process_lock:
+            process = self.process
+        return process is not None and process.poll() is None
+
+
+    def get_pid(self):
+        """
+            Returns:
+                int: The process id of the Nuke process, None if it is not running.
+        """
+        with self.process_lock:
+            process = self.process
+        if process is None or process.poll() is not None:
+            return None
+        return process.pid
+
+
+    def ping(self, timeout = 10):
+        """
+            Checks that the Nuke process is still answering requests.
+
+            Args:
+                timeout (float, optional): How long to wait for the answer in seconds. Defaults to 10.
+
+            Returns:
+                bool: True if the Nuke process answered in time.
+        """
+        self.next_id += 1
+        if not self.send({"cmd": "ping", "id": self.next_id}):
+            return False
+        return self.wait_for_reply("pong", self.next_id, timeout) is not None
+
+
+    def needs_restart(self):
+        """
+            Checks if the Nuke process should be restarted before the next job.
+
+            Returns:
+                bool: True if it has rendered `max_jobs` jobs, is using more than `max_memory_mb` or is not healthy.
+        """
+        if not self.is_alive():
+            return True
+        if self.max_jobs and self.jobs_done >= self.max_jobs:
+            return True
+        memory_mb = self.get_memory_mb()
+        if self.max_memory_mb and memory_mb is not None and memory_mb > self.max_memory_mb:
+            print(f"Nuke worker is using {memory_mb:.0f}MB, restarting it")
+            return True
+        return not self.ping()
+
+
+    def render(self, job, write_node_name):
+        """
+            Renders a job in the Nuke process, starting or restarting it first if needed.
+
+            Args:
+                job (RenderJob): The job to render.
+                write_node_name (str): The name of the write node to render with.
+
+            Returns:
+                int: The exit code of the job. 206 if the Nuke process died or could not be started.
+        """
+        if self.needs_restart() and not self.restart():
+            return self.EXIT_UNKNOWN_RENDER_ERROR
+
+        self.next_id += 1
+        request = {"cmd": "render", "id": self.next_id, "script": job.script, "write_node": write_node_name,
+                   "first_frame": job.first_frame, "last_frame": job.last_frame, "step": job.step,
+                   "frame_ranges": job.frame_ranges}
+        if not self.send(request):
+            return self.EXIT_UNKNOWN_RENDER_ERROR
+
+        reply = self.wait_for_reply("result", self.next_id)
+        self.jobs_done += 1
+        if reply is None:
+            #nuke died part way through the job, the next job gets a fresh process
+            self.stop()
+            return self.EXIT_UNKNOWN_RENDER_ERROR
+        return reply.get("exit_code", self.EXIT_UNKNOWN_RENDER_ERROR)
+
+
+    def get_memory_mb(self):
+        """
+            Gets the resident memory of the Nuke process. psutil is used when it is installed, otherwise it is read
+            from /proc, which is only there on Linux.
+
+            Returns:
+                float: The memory use in MB, or None if it could not be read.
+        """
+        pid = self.get_pid()
+        if pid is None:
+            return None
+        try:
+            import psutil
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except ImportError:
+            pass
+        except Exception:
+            return None
+
+        try:
+            with open(f"/proc/{pid}/status", "r") as status_file:
+                for line in status_file:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
@@ -0,0 +1,119 @@
+import nuke
+import sys
+import os
+import json
+import time
+
+#Exit codes with constants
+EXIT_NO_WRITE_NODE = 104
+EXIT_RENDER_CANCELLED = 200
+EXIT_RENDER_ERROR = 201
+EXIT_RENDER_MEMORY_ERROR = 202
+EXIT_RENDER_PROGRESS_ABORTED = 203
+EXIT_RENDER_LICENSE_ERROR = 204
+EXIT_RENDER_USER_ABORT = 205
+EXIT_UNKNOWN_RENDER_ERROR = 206
+EXIT_NO_SCRIPT = 404
+
+#Nuke prints its own output to stdout as well, so every reply starts with this to tell them apart
+RESPONSE_PREFIX = "BNRQ_WORKER "
+
+sys.stdout = sys.__stdout__
+
+
+def send(message):
+    """
+    Send a reply to BNRQ as a single line of json.
+
+    Args:
+        message (dict): The reply to send.
+    """
+    sys.stdout.write(RESPONSE_PREFIX + json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def render_job(request):
+    """
+    Open the requested script, render it with the requested write node and close it again.
+
+    Args:
+        request (dict): The render request. It holds the script path, the write node name and optionally
+            the first_frame, last_frame and step to render, or separate frame_ranges to render one after another.
+
+    Returns:
+        int: The exit code for the job, 0 if it rendered.
+    """
+    script = request["script"]
+    if not os.path.isfile(script):
+        return EXIT_NO_SCRIPT
+
+    try:
+        nuke.scriptOpen(script)
+    except BaseException as e:
+        print(f"Unable to open {script}: {e}")
+        return EXIT_NO_SCRIPT
+
+    try:
+        write_node = nuke.toNode(request.get("write_node", "Write1"))
+        if write_node is None:
+            return EXIT_NO_WRITE_NODE
+
+        first_frame = request.get("first_frame")
+        last_frame = request.get("last_frame")
+        if first_frame is None:
+            first_frame = nuke.root().firstFrame()
+        if last_frame is None:
+            last_frame = nuke.root().lastFrame()
+
+        frame_ranges = request.get("frame_ranges") or [(first_frame, last_frame)]
+
+        try:
+            for range_first, range_last in frame_ranges:
+                nuke.execute(write_node, start = range_first, end = range_last, incr = request.get("step", 1))
+        except BaseException as e:
+            print(f"Render error in {script}: {e}")
+            return EXIT_RENDER_ERROR
+        return 0
+    finally:
+        nuke.scriptClose()
+
+
+def main():
+    """
+    Read requests from stdin one line at a time and answer each one on stdout until told to quit
+    or stdin is closed.
+
+    Requests are json objects with a "cmd" of "ping", "render" or "quit".
+    """
+    jobs_done = 0
+    send({"cmd": "ready", "pid": os.getpid()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            send({"cmd": "error", "message": f"Bad request: {line}"})
+            continue
+
+        command = request.get("cmd")
+        if command == "ping":
+            send({"cmd": "pong", "id": request.get("id"), "jobs_done": jobs_done})
+        elif command == "render":
+            start_time = time.time()
+            exit_code = render_job(request)
+            jobs_done += 1
+            send({"cmd": "result", "id": request.get("id"), "script": request.get("script"),
+                  "exit_code": exit_code, "elapsed_time": time.time() - start_time})
+        elif command == "quit":
+            break
+        else:
+            send({"cmd": "error", "id": request.get("id"), "message": f"Unknown command: {command}"})
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from PySide6 import QtWidgets, QtCore
 from PySide6.QtGui import QMovie, QColor, QIcon, QPalette
 from PySide6.QtWidgets import (
     QWidget, QPushButton, QHBoxLayout, QLabel, QLineEdit, QVBoxLayout, QFileDialog,
-    QMessageBox, QApplication, QDialog, QCheckBox
+    QMessageBox, QApplication, QDialog, QCheckBox, QSpinBox
 )
 from PySide6.QtCore import(QSettings, Qt, QUrl, QThread, QCoreApplication)
 
@@ -25,6 +25,16 @@ class PreferencesTab(QDialog):
             nuke_exe_edit: A QLineEdit widget used to display and edit the path to the Nuke executable.
             search_start_edit: A QLineEdit widget used to display and edit the starting folder for the file search.
             write_node_edit: A QLineEdit widget used to display and edit the name of the write node.
+            render_workers_spinbox: A QSpinBox widget used to display and edit how many Nuke processes render at once.
+            persistent_workers_checkbox: A QCheckBox used to turn keeping Nuke running between jobs on and off.
+            chunk_size_spinbox: A QSpinBox widget used to display and edit how many frames are rendered per chunk.
+            render_cache_checkbox: A QCheckBox used to turn skipping scripts unchanged since their last render on and off.
+            incremental_render_checkbox: A QCheckBox used to turn rendering only missing or out of date frames on and off.
+            render_daemon_checkbox: A QCheckBox used to turn handing renders to the background render daemon on and off.
+            admission_control_checkbox: A QCheckBox used to turn waiting for free memory and CPU before each render on and off.
+            adaptive_workers_checkbox: A QCheckBox used to turn following the machine's frames per second with the number of workers on and off.
+            infer_dependencies_checkbox: A QCheckBox used to turn waiting for the scripts that write what a script reads on and off.
+            match_nuke_version_checkbox: A QCheckBox used to turn rendering each script with the Nuke version it was saved with on and off.
         
         Methods:
             update_nuke_path(): A method that updates the Nuke executable path based on the user's selection.
@@ -114,6 +124,64 @@ class PreferencesTab(QDialog):
                 self.settings.render_nuke_open == True 
             else False
         )
+
+        render_workers_label = QLabel("Render Workers:")
+        self.render_workers_spinbox = QSpinBox()
+        self.render_workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.render_workers_spinbox.setValue(self.settings.render_workers)
+        self.render_workers_spinbox.setToolTip("How many Nuke processes render at the same time. "
+                                               "Each one uses its own Nuke license.")
+
+        chunk_size_label = QLabel("Frames per Chunk:")
+        self.chunk_size_spinbox = QSpinBox()
+        self.chunk_size_spinbox.setRange(0, 100000)
+        self.chunk_size_spinbox.setSpecialValueText("Off")
+        self.chunk_size_spinbox.setValue(self.settings.chunk_size)
+        self.chunk_size_spinbox.setToolTip("Splits each script's frame range into chunks of this many frames, "
+                                           "each rendered by its own worker.")
+
+        self.persistent_workers_checkbox = QCheckBox("Keep Nuke running between scripts in each worker")
+        self.persistent_workers_checkbox.setChecked(self.settings.persistent_workers == True)
+        self.persistent_workers_checkbox.setToolTip("Skips Nuke's start up time for every script. Nuke is restarted "
+                                                    "after a set number of scripts or if it uses too much memory.")
+
+        self.render_cache_checkbox = QCheckBox("Skip scripts that have not changed since their last render")
+        self.render_cache_checkbox.setChecked(self.settings.render_cache == True)
+        self.render_cache_checkbox.setToolTip("A script is skipped if it, its write node, the Nuke version and every "
+                                              "Read input are the same as a render whose output is still on disk.")
+
+        self.incremental_render_checkbox = QCheckBox("Only render frames that are missing or out of date")
+        self.incremental_render_checkbox.setChecked(self.settings.incremental_render == True)
+        self.incremental_render_checkbox.setToolTip("Output frames that are missing, truncated, or older than the "
+                                                    "script or its Read inputs are rendered, the rest are kept.")
+
+        self.render_daemon_checkbox = QCheckBox("Render in the background, renders carry on after BNRQ is closed")
+        self.render_daemon_checkbox.setChecked(self.settings.render_daemon == True)
+        self.render_daemon_checkbox.setToolTip("Renders are handed to the render daemon, a process of its own. "
+                                               "BNRQ picks their progress up again when it is next opened.")
+
+        self.admission_control_checkbox = QCheckBox("Wait for free memory and CPU before starting another render")
+        self.admission_control_checkbox.setChecked(self.settings.admission_control == True)
+        self.admission_control_checkbox.setToolTip("Another Nuke process is only started when the memory its script "
+                                                   "needed last time is free and the CPUs are not saturated.")
+
+        self.adaptive_workers_checkbox = QCheckBox("Adjust the number of render workers to what the machine keeps up with")
+        self.adaptive_workers_checkbox.setChecked(self.settings.adaptive_workers == True)
+        self.adaptive_workers_checkbox.setToolTip("Starts at Render Workers and adds workers while the frames per second "
+                                                  "keep going up, backing off when they stop or memory or the disk "
+                                                  "runs short.")
+
+        self.infer_dependencies_checkbox = QCheckBox("Render scripts after the scripts in the queue that write what they read")
+        self.infer_dependencies_checkbox.setChecked(self.settings.infer_dependencies == True)
+        self.infer_dependencies_checkbox.setToolTip("A script whose Read nodes read the output of another script in "
+                                                    "the queue waits for that script to render, and is not rendered "
+                                                    "if it fails.")
+
+        self.match_nuke_version_checkbox = QCheckBox("Render each script with the Nuke version it was saved with")
+        self.match_nuke_version_checkbox.setChecked(self.settings.match_nuke_version == True)
+        self.match_nuke_version_checkbox.setToolTip("Uses the installed Nuke closest to the version in the script's "
+                                                    "header, a newer patch or minor release if that version is not "
+                                                    "installed. The Nuke executable above is used when none is close.")
         
         self.save_button = QPushButton("Save")
         self.save_button.clicked.connect(self.save_button_clicked)
@@ -135,6 +203,16 @@ class PreferencesTab(QDialog):
         self.search_start_edit.textChanged.connect(self.settings_changed)
         self.file_name_checkbox.stateChanged.connect(self.settings_changed)
         self.render_nuke_open_checkbox.stateChanged.connect(self.settings_changed)
+        self.render_workers_spinbox.valueChanged.connect(self.settings_changed)
+        self.chunk_size_spinbox.valueChanged.connect(self.settings_changed)
+        self.persistent_workers_checkbox.stateChanged.connect(self.settings_changed)
+        self.render_cache_checkbox.stateChanged.connect(self.settings_changed)
+        self.incremental_render_checkbox.stateChanged.connect(self.settings_changed)
+        self.render_daemon_checkbox.stateChanged.connect(self.settings_changed)
+        self.admission_control_checkbox.stateChanged.connect(self.settings_changed)
+        self.adaptive_workers_checkbox.stateChanged.connect(self.settings_changed)
+        self.infer_dependencies_checkbox.stateChanged.connect(self.settings_changed)
+        self.match_nuke_version_checkbox.stateChanged.connect(self.settings_changed)
 
         # Add the widgets to layouts
         nuke_exe_layout = QHBoxLayout()
@@ -149,6 +227,12 @@ class PreferencesTab(QDialog):
         write_node_layout = QHBoxLayout()
         write_node_layout.addWidget(write_node_label)
         write_node_layout.addWidget(self.write_node_edit)
+        render_workers_layout = QHBoxLayout()
+        render_workers_layout.addWidget(render_workers_label)
+        render_workers_layout.addWidget(self.render_workers_spinbox)
+        render_workers_layout.addWidget(chunk_size_label)
+        render_workers_layout.addWidget(self.chunk_size_spinbox)
+        render_workers_layout.addStretch()
         button_layout = QHBoxLayout()
         button_layout.addStretch()
         button_layout.addWidget(self.warning_label)
@@ -172,6 +256,15 @@ class PreferencesTab(QDialog):
         vbox.addLayout(write_node_layout)
         vbox.addWidget(self.file_name_checkbox)
         vbox.addWidget(self.render_nuke_open_checkbox)
+        vbox.addLayout(render_workers_layout)
+        vbox.addWidget(self.persistent_workers_checkbox)
+        vbox.addWidget(self.render_cache_checkbox)
+        vbox.addWidget(self.incremental_render_checkbox)
+        vbox.addWidget(self.render_daemon_checkbox)
+        vbox.addWidget(self.admission_control_checkbox)
+        vbox.addWidget(self.adaptive_workers_checkbox)
+        vbox.addWidget(self.infer_dependencies_checkbox)
+        vbox.addWidget(self.match_nuke_version_checkbox)
         vbox.addLayout(button_layout)
         vbox.addWidget(danger_zone_text)
         vbox.addLayout(danger_zone_layout)
@@ -184,7 +277,7 @@ class PreferencesTab(QDialog):
         self.dialog.setModal(True)
         self.dialog.setWindowFlags(self.dialog.windowFlags() & ~Qt.WindowContextHelpButtonHint)
         self.dialog.setWindowFlags(self.dialog.windowFlags() | Qt.WindowCloseButtonHint)
-        self.dialog.setFixedSize(750, 300)
+        self.dialog.setFixedSize(750, 510)
 
         self.settings.json_created.connect(self.enable_del_button)
     
@@ -243,6 +336,16 @@ class PreferencesTab(QDialog):
         self.settings.folder_search_start = self.search_start_edit.text()
         self.settings.full_filepath_name = self.file_name_checkbox.isChecked()
         self.settings.render_nuke_open = self.render_nuke_open_checkbox.isChecked()
+        self.settings.render_workers = self.render_workers_spinbox.value()
+        self.settings.chunk_size = self.chunk_size_spinbox.value()
+        self.settings.persistent_workers = self.persistent_workers_checkbox.isChecked()
+        self.settings.render_cache = self.render_cache_checkbox.isChecked()
+        self.settings.incremental_render = self.incremental_render_checkbox.isChecked()
+        self.settings.render_daemon = self.render_daemon_checkbox.isChecked()
+        self.settings.admission_control = self.admission_control_checkbox.isChecked()
+        self.settings.adaptive_workers = self.adaptive_workers_checkbox.isChecked()
+        self.settings.infer_dependencies = self.infer_dependencies_checkbox.isChecked()
+        self.settings.match_nuke_version = self.match_nuke_version_checkbox.isChecked()
         self.settings.save_settings()
 
         self.disable_save_buttons()
@@ -269,7 +372,7 @@ class PreferencesTab(QDialog):
         #Thread creator
         self.threads = QThread(self)
 
-        self.nuke_finder_worker = SeparateThread()
+        self.nuke_finder_worker = SeparateThread(settings=self.settings)
         self.nuke_finder_worker.moveToThread(self.threads)
         self.nuke_finder_worker.nuke_path_ready.connect(self.handle_nuke_path_search_result)
         self.nuke_finder_worker.nuke_path_ready.connect(self.loading_label.hide)
@@ -316,6 +419,16 @@ class PreferencesTab(QDialog):
                     self.settings.render_nuke_open == True 
                 else False
             )
+            self.render_workers_spinbox.setValue(self.settings.render_workers)
+            self.chunk_size_spinbox.setValue(self.settings.chunk_size)
+            self.persistent_workers_checkbox.setChecked(self.settings.persistent_workers == True)
+            self.render_cache_checkbox.setChecked(self.settings.render_cache == True)
+            self.incremental_render_checkbox.setChecked(self.settings.incremental_render == True)
+            self.render_daemon_checkbox.setChecked(self.settings.render_daemon == True)
+            self.admission_control_checkbox.setChecked(self.settings.admission_control == True)
+            self.adaptive_workers_checkbox.setChecked(self.settings.adaptive_workers == True)
+            self.infer_dependencies_checkbox.setChecked(self.settings.infer_dependencies == True)
+            self.match_nuke_version_checkbox.setChecked(self.settings.match_nuke_version == True)
             self.disable_save_buttons()
             
             
@@ -0,0 +1,431 @@
+import os
+import sys
+import json
+import signal
+import socket
+import argparse
+import threading
+import concurrent.futures
+
+from Settings import Settings
+from RenderJob import RenderJob
+
+from PySide6.QtCore import Qt, QCoreApplication
+
+
+class RenderAgent():
+    """
+        Renders units of work for a render coordinator (RenderCoordinator) on another machine, or on this one.
+
+        The agent connects to the coordinator, registers with its name and the number of renders it can run at once
+        (its slots), and then every heartbeat interval reports the frames each of its renders has written and pulls
+        new units for its free slots. Units are rendered in Nuke through SeparateThread the same way a local render
+        is, one pool thread for each slot. With `admission_control` on, a unit is only pulled alongside the ones
+        rendering when the machine has the memory and CPU for it.
+
+        The coordinator can ask the agent to stop a unit early so the frames after it can go to another agent. The
+        agent agrees to stop no earlier than the frame it is on, and the unit then finishes as soon as that many frames
+        have been written. A unit the coordinator cancels is stopped and not reported.
+
+        If the connection drops the renders are stopped, as the coordinator hands their frames out again, and the
+        agent keeps trying to connect until it is stopped with Ctrl+C.
+
+        Attributes:
+            settings (Settings): The settings to render with.
+            host (str): The address of the coordinator.
+            port (int): The port the coordinator listens on.
+            token (str): The token the coordinator expects.
+            slots (int): The number of units rendered at once.
+            name (str): The name the agent registers with.
+            agent_id (int): The id the coordinator gave the agent, None when not registered.
+            heartbeat_interval (float): Seconds between heartbeats, as asked for by the coordinator.
+            connection (socket.socket): The connection to the coordinator, None when not connected.
+            reader (file): Reads the replies from the connection.
+            request_lock (threading.Lock): Keeps each request and its reply together, as the pool threads send results.
+            units (dict): The "job", "spec", "stop_after" and "cancelled" of each unit rendering, by unit id.
+            units_lock (threading.Lock): Guards `units`.
+            executor (concurrent.futures.ThreadPoolExecutor): The pool the units render in.
+            render_worker (SeparateThread): The render engine the units render through, None until the first unit.
+            stop_event (threading.Event): Set once the agent has been asked to stop.
+
+        Methods:
+            __init__(settings, host, port, token, slots, name): Initializes the RenderAgent object.
+            main(argv): Reads the command line and runs the agent until it is stopped.
+            run(): Works for the coordinator, connecting again whenever the connection drops.
+            connect(): Connects and registers with the coordinator.
+            disconnect(): Closes the connection to the coordinator.
+            request(cmd, **args): Sends a request to the coordinator and returns the reply.
+            work(): Sends heartbeats and pulls units until the connection drops.
+            handle_command(command): Carries out a command from the coordinator.
+            start_unit(spec): Starts rendering a unit.
+            render_unit(unit_id): Renders a unit and reports how it went.
+            handle_frame_progress(script, frames_done, frames_total, fps): Stops units that have written enough frames.
+            get_render_worker(): Returns the render engine.
+            stop_units(): Stops every unit rendering.
+            request_stop(): Stops the agent.
+    """
+
+    RECONNECT_DELAY = 5.0
+
+
+    def __init__(self, settings, host, port, token, slots, name):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings to render with.
+                host (str): The address of the coordinator.
+                port (int): The port the coordinator listens on.
+                token (str): The token the coordinator expects.
+                slots (int): The number of units rendered at once.
+                name (str): The name the agent registers with.
+        """
+        self.settings = settings
+        self.host = host
+        self.port = port
+        self.token = token
+        self.slots = max(1, slots)
+        self.name = name
+        self.agent_id = None
+        self.heartbeat_interval = 1.0
+        self.connection = None
+        self.reader = None
+        self.request_lock = threading.Lock()
+        self.units = {}
+        self.units_lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.slots)
+        self.render_worker = None
+        self.stop_event = threading.Event()
+
+
+    @classmethod
+    def main(cls, argv):
+        """
+            Reads the command line and runs the agent until it is stopped.
+
+            Args:
+                argv (list): The command line arguments, without the program name.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        #the render engine's signals and timers need an application, it is never run as events are not used
+        app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+        settings = Settings()
+        settings.load_settings()
+        settings.load_settings_from_json()
+
+        parser = argparse.ArgumentParser(prog="RenderQ.py --agent",
+                                         description="Render Nuke scripts for a render coordinator.")
+        parser.add_argument("host", help="the address of the machine running the render coordinator")
+        parser.add_argument("--port", type=int, default=settings.farm_port,
+                            help=f"the port the coordinator listens on, defaults to {settings.farm_port}")
+        parser.add_argument("--token", default=settings.farm_token,
+                            help="the token the coordinator printed when it started, if none was set")
+        parser.add_argument("--slots", type=int, default=settings.render_workers,
+                            help=f"the number of renders to run at once, defaults to {settings.render_workers}")
+        parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}",
+                            help="the name to show on the coordinator")
+        parser.add_argument("--nuke", metavar="PATH", help="the Nuke executable to render with")
+        try:
+            args = parser.parse_args([arg for arg in argv if arg != "--agent"])
+        except SystemExit as e:
+            return e.code
+
+        if args.nuke:
+            settings.nuke_exe = args.nuke
+        if not settings.nuke_exe or not os.path.isfile(settings.nuke_exe):
+            print(f"Nuke executable not found: {settings.nuke_exe}")
+            return 1
+        if not args.token:
+            print("No token given, use --token with the one the render coordinator printed")
+            return 1
+
+        agent = cls(settings, args.host, args.port, args.token, args.slots, args.name)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, lambda signum, frame: agent.request_stop())
+            signal.signal(signal.SIGTERM, lambda signum, frame: agent.request_stop())
+        return agent.run()
+
+
+    def run(self):
+        """
+            Works for the coordinator until the agent is stopped. Whenever the connection drops, or the coordinator
+            no longer knows the agent, the renders are stopped and the agent connects again after RECONNECT_DELAY
+            seconds.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.connect()
+                    self.work()
+                except (ConnectionError, RuntimeError) as e:
+                    if self.stop_event.is_set():
+                        break
+                    print(f"{e}, connecting again in {self.RECONNECT_DELAY:.0f}s")
+                finally:
+                    self.stop_units()
+                    self.disconnect()
+                self.stop_event.wait(self.RECONNECT_DELAY)
+        finally:
+            self.executor.shutdown(wait=True)
+            if self.render_worker is not None:
+                self.render_worker.stop_workers()
+                if self.render_worker.admission is not None:
+                    self.render_worker.admission.stop()
+        return 0
+
+
+    def connect(self):
+        """
+            Connects to the coordinator and registers.
+
+            Raises:
+                ConnectionError: If the coordinator could not be reached.
+                RuntimeError: If the coordinator turned the agent down.
+        """
+        try:
+            self.connection = socket.create_connection((self.host, self.port), timeout=30)
+        except OSError as e:
+            raise ConnectionError(f"Unable to reach the render coordinator at {self.host}:{self.port}: {e}") from e
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.connection.makefile("rb")
+        self.agent_id = None
+        reply = self.request("register", name=self.name, slots=self.slots)
+        self.agent_id = reply["agent_id"]
+        self.heartbeat_interval = float(reply.get("heartbeat_interval", self.heartbeat_interval))
+        print(f"Registered with the render coordinator at {self.host}:{self.port} as {self.name}")
+
+
+    def disconnect(self):
+        """
+            Closes the connection to the coordinator.
+        """
+        with self.request_lock:
+            if self.reader is not None:
+                self.reader.close()
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            self.reader = None
+            self.agent_id = None
+
+
+    def request(self, cmd, **args):
+        """
+            Sends one request to the coordinator and reads the reply.
+
+            Args:
+                cmd (str): The command, see RenderCoordinator.
+                **args: The rest of the request.
+
+            Returns:
+                dict: The reply.
+
+            Raises:
+                ConnectionError: If the connection dropped.
+                RuntimeError: If the coordinator turned the request down.
+        """
+        request = {"cmd": cmd, "token": self.token, "agent_id": self.agent_id}
+        request.update(args)
+        with self.request_lock:
+            if self.connection is None:
+                raise ConnectionError("Not connected to the render coordinator")
+            try:
+                self.connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+                line = self.reader.readline()
+            except (OSError, ValueError) as e:
+                raise ConnectionError(f"Lost the render coordinator: {e}") from e
+        if not line:
+            raise ConnectionError("The render coordinator closed the connection")
+        try:
+            reply = json.loads(line)
+        except ValueError as e:
+            raise ConnectionError(f"Bad reply from the render coordinator: {e}") from e
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "The render coordinator turned the request down"))
+        return reply
+
+
+    def work(self):
+        """
+            Sends a heartbeat with the progress of every unit, carries out the commands that come back and pulls
+            units for the free slots, once every heartbeat interval until the agent is stopped.
+
+            Raises:
+                ConnectionError: If the connection dropped.
+                RuntimeError: If the coordinator no longer knows the agent.
+        """
+        while not self.stop_event.is_set():
+            with self.units_lock:
+                reports = {}
+                for unit_id, unit in self.units.items():
+                    parser = self.render_worker.running_parsers.get(unit["job"])
+                    reports[unit_id] = {"frames_done": unit["job"].frames_done,
+                                        "fps": round(parser.get_fps(), 2) if parser is not None else 0.0}
+                free_slots = self.slots - len(self.units)
+                admission = self.render_worker.admission if self.render_worker is not None else None
+                if free_slots > 0 and self.units and admission is not None and self.settings.admission_control == True:
+                    #the next unit's script is not known until it is pulled, so it is taken one at a time
+                    free_slots = 1 if admission.can_start(None) else 0
+
+            for command in self.request("heartbeat", units=reports)["commands"]:
+                self.handle_command(command)
+            if free_slots > 0:
+                for spec in self.request("pull", free_slots=free_slots)["units"]:
+                    self.start_unit(spec)
+            self.stop_event.wait(self.heartbeat_interval)
+
+
+    def handle_command(self, command):
+        """
+            Carries out a command from the coordinator. A truncate is answered with the last frame the unit will
+            now render, which is never before the frame it is on.
+
+            Args:
+                command (dict): The command, with its "type" and "unit_id".
+
+            Raises:
+                ConnectionError: If the connection dropped.
+                RuntimeError: If the coordinator no longer knows the agent.
+        """
+        unit_id = command.get("unit_id")
+        with self.units_lock:
+            unit = self.units.get(unit_id)
+            if unit is None:
+                return
+            job = unit["job"]
+            if command.get("type") == "cancel":
+                unit["cancelled"] = True
+                print(f"The render coordinator cancelled {job}")
+                self.render_worker.stop_job(job)
+                return
+            if command.get("type") != "truncate" or job.first_frame is None:
+                return
+            #the frame being rendered now is finished rather than thrown away
+            last_frame = min(job.last_frame, max(int(command["last"]), job.first_frame + job.frames_done * job.step))
+            stop_now = False
+            if last_frame < job.last_frame:
+                unit["stop_after"] = len(range(job.first_frame, last_frame + 1, job.step))
+                stop_now = job.frames_done >= unit["stop_after"]
+        self.request("truncated", unit_id=unit_id, last=last_frame)
+        if stop_now:
+            self.render_worker.stop_job(job)
+
+
+    def start_unit(self, spec):
+        """
+            Starts rendering a unit in the pool.
+
+            Args:
+                spec (dict): The "unit_id", "script", "write_node", "first", "last" and "step" of the unit.
+        """
+        job = RenderJob(spec["script"], spec.get("first"), spec.get("last"), spec.get("step", 1))
+        #unit ids are unique, so each unit counts its frames on its own
+        job.queue_index = spec["unit_id"]
+        #the coordinator renders one batch at a time and a batch has one write node, so units never mix them
+        self.get_render_worker().settings.write_node_name = spec["write_node"]
+        with self.units_lock:
+            self.units[spec["unit_id"]] = {"job": job, "spec": spec, "stop_after": None, "cancelled": False}
+        print(f"Rendering {job}")
+        self.executor.submit(self.render_unit, spec["unit_id"])
+
+
+    def render_unit(self, unit_id):
+        """
+            Renders a unit in a pool thread and reports how it went, unless it was cancelled or the connection has
+            dropped since it started. A unit that was stopped early because it was truncated counts as rendered.
+
+            Args:
+                unit_id (int): The id of the unit.
+        """
+        with self.units_lock:
+            unit = self.units[unit_id]
+        job = unit["job"]
+        agent_id = self.agent_id
+        if unit["cancelled"]:
+            return
+        try:
+            exit_code = self.render_worker.render_nuke_script(job)
+        except Exception as e:
+            print(f"Render job {job} failed: {e}")
+            exit_code = 206
+        with self.units_lock:
+            self.units.pop(unit_id, None)
+        if unit["stop_after"] is not None and job.frames_done >= unit["stop_after"]:
+            exit_code = 0
+        if unit["cancelled"] or agent_id != self.agent_id:
+            return
+        print(f"{job} finished with exit code {exit_code}")
+        try:
+            self.request("result", unit_id=unit_id, exit_code=exit_code if exit_code is not None else 206,
+                         frames_done=job.frames_done)
+        except (ConnectionError, RuntimeError) as e:
+            #the coordinator hands the unit out again once it gives up on this agent
+            print(f"Unable to report {job}: {e}")
+
+
+    def handle_frame_progress(self, script, frames_done, frames_total, fps):
+        """
+            Stops every unit of the script that has written all the frames it is left with after a truncate. Called
+            from the pool threads as frames are written.
+
+            Args:
+                script (str): The script a frame was written for.
+                frames_done (int): The frames written by the unit.
+                frames_total (int): The frames the unit renders.
+                fps (float): The frames the unit writes per second.
+        """
+        with self.units_lock:
+            finished_jobs = [unit["job"] for unit in self.units.values()
+                             if unit["job"].script == script and unit["stop_after"] is not None
+                             and unit["job"].frames_done >= unit["stop_after"]]
+        for job in finished_jobs:
+            self.render_worker.stop_job(job)
+
+
+    def get_render_worker(self):
+        """
+            Returns the render engine, making it the first time. It is made from the main thread when a unit starts,
+            so its timer belongs to that thread.
+
+            Returns:
+                SeparateThread: The render engine.
+        """
+        #imported here so the agent can report a bad command line before the render engine has loaded
+        from SeparateThread import SeparateThread
+
+        if self.render_worker is None:
+            self.render_worker = SeparateThread(settings=self.settings)
+            self.render_worker.frame_progress.connect(self.handle_frame_progress, Qt.DirectConnection)
+            if self.render_worker.admission is not None:
+                self.render_worker.admission.start()
+        return self.render_worker
+
+
+    def stop_units(self):
+        """
+            Stops every unit rendering, without reporting them.
+        """
+        with self.units_lock:
+            units = list(self.units.values())
+            for unit in units:
+                unit["cancelled"] = True
+        for unit in units:
+            self.render_worker.stop_job(unit["job"])
+
+
+    def request_stop(self):
+        """
+            Stops the agent. Its renders are stopped and the coordinator hands them out again.
+        """
+        self.stop_event.set()
+        connection = self.connection
+        if connection is not None:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
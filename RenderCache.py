@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from InputScanner import InputScanner
+
+
+class RenderCache():
+    """
+        Remembers the scripts that rendered successfully so an unchanged script is not rendered again.
+
+        Each successful render is stored under a key made from a hash of the .nk file, the write node rendered, the
+        Nuke executable used and the modification time and size of every frame the Read nodes read. If any of those
+        change the key changes, so a script only matches a stored render when nothing going into it has changed. A
+        match is only used if every output frame of that render is still on disk and not empty.
+
+        The entries are kept in a json manifest in the render queue folder. Entries are evicted when they are older
+        than `max_age_days`, when their script no longer exists, and (oldest first) when there are more than
+        `max_entries`.
+
+        Attributes:
+            manifest_filepath (str): The path of the json manifest, None to keep the cache in memory only.
+            script_cache (ScriptMetadataCache): The cache the script details are read from.
+            input_scanner (InputScanner): Lists the Read and output folders.
+            max_entries (int): The most renders to remember.
+            max_age_days (float): How long a render is remembered for, in days.
+            entries (dict): The stored renders, by key.
+            dirty (bool): True if the entries have changed since they were last saved.
+
+        Methods:
+            __init__(manifest_filepath, script_cache, input_scanner, max_entries, max_age_days): Initializes the RenderCache object.
+            get_key(script_path, write_node_name, nuke_exe): Works out the cache key of a script.
+            hash_file(path): Returns the sha256 hash of a file.
+            get_input_stamps(script_path, metadata): Returns the modification times and sizes of the Read frames.
+            is_cached(key): Returns whether a key matches a stored render whose output is still on disk.
+            get_output_read(script_path, write_node_name, metadata): Describes the output frames of a render.
+            record(key, script_path, write_node_name): Stores a successful render.
+            evict(): Drops old, orphaned and surplus entries.
+            load(): Loads the manifest.
+            save(): Saves the manifest if it has changed.
+    """
+
+    MANIFEST_VERSION = 1
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+
+    def __init__(self, manifest_filepath, script_cache, input_scanner = None, max_entries = 5000, max_age_days = 30):
+        """
+            Initialization method.
+
+            Args:
+                manifest_filepath (str): The json manifest to keep the cache in, None to keep it in memory only.
+                script_cache (ScriptMetadataCache): The cache to read the script details from.
+                input_scanner (InputScanner, optional): The scanner to list folders with. A new one is made if not
+                    given. Defaults to None.
+                max_entries (int, optional): The most renders to remember. Defaults to 5000.
+                max_age_days (float, optional): How long a render is remembered for, in days. Defaults to 30.
+        """
+        self.manifest_filepath = manifest_filepath
+        self.script_cache = script_cache
+        self.input_scanner = input_scanner if input_scanner is not None else InputScanner()
+        self.max_entries = max(1, max_entries)
+        self.max_age_days = max_age_days
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+
+    def get_key(self, script_path, write_node_name, nuke_exe):
+        """
+            Works out the cache key of a script as it is now.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                write_node_name (str): The name of the write node to render with.
+                nuke_exe (str): The path of the Nuke executable to render with.
+
+            Returns:
+                str: The key, or None if the script or one of its inputs could not be read (it is then never cached).
+        """
+        try:
+            metadata = self.script_cache.get(script_path)
+            input_stamps = self.get_input_stamps(script_path, metadata)
+            if input_stamps is None:
+                return None
+            key_data = {
+                "script": self.hash_file(script_path),
+                "write_node": write_node_name,
+                "nuke": os.path.normcase(os.path.abspath(nuke_exe or "")),
+                "inputs": input_stamps
+            }
+        except OSError:
+            return None
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+    def hash_file(self, path):
+        """
+            Args:
+                path (str): The path of the file.
+
+            Returns:
+                str: The sha256 hash of the file contents.
+
+            Raises:
+                OSError: If the file could not be read.
+        """
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as hashed_file:
+            for block in iter(lambda: hashed_file.read(self.HASH_BLOCK_SIZE), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+
+    def get_input_stamps(self, script_path, metadata):
+        """
+            Gets the modification time and size of every frame the Read nodes read, listing each folder once.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                metadata (dict): The script details from the script cache.
+
+            Returns:
+                list: A [file name, mtime, size] for each frame, in order. None if a Read uses an expression or
+                    reads a frame that is missing, as its inputs can not then be pinned down.
+        """
+        base_directory = os.path.dirname(script_path)
+        listings = {}
+        stamps = []
+        for read in metadata["reads"]:
+            if not read["file"] or "[" in read["file"] or "%V" in read["file"] or "%v" in read["file"]:
+                return None
+            directory = os.path.dirname(read["file"])
+            if not os.path.isabs(directory):
+                directory = os.path.join(base_directory, directory)
+            directory = os.path.normpath(directory)
+            if directory not in listings:
+                listings[directory] = self.input_scanner.list_directory(directory)
+            if listings[directory] is None:
+                return None
+
+            basename = os.path.basename(read["file"])
+            if InputScanner.PADDING_PATTERN.search(basename):
+                frames = self.input_scanner.get_needed_frames(read, metadata["frame_range"])
+                names = [self.input_scanner.get_frame_name(basename, frame) for frame in frames]
+            else:
+                names = [basename]
+            for name in names:
+                entry = listings[directory].get(name)
+                if entry is None:
+                    return None
+                stat = entry.stat()
+                stamps.append([os.path.join(directory, name), stat.st_mtime, stat.st_size])
+        return stamps
+
+
+    def is_cached(self, key):
+        """
+            Checks if a key matches a stored render whose output frames are all still on disk and not empty.
+
+            Args:
+                key (str): The cache key of a script, from get_key.
+
+            Returns:
+                bool: True if the script does not need rendering.
+        """
+        if key is None:
+            return False
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        try:
+            metadata = self.script_cache.get(entry["script"])
+        except OSError:
+            return False
+        output_read = self.get_output_read(entry["script"], entry["write_node"], metadata)
+        if output_read is None:
+            return False
+        result = self.input_scanner.scan_reads([output_read], metadata["frame_range"],
+                                               os.path.dirname(entry["script"]))[0]
+        if result["error"] or result["missing"] or result["empty"]:
+            return False
+
+        with self.lock:
+            if key in self.entries:
+                self.entries[key]["used"] = time.time()
+                self.dirty = True
+        return True
+
+
+    def get_output_read(self, script_path, write_node_name, metadata):
+        """
+            Describes the output frames of a render in the same way as a Read node, so they can be checked with the
+            input scanner.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                write_node_name (str): The name of the write node rendered.
+                metadata (dict): The script details from the script cache.
+
+            Returns:
+                dict: The "name", "file", "first" and "last" frame of the output. None if the output path can not
+                    be worked out.
+        """
+        write_knobs = metadata["write_nodes"].get(write_node_name)
+        if not write_knobs or not write_knobs.get("file") or "[" in write_knobs["file"]:
+            return None
+        first_frame, last_frame = metadata["frame_range"]
+        return {"name": write_node_name, "file": write_knobs["file"], "first": first_frame, "last": last_frame}
+
+
+    def record(self, key, script_path, write_node_name):
+        """
+            Stores a successful render under its key.
+
+            Args:
+                key (str): The cache key the script had when it was rendered.
+                script_path (str): The path of the .nk script.
+                write_node_name (str): The name of the write node rendered.
+        """
+        if key is None:
+            return
+        with self.lock:
+            now = time.time()
+            self.entries[key] = {"script": script_path, "write_node": write_node_name, "rendered": now, "used": now}
+            self.dirty = True
+        self.evict()
+
+
+    def evict(self):
+        """
+            Drops entries older than `max_age_days` or whose script no longer exists, then the least recently used
+            entries past `max_entries`.
+        """
+        oldest_allowed = time.time() - self.max_age_days * 24 * 60 * 60
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry.get("rendered", 0) < oldest_allowed or not os.path.isfile(entry.get("script", "")):
+                    del self.entries[key]
+                    self.dirty = True
+            if len(self.entries) > self.max_entries:
+                by_use = sorted(self.entries, key=lambda key: self.entries[key].get("used", 0))
+                for key in by_use[:len(self.entries) - self.max_entries]:
+                    del self.entries[key]
+                self.dirty = True
+
+
+    def load(self):
+        """
+            Loads the manifest and evicts anything stale from it. A missing, unreadable or out of date manifest
+            leaves the cache empty.
+        """
+        if not self.manifest_filepath or not os.path.isfile(self.manifest_filepath):
+            return
+        try:
+            with open(self.manifest_filepath, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            print("Unable to load render cache")
+            return
+        if not isinstance(manifest, dict) or manifest.get("version") != self.MANIFEST_VERSION:
+            return
+
+        with self.lock:
+            self.entries = {key: entry for key, entry in manifest.get("entries", {}).items() if isinstance(entry, dict)}
+            self.dirty = False
+        self.evict()
+
+
+    def save(self):
+        """
+            Saves the manifest if anything has changed. The file is written next to the old one and then swapped in,
+            so a crash part way through never leaves a broken manifest behind.
+        """
+        if not self.manifest_filepath:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            manifest = {"version": self.MANIFEST_VERSION, "entries": dict(self.entries)}
+            self.dirty = False
+
+        temp_filepath = self.manifest_filepath + ".tmp"
+        try:
+            with open(temp_filepath, "w") as manifest_file:
+                json.dump(manifest, manifest_file)
+            os.replace(temp_filepath, self.manifest_filepath)
+        except OSError:
+            print("Unable to save render cache")
+            with self.lock:
+                self.dirty = True
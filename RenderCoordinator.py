@@ -0,0 +1,634 @@
+import json
+import time
+import socket
+import secrets
+import threading
+
+from SeparateThread import SeparateThread
+
+
+class RenderCoordinator(SeparateThread):
+    """
+        Renders the list handed to it on render agents (RenderAgent) on other machines instead of in Nuke processes of
+        its own. The render daemon uses it in place of SeparateThread when started with --coordinator, so the queue,
+        the clients and the render cache all work the same way they do on one machine.
+
+        Agents connect over TCP and register with the shared token and the number of renders they can run at once
+        (their slots). They then send a heartbeat every second with the frames written by each of their renders, and
+        pull work whenever they have a free slot. Each job of the list is sent out as one or more units, a unit being
+        a frame range of a script that one agent renders in one Nuke process.
+
+        An agent that has not been heard from for AGENT_TIMEOUT seconds is taken to be dead. The frames its units had
+        not written yet go back to the front of the waiting units, so another agent picks them up. When nothing is
+        waiting and an agent has a free slot, the unit with the most frames left is cut in two: its agent is told to
+        stop early, and the frames it gives up become a new unit for the idle agent.
+
+        Each request from an agent is one json object on a line with a "cmd" and the "token", and is answered with one
+        json object on a line with "ok" and the result or an "error". The commands are:
+            register: adds the agent, with its "name" and "slots". Replies with its "agent_id".
+            heartbeat: reports the "frames_done" and "fps" of each unit the agent is rendering, in "units". Replies
+                with the "commands" for the agent, each a "truncate" (stop the unit after frame "last") or a "cancel".
+            pull: asks for up to "free_slots" units. Replies with the "units" to render, which may be none.
+            truncated: confirms a truncate, with the "last" frame the agent will render of the unit.
+            result: reports the "exit_code" and "frames_done" of a finished unit.
+
+        Scripts and output paths are passed to agents as they are, so they must be the same on every machine.
+
+        Attributes:
+            farm_lock (threading.Condition): Guards the agents and units, and wakes the jobs waiting on their units.
+            agents (dict): The "name", "slots", "last_seen", "units" and "commands" of each live agent, by id.
+            units (dict): Every unit waiting or rendering, by id. Each holds its "job", "first", "last", "agent",
+                "frames_done", "fps" and whether a "truncate" was asked for.
+            pending_units (list): The ids of the units waiting for an agent, in the order they are handed out.
+            job_units (dict): The ids of the units still rendering for each job, by job.
+            job_exit_codes (dict): The exit code of each job once its units are all done, or one has failed, by job.
+            next_id (int): The id given to the next agent or unit.
+            token (str): The token every request from an agent has to carry.
+            server_socket (socket.socket): The socket agents connect to, None when not listening.
+            closed (bool): True once the coordinator has stopped listening.
+
+        Methods:
+            __init__(script_cache, render_cache, settings): Initializes the RenderCoordinator object.
+            listen(port, token): Starts accepting agents.
+            close(): Stops accepting agents and cancels every unit.
+            get_worker_count(): Returns the number of jobs sent out at once.
+            render_nuke_script(job): Renders a job on the agents and waits for it to finish.
+            make_unit(job, first_frame, last_frame, front): Adds a unit of a job to the waiting units.
+            accept_connections(): Hands each agent that connects to a thread of its own.
+            handle_connection(connection): Reads the requests of an agent and replies to them.
+            handle_request(request): Carries out a request and returns the reply.
+            register_agent(request): Adds an agent.
+            handle_heartbeat(agent_id, unit_reports): Records the progress of an agent's units.
+            pull_units(agent_id, free_slots): Hands waiting units to an agent.
+            steal_unit(): Cuts the unit with the most frames left in two.
+            handle_truncated(agent_id, unit_id, last_frame): Makes a unit of the frames an agent gave up.
+            handle_result(agent_id, unit_id, exit_code, frames_done): Records a finished unit.
+            set_unit_progress(unit, frames_done, fps): Records the frames written by a unit.
+            monitor_agents(): Drops agents that have stopped sending heartbeats.
+            drop_agent(agent_id): Puts the frames left of an agent's units back in the waiting units.
+            cancel_job_units(job): Cancels every unit of a job.
+            cancel_script(script): Cancels one script of the list being rendered.
+            stop(): Stops the rendering process.
+            get_unit_spec(unit): Returns what an agent needs to render a unit.
+            get_unit_frame_count(unit): Returns the number of frames in a unit.
+            send_line(connection, message): Writes one json line to an agent.
+    """
+
+    HOST = "0.0.0.0"
+    HEARTBEAT_INTERVAL = 1.0
+    AGENT_TIMEOUT = 5.0
+    MIN_STEAL_FRAMES = 4
+    MAX_DISPATCHED_JOBS = 256
+
+
+    def __init__(self, script_cache = None, render_cache = None, settings = None):
+        """
+            Initialization method.
+
+            Args:
+                script_cache (ScriptMetadataCache, optional): The cache to look up script frame ranges in.
+                    Defaults to None.
+                render_cache (RenderCache, optional): The cache of successful renders. Defaults to None.
+                settings (Settings, optional): The settings to render with. Defaults to None.
+        """
+        super().__init__(script_cache, render_cache, settings)
+        #the agents hold their own renders back, nothing is rendered on this machine
+        self.admission = None
+        #the units sent out at once follow the agents' slots instead
+        self.concurrency = None
+        self.farm_lock = threading.Condition()
+        self.agents = {}
+        self.units = {}
+        self.pending_units = []
+        self.job_units = {}
+        self.job_exit_codes = {}
+        self.next_id = 1
+        self.token = None
+        self.server_socket = None
+        self.closed = False
+
+
+    def listen(self, port, token = None):
+        """
+            Starts accepting agents on every network interface, and checking on them in the background.
+
+            Args:
+                port (int): The port to listen on.
+                token (str, optional): The token agents have to give, a new one is made if not given. Defaults to None.
+
+            Returns:
+                bool: True if the coordinator is listening.
+        """
+        self.token = token or secrets.token_hex(16)
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.server_socket.bind((self.HOST, port))
+        except OSError as e:
+            print(f"Unable to listen for render agents on port {port}: {e}")
+            return False
+        self.server_socket.listen()
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+        threading.Thread(target=self.monitor_agents, daemon=True).start()
+        print(f"Render coordinator listening for agents on port {self.server_socket.getsockname()[1]}")
+        if not token:
+            print(f"Render agents connect with --token {self.token}")
+        return True
+
+
+    def close(self):
+        """
+            Stops accepting agents and cancels every unit. Agents still connected lose their connection and keep
+            trying to connect again.
+        """
+        self.closed = True
+        if self.server_socket is not None:
+            self.server_socket.close()
+        with self.farm_lock:
+            for job in list(self.job_units):
+                self.cancel_job_units(job)
+            self.farm_lock.notify_all()
+
+
+    def get_worker_count(self):
+        """
+            Every job of the list is sent out at once, the agents' slots limit how many render at the same time.
+
+            Returns:
+                int: The number of jobs waiting on the agents at once.
+        """
+        return self.MAX_DISPATCHED_JOBS
+
+
+    def render_nuke_script(self, job):
+        """
+            Renders a job on the agents. The job is made into a unit for each of its frame ranges, a whole script
+            job having its Root range looked up first so it can be split between agents. Called in a pool thread,
+            which waits here until every unit of the job is done, one of them fails, or the job is cancelled.
+
+            Args:
+                job (RenderJob): The job to render.
+
+            Returns:
+                int: The exit code of the first unit that failed, 0 if every unit rendered. None if the job was
+                    cancelled or the render stopped.
+        """
+        if job.queue_index in self.failed_scripts:
+            return None
+        job.attempts += 1
+        job.start_time = time.time()
+        self.script_start_times.setdefault(job.queue_index, job.start_time)
+
+        if job.frame_ranges is not None:
+            frame_ranges = job.frame_ranges
+        elif job.is_chunk():
+            frame_ranges = [[job.first_frame, job.last_frame]]
+        else:
+            frame_range = self.get_frame_range(job.script)
+            frame_ranges = [list(frame_range)] if frame_range is not None else [[None, None]]
+
+        with self.farm_lock:
+            self.job_units[job] = set()
+            for first_frame, last_frame in frame_ranges:
+                self.make_unit(job, first_frame, last_frame)
+            if not self.frames_total.get(job.queue_index):
+                self.frames_total[job.queue_index] = sum(self.get_unit_frame_count(self.units[unit_id])
+                                                         for unit_id in self.job_units[job])
+            if not self.agents:
+                print(f"No render agents connected, {job} is waiting for one")
+            self.farm_lock.notify_all()
+
+            while job not in self.job_exit_codes:
+                if self.closed or job.queue_index in self.failed_scripts or self.render_pool.stop_flag:
+                    self.cancel_job_units(job)
+                    return None
+                self.farm_lock.wait(0.5)
+            self.job_units.pop(job, None)
+            return self.job_exit_codes.pop(job)
+
+
+    def make_unit(self, job, first_frame, last_frame, front = False):
+        """
+            Adds a unit of a job to the waiting units. Must be called with `farm_lock` held.
+
+            Args:
+                job (RenderJob): The job the unit belongs to.
+                first_frame (int): The first frame of the unit, None for the script's whole range.
+                last_frame (int): The last frame of the unit, None for the script's whole range.
+                front (bool, optional): Hand the unit out before the units already waiting. Defaults to False.
+
+            Returns:
+                dict: The new unit.
+        """
+        unit_id = self.next_id
+        self.next_id += 1
+        unit = {"id": unit_id, "job": job, "first": first_frame, "last": last_frame, "agent": None,
+                "frames_done": 0, "fps": 0.0, "truncate": False}
+        self.units[unit_id] = unit
+        self.job_units[job].add(unit_id)
+        if front:
+            self.pending_units.insert(0, unit_id)
+        else:
+            self.pending_units.append(unit_id)
+        return unit
+
+
+    def accept_connections(self):
+        """
+            Hands each agent that connects to a thread of its own. Runs until the server socket is closed.
+        """
+        while not self.closed:
+            try:
+                connection, address = self.server_socket.accept()
+            except OSError:
+                return
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.handle_connection, args=(connection,), daemon=True).start()
+
+
+    def handle_connection(self, connection):
+        """
+            Reads the requests of an agent one line at a time and replies to each. A request without the right token
+            closes the connection. The agent is left to time out when its connection drops, so a short break in the
+            network does not cost it its units.
+
+            Args:
+                connection (socket.socket): The agent's connection.
+        """
+        with connection, connection.makefile("rb") as reader:
+            for line in reader:
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a json object")
+                except ValueError as e:
+                    reply = {"ok": False, "error": f"Bad request: {e}"}
+                else:
+                    if not secrets.compare_digest(str(request.get("token", "")), self.token):
+                        self.send_line(connection, {"ok": False, "error": "Bad token"})
+                        return
+                    try:
+                        reply = self.handle_request(request)
+                    except (KeyError, TypeError, ValueError) as e:
+                        reply = {"ok": False, "error": f"Bad request: {e}"}
+                if not self.send_line(connection, reply):
+                    return
+
+
+    def handle_request(self, request):
+        """
+            Carries out one request from an agent.
+
+            Args:
+                request (dict): The request, with its "cmd".
+
+            Returns:
+                dict: The reply, with "ok" and the result or an "error".
+
+            Raises:
+                KeyError, TypeError, ValueError: If the arguments of the request are not valid.
+        """
+        cmd = request.get("cmd")
+        if cmd == "register":
+            return self.register_agent(request)
+
+        agent_id = int(request["agent_id"])
+        with self.farm_lock:
+            if agent_id not in self.agents:
+                #it was taken for dead and its units handed out again, it has to start over
+                return {"ok": False, "error": "Unknown agent"}
+            self.agents[agent_id]["last_seen"] = time.time()
+        if cmd == "heartbeat":
+            return {"ok": True, "commands": self.handle_heartbeat(agent_id, request.get("units", {}))}
+        if cmd == "pull":
+            return {"ok": True, "units": self.pull_units(agent_id, int(request.get("free_slots", 1)))}
+        if cmd == "truncated":
+            self.handle_truncated(agent_id, int(request["unit_id"]), int(request["last"]))
+            return {"ok": True}
+        if cmd == "result":
+            self.handle_result(agent_id, int(request["unit_id"]), int(request["exit_code"]),
+                               int(request.get("frames_done", 0)))
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command: {cmd}"}
+
+
+    def register_agent(self, request):
+        """
+            Adds an agent.
+
+            Args:
+                request (dict): The register request, with the agent's "name" and "slots".
+
+            Returns:
+                dict: The reply, with the new "agent_id" and the "heartbeat_interval" to keep to.
+        """
+        name = str(request.get("name", "agent"))
+        slots = max(1, int(request.get("slots", 1)))
+        with self.farm_lock:
+            agent_id = self.next_id
+            self.next_id += 1
+            self.agents[agent_id] = {"name": name, "slots": slots, "last_seen": time.time(), "units": set(),
+                                     "commands": []}
+            self.farm_lock.notify_all()
+        print(f"Render agent {name} joined with {slots} slots")
+        return {"ok": True, "agent_id": agent_id, "heartbeat_interval": self.HEARTBEAT_INTERVAL}
+
+
+    def handle_heartbeat(self, agent_id, unit_reports):
+        """
+            Records the progress of an agent's units and hands over the commands waiting for it.
+
+            Args:
+                agent_id (int): The agent's id.
+                unit_reports (dict): The "frames_done" and "fps" of each of its units, by unit id.
+
+            Returns:
+                list: The commands for the agent.
+        """
+        with self.farm_lock:
+            for unit_id, report in unit_reports.items():
+                unit = self.units.get(int(unit_id))
+                if unit is not None and unit["agent"] == agent_id:
+                    self.set_unit_progress(unit, int(report.get("frames_done", 0)), float(report.get("fps", 0.0)))
+            agent = self.agents[agent_id]
+            commands = agent["commands"]
+            agent["commands"] = []
+        return commands
+
+
+    def pull_units(self, agent_id, free_slots):
+        """
+            Hands waiting units to an agent, in the order they are waiting. When nothing is waiting a running unit is
+            cut in two, and the frames it gives up are handed out on a later pull.
+
+            Args:
+                agent_id (int): The agent's id.
+                free_slots (int): The number of units the agent can take.
+
+            Returns:
+                list: What the agent needs to render each unit it is given.
+        """
+        specs = []
+        with self.farm_lock:
+            agent = self.agents[agent_id]
+            while self.pending_units and len(specs) < free_slots:
+                unit = self.units[self.pending_units.pop(0)]
+                unit["agent"] = agent_id
+                agent["units"].add(unit["id"])
+                specs.append(self.get_unit_spec(unit))
+            if len(specs) < free_slots:
+                self.steal_unit()
+        for spec in specs:
+            print(f"Sent {spec['script']} [{spec['first']}-{spec['last']}] to render agent {agent['name']}")
+        return specs
+
+
+    def steal_unit(self):
+        """
+            Asks the agent of the running unit with the most frames left to stop halfway through them, unless no
+            unit has at least twice MIN_STEAL_FRAMES left. Must be called with `farm_lock` held.
+
+            Returns:
+                bool: True if a unit is being cut.
+        """
+        best_unit = None
+        best_frames_left = 2 * self.MIN_STEAL_FRAMES - 1
+        for unit in self.units.values():
+            if unit["agent"] is None or unit["truncate"] or unit["first"] is None:
+                continue
+            frames_left = self.get_unit_frame_count(unit) - unit["frames_done"]
+            if frames_left > best_frames_left:
+                best_unit = unit
+                best_frames_left = frames_left
+        if best_unit is None:
+            return False
+
+        step = best_unit["job"].step
+        keep_frames = best_frames_left - best_frames_left // 2
+        last_frame = best_unit["first"] + (best_unit["frames_done"] + keep_frames - 1) * step
+        best_unit["truncate"] = True
+        self.agents[best_unit["agent"]]["commands"].append({"type": "truncate", "unit_id": best_unit["id"],
+                                                            "last": last_frame})
+        return True
+
+
+    def handle_truncated(self, agent_id, unit_id, last_frame):
+        """
+            Makes a unit of the frames an agent gave up when told to stop a unit early, and hands it out first. The
+            agent may have already gone past the frame asked for, in which case it gives up fewer frames.
+
+            Args:
+                agent_id (int): The agent's id.
+                unit_id (int): The unit cut short.
+                last_frame (int): The last frame the agent will render of the unit.
+        """
+        with self.farm_lock:
+            unit = self.units.get(unit_id)
+            if unit is None or unit["agent"] != agent_id:
+                return
+            unit["truncate"] = False
+            if last_frame >= unit["last"]:
+                return
+            tail_unit = self.make_unit(unit["job"], last_frame + unit["job"].step, unit["last"], front=True)
+            unit["last"] = last_frame
+            self.farm_lock.notify_all()
+        print(f"Split {unit['job'].script}, frames {tail_unit['first']}-{tail_unit['last']} are handed out again")
+
+
+    def handle_result(self, agent_id, unit_id, exit_code, frames_done):
+        """
+            Records a finished unit. The job is done once every one of its units is, or as soon as one fails, in
+            which case its other units are cancelled so the whole job can be retried.
+
+            Args:
+                agent_id (int): The agent's id.
+                unit_id (int): The finished unit.
+                exit_code (int): The exit code of the unit's Nuke process.
+                frames_done (int): The frames the unit wrote.
+        """
+        with self.farm_lock:
+            unit = self.units.get(unit_id)
+            if unit is None or unit["agent"] != agent_id:
+                return
+            self.set_unit_progress(unit, frames_done, 0.0)
+            del self.units[unit_id]
+            self.agents[agent_id]["units"].discard(unit_id)
+            job = unit["job"]
+            unit_ids = self.job_units.get(job, set())
+            unit_ids.discard(unit_id)
+            if exit_code != 0:
+                self.cancel_job_units(job)
+                self.job_exit_codes[job] = exit_code
+            elif not unit_ids:
+                self.job_exit_codes[job] = 0
+            self.farm_lock.notify_all()
+
+
+    def set_unit_progress(self, unit, frames_done, fps):
+        """
+            Records the frames written by a unit and reports the progress of its script. Must be called with
+            `farm_lock` held.
+
+            Args:
+                unit (dict): The unit.
+                frames_done (int): The frames the unit has written.
+                fps (float): The frames the unit writes per second.
+        """
+        unit["fps"] = fps
+        frames_added = frames_done - unit["frames_done"]
+        if frames_added <= 0:
+            return
+        unit["frames_done"] = frames_done
+        job = unit["job"]
+        queue_index = job.queue_index
+        with self.process_lock:
+            job.frames_done += frames_added
+            self.frames_done[queue_index] = self.frames_done.get(queue_index, 0) + frames_added
+            frames_done = self.frames_done[queue_index]
+            frames_total = self.frames_total.get(queue_index, 0)
+        fps = sum(other_unit["fps"] for other_unit in self.units.values()
+                  if other_unit["job"].queue_index == queue_index)
+        self.emit_frame_progress(job.script, frames_done, frames_total, fps)
+
+
+    def monitor_agents(self):
+        """
+            Drops every agent that has not been heard from for AGENT_TIMEOUT seconds. Runs until the coordinator is
+            closed.
+        """
+        while not self.closed:
+            time.sleep(self.HEARTBEAT_INTERVAL)
+            with self.farm_lock:
+                dead_agent_ids = [agent_id for agent_id, agent in self.agents.items()
+                                  if time.time() - agent["last_seen"] > self.AGENT_TIMEOUT]
+                for agent_id in dead_agent_ids:
+                    self.drop_agent(agent_id)
+                if dead_agent_ids:
+                    self.farm_lock.notify_all()
+
+
+    def drop_agent(self, agent_id):
+        """
+            Drops an agent and puts the frames its units had not written yet back at the front of the waiting units.
+            A unit without a known frame range is sent out again whole. Must be called with `farm_lock` held.
+
+            Args:
+                agent_id (int): The agent's id.
+        """
+        agent = self.agents.pop(agent_id)
+        print(f"Lost render agent {agent['name']}, handing its work out again")
+        for unit_id in sorted(agent["units"], reverse=True):
+            unit = self.units.pop(unit_id, None)
+            if unit is None:
+                continue
+            job = unit["job"]
+            self.job_units[job].discard(unit_id)
+            if unit["first"] is None:
+                #nothing says which frames were written, so all of them are rendered again
+                with self.process_lock:
+                    job.frames_done -= unit["frames_done"]
+                    self.frames_done[job.queue_index] -= unit["frames_done"]
+                self.make_unit(job, None, None, front=True)
+                continue
+            first_frame = unit["first"] + unit["frames_done"] * job.step
+            if first_frame <= unit["last"]:
+                self.make_unit(job, first_frame, unit["last"], front=True)
+            elif not self.job_units[job]:
+                self.job_exit_codes[job] = 0
+
+
+    def cancel_job_units(self, job):
+        """
+            Cancels every unit of a job, telling the agents rendering them to stop. Must be called with `farm_lock`
+            held.
+
+            Args:
+                job (RenderJob): The job.
+        """
+        for unit_id in self.job_units.get(job, set()):
+            unit = self.units.pop(unit_id, None)
+            if unit is None:
+                continue
+            if unit_id in self.pending_units:
+                self.pending_units.remove(unit_id)
+            agent = self.agents.get(unit["agent"])
+            if agent is not None:
+                agent["units"].discard(unit_id)
+                agent["commands"].append({"type": "cancel", "unit_id": unit_id})
+        self.job_units[job] = set()
+
+
+    def cancel_script(self, script):
+        """
+            Cancels one script of the list being rendered, telling the agents rendering it to stop.
+
+            Args:
+                script (str): The path of the script to cancel.
+
+            Returns:
+                bool: True if the script was in the list being rendered.
+        """
+        if not super().cancel_script(script):
+            return False
+        with self.farm_lock:
+            for job in list(self.job_units):
+                if job.queue_index in self.failed_scripts:
+                    self.cancel_job_units(job)
+            self.farm_lock.notify_all()
+        return True
+
+
+    def stop(self):
+        """
+            Stop the rendering process, telling the agents to stop every unit.
+        """
+        super().stop()
+        with self.farm_lock:
+            for job in list(self.job_units):
+                self.cancel_job_units(job)
+            self.farm_lock.notify_all()
+
+
+    def get_unit_spec(self, unit):
+        """
+            Args:
+                unit (dict): The unit.
+
+            Returns:
+                dict: The "unit_id", "script", "write_node", "first", "last" and "step" an agent renders the unit with.
+        """
+        job = unit["job"]
+        return {"unit_id": unit["id"], "script": job.script, "write_node": self.settings.write_node_name,
+                "first": unit["first"], "last": unit["last"], "step": job.step}
+
+
+    def get_unit_frame_count(self, unit):
+        """
+            Args:
+                unit (dict): The unit.
+
+            Returns:
+                int: The number of frames in the unit, 0 if its range is not known.
+        """
+        if unit["first"] is None:
+            return 0
+        return len(range(unit["first"], unit["last"] + 1, unit["job"].step))
+
+
+    @staticmethod
+    def send_line(connection, message):
+        """
+            Writes one json line to an agent.
+
+            Args:
+                connection (socket.socket): The agent's connection.
+                message (dict): The message to send.
+
+            Returns:
+                bool: False if the agent has gone away.
+        """
+        try:
+            connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,689 @@
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import secrets
+import argparse
+import threading
+
+from Settings import Settings
+from ErrorCodes import ErrorCodes
+from JobStore import JobStore
+from ScriptMetadataCache import ScriptMetadataCache
+from RenderCache import RenderCache
+from InputScanner import InputScanner
+from DaemonClient import DaemonClient
+
+from PySide6.QtCore import Qt, QCoreApplication
+
+
+class RenderDaemon():
+    """
+        Renders queued scripts in a process of its own, so closing the window (or the terminal a headless run was
+        started from) does not stop the renders.
+
+        The daemon owns the queue and the Nuke processes. The queue is kept in a JobStore of its own, so a daemon
+        that is killed picks its jobs up again the next time it starts. The window and the headless command line are
+        clients that talk to it over a socket on 127.0.0.1, and can come and go while it renders.
+
+        Each request is one json object on a line, with a "cmd", the "token" from the info file and the rest of the
+        request. Each reply is one json object on a line with "ok" and either the result or an "error". The commands
+        are:
+            ping: checks the daemon is up, replies with its "pid".
+            submit: adds "scripts" to the queue, with an optional "write_node", "priority" and "force". The
+                "priorities" of single scripts and the "dependencies" each script renders after can be given too, by
+                script path. Replies with the "job_ids" of the new jobs.
+            list: replies with the "jobs" in the queue, in the order they will render. "states" limits the jobs.
+            cancel: cancels the jobs in "job_ids", or every waiting and running job if it is not given.
+            reprioritize: sets the "priority" of the jobs in "job_ids". Higher priorities render first.
+            subscribe: replies once and then sends every event as a json line until the client disconnects.
+            shutdown: stops the daemon. Running jobs go back in the queue.
+
+        The events sent to subscribers each have an "event" type and a "time". They are submitted, started, cached,
+        progress, script_done, cancelled, reprioritized, idle and shutdown. The per job events carry its "job_id"
+        and "script".
+
+        Jobs are rendered in batches through SeparateThread. A batch is every waiting job that shares the write
+        node and force setting of the highest priority job, so jobs submitted while a batch renders wait for the
+        next one. Jobs that have to render after a script still waiting outside the batch are left for a later one,
+        and SeparateThread orders the rest within the batch. A running job can be cancelled without touching the
+        rest of its batch.
+
+        The address of the daemon is written to `daemon_info_filepath` while it runs, along with a random token
+        each request has to carry so only someone who can read that file can use the daemon.
+
+        Started with --coordinator, the daemon renders nothing itself. Its batches are handed to a RenderCoordinator
+        instead, which farms them out to render agents on other machines, and which stays up between batches so the
+        agents stay connected.
+
+        Attributes:
+            settings (Settings): The settings used to render.
+            default_write_node (str): The write node rendered when a job does not name one.
+            idle_timeout (float): Seconds with nothing queued before the daemon stops itself, 0 to never stop.
+            job_store (JobStore): The daemon's queue.
+            script_cache (ScriptMetadataCache): The cache of parsed script details.
+            render_cache (RenderCache): The successful renders, used to skip unchanged scripts.
+            error_obj (ErrorCodes): Reads the exit codes of the renders.
+            token (str): The token every request has to carry.
+            server_socket (socket.socket): The socket clients connect to.
+            port (int): The port the daemon listens on.
+            lock (threading.Lock): Guards the batch and the subscribers, which the connection threads share.
+            wake_event (threading.Event): Set when there is something new to render, or the daemon should stop.
+            subscribers (list): The event queue of each subscribed client.
+            render_worker (SeparateThread): The render engine of the batch rendering, None between batches.
+            farm_port (int): The port render agents connect to, None to render on this machine.
+            farm_token (str): The token render agents have to give, empty for one made when the daemon starts.
+            coordinator (RenderCoordinator): The render engine every batch is handed to, None to render on this
+                machine.
+            batch_jobs (dict): The job id of each script in the batch rendering, by script path.
+            shutting_down (bool): True once the daemon has been asked to stop.
+            last_active_time (float): When the daemon last had something to render.
+
+        Methods:
+            __init__(settings, idle_timeout, farm_port, farm_token): Initializes the RenderDaemon object.
+            main(argv): Reads the command line and runs the daemon until it stops.
+            serve(port): Listens for clients and renders the queue until the daemon is stopped.
+            write_info_file(): Writes the address and token of the daemon for clients to find.
+            remove_info_file(): Removes the info file if it is still this daemon's.
+            accept_connections(): Hands each client that connects to a thread of its own.
+            handle_connection(connection): Reads the requests of a client and replies to them.
+            handle_request(request): Carries out a request and returns the reply.
+            stream_events(connection): Sends every event to a subscribed client until it disconnects.
+            submit(request): Adds scripts to the queue.
+            cancel(job_ids): Cancels jobs, stopping them if they are rendering.
+            reprioritize(job_ids, priority): Changes the priority of jobs.
+            render_next_batch(): Renders the next batch of waiting jobs.
+            get_ready_jobs(group, waiting_scripts): Leaves out the jobs waiting on scripts outside their batch.
+            connect_render_worker(render_worker): Connects the signals of a render engine to the daemon.
+            handle_script_cached(script): Records a script skipped as unchanged.
+            handle_frame_progress(script, frames_done, frames_total, fps): Records and sends frame progress.
+            handle_render_update(script, exit_code, elapsed_time): Records a script that finished rendering.
+            request_shutdown(): Stops the daemon once the batch rendering has been stopped.
+            send_event(event_type, **info): Sends an event to every subscribed client.
+            send_line(connection, message): Writes one json line to a client.
+    """
+
+    HOST = "127.0.0.1"
+    IDLE_TIMEOUT = 600
+    HEARTBEAT_INTERVAL = 5.0
+
+
+    def __init__(self, settings, idle_timeout = IDLE_TIMEOUT, farm_port = None, farm_token = ""):
+        """
+            Initialization method.
+
+            Args:
+                settings (Settings): The settings to render with.
+                idle_timeout (float, optional): Seconds with nothing queued before the daemon stops itself, 0 to
+                    never stop. Defaults to IDLE_TIMEOUT.
+                farm_port (int, optional): The port render agents connect to, None to render on this machine.
+                    Defaults to None.
+                farm_token (str, optional): The token render agents have to give, empty for one made when the
+                    daemon starts. Defaults to "".
+
+            Raises:
+                sqlite3.Error: If the daemon's queue could not be opened.
+        """
+        self.settings = settings
+        self.default_write_node = settings.write_node_name
+        self.idle_timeout = idle_timeout
+        os.makedirs(self.settings.temp_folder, exist_ok=True)
+        self.job_store = JobStore(self.settings.daemon_store_filepath)
+        self.script_cache = ScriptMetadataCache(self.settings.script_cache_filepath, self.settings.script_cache_size)
+        self.script_cache.load()
+        self.render_cache = RenderCache(self.settings.render_cache_filepath, self.script_cache, InputScanner())
+        self.render_cache.load()
+        self.error_obj = ErrorCodes(self.settings)
+        self.token = secrets.token_hex(16)
+        self.server_socket = None
+        self.port = None
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.subscribers = []
+        self.render_worker = None
+        self.farm_port = farm_port
+        self.farm_token = farm_token
+        self.coordinator = None
+        self.batch_jobs = {}
+        self.shutting_down = False
+        self.last_active_time = time.time()
+
+
+    @classmethod
+    def main(cls, argv):
+        """
+            Reads the command line and runs the daemon until it is stopped or has been idle for too long.
+
+            Args:
+                argv (list): The command line arguments, without the program name.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        parser = argparse.ArgumentParser(prog="RenderQ.py --daemon",
+                                         description="Render queued Nuke scripts in the background.")
+        parser.add_argument("--port", type=int, default=0, help="the port to listen on, 0 picks a free one")
+        parser.add_argument("--idle-timeout", type=float, default=None,
+                            help=f"seconds with nothing queued before the daemon stops, 0 to never stop. Defaults to "
+                                 f"{cls.IDLE_TIMEOUT}, or 0 with --coordinator")
+        parser.add_argument("--coordinator", action="store_true",
+                            help="hand the renders out to render agents instead of rendering them here")
+        parser.add_argument("--agent-port", type=int, default=None,
+                            help="the port render agents connect to, defaults to the farm port setting")
+        parser.add_argument("--token", default=None,
+                            help="the token render agents have to give, defaults to the farm token setting")
+        try:
+            args = parser.parse_args([arg for arg in argv if arg != "--daemon"])
+        except SystemExit as e:
+            return e.code
+
+        #the render engine's signals and timers need an application, it is never run as events are not used
+        app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+        settings = Settings()
+        settings.load_settings()
+        settings.load_settings_from_json()
+        if settings.render_nuke_open in (True, "true"):
+            #the single Nuke instance is tied to the window's event loop, a persistent worker does the same job here
+            settings.render_workers = 1
+            settings.persistent_workers = True
+
+        if DaemonClient(settings).is_running():
+            print("A render daemon is already running")
+            return 1
+
+        idle_timeout = args.idle_timeout
+        if idle_timeout is None:
+            #agents that come and go should not find the coordinator gone
+            idle_timeout = 0 if args.coordinator else cls.IDLE_TIMEOUT
+        farm_port = None
+        if args.coordinator:
+            farm_port = args.agent_port if args.agent_port is not None else settings.farm_port
+        farm_token = args.token if args.token is not None else settings.farm_token
+        daemon = cls(settings, idle_timeout, farm_port, farm_token)
+        return daemon.serve(args.port)
+
+
+    def serve(self, port = 0):
+        """
+            Listens for clients and renders whatever is queued until the daemon is asked to stop, or nothing has been
+            queued for `idle_timeout` seconds. Jobs left running by a daemon that died are queued again first.
+
+            Args:
+                port (int, optional): The port to listen on, 0 picks a free one. Defaults to 0.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.server_socket.bind((self.HOST, port))
+        except OSError as e:
+            print(f"Unable to listen on port {port}: {e}")
+            return 1
+        self.server_socket.listen()
+        self.port = self.server_socket.getsockname()[1]
+
+        if self.farm_port is not None:
+            from RenderCoordinator import RenderCoordinator
+            coordinator = RenderCoordinator(self.script_cache, self.render_cache, self.settings)
+            if not coordinator.listen(self.farm_port, self.farm_token):
+                self.server_socket.close()
+                return 1
+            self.connect_render_worker(coordinator)
+            self.coordinator = coordinator
+        self.write_info_file()
+
+        recovered_count = self.job_store.recover()
+        if recovered_count:
+            print(f"Resuming {recovered_count} jobs that were cut off")
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, lambda signum, frame: self.request_shutdown())
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.request_shutdown())
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+        print(f"Render daemon listening on {self.HOST}:{self.port}")
+
+        try:
+            while not self.shutting_down:
+                if self.render_next_batch():
+                    self.last_active_time = time.time()
+                    continue
+                if self.idle_timeout and time.time() - self.last_active_time > self.idle_timeout:
+                    print("Nothing queued, stopping the render daemon")
+                    break
+                self.wake_event.wait(1.0)
+                self.wake_event.clear()
+        finally:
+            self.shutting_down = True
+            self.send_event("shutdown")
+            self.remove_info_file()
+            self.server_socket.close()
+            if self.coordinator is not None:
+                self.coordinator.close()
+            self.job_store.set_states([JobStore.STATE_RUNNING], JobStore.STATE_QUEUED)
+            self.job_store.close()
+            self.script_cache.save()
+            self.render_cache.save()
+        return 0
+
+
+    def write_info_file(self):
+        """
+            Writes the address, process id and token of the daemon to `daemon_info_filepath` for clients to find.
+            The file is written next to the old one and swapped in, and only the user can read it where the system
+            allows it.
+        """
+        info = {"host": self.HOST, "port": self.port, "pid": os.getpid(), "token": self.token,
+                "started": time.time()}
+        temp_filepath = self.settings.daemon_info_filepath + ".tmp"
+        with open(temp_filepath, "w") as info_file:
+            json.dump(info, info_file)
+        try:
+            os.chmod(temp_filepath, 0o600)
+        except OSError:
+            pass
+        os.replace(temp_filepath, self.settings.daemon_info_filepath)
+
+
+    def remove_info_file(self):
+        """
+            Removes the info file, unless another daemon has written its own since.
+        """
+        try:
+            with open(self.settings.daemon_info_filepath, "r") as info_file:
+                info = json.load(info_file)
+            if info.get("token") == self.token:
+                os.remove(self.settings.daemon_info_filepath)
+        except (OSError, ValueError):
+            pass
+
+
+    def accept_connections(self):
+        """
+            Hands each client that connects to a thread of its own. Runs until the server socket is closed.
+        """
+        while not self.shutting_down:
+            try:
+                connection, _ = self.server_socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle_connection, args=(connection,), daemon=True).start()
+
+
+    def handle_connection(self, connection):
+        """
+            Reads the requests of a client one line at a time and replies to each. A subscribe request hands the
+            connection over to the event stream. A request without the right token closes the connection.
+
+            Args:
+                connection (socket.socket): The client's connection.
+        """
+        with connection, connection.makefile("rb") as reader:
+            for line in reader:
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a json object")
+                except ValueError as e:
+                    self.send_line(connection, {"ok": False, "error": f"Bad request: {e}"})
+                    continue
+                if not secrets.compare_digest(str(request.get("token", "")), self.token):
+                    self.send_line(connection, {"ok": False, "error": "Bad token"})
+                    return
+                if request.get("cmd") == "subscribe":
+                    self.stream_events(connection)
+                    return
+                try:
+                    reply = self.handle_request(request)
+                except (TypeError, ValueError) as e:
+                    reply = {"ok": False, "error": f"Bad request: {e}"}
+                if not self.send_line(connection, reply):
+                    return
+
+
+    def handle_request(self, request):
+        """
+            Carries out one request.
+
+            Args:
+                request (dict): The request, with its "cmd".
+
+            Returns:
+                dict: The reply, with "ok" and the result or an "error".
+
+            Raises:
+                TypeError, ValueError: If the arguments of the request are not valid.
+        """
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if cmd == "submit":
+            return self.submit(request)
+        if cmd == "list":
+            states = request.get("states")
+            job_ids = request.get("job_ids")
+            return {"ok": True, "jobs": self.job_store.get_jobs(states, job_ids)}
+        if cmd == "cancel":
+            job_ids = request.get("job_ids")
+            return {"ok": True, "job_ids": self.cancel([int(job_id) for job_id in job_ids]
+                                                       if job_ids is not None else None)}
+        if cmd == "reprioritize":
+            return {"ok": True, "changed": self.reprioritize([int(job_id) for job_id in request["job_ids"]],
+                                                             int(request["priority"]))}
+        if cmd == "shutdown":
+            self.request_shutdown()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command: {cmd}"}
+
+
+    def stream_events(self, connection):
+        """
+            Sends every event to a subscribed client until it disconnects. A heartbeat is sent when things are quiet
+            so a client that has gone away is noticed.
+
+            Args:
+                connection (socket.socket): The client's connection.
+        """
+        events = queue.Queue()
+        with self.lock:
+            self.subscribers.append(events)
+        try:
+            if not self.send_line(connection, {"ok": True}):
+                return
+            while True:
+                try:
+                    event = events.get(timeout=self.HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    event = {"event": "heartbeat", "time": round(time.time(), 3)}
+                if not self.send_line(connection, event) or event["event"] == "shutdown":
+                    return
+        finally:
+            with self.lock:
+                self.subscribers.remove(events)
+
+
+    def submit(self, request):
+        """
+            Adds scripts to the end of the queue.
+
+            Args:
+                request (dict): The submit request, with the "scripts" and optionally the "write_node", "priority",
+                    "force", "priorities" and "dependencies".
+
+            Returns:
+                dict: The reply, with the "job_ids" of the new jobs in the order of the scripts.
+
+            Raises:
+                TypeError, ValueError: If the scripts, the priorities or the dependencies are not valid.
+        """
+        script_paths = request.get("scripts")
+        if not isinstance(script_paths, list) or not all(isinstance(path, str) for path in script_paths):
+            raise ValueError("expected a list of script paths")
+        if not all(os.path.isabs(path) for path in script_paths):
+            raise ValueError("script paths must be absolute")
+        if not self.settings.nuke_exe or not os.path.isfile(self.settings.nuke_exe):
+            return {"ok": False, "error": f"Nuke executable not found: {self.settings.nuke_exe}"}
+
+        write_node_name = request.get("write_node") or self.default_write_node
+        priority = int(request.get("priority", 0))
+        force_render = bool(request.get("force", False))
+        priorities = {path: int(value) for path, value in dict(request.get("priorities") or {}).items()}
+        dependencies = request.get("dependencies") or {}
+        if not isinstance(dependencies, dict) or not all(
+                isinstance(after, list) and all(isinstance(path, str) and os.path.isabs(path) for path in after)
+                for after in dependencies.values()):
+            raise ValueError("expected the dependencies of each script to be a list of absolute script paths")
+        job_ids = self.job_store.add_jobs(script_paths, write_node_name, priority, force_render, priorities,
+                                          dependencies)
+        self.send_event("submitted", job_ids=job_ids, scripts=script_paths, priority=priority)
+        self.wake_event.set()
+        return {"ok": True, "job_ids": job_ids}
+
+
+    def cancel(self, job_ids = None):
+        """
+            Cancels jobs. Waiting jobs are simply marked cancelled, running jobs are stopped without touching the
+            rest of their batch.
+
+            Args:
+                job_ids (list, optional): The ids of the jobs to cancel, None for every waiting and running job.
+                    Defaults to None.
+
+            Returns:
+                list: The ids of the jobs cancelled.
+        """
+        if job_ids is None:
+            job_ids = [job["id"] for job in self.job_store.get_jobs([JobStore.STATE_QUEUED, JobStore.STATE_RUNNING])]
+        cancelled_ids = self.job_store.set_job_state(job_ids, JobStore.STATE_CANCELLED, [JobStore.STATE_QUEUED])
+
+        with self.lock:
+            running_scripts = {job_id: script for script, job_id in self.batch_jobs.items() if job_id in job_ids}
+            for script in running_scripts.values():
+                del self.batch_jobs[script]
+            render_worker = self.render_worker
+        for job_id, script in running_scripts.items():
+            if render_worker is not None:
+                render_worker.cancel_script(script)
+            cancelled_ids.extend(self.job_store.set_job_state([job_id], JobStore.STATE_CANCELLED,
+                                                              [JobStore.STATE_RUNNING]))
+
+        for job in self.job_store.get_jobs(job_ids=cancelled_ids):
+            self.send_event("cancelled", job_id=job["id"], script=job["script"])
+        return cancelled_ids
+
+
+    def reprioritize(self, job_ids, priority):
+        """
+            Changes the priority of jobs. Only jobs still waiting are moved, a running job keeps rendering.
+
+            Args:
+                job_ids (list): The ids of the jobs.
+                priority (int): The new priority, higher renders first.
+
+            Returns:
+                int: The number of jobs changed.
+        """
+        changed_count = self.job_store.set_priority(job_ids, priority)
+        if changed_count:
+            self.send_event("reprioritized", job_ids=job_ids, priority=priority)
+        return changed_count
+
+
+    def render_next_batch(self):
+        """
+            Renders the next batch of waiting jobs and waits for it to finish: the highest priority job, and every
+            other waiting job with the same write node and force setting. A script queued twice only renders once
+            per batch. Jobs of a batch that was stopped before they finished go back in the queue.
+
+            Jobs waiting on a script that is not in their batch are left for a later batch. If that leaves nothing
+            ready, the batch of the next job is tried. When the dependencies loop round every batch, the batch of
+            the highest priority job is rendered as it is.
+
+            Returns:
+                bool: True if a batch was rendered, False if nothing is waiting.
+        """
+        #imported here so the daemon can start answering requests before the render engine has loaded
+        from SeparateThread import SeparateThread
+
+        waiting_jobs = self.job_store.get_jobs([JobStore.STATE_QUEUED])
+        if not waiting_jobs:
+            return False
+
+        groups = {}
+        for job in waiting_jobs:
+            groups.setdefault((job["write_node"], job["force_render"]), {}).setdefault(job["script"], job)
+        waiting_scripts = {job["script"] for job in waiting_jobs}
+        ready_jobs = next(filter(None, (self.get_ready_jobs(group, waiting_scripts) for group in groups.values())),
+                          next(iter(groups.values())))
+        first_job = next(iter(ready_jobs.values()))
+        batch = {script: job["id"] for script, job in ready_jobs.items()}
+        started_ids = set(self.job_store.set_job_state(list(batch.values()), JobStore.STATE_RUNNING,
+                                                       [JobStore.STATE_QUEUED]))
+        batch = {script: job_id for script, job_id in batch.items() if job_id in started_ids}
+        if not batch:
+            return True
+
+        self.settings.write_node_name = first_job["write_node"] or self.default_write_node
+        render_worker = self.coordinator
+        if render_worker is None:
+            render_worker = SeparateThread(self.script_cache, self.render_cache, self.settings)
+            self.connect_render_worker(render_worker)
+        render_worker.script_priorities = {script: ready_jobs[script]["priority"] for script in batch}
+        render_worker.script_dependencies = {script: json.loads(ready_jobs[script]["depends_on"])
+                                             for script in batch if ready_jobs[script]["depends_on"]}
+        with self.lock:
+            self.batch_jobs = dict(batch)
+            self.render_worker = render_worker
+        self.send_event("started", job_ids=list(batch.values()), scripts=list(batch),
+                        write_node=self.settings.write_node_name)
+
+        try:
+            render_worker.render_list(list(batch), bool(first_job["force_render"]))
+        finally:
+            with self.lock:
+                unfinished_ids = list(self.batch_jobs.values())
+                self.batch_jobs = {}
+                self.render_worker = None
+            self.job_store.set_job_state(unfinished_ids, JobStore.STATE_QUEUED, [JobStore.STATE_RUNNING])
+            self.script_cache.save()
+
+        if not self.job_store.get_jobs([JobStore.STATE_QUEUED]):
+            self.send_event("idle")
+        return True
+
+
+    def get_ready_jobs(self, group, waiting_scripts):
+        """
+            Args:
+                group (dict): The first waiting job of each script that could render in one batch, by script path.
+                waiting_scripts (set): The scripts of every waiting job.
+
+            Returns:
+                dict: The jobs of the group that do not wait on a script outside it, directly or through the other
+                    jobs left out, by script path.
+        """
+        ready_jobs = dict(group)
+        dropped = True
+        while dropped:
+            dropped = False
+            for script, job in list(ready_jobs.items()):
+                dependencies = json.loads(job["depends_on"]) if job["depends_on"] else []
+                if any(dependency in waiting_scripts and dependency not in ready_jobs for dependency in dependencies):
+                    del ready_jobs[script]
+                    dropped = True
+        return ready_jobs
+
+
+    def connect_render_worker(self, render_worker):
+        """
+            Connects the signals of a render engine to the daemon.
+
+            Args:
+                render_worker (SeparateThread): The render engine.
+        """
+        #the signals come from the pool's threads and are handled there, there is no event loop to queue them on
+        render_worker.script_cached.connect(self.handle_script_cached, Qt.DirectConnection)
+        render_worker.frame_progress.connect(self.handle_frame_progress, Qt.DirectConnection)
+        render_worker.render_script_update.connect(self.handle_render_update, Qt.DirectConnection)
+
+
+    def handle_script_cached(self, script):
+        """
+            Args:
+                script (str): The script skipped as unchanged.
+        """
+        with self.lock:
+            job_id = self.batch_jobs.pop(script, None)
+        if job_id is None:
+            return
+        self.job_store.set_job_state([job_id], JobStore.STATE_DONE, [JobStore.STATE_RUNNING], 0)
+        self.send_event("cached", job_id=job_id, script=script)
+
+
+    def handle_frame_progress(self, script, frames_done, frames_total, fps):
+        """
+            Args:
+                script (str): The script being rendered.
+                frames_done (int): The frames written so far.
+                frames_total (int): The frames to render, 0 if not known.
+                fps (float): The frames written per second.
+        """
+        with self.lock:
+            job_id = self.batch_jobs.get(script)
+        if job_id is None:
+            return
+        self.job_store.update_progress(script, frames_done, frames_total)
+        self.send_event("progress", job_id=job_id, script=script, frames_done=frames_done,
+                        frames_total=frames_total, fps=round(fps, 2))
+
+
+    def handle_render_update(self, script, exit_code, elapsed_time):
+        """
+            Args:
+                script (str): The script that finished rendering.
+                exit_code (int): The exit code of the render.
+                elapsed_time (float): How long the script took to render, in seconds.
+        """
+        with self.lock:
+            job_id = self.batch_jobs.pop(script, None)
+        if job_id is None:
+            return
+        state = JobStore.STATE_DONE if exit_code == 0 else JobStore.STATE_FAILED
+        self.job_store.set_job_state([job_id], state, [JobStore.STATE_RUNNING], exit_code)
+        info = {"job_id": job_id, "script": script, "exit_code": exit_code, "elapsed_time": round(elapsed_time, 3)}
+        if self.error_obj.check_error_codes(exit_code):
+            info["message"] = self.error_obj.get_error_message(exit_code, script)
+        elif exit_code != 0:
+            info["message"] = f"Nuke exited with {exit_code}"
+        print(f"{script} finished with exit code {exit_code} in {elapsed_time:.1f}s")
+        self.send_event("script_done", **info)
+
+
+    def request_shutdown(self):
+        """
+            Stops the daemon. The batch rendering is stopped and its jobs go back in the queue, so they render again
+            the next time the daemon starts.
+        """
+        self.shutting_down = True
+        with self.lock:
+            render_worker = self.render_worker
+        if render_worker is not None:
+            render_worker.stop()
+        self.wake_event.set()
+
+
+    def send_event(self, event_type, **info):
+        """
+            Sends an event to every subscribed client.
+
+            Args:
+                event_type (str): The type of event.
+                **info: The rest of the event, such as the job id.
+        """
+        event = {"event": event_type, "time": round(time.time(), 3)}
+        event.update(info)
+        with self.lock:
+            for events in self.subscribers:
+                events.put(event)
+
+
+    @staticmethod
+    def send_line(connection, message):
+        """
+            Writes one json line to a client.
+
+            Args:
+                connection (socket.socket): The client's connection.
+                message (dict): The message to send.
+
+            Returns:
+                bool: False if the client has gone away.
+        """
+        try:
+            connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        except OSError:
+            return False
+        return True
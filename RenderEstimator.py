@@ -0,0 +1,252 @@
+import heapq
+import statistics
+
+
+class RenderEstimator():
+    """
+        Estimates when a render list will finish, from the frames each script has left and how long each of its
+        frames is expected to take, laid out over the workers of the render pool.
+
+        The time per frame of a script that has not started comes from its profile in the resource history, scaled
+        by how fast this run is going against what the history expected. A script whose time per frame has never
+        been measured is expected to take what the other scripts of the list do. Once a script is rendering, the
+        frames per second it is writing at take over from the prediction, a little more with every frame.
+
+        The scripts rendering keep their workers until their frames are done. The scripts waiting are then handed
+        to whichever worker frees up first, in queue order, split into chunks when the render pool splits them, and
+        the list finishes when the last worker does. Long scripts are counted by their frames rather than one
+        script each, and a single very long script holds the finish time back even with workers to spare.
+
+        Every time per frame has a spread: SPREAD_HISTORY for a learned profile, SPREAD_UNKNOWN for a guess from
+        the other scripts, shrinking to SPREAD_OBSERVED as a script renders. The same layout worked out with every
+        script at the fast and the slow end of its spread gives the band the finish time should fall in.
+
+        Attributes:
+            history (ResourceHistory): The learned profiles the times per frame are predicted from, None to only
+                learn from this run.
+            workers (int): The number of renders run at once.
+            chunk_size (int): The frames per chunk scripts are split into, 0 for whole scripts.
+            scripts (list): The scripts still to finish, in queue order.
+            frame_counts (dict): The frames each script renders, by script path. None if it is not known yet.
+            predicted_seconds (dict): The seconds per frame the history predicted for each script when the list
+                started, by script path.
+            progress (dict): The (frames done, frames per second) last reported for each script rendering, by
+                script path.
+            measured_ratios (list): How much slower than predicted each finished script rendered, per frame.
+            measured_seconds (list): The seconds per frame each finished script took.
+
+        Methods:
+            __init__(history, workers, chunk_size): Initializes the RenderEstimator object.
+            start(scripts, script_cache): Starts estimating a render list.
+            frame_progress(script, frames_done, frames_total, fps): Records the frames a script has written.
+            script_done(script, elapsed_time): Records a script that finished, or was skipped if no time is given.
+            get_scale(): Returns how much slower this run is going than the history predicted.
+            get_seconds_per_frame(script, fallback): Returns the expected seconds per frame of a script and its spread.
+            estimate(): Returns the seconds left, with the fast and slow end of the band.
+            lay_out(running_times, waiting_times): Returns when the last worker finishes.
+    """
+
+    SPREAD_HISTORY = 0.25
+    SPREAD_UNKNOWN = 0.5
+    SPREAD_OBSERVED = 0.1
+    #the frames a script has to write before its own speed counts as much as the prediction
+    PRIOR_FRAMES = 10
+
+
+    def __init__(self, history = None, workers = 1, chunk_size = 0):
+        """
+            Initialization method.
+
+            Args:
+                history (ResourceHistory, optional): The learned profiles to predict from, already loaded. Defaults
+                    to None.
+                workers (int, optional): The number of renders run at once. Defaults to 1.
+                chunk_size (int, optional): The frames per chunk scripts are split into, 0 for whole scripts.
+                    Defaults to 0.
+        """
+        self.history = history
+        self.workers = max(1, workers)
+        self.chunk_size = max(0, chunk_size)
+        self.scripts = []
+        self.frame_counts = {}
+        self.predicted_seconds = {}
+        self.progress = {}
+        self.measured_ratios = []
+        self.measured_seconds = []
+
+
+    def start(self, scripts, script_cache = None):
+        """
+            Starts estimating a render list. The frames of each script are taken from its frame range, until the
+            render reports the frames it is actually rendering.
+
+            Args:
+                scripts (list): The scripts of the list, in queue order.
+                script_cache (ScriptMetadataCache, optional): The cache to look the frame ranges up in.
+                    Defaults to None.
+        """
+        self.scripts = list(dict.fromkeys(scripts))
+        self.frame_counts = {}
+        self.predicted_seconds = {}
+        self.progress = {}
+        self.measured_ratios = []
+        self.measured_seconds = []
+        for script in self.scripts:
+            frame_count = None
+            if script_cache is not None:
+                try:
+                    first_frame, last_frame = script_cache.get(script)["frame_range"]
+                    frame_count = max(1, last_frame - first_frame + 1)
+                except (OSError, KeyError, TypeError, ValueError):
+                    pass
+            self.frame_counts[script] = frame_count
+            if self.history is not None:
+                predicted_seconds = self.history.predict_render_time(script, 1)
+                if predicted_seconds:
+                    self.predicted_seconds[script] = predicted_seconds
+
+
+    def frame_progress(self, script, frames_done, frames_total, fps):
+        """
+            Records the frames a script has written. Progress of a script that has already finished is left out,
+            so its speed is not counted as that of a script still rendering.
+
+            Args:
+                script (str): The script the frames belong to.
+                frames_done (int): The frames of the script written so far.
+                frames_total (int): The frames the script renders, 0 if not known.
+                fps (float): The frames per second the script is being written at.
+        """
+        if script not in self.scripts:
+            return
+        if frames_total:
+            self.frame_counts[script] = frames_total
+        self.progress[script] = (frames_done, fps)
+
+
+    def script_done(self, script, elapsed_time = None):
+        """
+            Takes a script off the estimate. The time per frame of a script that rendered whole, one worker to
+            itself, is kept to judge the rest of the list by.
+
+            Args:
+                script (str): The script that finished.
+                elapsed_time (float, optional): How long it took to render, None if it was skipped or failed.
+                    Defaults to None.
+        """
+        if script not in self.frame_counts:
+            return
+        frames_done = self.progress.get(script, (0, 0.0))[0] or self.frame_counts.get(script)
+        if elapsed_time and frames_done and self.chunk_size == 0:
+            seconds_per_frame = elapsed_time / frames_done
+            self.measured_seconds.append(seconds_per_frame)
+            if script in self.predicted_seconds:
+                self.measured_ratios.append(seconds_per_frame / self.predicted_seconds[script])
+        if script in self.scripts:
+            self.scripts.remove(script)
+        self.progress.pop(script, None)
+
+
+    def get_scale(self):
+        """
+            Returns:
+                float: How many times as long as the history predicted the frames of this run take, from the
+                    scripts that have finished and those rendering long enough to tell. 1 until one can tell.
+        """
+        ratios = list(self.measured_ratios)
+        if self.chunk_size == 0:
+            for script, (frames_done, fps) in self.progress.items():
+                if frames_done >= self.PRIOR_FRAMES and fps > 0 and script in self.predicted_seconds:
+                    ratios.append(1.0 / fps / self.predicted_seconds[script])
+        if not ratios:
+            return 1.0
+        return statistics.median(ratios)
+
+
+    def get_seconds_per_frame(self, script, fallback):
+        """
+            Args:
+                script (str): The path of the script.
+                fallback (float): The seconds per frame to expect when the script has never been measured, None if
+                    no script has been.
+
+            Returns:
+                tuple: The seconds per frame the script is expected to take and the spread of it, as a part of the
+                    time. None if there is nothing to go on.
+        """
+        if script in self.predicted_seconds:
+            seconds_per_frame = self.predicted_seconds[script] * self.get_scale()
+            spread = self.SPREAD_HISTORY
+        elif fallback is not None:
+            seconds_per_frame = fallback
+            spread = self.SPREAD_UNKNOWN
+        else:
+            seconds_per_frame = None
+            spread = self.SPREAD_UNKNOWN
+
+        frames_done, fps = self.progress.get(script, (0, 0.0))
+        if fps > 0:
+            #the script's own speed takes over from the prediction as it writes more frames
+            weight = frames_done / (frames_done + self.PRIOR_FRAMES) if seconds_per_frame is not None else 1.0
+            seconds_per_frame = (1.0 / fps) * weight + (seconds_per_frame or 0.0) * (1 - weight)
+            spread = self.SPREAD_OBSERVED * weight + spread * (1 - weight)
+        if seconds_per_frame is None:
+            return None
+        return seconds_per_frame, spread
+
+
+    def estimate(self):
+        """
+            Returns:
+                tuple: The seconds left until the list is expected to finish, and the fewest and most seconds it
+                    should take. None if nothing has been measured to estimate from yet.
+        """
+        if not self.scripts:
+            return 0.0, 0.0, 0.0
+
+        known_seconds = self.measured_seconds + [seconds * self.get_scale() for seconds in self.predicted_seconds.values()]
+        known_seconds += [1.0 / fps for frames_done, fps in self.progress.values() if fps > 0]
+        fallback = statistics.median(known_seconds) if known_seconds else None
+        known_frames = [frame_count for frame_count in self.frame_counts.values() if frame_count]
+        typical_frames = statistics.median(known_frames) if known_frames else 1
+
+        #the seconds left of each script, at its expected speed and at both ends of its spread
+        running_times = ([], [], [])
+        waiting_times = ([], [], [])
+        for script in self.scripts:
+            seconds_per_frame = self.get_seconds_per_frame(script, fallback)
+            if seconds_per_frame is None:
+                return None
+            seconds_per_frame, spread = seconds_per_frame
+            frames_done = self.progress.get(script, (0, 0.0))[0]
+            frames_left = max(0, (self.frame_counts.get(script) or typical_frames) - frames_done)
+            times = running_times if script in self.progress else waiting_times
+            for index, scale in enumerate((1.0, 1.0 - min(spread, 0.9), 1.0 + spread)):
+                if times is waiting_times and self.chunk_size > 0:
+                    #each chunk goes to whichever worker is free first
+                    chunk_frames = [self.chunk_size] * (frames_left // self.chunk_size)
+                    if frames_left % self.chunk_size:
+                        chunk_frames.append(frames_left % self.chunk_size)
+                    times[index].extend(frames * seconds_per_frame * scale for frames in chunk_frames)
+                else:
+                    times[index].append(frames_left * seconds_per_frame * scale)
+
+        return tuple(self.lay_out(running_times[index], waiting_times[index]) for index in range(3))
+
+
+    def lay_out(self, running_times, waiting_times):
+        """
+            Hands the scripts waiting to the workers as they free up.
+
+            Args:
+                running_times (list): The seconds left of each script rendering, each holding a worker.
+                waiting_times (list): The seconds each waiting script or chunk takes, in the order they start.
+
+            Returns:
+                float: The seconds until the last worker finishes.
+        """
+        worker_times = list(running_times) + [0.0] * max(0, self.workers - len(running_times))
+        heapq.heapify(worker_times)
+        for seconds in waiting_times:
+            heapq.heappush(worker_times, heapq.heappop(worker_times) + seconds)
+        return max(worker_times, default=0.0)
@@ -0,0 +1,443 @@
+import os
+import csv
+import sys
+import math
+import time
+import sqlite3
+import contextlib
+import argparse
+import statistics
+import threading
+
+from PySide6.QtCore import QCoreApplication
+
+from Settings import Settings
+from NukeLocator import NukeLocator
+
+
+class RenderHistory():
+    """
+        Keeps a record of every render in a SQLite database: each job (a whole script or one chunk of it) and the
+        time Nuke took to write each of its frames. Records are only ever added, never changed, so the history can
+        be trusted to show how renders went at the time.
+
+        Each job records its script, the hash of the script's contents and its shot (the folder the script is in),
+        the machine and Nuke version it rendered with, the number of renders running at once, the frames it rendered,
+        its exit code, how long it took and the memory, CPU and data it used. The database is in WAL mode, so the
+        window, the render daemon and render agents on the same machine can all add to it at once.
+
+        The history can be looked at by shot: the seconds per frame of each shot over time, the middle (p50) and
+        slow (p95) frame times, and the shots rendering slower than they used to. It can also be written out as CSV.
+        `python RenderQ.py --history` does the same from the command line.
+
+        Attributes:
+            db_filepath (str): The path of the database, ":memory:" to keep it in memory only.
+            connection (sqlite3.Connection): The open database.
+            lock (threading.Lock): Guards the connection, which is shared by the render pool's threads.
+
+        Methods:
+            __init__(db_filepath): Opens the database, creating it if needed.
+            main(argv): Reads the command line and writes a report or export of the history.
+            create_tables(): Creates the tables if they are not there.
+            record_job(record, frame_times): Adds a job and its frame times in one transaction.
+            get_jobs(shot, since): Returns the jobs recorded, oldest first.
+            get_frame_times(shot, since): Returns the frame times recorded, fastest first.
+            get_percentiles(shot, since): Returns the p50 and p95 frame times.
+            get_shot_trends(since): Returns how the renders of each shot have gone.
+            find_regressions(factor, since): Returns the shots rendering slower than they used to.
+            export_csv(csv_file, frames, shot, since): Writes the jobs or frame times out as CSV.
+            get_nuke_version(nuke_exe): Returns the Nuke version of an executable from its path.
+            get_percentile(values, percent): Returns a percentile of sorted values.
+            close(): Closes the database.
+    """
+
+    SCHEMA_VERSION = 1
+    JOB_COLUMNS = ("script", "script_hash", "shot", "host", "nuke_version", "workers", "first_frame", "last_frame",
+                   "frames", "attempt", "exit_code", "started", "finished", "elapsed_time", "peak_memory_mb",
+                   "cpu_cores", "read_mb", "written_mb")
+    #the latest renders of a shot that are compared against the ones before them
+    RECENT_JOBS = 3
+    BASELINE_JOBS = 20
+    MIN_BASELINE_JOBS = 3
+    REGRESSION_FACTOR = 1.25
+
+
+    def __init__(self, db_filepath):
+        """
+            Initialization method. Opens the database, creating it if needed.
+
+            Args:
+                db_filepath (str): The path of the database, ":memory:" to keep it in memory only.
+
+            Raises:
+                sqlite3.Error: If the database could not be opened.
+        """
+        self.db_filepath = db_filepath
+        self.lock = threading.Lock()
+        if db_filepath != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_filepath)), exist_ok=True)
+        #transactions are managed here, so a job and its frames are one commit
+        self.connection = sqlite3.connect(db_filepath, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+
+    @classmethod
+    def main(cls, argv):
+        """
+            Reads the command line and writes a report of the history to stdout, or exports it as CSV.
+
+            Args:
+                argv (list): The command line arguments, without the program name.
+
+            Returns:
+                int: The exit code for the process.
+        """
+        app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+        settings = Settings()
+        #anything printed while loading the settings would end up in an export to stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            settings.load_settings()
+            settings.load_settings_from_json()
+
+        parser = argparse.ArgumentParser(prog="RenderQ.py --history",
+                                         description="Report on or export the history of past renders.")
+        parser.add_argument("--shot", metavar="FOLDER", help="only the scripts in this folder")
+        parser.add_argument("--days", type=float, help="only the renders of the last number of days")
+        parser.add_argument("--regressions", action="store_true",
+                            help="list the shots whose latest renders are slower than the ones before them")
+        parser.add_argument("--factor", type=float, default=cls.REGRESSION_FACTOR,
+                            help=f"how many times slower counts as a regression, defaults to {cls.REGRESSION_FACTOR}")
+        parser.add_argument("--export", metavar="CSV", help="write the jobs out to a CSV file, - for stdout")
+        parser.add_argument("--frames", action="store_true", help="export the frame times instead of the jobs")
+        try:
+            args = parser.parse_args([arg for arg in argv if arg != "--history"])
+        except SystemExit as e:
+            return e.code
+
+        try:
+            history = cls(settings.render_history_filepath)
+        except sqlite3.Error as e:
+            print(f"Unable to open the render history: {e}", file=sys.stderr)
+            return 1
+        since = time.time() - args.days * 86400 if args.days else None
+        shot = os.path.abspath(args.shot) if args.shot else None
+
+        try:
+            if args.export:
+                if args.export == "-":
+                    count = history.export_csv(sys.stdout, args.frames, shot, since)
+                else:
+                    with open(args.export, "w", newline="") as csv_file:
+                        count = history.export_csv(csv_file, args.frames, shot, since)
+                    print(f"Wrote {count} rows to {args.export}")
+            elif args.regressions:
+                regressions = history.find_regressions(args.factor, since)
+                if not regressions:
+                    print("No shot is rendering slower than it used to")
+                for regression in regressions:
+                    if shot is not None and regression["shot"] != shot:
+                        continue
+                    changed = ", ".join(regression["changed"]) or "nothing recorded"
+                    print(f"{regression['shot']}: {regression['baseline_seconds']:.2f}s -> "
+                          f"{regression['recent_seconds']:.2f}s per frame ({regression['change'] * 100:+.0f}%), "
+                          f"changed: {changed}")
+            else:
+                trends = [trend for trend in history.get_shot_trends(since) if shot is None or trend["shot"] == shot]
+                if not trends:
+                    print("Nothing has been rendered yet")
+                for trend in trends:
+                    percentiles = trend["percentiles"]
+                    frame_text = (f"p50 {percentiles[50]:.2f}s, p95 {percentiles[95]:.2f}s per frame"
+                                  if percentiles else "no frame times")
+                    trend_text = f", {trend['trend'] * 100:+.0f}% since the first renders" if trend["trend"] is not None else ""
+                    print(f"{trend['shot']}: {trend['jobs']} jobs ({trend['failed']} failed), {trend['frames']} frames, "
+                          f"{frame_text}{trend_text}")
+        except OSError as e:
+            print(f"Unable to write the history: {e}", file=sys.stderr)
+            return 1
+        finally:
+            history.close()
+        return 0
+
+
+    def create_tables(self):
+        """
+            Creates the jobs and frames tables and their indexes if they are not there yet.
+        """
+        with self.lock:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    script TEXT NOT NULL,
+                    script_hash TEXT,
+                    shot TEXT NOT NULL,
+                    host TEXT,
+                    nuke_version TEXT,
+                    workers INTEGER,
+                    first_frame INTEGER,
+                    last_frame INTEGER,
+                    frames INTEGER NOT NULL DEFAULT 0,
+                    attempt INTEGER NOT NULL DEFAULT 1,
+                    exit_code INTEGER,
+                    started REAL,
+                    finished REAL NOT NULL,
+                    elapsed_time REAL,
+                    peak_memory_mb REAL,
+                    cpu_cores REAL,
+                    read_mb REAL,
+                    written_mb REAL
+                );
+                CREATE TABLE IF NOT EXISTS frames (
+                    job_id INTEGER NOT NULL REFERENCES jobs (id),
+                    frame INTEGER,
+                    seconds REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_shot_finished ON jobs (shot, finished);
+                CREATE INDEX IF NOT EXISTS frames_job ON frames (job_id);
+            """)
+            self.connection.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+
+    def record_job(self, record, frame_times = None):
+        """
+            Adds a job and the times of its frames in a single transaction.
+
+            Args:
+                record (dict): The job, any of the JOB_COLUMNS. "script" and "shot" are needed, "finished" is now
+                    if it is not given.
+                frame_times (list, optional): The (frame, seconds) of each frame the job wrote. Defaults to None.
+
+            Returns:
+                int: The id of the job.
+        """
+        record = dict(record)
+        record.setdefault("finished", time.time())
+        columns = [column for column in self.JOB_COLUMNS if record.get(column) is not None]
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                job_id = self.connection.execute(
+                    f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    [record[column] for column in columns]).lastrowid
+                if frame_times:
+                    self.connection.executemany("INSERT INTO frames (job_id, frame, seconds) VALUES (?, ?, ?)",
+                                                ((job_id, frame, seconds) for frame, seconds in frame_times
+                                                 if seconds is not None))
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+        return job_id
+
+
+    def get_jobs(self, shot = None, since = None):
+        """
+            Args:
+                shot (str, optional): Only the jobs of this shot, None for every shot. Defaults to None.
+                since (float, optional): Only the jobs finished after this time, None for every job. Defaults to None.
+
+            Returns:
+                list: A dict of each job's columns, oldest first.
+        """
+        conditions = []
+        params = []
+        if shot is not None:
+            conditions.append("shot = ?")
+            params.append(shot)
+        if since is not None:
+            conditions.append("finished >= ?")
+            params.append(since)
+        query = "SELECT * FROM jobs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(query + " ORDER BY finished, id", params)]
+
+
+    def get_frame_times(self, shot = None, since = None):
+        """
+            Args:
+                shot (str, optional): Only the frames of this shot, None for every shot. Defaults to None.
+                since (float, optional): Only the frames of jobs finished after this time. Defaults to None.
+
+            Returns:
+                list: The seconds each frame took, fastest first.
+        """
+        conditions = []
+        params = []
+        if shot is not None:
+            conditions.append("jobs.shot = ?")
+            params.append(shot)
+        if since is not None:
+            conditions.append("jobs.finished >= ?")
+            params.append(since)
+        query = "SELECT frames.seconds FROM frames JOIN jobs ON frames.job_id = jobs.id"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.lock:
+            return [row[0] for row in self.connection.execute(query + " ORDER BY frames.seconds", params)]
+
+
+    def get_percentiles(self, shot = None, since = None):
+        """
+            Args:
+                shot (str, optional): Only the frames of this shot, None for every shot. Defaults to None.
+                since (float, optional): Only the frames of jobs finished after this time. Defaults to None.
+
+            Returns:
+                dict: The seconds per frame at the 50th and 95th percentiles, by percent. None if no frame times have
+                    been recorded.
+        """
+        frame_times = self.get_frame_times(shot, since)
+        if not frame_times:
+            return None
+        return {percent: self.get_percentile(frame_times, percent) for percent in (50, 95)}
+
+
+    def get_shot_trends(self, since = None):
+        """
+            Sums up the renders of each shot. The trend compares the seconds per frame of the later half of a shot's
+            successful jobs against the earlier half, and needs four of them.
+
+            Args:
+                since (float, optional): Only the jobs finished after this time. Defaults to None.
+
+            Returns:
+                list: A dict for each shot, by when it last rendered, with its "shot", the "jobs", "failed" jobs and
+                    "frames" recorded, the "last_finished" time, the frame time "percentiles" (None without any) and
+                    the "trend" as a part of the earlier seconds per frame (None if it can not be told yet).
+        """
+        jobs_by_shot = {}
+        for job in self.get_jobs(since=since):
+            jobs_by_shot.setdefault(job["shot"], []).append(job)
+
+        trends = []
+        for shot, jobs in jobs_by_shot.items():
+            seconds_per_frame = [job["elapsed_time"] / job["frames"] for job in jobs
+                                 if job["exit_code"] == 0 and job["frames"] and job["elapsed_time"]]
+            trend = None
+            if len(seconds_per_frame) >= 4:
+                half = len(seconds_per_frame) // 2
+                earlier = statistics.median(seconds_per_frame[:half])
+                if earlier > 0:
+                    trend = statistics.median(seconds_per_frame[half:]) / earlier - 1
+            trends.append({"shot": shot, "jobs": len(jobs), "failed": sum(1 for job in jobs if job["exit_code"] != 0),
+                           "frames": sum(job["frames"] for job in jobs), "last_finished": jobs[-1]["finished"],
+                           "percentiles": self.get_percentiles(shot, since), "trend": trend})
+        return sorted(trends, key=lambda trend: trend["last_finished"], reverse=True)
+
+
+    def find_regressions(self, factor = REGRESSION_FACTOR, since = None):
+        """
+            Finds the shots whose latest successful jobs take more than `factor` times as long per frame as the ones
+            before them. The RECENT_JOBS latest jobs are compared against up to BASELINE_JOBS before them, and a
+            shot needs MIN_BASELINE_JOBS of those to be judged. What changed between the two, of the script, the
+            Nuke version, the machine and the renders running at once, is listed to help find the cause.
+
+            Args:
+                factor (float, optional): How many times as long counts as slower. Defaults to REGRESSION_FACTOR.
+                since (float, optional): Only the jobs finished after this time. Defaults to None.
+
+            Returns:
+                list: A dict for each slower shot, slowest change first, with its "shot", the "baseline_seconds" and
+                    "recent_seconds" per frame, the "change" as a part of the baseline, and what "changed".
+        """
+        jobs_by_shot = {}
+        for job in self.get_jobs(since=since):
+            if job["exit_code"] == 0 and job["frames"] and job["elapsed_time"]:
+                jobs_by_shot.setdefault(job["shot"], []).append(job)
+
+        regressions = []
+        for shot, jobs in jobs_by_shot.items():
+            recent_jobs = jobs[-self.RECENT_JOBS:]
+            baseline_jobs = jobs[-self.RECENT_JOBS - self.BASELINE_JOBS:-self.RECENT_JOBS]
+            if len(baseline_jobs) < self.MIN_BASELINE_JOBS:
+                continue
+            baseline_seconds = statistics.median(job["elapsed_time"] / job["frames"] for job in baseline_jobs)
+            recent_seconds = statistics.median(job["elapsed_time"] / job["frames"] for job in recent_jobs)
+            if baseline_seconds <= 0 or recent_seconds <= baseline_seconds * factor:
+                continue
+            changed = [name for name, column in (("script", "script_hash"), ("Nuke version", "nuke_version"),
+                                                 ("machine", "host"), ("render workers", "workers"))
+                       if {job[column] for job in recent_jobs} - {job[column] for job in baseline_jobs}]
+            regressions.append({"shot": shot, "baseline_seconds": baseline_seconds, "recent_seconds": recent_seconds,
+                                "change": recent_seconds / baseline_seconds - 1, "changed": changed})
+        return sorted(regressions, key=lambda regression: regression["change"], reverse=True)
+
+
+    def export_csv(self, csv_file, frames = False, shot = None, since = None):
+        """
+            Writes the jobs, or the frame times with the job each belongs to, out as CSV with a header row.
+
+            Args:
+                csv_file (file): The open file to write to.
+                frames (bool, optional): Write the frame times instead of the jobs. Defaults to False.
+                shot (str, optional): Only the jobs of this shot, None for every shot. Defaults to None.
+                since (float, optional): Only the jobs finished after this time. Defaults to None.
+
+            Returns:
+                int: The number of rows written, not counting the header.
+        """
+        writer = csv.writer(csv_file)
+        if not frames:
+            jobs = self.get_jobs(shot, since)
+            writer.writerow(("id",) + self.JOB_COLUMNS)
+            writer.writerows([job["id"]] + [job[column] for column in self.JOB_COLUMNS] for job in jobs)
+            return len(jobs)
+
+        conditions = []
+        params = []
+        if shot is not None:
+            conditions.append("jobs.shot = ?")
+            params.append(shot)
+        if since is not None:
+            conditions.append("jobs.finished >= ?")
+            params.append(since)
+        query = ("SELECT frames.job_id, jobs.script, jobs.shot, jobs.host, jobs.nuke_version, frames.frame, "
+                 "frames.seconds FROM frames JOIN jobs ON frames.job_id = jobs.id")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY frames.job_id, frames.rowid", params).fetchall()
+        writer.writerow(("job_id", "script", "shot", "host", "nuke_version", "frame", "seconds"))
+        writer.writerows(tuple(row) for row in rows)
+        return len(rows)
+
+
+    @classmethod
+    def get_nuke_version(cls, nuke_exe):
+        """
+            Args:
+                nuke_exe (str): The path of the Nuke executable, such as ".../Nuke14.0v5/Nuke14.0.exe".
+
+            Returns:
+                str: The version in the path, such as "14.0v5", None if there is none.
+        """
+        if not nuke_exe:
+            return None
+        return NukeLocator.format_version(NukeLocator.get_version(nuke_exe))
+
+
+    @staticmethod
+    def get_percentile(values, percent):
+        """
+            Args:
+                values (list): The values, sorted.
+                percent (float): The percentile, from 0 to 100.
+
+            Returns:
+                float: The smallest value at least `percent` percent of the values are at or below.
+        """
+        index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+        return values[min(index, len(values) - 1)]
+
+
+    def close(self):
+        """
+            Closes the database.
+        """
+        with self.lock:
+            self.connection.close()
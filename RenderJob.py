@@ -0,0 +1,146 @@
+class RenderJob():
+    """
+        A single unit of render work: a Nuke script and, optionally, the frame range of it to render.
+
+        A job without a frame range renders the script's whole Root frame range. A job with a frame range is a chunk,
+        one of several jobs that together render one script across several Nuke processes. A job can also hold
+        several separate frame ranges, such as the missing frames of a script, which are rendered one after another
+        in the same Nuke process.
+
+        Attributes:
+            script (str): The path to the Nuke script.
+            first_frame (int): The first frame to render, None to use the script's Root range.
+            last_frame (int): The last frame to render, None to use the script's Root range.
+            step (int): The frame increment.
+            attempts (int): How many times this job has been started.
+            start_time (float): When the latest attempt was started, None if it has not been started.
+            queue_index (int): The place in the render queue of the script this job belongs to.
+            frames_done (int): The frames written by the current attempt.
+            frame_times (list): The (frame, seconds) Nuke reported for each frame written by the current attempt.
+            frame_ranges (list): The [first_frame, last_frame] ranges to render, None if the job renders a single range.
+            nuke_exe (str): The Nuke executable to render the job with, None until it is worked out.
+
+        Methods:
+            __init__(script, first_frame, last_frame, step, frame_ranges): Initializes the RenderJob object.
+            split(script, first_frame, last_frame, chunk_size, step): Splits a frame range into chunk jobs.
+            from_ranges(script, frame_ranges, chunk_size): Makes the jobs that render a list of frame ranges.
+            is_chunk(): Returns whether the job renders only part of the script.
+            get_frame_args(): Returns the frame arguments to pass to RenderScript.py.
+            get_frame_count(): Returns the number of frames the job renders.
+    """
+
+    def __init__(self, script, first_frame = None, last_frame = None, step = 1, frame_ranges = None):
+        """
+            Initialization method.
+
+            Args:
+                script (str): The path to the Nuke script.
+                first_frame (int, optional): The first frame to render. Defaults to the script's Root range.
+                last_frame (int, optional): The last frame to render. Defaults to the script's Root range.
+                step (int, optional): The frame increment. Defaults to 1.
+                frame_ranges (list, optional): Separate [first_frame, last_frame] ranges to render in one go. The
+                    first and last frame are then taken from the ranges. Defaults to None.
+        """
+        self.script = script
+        self.frame_ranges = None
+        if frame_ranges:
+            self.frame_ranges = [list(frame_range) for frame_range in frame_ranges]
+            first_frame = self.frame_ranges[0][0]
+            last_frame = self.frame_ranges[-1][1]
+        self.first_frame = first_frame
+        self.last_frame = last_frame
+        self.step = step
+        self.attempts = 0
+        self.start_time = None
+        self.queue_index = None
+        self.frames_done = 0
+        self.frame_times = []
+        self.nuke_exe = None
+
+
+    @classmethod
+    def split(cls, script, first_frame, last_frame, chunk_size, step = 1):
+        """
+            Splits the frame range of a script into chunk jobs of at most `chunk_size` frames each.
+
+            Args:
+                script (str): The path to the Nuke script.
+                first_frame (int): The first frame of the range.
+                last_frame (int): The last frame of the range.
+                chunk_size (int): The most frames a single chunk may hold.
+                step (int, optional): The frame increment. Defaults to 1.
+
+            Returns:
+                list: The chunk jobs, in frame order. A range that fits in one chunk gives a single job.
+        """
+        chunk_span = max(1, chunk_size) * step
+        jobs = []
+        start = first_frame
+        while start <= last_frame:
+            end = min(start + chunk_span - step, last_frame)
+            jobs.append(cls(script, start, end, step))
+            start = end + step
+        return jobs
+
+
+    @classmethod
+    def from_ranges(cls, script, frame_ranges, chunk_size = 0):
+        """
+            Makes the jobs that render a list of frame ranges of a script. With chunking on each range is split into
+            chunks of its own, so no chunk spans a gap. Without it every range is rendered by one job.
+
+            Args:
+                script (str): The path to the Nuke script.
+                frame_ranges (list): The [first_frame, last_frame] ranges to render, in order.
+                chunk_size (int, optional): The most frames a single chunk may hold, 0 for no chunking. Defaults to 0.
+
+            Returns:
+                list: The jobs, in frame order.
+        """
+        if chunk_size > 0:
+            return [job for first_frame, last_frame in frame_ranges
+                    for job in cls.split(script, first_frame, last_frame, chunk_size)]
+        if len(frame_ranges) == 1:
+            return [cls(script, *frame_ranges[0])]
+        return [cls(script, frame_ranges = frame_ranges)]
+
+
+    def is_chunk(self):
+        """
+            Returns:
+                bool: True if the job only renders a set frame range of the script.
+        """
+        return self.first_frame is not None
+
+
+    def get_frame_args(self):
+        """
+            Returns:
+                list: The start, end and step arguments for RenderScript.py, the "--frames" argument for a job with
+                    several ranges, or an empty list for a whole script.
+        """
+        if not self.is_chunk():
+            return []
+        if self.frame_ranges is not None:
+            return ["--frames", ",".join(f"{first}-{last}" for first, last in self.frame_ranges)]
+        return [str(self.first_frame), str(self.last_frame), str(self.step)]
+
+
+    def get_frame_count(self):
+        """
+            Returns:
+                int: The number of frames the job renders, 0 for a whole script as its range is not known here.
+        """
+        if not self.is_chunk():
+            return 0
+        if self.frame_ranges is not None:
+            return sum(len(range(first, last + 1, self.step)) for first, last in self.frame_ranges)
+        return len(range(self.first_frame, self.last_frame + 1, self.step))
+
+
+    def __repr__(self):
+        if self.frame_ranges is not None:
+            return f"{self.script} [{','.join(f'{first}-{last}' for first, last in self.frame_ranges)}]"
+        if self.is_chunk():
+            return f"{self.script} [{self.first_frame}-{self.last_frame}]"
+        return self.script
@@ -0,0 +1,101 @@
+import re
+import time
+from collections import deque
+
+
+class RenderOutputParser():
+    """
+        Reads Nuke's verbose (-V 2) render output one line at a time and keeps track of the frames rendered.
+
+        Nuke prints a "Frame 12 (2 of 50)" line as it starts each frame and a "Writing <file> took 1.23 seconds"
+        line once the frame is written. The parser only ever keeps the last few lines and frame times, so memory
+        use stays the same no matter how long the render runs or how much it prints.
+
+        Attributes:
+            frames_done (int): The number of frames written so far.
+            total_frames (int): The number of frames Nuke said it would render, 0 until it says so.
+            current_frame (int): The frame number Nuke is on, None until the first frame starts.
+            last_frame_time (float): How long Nuke said the last frame took to write, in seconds.
+            recent_lines (deque): The last lines printed, kept to show with an error.
+            frame_times (deque): When each of the most recent frames was written, used for the fps.
+
+        Methods:
+            __init__(total_frames, history): Initializes the RenderOutputParser object.
+            feed(line): Reads one line of output.
+            get_fps(): Returns the frames per second over the most recent frames.
+            get_recent_output(): Returns the last lines printed as a single string.
+    """
+
+    FRAME_START_PATTERN = re.compile(r"Frame (\d+) \((\d+) of (\d+)\)")
+    FRAME_WRITTEN_PATTERN = re.compile(r"Writing (.+?) took ([\d.]+) seconds")
+
+
+    def __init__(self, total_frames = 0, history = 50):
+        """
+            Initialization method.
+
+            Args:
+                total_frames (int, optional): The number of frames expected, if known before Nuke says. Defaults to 0.
+                history (int, optional): How many lines and frame times to keep. Defaults to 50.
+        """
+        self.frames_done = 0
+        self.total_frames = total_frames
+        self.current_frame = None
+        self.last_frame_time = None
+        self.recent_lines = deque(maxlen=history)
+        self.frame_times = deque(maxlen=history)
+
+
+    def feed(self, line):
+        """
+            Reads one line of Nuke output.
+
+            Args:
+                line (str or bytes): The line printed by Nuke.
+
+            Returns:
+                bool: True if the line was a frame being written, False otherwise.
+        """
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.rstrip("\r\n")
+        if not line:
+            return False
+        self.recent_lines.append(line)
+
+        match = self.FRAME_START_PATTERN.search(line)
+        if match:
+            self.current_frame = int(match.group(1))
+            if not self.total_frames:
+                self.total_frames = int(match.group(3))
+            return False
+
+        match = self.FRAME_WRITTEN_PATTERN.search(line)
+        if match:
+            self.frames_done += 1
+            self.last_frame_time = float(match.group(2))
+            self.frame_times.append(time.time())
+            return True
+        return False
+
+
+    def get_fps(self):
+        """
+            Gets the render speed over the most recent frames.
+
+            Returns:
+                float: The frames per second, 0 if no frames have been written yet.
+        """
+        if len(self.frame_times) > 1 and self.frame_times[-1] > self.frame_times[0]:
+            return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+        if self.last_frame_time:
+            return 1 / self.last_frame_time
+        return 0.0
+
+
+    def get_recent_output(self):
+        """
+            Returns:
+                str: The last lines Nuke printed, one per line.
+        """
+        return "\n".join(self.recent_lines)
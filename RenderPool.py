@@ -0,0 +1,218 @@
+import concurrent.futures
+import queue
+import time
+
+
+class RenderPool():
+    """
+        A pool of render workers that runs several render jobs at the same time.
+
+        The pool keeps up to `max_workers` jobs running at once. Each job is handed to `run_job` in a worker
+        thread (which in turn drives a Nuke process), and the result of every job is passed back through a callback
+        as soon as that job finishes. Jobs can therefore finish out of order; the callback is always called from the
+        thread that called `run()`, never from a worker thread. The callback can hand back jobs to run again (for
+        example a failed chunk), which are started before any job still waiting.
+
+        An optional `can_start` check can hold the next job back while others are running, for example until there
+        is enough free memory for it. It is asked again every `poll_interval` seconds. A job is always started when
+        nothing is running, so the pool can never stall.
+
+        An optional `is_ready` check lets jobs wait on others, for example until the scripts they read from have
+        rendered. The first waiting job that is ready is started rather than the first in line, so the workers are
+        kept busy with the jobs that can run. If nothing is running and no job is ready, the first job is started
+        anyway.
+
+        An optional `worker_limit` can change the number of jobs run at once while the pool runs, for example to
+        follow the frames per second the machine keeps up. It is asked after every round of starting jobs, and is
+        kept between 1 and `max_workers`. Lowering it never stops a running job, the pool only waits to start the
+        next one.
+
+        The worker threads are not Qt threads, so a signal emitted from one only reaches a window once the thread
+        that called `run()` returns. Anything a job has to report while it runs, such as the frames it has written, is
+        handed to `post` instead, and called from the thread that called `run()` as soon as it comes in. Everything a
+        job posts is called before its result is passed to the callback.
+
+        Attributes:
+            max_workers (int): The number of jobs allowed to run at the same time.
+            run_job (callable): Called in a worker thread with a job. Returns the exit code of the job.
+            can_start (callable): Called with the next job before it is started while others are running. Returns
+                False to hold it back for now. None to start jobs as soon as there is a free worker.
+            worker_limit (callable): Called with the number of jobs running and waiting, returns the number of jobs
+                to run at once. None to always run `max_workers`.
+            is_ready (callable): Called with a waiting job, returns False while it has to wait on other jobs. None to
+                start jobs in the order they are given.
+            stop_flag (bool): Flag indicating that no new jobs should be started.
+            poll_interval (float): How long (in seconds) to wait for a job to finish before checking the stop flag again.
+            events (queue.Queue): The calls posted by the worker threads, and a None for each job that finishes, waiting
+                for the thread that called `run()`.
+
+        Methods:
+            __init__(max_workers, run_job, can_start, worker_limit, is_ready): Initializes the RenderPool object.
+            run(jobs, on_job_finished): Runs every job in the list and reports each result as it comes in.
+            post(callback, *args): Calls a method from the thread that called `run()`.
+            process_events(timeout): Calls the methods posted by the worker threads.
+            get_worker_limit(running_count, pending_count): Returns the number of jobs to run at once.
+            get_next_job_index(pending, running_count): Returns the place of the next job to start.
+            stop(): Stops the pool from starting any new jobs.
+    """
+
+    def __init__(self, max_workers, run_job, can_start = None, worker_limit = None, is_ready = None):
+        """
+            Initialization method.
+
+            Args:
+                max_workers (int): The number of jobs allowed to run at the same time. Anything below 1 is treated as 1.
+                run_job (callable): The method called for each job in a worker thread. It must return the exit code.
+                can_start (callable, optional): Called with the next job while others are running, returning False
+                    holds it back. Defaults to None.
+                worker_limit (callable, optional): Called with the number of jobs running and waiting, returning the
+                    number of jobs to run at once, at most `max_workers`. Defaults to None.
+                is_ready (callable, optional): Called with a waiting job, returning False keeps it waiting while later
+                    jobs start. Defaults to None.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.run_job = run_job
+        self.can_start = can_start
+        self.worker_limit = worker_limit
+        self.is_ready = is_ready
+        self.stop_flag = False
+        self.poll_interval = 0.5
+        self.events = queue.Queue()
+
+
+    def run(self, jobs, on_job_finished):
+        """
+            Runs the given jobs, keeping up to `max_workers` of them (or the worker limit) running at once.
+
+            Jobs are started in the order they are given, skipping those that are not ready yet. Whenever a job finishes, `on_job_finished` is called with
+            the job, its exit code and the time it took, and the next waiting job is started. A job that raises an
+            exception is reported with the unknown render error code (206).
+
+            Args:
+                jobs (list): The jobs to run. They are passed as-is to `run_job`.
+                on_job_finished (callable): Called with (job, exit_code, elapsed_time) for every finished job.
+                    It may return a list of jobs to retry, which go to the front of the waiting jobs.
+
+            Returns:
+                bool: True if every job was run, False if the pool was stopped before then.
+        """
+        pending = list(jobs)
+        running = {}
+        worker_limit = self.get_worker_limit(0, len(pending))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                while pending and len(running) < worker_limit and not self.stop_flag:
+                    job_index = self.get_next_job_index(pending, len(running))
+                    if job_index is None:
+                        break
+                    if running and self.can_start is not None and not self.can_start(pending[job_index]):
+                        break
+                    job = pending.pop(job_index)
+                    future = executor.submit(self.run_job, job)
+                    #wakes the loop below as soon as the job finishes
+                    future.add_done_callback(lambda _: self.events.put(None))
+                    running[future] = (job, time.time())
+                worker_limit = self.get_worker_limit(len(running), len(pending))
+
+                if not running:
+                    break
+
+                self.process_events(self.poll_interval)
+                done = [future for future in running if future.done()]
+                #what the finished jobs posted last is in the queue before their results are handled
+                self.process_events(0)
+                for future in done:
+                    job, start_time = running.pop(future)
+                    try:
+                        exit_code = future.result()
+                    except Exception as e:
+                        print(f"Render job {job} failed: {e}")
+                        exit_code = 206
+
+                    #anything still finishing after a stop was killed, so it is not reported
+                    if not self.stop_flag:
+                        retry_jobs = on_job_finished(job, exit_code, time.time()-start_time)
+                        if retry_jobs:
+                            pending[0:0] = retry_jobs
+
+        #the jobs killed by a stop may have posted more on their way out
+        self.process_events(0)
+        return not self.stop_flag
+
+
+    def post(self, callback, *args):
+        """
+            Hands a call to the thread that called `run()`, which makes it as soon as it is waiting on the jobs. Called
+            from the worker threads.
+
+            Args:
+                callback (callable): The method to call.
+                *args: The arguments to call it with.
+        """
+        self.events.put((callback, args))
+
+
+    def process_events(self, timeout):
+        """
+            Calls every method posted by the worker threads, in the order they were posted, waiting up to `timeout`
+            seconds for something to come in if nothing has.
+
+            Args:
+                timeout (float): How long (in seconds) to wait for a post or a job to finish, 0 to not wait.
+        """
+        try:
+            event = self.events.get(timeout=timeout) if timeout > 0 else self.events.get_nowait()
+        except queue.Empty:
+            return
+        while True:
+            if event is not None:
+                callback, args = event
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Unable to handle {callback}: {e}")
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+
+
+    def get_worker_limit(self, running_count, pending_count):
+        """
+            Args:
+                running_count (int): The number of jobs running.
+                pending_count (int): The number of jobs waiting to start.
+
+            Returns:
+                int: The number of jobs to run at once, from `worker_limit` if there is one, kept between 1 and
+                    `max_workers`.
+        """
+        if self.worker_limit is None:
+            return self.max_workers
+        return max(1, min(self.max_workers, int(self.worker_limit(running_count, pending_count))))
+
+
+    def get_next_job_index(self, pending, running_count):
+        """
+            Args:
+                pending (list): The jobs waiting to start, in order.
+                running_count (int): The number of jobs running.
+
+            Returns:
+                int: The place in `pending` of the first job that is ready. The first job if nothing is running and
+                    none are ready, so the pool can never stall. None if the jobs have to wait for those running.
+        """
+        if self.is_ready is None:
+            return 0
+        for job_index, job in enumerate(pending):
+            if self.is_ready(job):
+                return job_index
+        return 0 if running_count == 0 else None
+
+
+    def stop(self):
+        """
+            Stops the pool from starting any new jobs. Jobs that are already running are left to the caller to kill.
+        """
+        self.stop_flag = True
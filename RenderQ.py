@@ -1,16 +1,13 @@
 import sys
 import os
-import subprocess
-import time
-import threading
 
-from PreferencesTab import PreferencesTab
+from StartupProfiler import StartupProfiler
+#made before anything heavy is imported, so the imports are timed too
+startup_profiler = StartupProfiler("--profile-startup" in sys.argv[1:])
+
 from Settings import Settings
-from MainWindowTab import MainWindowTab
-from SeparateThread import SeparateThread
 from SplashScreen import SplashScreen
 
-
 from PySide6 import QtWidgets, QtGui, QtCore
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QHBoxLayout,
@@ -20,8 +17,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import(
     QSettings, Qt, QUrl, QEventLoop, QThread, 
-    QCoreApplication, QEventLoop
+    QCoreApplication, QEventLoop, QTimer
 )
+startup_profiler.mark("imports")
 
 class Application(QMainWindow):
     """
@@ -30,31 +28,49 @@ class Application(QMainWindow):
         This class inherits from QMainWindow and constructs the main window with tabs. It also displays a splash screen
         during the loading process and handles the completion of settings loading.
 
+        The window is shown as soon as the settings are loaded. The settings loaded on launch are the one Settings
+        object shared by the window, its render engines and its error codes, so they are only read once. Anything
+        slow is left to the background: finding Nuke when no Nuke executable is set yet, and checking the scripts of
+        the saved queue. The modules only needed for the window, and the preferences, are imported when they are
+        first needed.
+
         Attributes:
             splash_screen (SplashScreen): The splash screen widget.
             threads (QThread): The thread for loading settings.
             launch_worker (Settings): The settings loading worker object.
-            settings (Settings): The settings object.
+            settings (Settings): The settings object, the launch worker once it has loaded.
+            mw_tab (MainWindowTab): The render queue tab.
+            profiler (StartupProfiler): Times the phases of the start up for `--profile-startup`.
+            nuke_finder_threads (QThread): The thread Nuke is looked for in when no Nuke executable is set, None if
+                it is not needed.
+            nuke_finder_worker (SeparateBootupThread): Looks for the latest Nuke in the background.
 
         Methods:
-            __init__(): Initializes the Application object and sets up the application window.
+            __init__(profiler): Initializes the Application object and sets up the application window.
             continue_construction(): Continues the construction of the application after settings loading is finished.
+            report_startup(): Prints the time each phase of the start up took, with `--profile-startup`.
+            find_nuke(): Looks for the latest Nuke in the background.
+            handle_nuke_found(nuke_path): Called once the search for Nuke is done, saves the path found.
             closeEvent(event): Overrides the closeEvent method to handle the event of the application window being closed.
             open_readme(): Opens the README file in the default browser under the use section.
             open_pref_dialog(): Opens the preferences dialog.
     """
 
-    def __init__(self):
+    def __init__(self, profiler = None):
         """
         This method sets up the application window, loads settings in a separate thread,
         and constructs the main window with tabs.
 
-        The splash screen is displayed during the loading process and is automatically closed
-        when the settings are loaded. It has a slight pause (sleep) so the user can see which nuke version was loaded
+        The splash screen is displayed during the loading process and is closed as soon as the settings are loaded.
 
+        Args:
+            profiler (StartupProfiler, optional): Times the phases of the start up. Defaults to None.
         """
         
         super(Application, self).__init__()
+        self.profiler = profiler or StartupProfiler()
+        self.nuke_finder_threads = None
+        self.nuke_finder_worker = None
 
         #load logo splashscreen
         self.splash_screen = SplashScreen()
@@ -63,6 +79,7 @@ class Application(QMainWindow):
         self.splash_screen.show()
         self.hide()
         QtWidgets.QApplication.processEvents() 
+        self.profiler.mark("splash screen")
 
         #load settings in separate thread
         self.threads = QThread(self)
@@ -84,17 +101,17 @@ class Application(QMainWindow):
         It hides the splash screen, sets window properties such as size and title, constructs the main window with tabs
         and adds toolbar buttons for Help and Preferences.
         """
+        self.profiler.mark("settings")
         self.splash_screen.deal_with_end()
-        QtWidgets.QApplication.processEvents() 
-        time.sleep(1.5)
-        self.show()
         self.threads.quit()
-        self.settings = Settings()
-        self.settings.load_settings()
+        #the launch worker has loaded and saved the settings, and is back on this thread
+        self.settings = self.launch_worker
+
+        from MainWindowTab import MainWindowTab
+        self.profiler.mark("window imports")
         
         #hide logo once settings are done loading
         self.splash_screen.hide()
-        QtWidgets.QApplication.processEvents() 
 
         #Window set
         self.resize(900, 450)
@@ -108,8 +125,8 @@ class Application(QMainWindow):
         central_widget = QWidget()
         tabs = QTabWidget()
         #pref_tab = PreferencesTab(self.settings)
-        mw_tab = MainWindowTab(self.settings)
-        tabs.addTab(mw_tab, "Render Queue")
+        self.mw_tab = MainWindowTab(self.settings)
+        tabs.addTab(self.mw_tab, "Render Queue")
         #tabs.addTab(pref_tab, "Preferences")
         main_layout = QVBoxLayout()
         main_layout.addWidget(tabs)
@@ -126,19 +143,72 @@ class Application(QMainWindow):
         toolbar.addWidget(help_button)
         toolbar.setMovable(False)
         self.addToolBar(Qt.TopToolBarArea, toolbar)
+        self.profiler.mark("window")
+
+        self.show()
+        #runs once the window has been drawn
+        QTimer.singleShot(0, self.report_startup)
+        if not self.settings.nuke_exe:
+            self.find_nuke()
+
+
+    def report_startup(self):
+        """
+            Ends the start up once the window is up, and prints how long each phase of it took with
+            `--profile-startup`.
+        """
+        self.profiler.mark("first paint")
+        self.profiler.report()
+
+
+    def find_nuke(self):
+        """
+            Looks for the latest Nuke in the background when no Nuke executable is set, on the first launch. The
+            window can be used in the meantime.
+        """
+        from SeparateBootupThread import SeparateBootupThread
+        self.nuke_finder_threads = QThread(self)
+        self.nuke_finder_worker = SeparateBootupThread(self.settings.nuke_cache_filepath)
+        self.nuke_finder_worker.moveToThread(self.nuke_finder_threads)
+        self.nuke_finder_worker.nuke_path_ready.connect(self.handle_nuke_found)
+        self.nuke_finder_threads.started.connect(self.nuke_finder_worker.get_latest_nuke_path)
+        self.nuke_finder_threads.start()
+
+
+    def handle_nuke_found(self, nuke_path):
+        """
+            Saves the Nuke executable found in the background, or shows an error message if none was found.
+
+            Args:
+                nuke_path (str): The path of the latest Nuke executable, empty or None if none was found.
+        """
+        self.nuke_finder_threads.quit()
+        self.settings.handle_nuke_path_search_result(nuke_path)
+        self.settings.save_settings()
+        if nuke_path:
+            print(f"Using Nuke {nuke_path}")
 
 
     def closeEvent(self, event):
         """This method overrides the closeEvent method to handle the event of the application window being closed.
-        It clears internal settings and performs slight clean-up before closing the application.
+        It clears internal settings and performs slight clean-up before closing the application. The queue is kept
+        in the job store, so it is there again next time.
 
         Args:
             event: The event passed into the method.
         """
+        #keep the parsed script details and the queue for next time, the render daemon carries on without the window
+        if hasattr(self, "mw_tab"):
+            self.mw_tab.detach_from_daemon()
+            self.mw_tab.validation_pool.shutdown()
+            self.mw_tab.validator.input_scanner.shutdown()
+            self.mw_tab.script_cache.save()
+            self.mw_tab.job_store.close()
+
+        #the settings themselves are kept in the json file, which is loaded again on launch
         user = self.settings.get_user()
         pyside_settings = QtCore.QSettings(user, "BNRQ")
         pyside_settings.clear()
-        self.settings.clear()
 
         #self.settings.remove_appdata_contents()
         super().closeEvent(event)
@@ -156,6 +226,7 @@ class Application(QMainWindow):
         """
         Open up the preferences dialog.
         """
+        from PreferencesTab import PreferencesTab
         prefs = PreferencesTab(self.settings)
         prefs.finished.connect(prefs.close_prefs)
         prefs.dialog.exec()
@@ -186,10 +257,26 @@ class Application(QMainWindow):
         
 if __name__ == "__main__":
     """Program start. This creates an insance of the MainWindow and shows
-        it to the user. 
+        it to the user. With --headless the queue file given is rendered without any window instead, with
+        --daemon the render daemon is run, with --agent this machine renders for a render coordinator, and with
+        --history the history of past renders is reported on or exported. With --profile-startup the time each phase
+        of starting the window took is printed.
     """
+    if "--headless" in sys.argv[1:]:
+        from HeadlessRender import HeadlessRender
+        sys.exit(HeadlessRender.main(sys.argv[1:]))
+    if "--daemon" in sys.argv[1:]:
+        from RenderDaemon import RenderDaemon
+        sys.exit(RenderDaemon.main(sys.argv[1:]))
+    if "--agent" in sys.argv[1:]:
+        from RenderAgent import RenderAgent
+        sys.exit(RenderAgent.main(sys.argv[1:]))
+    if "--history" in sys.argv[1:]:
+        from RenderHistory import RenderHistory
+        sys.exit(RenderHistory.main(sys.argv[1:]))
     app = QApplication(sys.argv)
-    main_window = Application()
+    startup_profiler.mark("qt application")
+    main_window = Application(startup_profiler)
     #pdb.run('main_window.show()', globals(), locals())
-    main_window.show()
+    #the window shows itself once the settings are loaded
     sys.exit(app.exec())
\ No newline at end of file
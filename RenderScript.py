@@ -1,5 +1,6 @@
 import nuke
 import sys
+import re
 import datetime
 
 #not needed as of yet, but imported just in case
@@ -41,13 +42,16 @@ def find_write_node(write_node_name):
         exit(EXIT_NO_WRITE_NODE)
 
 
-def render_script(wn):
+def render_script(wn, first_frame = None, last_frame = None, step = 1):
     """
     Render the given Nuke script using the specified write node.
 
     Args:
         ns (nuke.Node): The Nuke script to render.
         wn (nuke.Node): The write node to use for rendering.
+        first_frame (int): The first frame to render, defaults to the Root's first frame.
+        last_frame (int): The last frame to render, defaults to the Root's last frame.
+        step (int): The frame increment, defaults to 1.
 
     Raises:
         nuke.RenderCancelled: If the render was cancelled by the user.
@@ -78,13 +82,40 @@ def render_script(wn):
             print("An unknown render error occurred.")
             sys.exit(206)
     """
+    if first_frame is None:
+        first_frame = nuke.root().firstFrame()
+    if last_frame is None:
+        last_frame = nuke.root().lastFrame()
+
     try:
-        nuke.execute(wn, start = nuke.root().firstFrame(), end = nuke.root().lastFrame())
+        nuke.execute(wn, start = first_frame, end = last_frame, incr = step)
     except BaseException as e:
         sys.exit(EXIT_RENDER_ERROR)
 
 
-def main(nuke_script = nuke.Root(), write_node_name = "Write1"):
+def parse_frame_ranges(text):
+    """
+    Read a list of frame ranges, such as "1001-1010,1050-1050".
+
+    Args:
+        text (str): The frame ranges, separated by commas. Frames can be negative.
+
+    Returns:
+        list: The (first_frame, last_frame) of each range.
+    """
+    frame_ranges = []
+    for part in text.split(","):
+        match = re.fullmatch(r"\s*(-?\d+)(?:-(-?\d+))?\s*", part)
+        if match is None:
+            print(f"Unreadable frame range: {part}")
+            sys.exit(EXIT_UNKNOWN_RENDER_ERROR)
+        first_frame = int(match.group(1))
+        frame_ranges.append((first_frame, int(match.group(2)) if match.group(2) else first_frame))
+    return frame_ranges
+
+
+def main(nuke_script = nuke.Root(), write_node_name = "Write1", first_frame = None, last_frame = None, step = 1,
+         frame_ranges = None):
     """
     Find write node and render script with the found write node.
 
@@ -92,13 +123,23 @@ def main(nuke_script = nuke.Root(), write_node_name = "Write1"):
         nuke_script (nuke.Script): the Nuke script to render
         write_node_name (str): the name of the write node that the user selected,
                 defaults to "Write1".
+        first_frame (int): the first frame to render, defaults to the Root's first frame.
+        last_frame (int): the last frame to render, defaults to the Root's last frame.
+        step (int): the frame increment, defaults to 1.
+        frame_ranges (list): separate (first_frame, last_frame) ranges to render one after another,
+                used instead of first_frame and last_frame when given.
     """
     #setting the logging [not being used]
     #logging.basicConfig(level = logging.ERROR)
     nuke.scriptOpen(nuke_script)
     write_node = find_write_node(write_node_name)
     
-    render_script(write_node)
+    if frame_ranges:
+        #one execute per contiguous range, so frames that are already rendered are never touched
+        for range_first, range_last in frame_ranges:
+            render_script(write_node, range_first, range_last, step)
+    else:
+        render_script(write_node, first_frame, last_frame, step)
 
     sys.exit(0)
 
@@ -119,4 +160,11 @@ if __name__ == "__main__":
             sys.exit(EXIT_NO_SCRIPT)
     nuke_script_arg = sys.argv[1]
     write_node_name_arg = sys.argv[2]
-    main(nuke_script_arg, write_node_name_arg)
\ No newline at end of file
+    #optional separate frame ranges for rendering only some frames: --frames 1001-1010,1050-1050
+    if len(sys.argv) > 4 and sys.argv[3] == "--frames":
+        main(nuke_script_arg, write_node_name_arg, frame_ranges=parse_frame_ranges(sys.argv[4]))
+    #optional frame range for rendering a chunk of the script: start end [step]
+    first_frame_arg = int(sys.argv[3]) if len(sys.argv) > 4 else None
+    last_frame_arg = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    step_arg = int(sys.argv[5]) if len(sys.argv) > 5 else 1
+    main(nuke_script_arg, write_node_name_arg, first_frame_arg, last_frame_arg, step_arg)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import nuke
 import sys
 import os
-import xml.etree.ElementTree as ET
+import json
 import time
 
 #not needed as of yet, but imported just in case
@@ -18,9 +18,32 @@ EXIT_RENDER_USER_ABORT = 205
 EXIT_UNKNOWN_RENDER_ERROR = 206
 EXIT_NO_SCRIPT = 404
 
+#Nuke prints its own output to stdout as well, so every progress event starts with this to tell them apart
+EVENT_PREFIX = "BNRQ_EVENT "
+
 sys.stdout = sys.__stdout__
 
 current_frame = None
+event_sequence = 0
+
+
+def send_event(event_type, **info):
+    """
+    Send a progress event to BNRQ as a single line of json on stdout.
+
+    Every event has a sequence number one higher than the last, so BNRQ can tell if an event
+    was missed or read twice.
+
+    Args:
+        event_type (str): The type of event, "script_start" or "script_done".
+        **info: The rest of the event, such as the script name.
+    """
+    global event_sequence
+    event_sequence += 1
+    event = {"seq": event_sequence, "type": event_type}
+    event.update(info)
+    sys.stdout.write(EVENT_PREFIX + json.dumps(event) + "\n")
+    sys.stdout.flush()
 
 def find_write_node(write_node_name):
     """
@@ -45,13 +68,15 @@ def find_write_node(write_node_name):
         exit(EXIT_NO_WRITE_NODE)
 
 
-def render_script(wn):
+def render_script(wn, frame_ranges = None):
     """
     Render the given Nuke script using the specified write node.
 
     Args:
         ns (nuke.Node): The Nuke script to render.
         wn (nuke.Node): The write node to use for rendering.
+        frame_ranges (list): The [first_frame, last_frame] ranges to render, one execute each.
+            Defaults to the Root's frame range.
 
     Raises:
         nuke.RenderCancelled: If the render was cancelled by the user.
@@ -82,50 +107,52 @@ def render_script(wn):
             print("An unknown render error occurred.")
             sys.exit(206)
     """
+    if not frame_ranges:
+        frame_ranges = [(nuke.root().firstFrame(), nuke.root().lastFrame())]
     try:
-        nuke.execute(wn, start = nuke.root().firstFrame(), end = nuke.root().lastFrame())
+        for first_frame, last_frame in frame_ranges:
+            nuke.execute(wn, start = first_frame, end = last_frame)
     except BaseException as e:
         sys.exit(EXIT_RENDER_ERROR)
 
 
-def main(file_paths, xml_filepath, write_node_name = "Write1"):
+def main(file_paths, write_node_name = "Write1", frame_ranges = None):
     """
-    Renders scripts and generates an XML file with execution information.
+    Renders scripts one after another, sending a progress event as each one starts and finishes.
+
+    If a script fails, its "script_done" event carries the exit code and no further scripts are rendered.
 
     Args:
         file_paths (list): List of file paths to the scripts.
-        xml_filepath (str): Path to the XML file to be generated.
         write_node_name (str, optional): Name of the write node to be used for rendering. Defaults to "Write1".
-
-    Raises:
-        Exception: If there's an error writing the XML file.
+        frame_ranges (dict, optional): The frame ranges to render for each script, by path. Scripts not in it
+            render their whole Root range. Defaults to None.
     """
+    if frame_ranges is None:
+        frame_ranges = {}
 
     #setting the logging [not being used]
     #logging.basicConfig(level = logging.ERROR)
     
 
     #This progress task is a lot more complicated than it seems. I will have to create a new object for it
-    #For now, just write an xml file at the end of each script
+    #For now, send an event at the start and end of each script
     #nuke.addProgressTask(render_info)
-    xml_root = ET.Element("Script")
-    xml_script_info = ET.SubElement(xml_root, "Info")
-    
     for script in file_paths:
         start_time = time.time()
-        xml_script_info.attrib["name"] = script
-        nuke.scriptOpen(script)
-        write_node = find_write_node(write_node_name)
-        
-        render_script(write_node)
-        nuke.scriptClose(script)
-        xml_script_info.attrib["execute_time"] = str(time.time() - start_time)
-        indiv_script_tree = ET.ElementTree(xml_root)
-        
+        send_event("script_start", name=script)
         try:
-            indiv_script_tree.write(xml_filepath)
-        except Exception as e:
-            print(f"Error writing xml: {e}")
+            if not os.path.isfile(script):
+                sys.exit(EXIT_NO_SCRIPT)
+            nuke.scriptOpen(script)
+            write_node = find_write_node(write_node_name)
+            
+            render_script(write_node, frame_ranges.get(script))
+            nuke.scriptClose(script)
+        except SystemExit as e:
+            send_event("script_done", name=script, exit_code=e.code, execute_time=time.time() - start_time)
+            raise
+        send_event("script_done", name=script, exit_code=0, execute_time=time.time() - start_time)
 
         
 
@@ -154,11 +181,17 @@ if __name__ == "__main__":
             main()
         except NameError:
             sys.exit(EXIT_NO_SCRIPT)
+    #optional json file of the frame ranges to render for each script: --frame-ranges path
+    frame_ranges_arg = None
+    script_args = sys.argv[1:-1]
+    if len(script_args) > 1 and script_args[0] == "--frame-ranges":
+        with open(script_args[1], "r") as frame_ranges_file:
+            frame_ranges_arg = json.load(frame_ranges_file)
+        script_args = script_args[2:]
     nuke_script_arg = sys.argv[1]
     file_paths = []
-    for path in sys.argv[1:-2]:
+    for path in script_args:
         file_paths.append(path)
     print(f"File path list: {file_paths}")
-    write_node_name_arg = sys.argv[-2]
-    xml_filepath = sys.argv[-1]
-    main(file_paths, xml_filepath, write_node_name_arg)
\ No newline at end of file
+    write_node_name_arg = sys.argv[-1]
+    main(file_paths, write_node_name_arg, frame_ranges_arg)
\ No newline at end of file
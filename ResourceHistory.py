@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+class ResourceHistory():
+    """
+        Learns the resource profile of each script from its past renders: the memory it needs at its peak, the CPU
+        cores it keeps busy, the time it takes per frame and the data it reads and writes. The profiles are used to
+        predict what a script will need before it is rendered again, by the render pool's admission control and the
+        time left shown for a render.
+
+        Every profile is kept twice, once by the hash of the script's contents and once by its shot, the folder the
+        script is in. A script that has rendered before as it is now is predicted from its own profile. One that has
+        changed, or a new version saved next to the old ones, is predicted from its shot. A script from a shot that
+        has never rendered is predicted to need what a typical shot does.
+
+        Each render counts DECAY times as much as the one after it, so the profiles follow the scripts as they change
+        and older renders fade out. A higher peak memory is taken on straight away though, while a lower one only
+        brings the profile down bit by bit, as a render that needs more memory than it is given fails.
+
+        The history is kept in a json file in the render queue folder, written next to the old one and swapped in the
+        same way as the render cache. Shots whose folder no longer exists are dropped, and past `max_scripts` the
+        least recently rendered hashes and shots.
+
+        Attributes:
+            history_filepath (str): The path of the json file, None to keep the history in memory only.
+            max_scripts (int): The most profiles of each kind to remember.
+            hashes (dict): The profile of each script, by the hash of its contents.
+            shots (dict): The profile of each shot, by the folder of its scripts.
+            script_hashes (dict): The (modified time, size, hash) last worked out for each script, by script path.
+            dirty (bool): True if the history has changed since it was last saved.
+            lock (threading.Lock): Guards the history, as it is recorded from the render pool's threads.
+
+        Methods:
+            __init__(history_filepath, max_scripts): Initializes the ResourceHistory object.
+            record(script_path, usage): Adds the usage of a render to the script's profiles.
+            update_profile(profile, usage): Adds the usage of a render to a profile.
+            get_profile(script_path): Returns the learned profile of a script.
+            predict_memory(script_path): Returns the memory a script is expected to need.
+            predict_render_time(script_path, frame_count): Returns how long a number of frames is expected to take.
+            get_typical_memory(): Returns the memory a typical shot needs.
+            get_script_hash(script_path): Returns the hash of a script's contents.
+            get_shot(script_path): Returns the shot a script belongs to.
+            evict(): Drops missing and surplus profiles.
+            load(): Loads the history.
+            save(): Saves the history if it has changed.
+    """
+
+    HISTORY_VERSION = 2
+    DECAY = 0.7
+    PROFILE_FIELDS = ("peak_memory_mb", "cpu_cores", "seconds_per_frame", "read_mb", "written_mb")
+
+
+    def __init__(self, history_filepath, max_scripts = 5000):
+        """
+            Initialization method.
+
+            Args:
+                history_filepath (str): The json file to keep the history in, None to keep it in memory only.
+                max_scripts (int, optional): The most profiles of each kind to remember. Defaults to 5000.
+        """
+        self.history_filepath = history_filepath
+        self.max_scripts = max(1, max_scripts)
+        self.hashes = {}
+        self.shots = {}
+        self.script_hashes = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+
+    def record(self, script_path, usage):
+        """
+            Adds the usage of a render to the profile of the script's contents and to the profile of its shot.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                usage (dict): What the render used, any of the PROFILE_FIELDS. Fields that were not measured are
+                    left out, such as the time per frame of a render that failed.
+        """
+        if not usage:
+            return
+        script_hash = self.get_script_hash(script_path)
+        shot = self.get_shot(script_path)
+        with self.lock:
+            profiles = [self.shots.setdefault(shot, {})]
+            if script_hash is not None:
+                profiles.append(self.hashes.setdefault(script_hash, {}))
+            for profile in profiles:
+                self.update_profile(profile, usage)
+            self.dirty = True
+
+
+    def update_profile(self, profile, usage):
+        """
+            Adds the usage of a render to a profile. Each field is the average of the renders that measured it, with
+            each render counting DECAY times as much as the one after it.
+
+            Args:
+                profile (dict): The profile, changed in place. Each field has its "weight" kept next to it.
+                usage (dict): What the render used.
+        """
+        for field in self.PROFILE_FIELDS:
+            value = usage.get(field)
+            if value is None:
+                continue
+            weight = profile.get("weights", {}).get(field, 0.0) * self.DECAY
+            average = (profile.get(field, 0.0) * weight + value) / (weight + 1)
+            if field == "peak_memory_mb":
+                #running out of memory fails the render, so a higher peak is never averaged away
+                average = max(average, value)
+            profile[field] = round(average, 3)
+            profile.setdefault("weights", {})[field] = round(weight + 1, 3)
+        profile["runs"] = profile.get("runs", 0) + 1
+        profile["updated"] = time.time()
+
+
+    def get_profile(self, script_path):
+        """
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                dict: The "peak_memory_mb", "cpu_cores", "seconds_per_frame", "read_mb" and "written_mb" learned for
+                    the script, the fields that were never measured left out, and the "runs" they were learned from.
+                    The profile of the script's contents is used if it has rendered as it is now, otherwise the
+                    profile of its shot. None if neither has rendered.
+        """
+        script_hash = self.get_script_hash(script_path)
+        with self.lock:
+            profile = self.hashes.get(script_hash) if script_hash is not None else None
+            if profile is None:
+                profile = self.shots.get(self.get_shot(script_path))
+            if profile is None:
+                return None
+            return {field: value for field, value in profile.items() if field in self.PROFILE_FIELDS + ("runs",)}
+
+
+    def predict_memory(self, script_path):
+        """
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                float: The memory in MB the script is expected to need at its peak, the typical memory if it has not
+                    been measured. None if no script has been measured.
+        """
+        profile = self.get_profile(script_path)
+        if profile is not None and profile.get("peak_memory_mb") is not None:
+            return profile["peak_memory_mb"]
+        return self.get_typical_memory()
+
+
+    def predict_render_time(self, script_path, frame_count):
+        """
+            Args:
+                script_path (str): The path of the .nk script.
+                frame_count (int): The number of frames to render.
+
+            Returns:
+                float: The seconds the frames are expected to take to render, None if the script's time per frame
+                    has not been learned.
+        """
+        profile = self.get_profile(script_path)
+        if profile is None or profile.get("seconds_per_frame") is None:
+            return None
+        return profile["seconds_per_frame"] * frame_count
+
+
+    def get_typical_memory(self):
+        """
+            Returns:
+                float: The middle of the peak memory of every shot measured, None if none have been.
+        """
+        with self.lock:
+            peaks = sorted(profile["peak_memory_mb"] for profile in self.shots.values() if "peak_memory_mb" in profile)
+        if not peaks:
+            return None
+        return peaks[len(peaks) // 2]
+
+
+    def get_script_hash(self, script_path):
+        """
+            Hashes the contents of a script. The hash is only worked out again once the script changes.
+
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                str: The sha256 hash of the script, None if it could not be read.
+        """
+        try:
+            stat = os.stat(script_path)
+        except OSError:
+            return None
+        known = self.script_hashes.get(script_path)
+        if known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            return known[2]
+
+        file_hash = hashlib.sha256()
+        try:
+            with open(script_path, "rb") as script_file:
+                for block in iter(lambda: script_file.read(1024 * 1024), b""):
+                    file_hash.update(block)
+        except OSError:
+            return None
+        script_hash = file_hash.hexdigest()
+        self.script_hashes[script_path] = (stat.st_mtime_ns, stat.st_size, script_hash)
+        return script_hash
+
+
+    def get_shot(self, script_path):
+        """
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                str: The shot of the script, the folder it is in.
+        """
+        return os.path.dirname(os.path.abspath(script_path))
+
+
+    def evict(self):
+        """
+            Drops the shots whose folder no longer exists, then the least recently rendered hashes and shots past
+            `max_scripts`.
+        """
+        with self.lock:
+            for shot in list(self.shots):
+                if not os.path.isdir(shot):
+                    del self.shots[shot]
+                    self.dirty = True
+            for profiles in (self.hashes, self.shots):
+                if len(profiles) > self.max_scripts:
+                    by_update = sorted(profiles, key=lambda key: profiles[key].get("updated", 0))
+                    for key in by_update[:len(profiles) - self.max_scripts]:
+                        del profiles[key]
+                    self.dirty = True
+
+
+    def load(self):
+        """
+            Loads the history. A missing, unreadable or out of date file leaves the history empty.
+        """
+        if not self.history_filepath or not os.path.isfile(self.history_filepath):
+            return
+        try:
+            with open(self.history_filepath, "r") as history_file:
+                history = json.load(history_file)
+        except (OSError, ValueError):
+            print("Unable to load resource history")
+            return
+        if not isinstance(history, dict) or history.get("version") != self.HISTORY_VERSION:
+            return
+
+        with self.lock:
+            self.hashes = {key: profile for key, profile in history.get("hashes", {}).items()
+                           if isinstance(profile, dict)}
+            self.shots = {key: profile for key, profile in history.get("shots", {}).items()
+                          if isinstance(profile, dict)}
+            self.dirty = False
+        self.evict()
+
+
+    def save(self):
+        """
+            Saves the history if anything has changed. The file is written next to the old one and then swapped in,
+            so a crash part way through never leaves a broken file behind.
+        """
+        if not self.history_filepath:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            #the profiles are changed in place as renders finish, so they are written out while still locked
+            history = json.dumps({"version": self.HISTORY_VERSION, "hashes": self.hashes, "shots": self.shots})
+            self.dirty = False
+
+        temp_filepath = self.history_filepath + ".tmp"
+        try:
+            with open(temp_filepath, "w") as history_file:
+                history_file.write(history)
+            os.replace(temp_filepath, self.history_filepath)
+        except OSError:
+            print("Unable to save resource history")
+            with self.lock:
+                self.dirty = True
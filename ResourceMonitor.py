@@ -0,0 +1,435 @@
+import os
+import time
+import threading
+
+
+class ResourceMonitor():
+    """
+        Samples the memory and CPU use of the machine, and the memory, CPU time and disk reads and writes of each
+        running render, in a thread of its own.
+
+        psutil is used when it is installed, otherwise everything is read from /proc, which is only there on Linux.
+        Without either, the machine's numbers are None and the renders are not measured.
+
+        The memory and disk pressure of the machine, the share of time processes were stalled waiting on memory or
+        on the disk, are read from /proc/pressure on Linux kernels that keep it. Where it is not kept the disk
+        pressure is taken from the share of time the CPUs sat waiting on the disk, and the memory pressure is None.
+
+        A render is measured with every process under it, as Nuke can start processes of its own. The peak memory
+        of each render, and the most CPU time and data read and written seen, are kept until it is no longer
+        tracked, so they can be recorded against its script. The CPU time each render took between the last two
+        samples is added up into the share of the machine the tracked renders use, so the load of the renders can be
+        told apart from that of everything else.
+
+        Attributes:
+            sample_interval (float): Seconds between samples.
+            available_memory_mb (float): The memory free for new processes at the last sample, None if not known.
+            total_memory_mb (float): The memory of the machine, None if not known.
+            cpu_load (float): How busy the CPUs were between the last two samples, from 0 to 1. None if not known.
+            tracked_cpu_load (float): How much of that was the tracked renders, from 0 to 1.
+            memory_pressure (float): The share of time processes were stalled on memory between the last two samples,
+                from 0 to 1. None if not known.
+            io_pressure (float): The share of time processes were stalled on the disk between the last two samples,
+                from 0 to 1. None if not known.
+            tracked (dict): The "get_pid", "memory_mb", "peak_memory_mb", "cpu_seconds", "read_bytes", "write_bytes",
+                "start_time", "cpu_cores" (between the last two samples), "last_cpu_seconds" and "last_sample_time"
+                of each tracked render, by job.
+            lock (threading.Lock): Guards the samples, as they are read from the render pool's threads.
+            sample_thread (threading.Thread): The thread taking the samples, None when not running.
+            running (bool): True while the samples should be taken.
+            last_cpu_times (tuple): The (busy, total, iowait) CPU time from /proc/stat at the last sample.
+            io_wait (float): The share of CPU time spent waiting on the disk between the last two readings of
+                /proc/stat, None if not known.
+            last_pressure (dict): The (stalled microseconds, time) read from /proc/pressure at the last sample, by
+                resource.
+
+        Methods:
+            __init__(sample_interval): Initializes the ResourceMonitor object.
+            start(): Takes a first sample and starts sampling in the background.
+            stop(): Stops sampling.
+            run(): Takes samples until stopped.
+            sample(): Samples the machine and every tracked render.
+            track(job, get_pid): Starts measuring a render.
+            update_usage(usage, memory_mb, cpu_seconds, read_bytes, write_bytes): Adds a sample to what a render has used.
+            untrack(job): Stops measuring a render and returns what it used.
+            get_memory_mb(job): Returns the memory a render is using.
+            get_system_memory(): Returns the free and total memory of the machine.
+            get_cpu_load(): Returns how busy the CPUs are.
+            get_pressure(resource): Returns the share of time processes were stalled on memory or the disk.
+            get_process_usage(pid): Returns the memory, CPU time and disk reads and writes of a process and everything
+                under it.
+            get_child_pids(pid): Returns the processes under a process, from /proc.
+    """
+
+    SAMPLE_INTERVAL = 0.5
+
+
+    def __init__(self, sample_interval = SAMPLE_INTERVAL):
+        """
+            Initialization method.
+
+            Args:
+                sample_interval (float, optional): Seconds between samples. Defaults to SAMPLE_INTERVAL.
+        """
+        self.sample_interval = sample_interval
+        self.available_memory_mb = None
+        self.total_memory_mb = None
+        self.cpu_load = None
+        self.tracked_cpu_load = 0.0
+        self.memory_pressure = None
+        self.io_pressure = None
+        self.tracked = {}
+        self.lock = threading.Lock()
+        self.sample_thread = None
+        self.running = False
+        self.last_cpu_times = None
+        self.io_wait = None
+        self.last_pressure = {}
+        #the load and pressure are worked out between two readings, so the first ones are taken now
+        self.get_cpu_load()
+        self.get_pressure("memory")
+        self.get_pressure("io")
+
+
+    def start(self):
+        """
+            Takes a first sample, so the numbers are there straight away, and starts sampling in the background.
+        """
+        if self.running:
+            return
+        self.running = True
+        self.sample()
+        self.sample_thread = threading.Thread(target=self.run, daemon=True)
+        self.sample_thread.start()
+
+
+    def stop(self):
+        """
+            Stops sampling.
+        """
+        self.running = False
+        self.sample_thread = None
+
+
+    def run(self):
+        """
+            Takes a sample every `sample_interval` seconds until stopped.
+        """
+        while self.running:
+            time.sleep(self.sample_interval)
+            if self.running:
+                self.sample()
+
+
+    def sample(self):
+        """
+            Samples the free memory and CPU load of the machine, and the memory, CPU time and disk reads and writes of
+            every tracked render.
+        """
+        available_memory_mb, total_memory_mb = self.get_system_memory()
+        cpu_load = self.get_cpu_load()
+        memory_pressure = self.get_pressure("memory")
+        io_pressure = self.get_pressure("io")
+        if io_pressure is None:
+            io_pressure = self.io_wait
+        with self.lock:
+            tracked = list(self.tracked.items())
+        usages = {}
+        for job, usage in tracked:
+            try:
+                pid = usage["get_pid"]()
+            except AttributeError:
+                pid = None
+            if pid is not None:
+                usages[job] = self.get_process_usage(pid)
+
+        with self.lock:
+            self.available_memory_mb = available_memory_mb
+            self.total_memory_mb = total_memory_mb
+            if cpu_load is not None:
+                self.cpu_load = cpu_load
+            if memory_pressure is not None:
+                self.memory_pressure = memory_pressure
+            if io_pressure is not None:
+                self.io_pressure = io_pressure
+            for job, process_usage in usages.items():
+                usage = self.tracked.get(job)
+                if usage is not None:
+                    self.update_usage(usage, *process_usage)
+            tracked_cores = sum(usage["cpu_cores"] for usage in self.tracked.values())
+            self.tracked_cpu_load = min(1.0, tracked_cores / (os.cpu_count() or 1))
+
+
+    def track(self, job, get_pid):
+        """
+            Starts measuring a render. It is sampled straight away, so a short render is still measured.
+
+            Args:
+                job (RenderJob): The job being rendered.
+                get_pid (callable): Returns the id of the process rendering the job, or None if it is not running.
+        """
+        with self.lock:
+            self.tracked[job] = {"get_pid": get_pid, "memory_mb": 0.0, "peak_memory_mb": 0.0, "cpu_seconds": 0.0,
+                                 "read_bytes": 0, "write_bytes": 0, "start_time": time.time(), "cpu_cores": 0.0,
+                                 "last_cpu_seconds": None, "last_sample_time": None}
+        try:
+            pid = get_pid()
+        except AttributeError:
+            pid = None
+        if pid is None:
+            return
+        process_usage = self.get_process_usage(pid)
+        with self.lock:
+            usage = self.tracked.get(job)
+            if usage is not None:
+                self.update_usage(usage, *process_usage)
+
+
+    def update_usage(self, usage, memory_mb, cpu_seconds, read_bytes, write_bytes):
+        """
+            Adds a sample of a render's processes to what it has used. The CPU time and data read and written only
+            ever go up, as the numbers of a process under the render are lost once it exits. The CPU cores it used
+            since the last sample are worked out from the CPU time it took in between.
+
+            Args:
+                usage (dict): What the render has used, changed in place.
+                memory_mb (float): The memory of its processes, None if they could not be read.
+                cpu_seconds (float): The CPU time of its processes.
+                read_bytes (int): The data its processes have read from disk.
+                write_bytes (int): The data its processes have written to disk.
+        """
+        if memory_mb is None:
+            return
+        now = time.time()
+        if usage["last_cpu_seconds"] is not None and now > usage["last_sample_time"]:
+            usage["cpu_cores"] = max(0.0, cpu_seconds - usage["last_cpu_seconds"]) / (now - usage["last_sample_time"])
+        usage["last_cpu_seconds"] = cpu_seconds
+        usage["last_sample_time"] = now
+        usage["memory_mb"] = memory_mb
+        usage["peak_memory_mb"] = max(usage["peak_memory_mb"], memory_mb)
+        usage["cpu_seconds"] = max(usage["cpu_seconds"], cpu_seconds)
+        usage["read_bytes"] = max(usage["read_bytes"], read_bytes)
+        usage["write_bytes"] = max(usage["write_bytes"], write_bytes)
+
+
+    def untrack(self, job):
+        """
+            Stops measuring a render.
+
+            Args:
+                job (RenderJob): The job that was rendered.
+
+            Returns:
+                dict: The "peak_memory_mb", "cpu_seconds", "cpu_cores" (the CPU time over the time it ran), "read_mb",
+                    "written_mb" and "elapsed_time" of the render. None if it was not tracked, or nothing could be
+                    measured.
+        """
+        with self.lock:
+            usage = self.tracked.pop(job, None)
+        if usage is None or not usage["peak_memory_mb"]:
+            return None
+        elapsed_time = time.time() - usage["start_time"]
+        return {"peak_memory_mb": round(usage["peak_memory_mb"], 1), "cpu_seconds": round(usage["cpu_seconds"], 2),
+                "cpu_cores": round(usage["cpu_seconds"] / elapsed_time, 2) if elapsed_time > 0 else 0.0,
+                "read_mb": round(usage["read_bytes"] / (1024 * 1024), 1),
+                "written_mb": round(usage["write_bytes"] / (1024 * 1024), 1),
+                "elapsed_time": round(elapsed_time, 2)}
+
+
+    def get_memory_mb(self, job):
+        """
+            Args:
+                job (RenderJob): A tracked job.
+
+            Returns:
+                float: The memory the render was using at the last sample, 0 if it is not tracked.
+        """
+        with self.lock:
+            usage = self.tracked.get(job)
+            return usage["memory_mb"] if usage is not None else 0.0
+
+
+    def get_system_memory(self):
+        """
+            Returns:
+                tuple: The (available, total) memory of the machine in MB, (None, None) if it could not be read.
+        """
+        try:
+            import psutil
+            memory = psutil.virtual_memory()
+            return memory.available / (1024 * 1024), memory.total / (1024 * 1024)
+        except ImportError:
+            pass
+
+        meminfo = {}
+        try:
+            with open("/proc/meminfo", "r") as meminfo_file:
+                for line in meminfo_file:
+                    name, _, value = line.partition(":")
+                    meminfo[name] = int(value.split()[0])
+        except (OSError, ValueError, IndexError):
+            return None, None
+        if "MemTotal" not in meminfo:
+            return None, None
+        #older kernels have no MemAvailable, free memory and the page cache is the closest to it
+        available_kb = meminfo.get("MemAvailable", meminfo.get("MemFree", 0) + meminfo.get("Cached", 0))
+        return available_kb / 1024, meminfo["MemTotal"] / 1024
+
+
+    def get_cpu_load(self):
+        """
+            Returns:
+                float: How busy the CPUs were since the last call, from 0 to 1. The load average is used where neither
+                    psutil nor /proc/stat is there, and None is returned if nothing could be read.
+        """
+        try:
+            import psutil
+            return psutil.cpu_percent(interval=None) / 100
+        except ImportError:
+            pass
+
+        try:
+            with open("/proc/stat", "r") as stat_file:
+                cpu_times = [int(value) for value in stat_file.readline().split()[1:]]
+        except (OSError, ValueError):
+            try:
+                return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+            except (AttributeError, OSError):
+                return None
+        #idle and iowait are the only times the CPU was not busy
+        idle_time = cpu_times[3] + (cpu_times[4] if len(cpu_times) > 4 else 0)
+        total_time = sum(cpu_times)
+        last_cpu_times = self.last_cpu_times
+        self.last_cpu_times = (total_time - idle_time, total_time, cpu_times[4] if len(cpu_times) > 4 else 0)
+        if last_cpu_times is None or total_time <= last_cpu_times[1]:
+            return None
+        if len(cpu_times) > 4:
+            #the iowait time is kept next to the busy time, so its share is worked out from the same readings
+            self.io_wait = min(1.0, max(0.0, (cpu_times[4] - last_cpu_times[2]) / (total_time - last_cpu_times[1])))
+        return (total_time - idle_time - last_cpu_times[0]) / (total_time - last_cpu_times[1])
+
+
+    def get_pressure(self, resource):
+        """
+            Reads how long processes were stalled waiting on a resource since the last call, from the "some" line of
+            /proc/pressure.
+
+            Args:
+                resource (str): "memory" or "io".
+
+            Returns:
+                float: The share of time at least one process was stalled, from 0 to 1. None on the first call, or
+                    if the kernel does not keep the pressure.
+        """
+        try:
+            with open(f"/proc/pressure/{resource}", "r") as pressure_file:
+                fields = dict(field.split("=", 1) for field in pressure_file.readline().split()[1:])
+            stalled_us = int(fields["total"])
+        except (OSError, ValueError, KeyError):
+            return None
+        now = time.time()
+        last_pressure = self.last_pressure.get(resource)
+        self.last_pressure[resource] = (stalled_us, now)
+        if last_pressure is None or now <= last_pressure[1]:
+            return None
+        return min(1.0, max(0.0, (stalled_us - last_pressure[0]) / ((now - last_pressure[1]) * 1000000)))
+
+
+    def get_process_usage(self, pid):
+        """
+            Args:
+                pid (int): The id of the process.
+
+            Returns:
+                tuple: The (memory_mb, cpu_seconds, read_bytes, write_bytes) of the process and every process under
+                    it, memory_mb None if the process could not be read. The data read and written only counts what
+                    reached the disk, and is 0 where the system does not keep count of it.
+        """
+        try:
+            import psutil
+            try:
+                process = psutil.Process(pid)
+                processes = [process] + process.children(recursive=True)
+                memory_mb = 0.0
+                cpu_seconds = 0.0
+                read_bytes = 0
+                write_bytes = 0
+                for child in processes:
+                    try:
+                        memory_mb += child.memory_info().rss / (1024 * 1024)
+                        cpu_times = child.cpu_times()
+                        cpu_seconds += cpu_times.user + cpu_times.system
+                        #macOS has no per process disk counters
+                        if hasattr(child, "io_counters"):
+                            io_counters = child.io_counters()
+                            read_bytes += io_counters.read_bytes
+                            write_bytes += io_counters.write_bytes
+                    except psutil.Error:
+                        pass
+                return memory_mb, cpu_seconds, read_bytes, write_bytes
+            except psutil.Error:
+                return None, 0.0, 0, 0
+        except ImportError:
+            pass
+
+        try:
+            page_size = os.sysconf("SC_PAGE_SIZE")
+            clock_ticks = os.sysconf("SC_CLK_TCK")
+        except (AttributeError, ValueError, OSError):
+            return None, 0.0, 0, 0
+        memory_mb = None
+        cpu_seconds = 0.0
+        read_bytes = 0
+        write_bytes = 0
+        for process_id in [pid] + self.get_child_pids(pid):
+            try:
+                with open(f"/proc/{process_id}/statm", "r") as statm_file:
+                    resident_pages = int(statm_file.read().split()[1])
+                with open(f"/proc/{process_id}/stat", "r") as stat_file:
+                    #the name can hold spaces, the fields after it are split from the last bracket
+                    fields = stat_file.read().rsplit(")", 1)[1].split()
+            except (OSError, ValueError, IndexError):
+                continue
+            memory_mb = (memory_mb or 0.0) + resident_pages * page_size / (1024 * 1024)
+            cpu_seconds += (int(fields[11]) + int(fields[12])) / clock_ticks
+            #the disk counters need the kernel's task accounting, without it there is no io file
+            try:
+                with open(f"/proc/{process_id}/io", "r") as io_file:
+                    io_counters = dict(line.split(":", 1) for line in io_file if ":" in line)
+                read_bytes += int(io_counters.get("read_bytes", 0))
+                write_bytes += int(io_counters.get("write_bytes", 0))
+            except (OSError, ValueError):
+                pass
+        return memory_mb, cpu_seconds, read_bytes, write_bytes
+
+
+    def get_child_pids(self, pid):
+        """
+            Finds every process under a process by reading the parent of each process in /proc.
+
+            Args:
+                pid (int): The id of the process.
+
+            Returns:
+                list: The ids of the processes under it, empty if there are none or /proc could not be read.
+        """
+        children = {}
+        try:
+            process_ids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+        except OSError:
+            return []
+        for process_id in process_ids:
+            try:
+                with open(f"/proc/{process_id}/stat", "r") as stat_file:
+                    parent_id = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            children.setdefault(parent_id, []).append(process_id)
+
+        child_pids = []
+        waiting = [pid]
+        while waiting:
+            for child_pid in children.get(waiting.pop(), []):
+                child_pids.append(child_pid)
+                waiting.append(child_pid)
+        return child_pids
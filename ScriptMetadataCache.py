@@ -0,0 +1,211 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from NukeScriptParser import NukeScriptParser
+
+
+class ScriptMetadataCache():
+    """
+        Keeps the details read out of .nk scripts so each script is only parsed again once it changes.
+
+        Each entry is keyed by the script path and stamped with the modification time and size the script had when
+        it was read. A lookup stats the script and only parses it again if either of those has changed, so clicking
+        through the queue or checking the write nodes of hundreds of scripts costs a stat per script rather than a
+        read. The entries are kept in least recently used order and the oldest are dropped once there are more than
+        `max_entries`. The cache is saved to a json file in the render queue folder so it lasts between runs.
+
+        Lookups may come from more than one thread, so every change to the entries is made under a lock. The scripts
+        themselves are parsed outside of it.
+
+        The metadata kept for each script is a dict of:
+            write_nodes (dict): The knobs of each Write node, by the full name of the node.
+            frame_range (list): The [first_frame, last_frame] of the Root node.
+            reads (list): A dict for each Read node, holding its "name", "file", "first" and "last" frame.
+            version (str): The Nuke version the script was saved with.
+            header (str): The "#!" line at the top of the script.
+            write_info (dict): The details Nuke wrote about each Write node at the top of the script.
+
+        Attributes:
+            cache_filepath (str): The path of the json file the cache is saved to, None to keep it in memory only.
+            max_entries (int): The most scripts to keep, the least recently used are dropped past this.
+            entries (OrderedDict): The (mtime, size, metadata) of each script, by path, least recently used first.
+            dirty (bool): True if the entries have changed since they were last saved.
+            hits (int): The number of lookups answered from the cache.
+            misses (int): The number of lookups that had to parse the script.
+
+        Methods:
+            __init__(cache_filepath, max_entries): Initializes the ScriptMetadataCache object.
+            get(script_path): Returns the metadata of a script, parsing it only if it has changed.
+            read_metadata(script_path): Parses a script into its metadata.
+            invalidate(script_path): Drops a script from the cache.
+            clear(): Drops every script from the cache.
+            load(): Loads the cache from its json file.
+            save(): Saves the cache to its json file if it has changed.
+    """
+
+    CACHE_VERSION = 1
+
+
+    def __init__(self, cache_filepath = None, max_entries = 1000):
+        """
+            Initialization method.
+
+            Args:
+                cache_filepath (str, optional): The json file to save the cache to, None to keep it in memory only.
+                    Defaults to None.
+                max_entries (int, optional): The most scripts to keep. Defaults to 1000.
+        """
+        self.cache_filepath = cache_filepath
+        self.max_entries = max(1, max_entries)
+        self.entries = OrderedDict()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+
+    def get(self, script_path):
+        """
+            Gets the metadata of a script, from the cache if the script has not changed since it was read.
+
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                dict: The metadata of the script. The dict is shared with the cache, so it should not be changed.
+
+            Raises:
+                OSError: If the script does not exist or could not be read.
+        """
+        stat = os.stat(script_path)
+        with self.lock:
+            entry = self.entries.get(script_path)
+            if entry is not None and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+                self.entries.move_to_end(script_path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        metadata = self.read_metadata(script_path)
+        with self.lock:
+            self.entries[script_path] = (stat.st_mtime, stat.st_size, metadata)
+            self.entries.move_to_end(script_path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+        return metadata
+
+
+    def read_metadata(self, script_path):
+        """
+            Parses a script and pulls out the details kept in the cache.
+
+            Args:
+                script_path (str): The path of the .nk script.
+
+            Returns:
+                dict: The metadata of the script.
+
+            Raises:
+                OSError: If the script could not be read.
+        """
+        parser = NukeScriptParser(script_path)
+        parser.parse()
+        first_frame, last_frame = parser.get_frame_range()
+
+        reads = []
+        for read_node in parser.get_nodes("Read"):
+            try:
+                read_first = int(read_node.knob("first", first_frame))
+                read_last = int(read_node.knob("last", last_frame))
+            except ValueError:
+                read_first, read_last = first_frame, last_frame
+            reads.append({"name": read_node.get_full_name(), "file": read_node.knob("file", ""),
+                          "first": read_first, "last": read_last})
+
+        return {
+            "write_nodes": {node.get_full_name(): node.knobs for node in parser.get_nodes("Write")},
+            "frame_range": [first_frame, last_frame],
+            "reads": reads,
+            "version": parser.version,
+            "header": parser.header,
+            "write_info": parser.write_info
+        }
+
+
+    def invalidate(self, script_path):
+        """
+            Drops a script from the cache, so it is parsed again the next time it is looked up.
+
+            Args:
+                script_path (str): The path of the .nk script.
+        """
+        with self.lock:
+            if self.entries.pop(script_path, None) is not None:
+                self.dirty = True
+
+
+    def clear(self):
+        """
+            Drops every script from the cache.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.dirty = True
+
+
+    def load(self):
+        """
+            Loads the cache from its json file. A missing, unreadable or out of date file leaves the cache empty.
+        """
+        if not self.cache_filepath or not os.path.isfile(self.cache_filepath):
+            return
+        try:
+            with open(self.cache_filepath, "r") as cache_file:
+                cache_data = json.load(cache_file)
+        except (OSError, ValueError):
+            print("Unable to load script cache")
+            return
+        if not isinstance(cache_data, dict) or cache_data.get("version") != self.CACHE_VERSION:
+            return
+
+        with self.lock:
+            self.entries.clear()
+            #the file is written least recently used first, so the order carries over
+            for entry in cache_data.get("entries", [])[-self.max_entries:]:
+                try:
+                    script_path, mtime, size, metadata = entry
+                except (TypeError, ValueError):
+                    continue
+                self.entries[script_path] = (mtime, size, metadata)
+            self.dirty = False
+
+
+    def save(self):
+        """
+            Saves the cache to its json file if anything has changed. The file is written next to the old one and
+            then swapped in, so a crash part way through never leaves a broken cache behind.
+        """
+        if not self.cache_filepath:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            cache_data = {
+                "version": self.CACHE_VERSION,
+                "entries": [[script_path, mtime, size, metadata]
+                            for script_path, (mtime, size, metadata) in self.entries.items()]
+            }
+            self.dirty = False
+
+        temp_filepath = self.cache_filepath + ".tmp"
+        try:
+            with open(temp_filepath, "w") as cache_file:
+                json.dump(cache_data, cache_file)
+            os.replace(temp_filepath, self.cache_filepath)
+        except OSError:
+            print("Unable to save script cache")
+            with self.lock:
+                self.dirty = True
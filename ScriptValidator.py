@@ -0,0 +1,259 @@
+import os
+
+from InputScanner import InputScanner
+from JobScheduler import JobScheduler
+
+
+class ScriptValidator():
+    """
+        Checks a queued script can be rendered before any Nuke process is started for it.
+
+        Scripts are checked as they are added to the queue, so the result is stamped with the modification time and
+        size of the script and the write node it was checked for. When Render is pressed only the scripts that have
+        changed since (or that failed) are checked again.
+
+        The script details come from the script cache, so checking a script that has not changed since it was last
+        read only costs a stat of the script and of its output folder. Every problem found is given as a line of text
+        and the worst of them sets the status of the script. Errors stop the render, warnings are only shown.
+
+        Attributes:
+            script_cache (ScriptMetadataCache): The cache the script details are read from.
+            input_scanner (InputScanner): Finds the missing and empty frames of the Read nodes.
+
+        Methods:
+            __init__(script_cache, input_scanner): Initializes the ScriptValidator object.
+            get_queued_outputs(script_paths, write_node_name): Returns the files the queued scripts write.
+            validate(script_path, write_node_name, queued_outputs): Checks a script and returns the result.
+            check_write_node(metadata, write_node_name): Checks the write node is there and has a file set.
+            check_frame_range(metadata): Checks the frame range of the script.
+            check_output_directory(script_path, output_path, write_knobs): Checks the folder the frames go to.
+            check_read_inputs(script_path, metadata, queued_outputs): Checks the frames the Read nodes read are on disk.
+            is_current(result, write_node_name, queued_outputs): Returns whether a result still holds for the script
+                as it is now.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_OK = "ok"
+    STATUS_WARNING = "warning"
+    STATUS_ERROR = "error"
+
+
+    def __init__(self, script_cache, input_scanner = None):
+        """
+            Initialization method.
+
+            Args:
+                script_cache (ScriptMetadataCache): The cache to read the script details from.
+                input_scanner (InputScanner, optional): The scanner to check the Read node frames with. A new one
+                    is made if not given. Defaults to None.
+        """
+        self.script_cache = script_cache
+        self.input_scanner = input_scanner if input_scanner is not None else InputScanner()
+
+
+    def get_queued_outputs(self, script_paths, write_node_name):
+        """
+            Finds the files the write nodes of the queued scripts write, keyed the way the job scheduler infers
+            dependencies. Scripts that can not be read are left out, their own checks will fail.
+
+            Args:
+                script_paths (list): The paths of the queued scripts.
+                write_node_name (str): The name of the write node the scripts will be rendered with.
+
+            Returns:
+                dict: The scripts writing each file, by the key of the file.
+        """
+        queued_outputs = {}
+        for script_path in dict.fromkeys(script_paths):
+            try:
+                metadata = self.script_cache.get(script_path)
+            except OSError:
+                continue
+            write_knobs = metadata["write_nodes"].get(write_node_name)
+            if write_knobs:
+                output_key = JobScheduler.get_file_key(write_knobs.get("file"), os.path.dirname(script_path))
+                if output_key is not None:
+                    queued_outputs.setdefault(output_key, set()).add(script_path)
+        return queued_outputs
+
+
+    def validate(self, script_path, write_node_name, queued_outputs = None):
+        """
+            Checks a script has the write node to render with, a usable frame range, a folder to write to and
+            every frame its Read nodes read.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                write_node_name (str): The name of the write node the script will be rendered with.
+                queued_outputs (dict, optional): The files the other queued scripts render first, from
+                    get_queued_outputs. Defaults to None.
+
+            Returns:
+                dict: The result, holding the "script", its "status", the "errors" and "warnings" found, the
+                    "frame_count" to render (0 if it could not be worked out), the "write_node", "mtime" and
+                    "size" it was checked with, and the "queued_reads", the keys of the files read that were left
+                    to the queued scripts writing them.
+        """
+        result = {"script": script_path, "status": self.STATUS_OK, "errors": [], "warnings": [], "frame_count": 0,
+                  "write_node": write_node_name, "mtime": None, "size": None, "queued_reads": []}
+        try:
+            stat = os.stat(script_path)
+            result["mtime"] = stat.st_mtime
+            result["size"] = stat.st_size
+            metadata = self.script_cache.get(script_path)
+        except OSError as e:
+            result["errors"].append(f"Unable to read the script: {e.strerror or e}")
+            result["status"] = self.STATUS_ERROR
+            return result
+
+        write_knobs, errors = self.check_write_node(metadata, write_node_name)
+        result["errors"].extend(errors)
+
+        frame_count, errors = self.check_frame_range(metadata)
+        result["frame_count"] = frame_count
+        result["errors"].extend(errors)
+
+        if write_knobs is not None:
+            errors, warnings = self.check_output_directory(script_path, write_knobs["file"], write_knobs)
+            result["errors"].extend(errors)
+            result["warnings"].extend(warnings)
+
+        errors, warnings, result["queued_reads"] = self.check_read_inputs(script_path, metadata, queued_outputs)
+        result["errors"].extend(errors)
+        result["warnings"].extend(warnings)
+
+        if result["errors"]:
+            result["status"] = self.STATUS_ERROR
+        elif result["warnings"]:
+            result["status"] = self.STATUS_WARNING
+        return result
+
+
+    def check_write_node(self, metadata, write_node_name):
+        """
+            Args:
+                metadata (dict): The script details from the script cache.
+                write_node_name (str): The name of the write node the script will be rendered with.
+
+            Returns:
+                tuple: The knobs of the write node (None if it is missing or has no file) and a list of errors.
+        """
+        write_knobs = metadata["write_nodes"].get(write_node_name)
+        if write_knobs is None:
+            return None, [f"There is no write node named {write_node_name}"]
+        if not write_knobs.get("file"):
+            return None, [f"{write_node_name} has no file set"]
+        return write_knobs, []
+
+
+    def check_frame_range(self, metadata):
+        """
+            Args:
+                metadata (dict): The script details from the script cache.
+
+            Returns:
+                tuple: The number of frames in the range (0 if it is not usable) and a list of errors.
+        """
+        first_frame, last_frame = metadata["frame_range"]
+        if last_frame < first_frame:
+            return 0, [f"The frame range {first_frame}-{last_frame} ends before it starts"]
+        return last_frame - first_frame + 1, []
+
+
+    def check_output_directory(self, script_path, output_path, write_knobs):
+        """
+            Checks the folder the write node writes to exists. Relative paths are taken from the folder of the
+            script. A missing folder is only a warning if the write node is set to create it.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                output_path (str): The file knob of the write node.
+                write_knobs (dict): The knobs of the write node.
+
+            Returns:
+                tuple: A list of errors and a list of warnings.
+        """
+        #paths built from tcl expressions can only be worked out by nuke
+        if "[" in output_path:
+            return [], ["The output path uses an expression, its folder could not be checked"]
+
+        output_directory = os.path.dirname(output_path)
+        if not os.path.isabs(output_directory):
+            output_directory = os.path.join(os.path.dirname(script_path), output_directory)
+        if os.path.isdir(output_directory):
+            return [], []
+        if write_knobs.get("create_directories", "false").lower() in ("true", "1"):
+            return [], [f"The output folder {output_directory} does not exist yet, Nuke will create it"]
+        return [f"The output folder {output_directory} does not exist"], []
+
+
+    def check_read_inputs(self, script_path, metadata, queued_outputs = None):
+        """
+            Checks every frame the Read nodes need is on disk and not empty. Relative paths are taken from the folder
+            of the script. Reads of a file another queued script writes are left out, the frames are not there yet.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                metadata (dict): The script details from the script cache.
+                queued_outputs (dict, optional): The scripts writing each file, from get_queued_outputs.
+                    Defaults to None.
+
+            Returns:
+                tuple: A list of errors, a list of warnings and the keys of the files left to the queued scripts.
+        """
+        errors = []
+        warnings = []
+        reads = []
+        queued_reads = []
+        base_directory = os.path.dirname(script_path)
+        for read in metadata["reads"]:
+            read_key = JobScheduler.get_file_key(read["file"], base_directory) if queued_outputs else None
+            if not read["file"]:
+                warnings.append(f"{read['name']} has no file set")
+            elif "[" in read["file"] or "%V" in read["file"] or "%v" in read["file"]:
+                warnings.append(f"{read['name']} uses an expression, its input could not be checked")
+            elif read_key is not None and queued_outputs.get(read_key, set()) - {script_path}:
+                queued_reads.append(read_key)
+            else:
+                reads.append(read)
+        if not reads:
+            return errors, warnings, queued_reads
+
+        for result in self.input_scanner.scan_reads(reads, metadata["frame_range"], base_directory):
+            if result["error"]:
+                errors.append(result["error"])
+            if result["missing"]:
+                errors.append(f"{result['name']} is missing frames {InputScanner.format_frames(result['missing'])}")
+            if result["empty"]:
+                errors.append(f"{result['name']} has empty frames {InputScanner.format_frames(result['empty'])}")
+        return errors, warnings, queued_reads
+
+
+    def is_current(self, result, write_node_name, queued_outputs = None):
+        """
+            Checks if a result still holds: it passed, it was checked for the same write node, every file it left to
+            a queued script is still written by one, and the script has not changed since. Failed results never
+            hold, as the problem may have been fixed outside the script.
+
+            Args:
+                result (dict): A result from validate, or None.
+                write_node_name (str): The name of the write node the script will be rendered with.
+                queued_outputs (dict, optional): The scripts writing each file, from get_queued_outputs.
+                    Defaults to None.
+
+            Returns:
+                bool: True if the script does not need to be checked again.
+        """
+        if result is None or result.get("status") not in (self.STATUS_OK, self.STATUS_WARNING):
+            return False
+        if result.get("write_node") != write_node_name:
+            return False
+        queued_outputs = queued_outputs or {}
+        for read_key in result.get("queued_reads", []):
+            if not queued_outputs.get(read_key, set()) - {result["script"]}:
+                return False
+        try:
+            stat = os.stat(result["script"])
+        except OSError:
+            return False
+        return stat.st_mtime == result["mtime"] and stat.st_size == result["size"]
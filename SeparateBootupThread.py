@@ -8,6 +8,8 @@ from PySide6 import QtWidgets, QtCore
 from PySide6.QtCore import QThread, Signal, QObject
 from PySide6.QtWidgets import QMessageBox
 
+from NukeLocator import NukeLocator
+
 class SeparateBootupThread(QObject):
     """A class to handle single thread tasks. This was created to help keep the GUI active while some tasks
         are run such as finding the nuke executable path.
@@ -22,42 +24,36 @@ class SeparateBootupThread(QObject):
         render_done (): This just sends a signal once the render is done so the GUI can handle everything.
     """
     done = Signal()
+    nuke_path_ready = Signal(str)
     root_being_explored = Signal(str)
     nuke_path_stored = Signal(str)
     
             
-    def __init__(self):
+    def __init__(self, nuke_cache_filepath = None):
         super().__init__()
         self.stop_flag = False
+        self.nuke_cache_filepath = nuke_cache_filepath
 
 
     def get_latest_nuke_path(self):
-        """ Find the latest version of Nuke executable installed. This is limited in it only searches the default
-                and common spot of C:/ProgramFiles
+        """ Find the latest version of Nuke executable installed. Only the common install folders are searched:
+                Program Files on Windows, /Applications on macOS and /usr/local and /opt on Linux.
 
         Emits:
             nuke_path_ready (str): Signal emitted when the latest Nuke executable path is found.
                 It provides the path in it so the path can be useable by the UI.
 
         Steps:
-            - The method searches for Nuke executable (by OS walking) in the "C:\Program Files\" directory and its subdirectories.
-            - It identifies Nuke executables by looking for files with "Nuke" in their name and ending with ".exe".
-            - The method determines the version of each found executable and keeps track of the latest version.
-            - Once the latest Nuke executable path is found, it is emitted via the `nuke_path_ready` signal.
+            - The method looks for Nuke executables in the folders Nuke is installed to (see NukeLocator), only going
+              into the folders named after Nuke or The Foundry.
+            - The folders searched before are taken from the cache unless something was installed to or removed from
+              them since, so after the first launch this takes a few stats.
+            - Versions are compared as (major, minor, patch), so Nuke13.10 is newer than Nuke13.2.
 
         """
-        nuke_path = None
-        max_ver = -1
-
-        for root, dirs, files in os.walk("C:\\Program Files\\"):
-            self.root_being_explored.emit(root)
-            for file in files:
-                if "Nuke" in file and file.endswith(".exe"):
-                    ver = float(file.split("Nuke")[1].split(".exe")[0])
-                    if ver > max_ver:
-                        max_ver = ver
-                        nuke_path = os.path.join(root, file)
-                        self.nuke_path_stored.emit(nuke_path)
+        nuke_path = NukeLocator(self.nuke_cache_filepath).find_latest(self.root_being_explored.emit)
+        if nuke_path:
+            self.nuke_path_stored.emit(nuke_path)
 
         self.nuke_path_ready.emit(nuke_path)
 
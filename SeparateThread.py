@@ -1,16 +1,32 @@
 import os
 import sys
+import json
+import socket
+import sqlite3
 import subprocess
+import threading
 import time
+import concurrent.futures
 from typing import Optional
 
 from Settings import Settings
 from ErrorCodes import ErrorCodes
+from RenderPool import RenderPool
+from RenderJob import RenderJob
+from NukeWorker import NukeWorker
+from RenderOutputParser import RenderOutputParser
+from NukeScriptParser import NukeScriptParser
+from StaleFrameFinder import StaleFrameFinder
+from AdmissionController import AdmissionController
+from ConcurrencyController import ConcurrencyController
+from JobScheduler import JobScheduler
+from RenderHistory import RenderHistory
+from NukeLocator import NukeLocator
 
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtCore import (
-    QThread, Signal, QObject, QFileSystemWatcher, QDir, QStandardPaths, QFileInfo,
-    QFile, QXmlStreamReader, QFileSystemWatcher, QTimer, QProcess
+    QThread, Signal, QObject, QDir, QStandardPaths, QFileInfo,
+    QFile, QTimer, QProcess
 )
 from PySide6.QtWidgets import QMessageBox
 
@@ -28,6 +44,10 @@ class SeparateThread(QObject):
             render_done: Signal emitted when rendering of all scripts is complete.
             update_gui: Signal emitted to update the GUI.
             render_cancelled: Signal emitted when rendering is cancelled.
+            frame_progress (str, int, int, float): Signal emitted as frames are written. It provides the script path,
+                the frames written, the total frames (0 if not known yet) and the frames per second.
+            script_cached (str): Signal emitted for a script that is skipped as it has not changed since its last
+                successful render, or as every one of its output frames is up to date. It provides the script path.
 
         Attributes:
             settings (Settings): The settings object for managing user preferences.
@@ -36,8 +56,56 @@ class SeparateThread(QObject):
             external_error_code (int): The external error code for the render process.
             render_queue_folder (str): The folder path for the render queue.
             temp_folder (str): The folder path for temporary files.
-            xml_filepath (str): The filepath for the current render script info XML.
             timer (QTimer): The timer for emitting GUI updates.
+            script_cache (ScriptMetadataCache): The cache of parsed script details, None to parse scripts directly.
+            render_cache (RenderCache): The successful renders, used to skip unchanged scripts. None to render all.
+            render_keys (dict): The render cache key of each script being rendered, by its place in the queue.
+            late_key_scripts (set): The scripts rendering after scripts of the list they read from, whose render
+                cache key is worked out once they have rendered.
+            stale_frame_finder (StaleFrameFinder): Works out which output frames need rendering, None to render all.
+            frame_ranges (dict): The frame ranges to render of each script, by its place in the queue. Scripts not in
+                it render their whole Root range.
+            script_priorities (dict): The priority of scripts, by script path, set before a list is rendered. Higher
+                renders first, scripts not in it have a priority of 0.
+            script_dependencies (dict): The script paths each script waits for, by script path, set before a list is
+                rendered.
+            scheduler (JobScheduler): Orders the jobs of a list by priority and dependency.
+            nuke_locator (NukeLocator): Finds the Nuke versions installed, to render each script with the one it was
+                saved with.
+            nuke_executables (list): The (path, version) of each Nuke installed, `nuke_exe` first. None until it is
+                looked up for a list.
+            script_nuke_exes (dict): The Nuke executable each script renders with, by script path.
+            nuke_lock (threading.Lock): Makes sure the installed Nuke versions are only looked up once per list.
+            render_pool (RenderPool): The pool running the Nuke processes, None when not rendering a list.
+            admission (AdmissionController): Measures what each job uses into the learned profile of its script and,
+                with `admission_control` on, holds jobs back until the machine has the memory and CPU for them. None
+                where nothing is rendered on this machine.
+            concurrency (ConcurrencyController): Changes the number of jobs run at once to follow the frames per second
+                the machine keeps up. None when `adaptive_workers` is off.
+            render_history (RenderHistory): The record of every job rendered here and the times of its frames, None
+                if it could not be opened.
+            running_processes (dict): The job each running Nuke process is rendering, by process.
+            process_lock (threading.Lock): Guards `running_processes` as it is shared with the pool's threads.
+            nuke_workers (list): The persistent Nuke workers started for the current render.
+            worker_jobs (dict): The job each persistent Nuke worker is rendering, by worker.
+            queued_scripts (list): The scripts of the list being rendered, in queue order.
+            thread_workers (threading.local): Holds the persistent Nuke worker of each pool thread.
+            chunks_left (dict): The number of chunks still to render for each script, by its place in the queue.
+            script_start_times (dict): When the first chunk of each script started rendering, by its place in the queue.
+            failed_scripts (set): Queue places of scripts with a chunk that failed for good, or that were cancelled. Their
+                other chunks are skipped.
+            frames_done (dict): The frames written for each script, by its place in the queue.
+            frames_written (int): The frames written by every job since the render engine was made, never going down
+                for a retried chunk.
+            frames_total (dict): The frames to render for each script, by its place in the queue. 0 if not known yet.
+            running_parsers (dict): The output parser of each running job.
+            internal_script (str): The script the single Nuke instance is rendering, None between scripts.
+            last_event_seq (int): The sequence number of the last progress event read from the single Nuke instance.
+            internal_parser (RenderOutputParser): The output parser for the single Nuke instance render.
+            internal_job (RenderJob): The script the single Nuke instance is rendering as a job, to record it in the
+                render history. None between scripts.
+            internal_output_buffer (bytes): Output from the single Nuke instance that does not end in a new line yet.
+            internal_render_keys (dict): The render cache key of each script the single Nuke instance renders, by path.
     """
 
     nuke_path_ready = Signal(str)
@@ -46,157 +114,815 @@ class SeparateThread(QObject):
     render_done = Signal()
     update_gui = Signal()
     render_cancelled = Signal()
+    frame_progress = Signal(str, int, int, float)
+    script_cached = Signal(str)
+
+    EVENT_PREFIX = "BNRQ_EVENT "
+    ERROR_DEPENDENCY_FAILED = 207
+    ERROR_DEPENDENCY_CYCLE = 208
 
             
-    def __init__(self):
+    def __init__(self, script_cache = None, render_cache = None, settings = None):
         """
             Initialization method.
 
             This initializes the SeparateThread object and sets up the necessary attributes and signals.
+
+            Args:
+                script_cache (ScriptMetadataCache, optional): The cache to look up script frame ranges in. Scripts are
+                    parsed directly if not given. Defaults to None.
+                render_cache (RenderCache, optional): The cache of successful renders, used to skip scripts that
+                    have not changed. Every script is rendered if not given. Defaults to None.
+                settings (Settings, optional): The settings to render with. The saved settings are loaded if not
+                    given. Defaults to None.
         """
         super().__init__()
-        self.settings = Settings()
-        self.settings.load_settings()
-        self.error_obj = ErrorCodes()
+        if settings is None:
+            settings = Settings()
+            settings.load_settings()
+        self.settings = settings
+        self.error_obj = ErrorCodes(self.settings)
         self.stop_flag = False
+        self.script_cache = script_cache
+        self.render_cache = render_cache
+        self.render_keys = {}
+        self.late_key_scripts = set()
+        self.stale_frame_finder = None
+        if script_cache is not None:
+            self.stale_frame_finder = StaleFrameFinder(script_cache,
+                                                       render_cache.input_scanner if render_cache is not None else None)
+        self.frame_ranges = {}
+        self.script_priorities = {}
+        self.script_dependencies = {}
+        self.scheduler = JobScheduler(script_cache)
+        self.nuke_locator = None
+        self.nuke_executables = None
+        self.script_nuke_exes = {}
+        self.nuke_lock = threading.Lock()
 
         self.external_error_code = None
 
-        data_dir = os.getenv('APPDATA')
-        self.render_queue_folder = os.path.join(data_dir, "BNRQ")
         self.render_queue_folder = self.settings.render_queue_folder
         self.temp_folder = os.path.join(self.render_queue_folder, "Temp")
-        self.xml_filepath = os.path.join(self.temp_folder, "CurrentRenderScriptInfo.xml")
         
         
         if not QDir(self.temp_folder).exists():
             QDir().mkpath(self.temp_folder)
-        elif os.path.exists(self.xml_filepath):
-            os.remove(self.xml_filepath)
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.emit_update)
         self.timer.start(50)
 
+        self.render_pool = None
+        self.admission = AdmissionController(self.settings)
+        self.frames_written = 0
+        self.concurrency = None
+        try:
+            self.render_history = RenderHistory(self.settings.render_history_filepath)
+        except sqlite3.Error as e:
+            print(f"Unable to open the render history, renders will not be recorded: {e}")
+            self.render_history = None
+        if self.settings.adaptive_workers == True:
+            self.concurrency = ConcurrencyController(self.settings, self.admission.monitor, lambda: self.frames_written)
+        self.chunks_left = {}
+        self.script_start_times = {}
+        self.failed_scripts = set()
+        self.frames_done = {}
+        self.frames_total = {}
+        self.running_parsers = {}
+        self.internal_render_process = None
+        self.internal_script = None
+        self.last_event_seq = 0
+        self.internal_parser = None
+        self.internal_job = None
+        self.internal_output_buffer = b""
+        self.internal_render_keys = {}
+        self.nuke_workers = []
+        self.thread_workers = threading.local()
+        self.worker_jobs = {}
+        self.queued_scripts = []
+        self.running_processes = {}
+        self.process_lock = threading.Lock()
+
 
     def get_latest_nuke_path(self):
-        """ Find the latest version of Nuke executable installed. This is limited in it only searches the default
-                and common spot of C:/ProgramFiles
+        """ Find the latest version of Nuke executable installed. Only the common install folders are searched:
+                Program Files on Windows, /Applications on macOS and /usr/local and /opt on Linux.
 
         Emits:
             nuke_path_ready (str): Signal emitted when the latest Nuke executable path is found.
                 It provides the path in it so the path can be useable by the UI.
 
         Steps:
-            - The method searches for Nuke executable (by OS walking) in the "C:\Program Files\" directory and its subdirectories.
-            - It identifies Nuke executables by looking for files with "Nuke" in their name and ending with ".exe".
-            - The method determines the version of each found executable and keeps track of the latest version.
-            - Once the latest Nuke executable path is found, it is emitted via the `nuke_path_ready` signal.
+            - The method looks for Nuke executables in the folders Nuke is installed to (see NukeLocator), only going
+              into the folders named after Nuke or The Foundry.
+            - The folders searched before are taken from the cache unless something was installed to or removed from
+              them since, so after the first launch this takes a few stats.
+            - Versions are compared as (major, minor, patch), so Nuke13.10 is newer than Nuke13.2.
 
         """
-        nuke_path = None
-        max_ver = -1
-
-        for root, dirs, files in os.walk("C:\\Program Files\\"):
-            for file in files:
-                if "Nuke" in file and file.endswith(".exe"):
-                    ver = float(file.split("Nuke")[1].split(".exe")[0])
-                    if ver > max_ver:
-                        max_ver = ver
-                        nuke_path = os.path.join(root, file)
-
+        nuke_path = NukeLocator(self.settings.nuke_cache_filepath).find_latest()
         self.nuke_path_ready.emit(nuke_path)
     
 
-    def render_list(self, file_paths):
-        """Render the list of Nuke scripts provided from the GUI. This method itterates through the 
-            filepaths provided in the file_paths() argument and renders them out. After each script rendered
-            out (or stopped due to error), the method emits a signal with the nessesary information to 
-            give back to the user.
+    def render_list(self, file_paths, force_render = False):
+        """Render the list of Nuke scripts provided from the GUI. The scripts are handed to a render pool
+            that keeps up to `render_workers` (from the settings) Nuke processes running at once. After each script
+            is rendered out (or stopped due to error), the method emits a signal with the nessesary information to 
+            give back to the user. Scripts can finish out of order when more than one worker is used.
+
+            When `chunk_size` is set, each script's Root frame range is split into chunks that render in their own
+            Nuke processes. A script is only reported once every one of its chunks has rendered, and a chunk that fails
+            is rendered again on its own (up to `chunk_retries` times) without touching the rest of the range.
+
+            With `admission_control` on, a job waits to start alongside the others until the memory it is expected to
+            need is free and the CPUs are not saturated. With `adaptive_workers` on, the number of Nuke processes
+            starts at `render_workers` and follows the frames per second the machine keeps up, between
+            `min_render_workers` and `max_render_workers`.
+
+            Jobs start highest priority first (from `script_priorities`), then in queue order. A script waits for the
+            scripts it depends on (from `script_dependencies`, and with `infer_dependencies` on, the scripts whose
+            write node writes what it reads) to render, and the workers pick up whichever jobs are ready meanwhile.
+            Scripts whose dependencies loop, or that depend on a script that fails, are reported as failed without
+            rendering.
+
+            Scripts that have not changed since their last successful render are skipped when the render cache is on.
+            When `incremental_render` is on only the output frames that are missing or out of date are rendered,
+            each contiguous run of them in one `nuke.execute` call (or split into chunks when chunking is on).
 
         Args:
             file_paths (list): List of file paths containing the Nuke scripts to render.
+            force_render (bool, optional): Render every script, even those that have not changed. Defaults to False.
 
         Emits:
+            script_cached (str): Signal emitted for each script skipped as unchanged.
             render_script_update (str, int, float): Signal emitted after each script is rendered.
                 It provides the script path, exit code, and elapsed time for the GUI to use.
             render_done: Signal emitted when rendering of all scripts is complete.
+        """
 
-        Notes:
-            - A delay of 1 second is added between rendering each script to allow for GUI
-            interaction and possible thread interruption.
+        #Nuke may have been installed or the settings changed since the last list
+        with self.nuke_lock:
+            self.nuke_executables = None
+        with self.process_lock:
+            self.script_nuke_exes = {}
+        temp_file_paths = self.skip_cached_scripts(file_paths, force_render)
+        self.queued_scripts = temp_file_paths
 
+        jobs = []
+        self.chunks_left = {}
+        self.script_start_times = {}
+        self.failed_scripts = set()
+        self.frames_done = {}
+        self.frames_total = {}
+        self.running_parsers = {}
+        for queue_index, script in enumerate(temp_file_paths):
+            frame_range = self.get_frame_range(script) if self.settings.chunk_size > 0 else None
+            if self.frame_ranges.get(queue_index):
+                script_jobs = RenderJob.from_ranges(script, self.frame_ranges[queue_index], self.settings.chunk_size)
+            elif frame_range is not None:
+                script_jobs = RenderJob.split(script, *frame_range, self.settings.chunk_size)
+            else:
+                script_jobs = [RenderJob(script)]
+            nuke_exe = self.get_nuke_exe(script)
+            for job in script_jobs:
+                job.queue_index = queue_index
+                job.nuke_exe = nuke_exe
+            self.chunks_left[queue_index] = len(script_jobs)
+            self.frames_done[queue_index] = 0
+            self.frames_total[queue_index] = sum(job.get_frame_count() for job in script_jobs)
+            jobs.extend(script_jobs)
+
+        blocked = self.scheduler.set_queue(temp_file_paths, self.settings.write_node_name, self.script_priorities,
+                                           self.script_dependencies, self.settings.infer_dependencies == True)
+        for queue_index, cycle in blocked.items():
+            print(f"{temp_file_paths[queue_index]} waits on scripts that wait on each other ({cycle}), skipping it")
+            self.failed_scripts.add(queue_index)
+            self.render_script_update.emit(temp_file_paths[queue_index], self.ERROR_DEPENDENCY_CYCLE, 0.0)
+        jobs = self.scheduler.sort_jobs(jobs)
+
+        can_start = self.admission.can_start if self.settings.admission_control == True else None
+        if self.concurrency is not None:
+            self.render_pool = RenderPool(self.concurrency.max_workers, self.render_nuke_script, can_start,
+                                          self.concurrency.get_worker_limit, self.is_job_ready)
+        else:
+            self.render_pool = RenderPool(self.get_worker_count(), self.render_nuke_script, can_start,
+                                          is_ready=self.is_job_ready)
+        if self.admission is not None:
+            self.admission.start()
+        if self.concurrency is not None:
+            self.concurrency.start()
+        try:
+            finished = self.render_pool.run(jobs, self.handle_job_finished)
+        finally:
+            self.render_pool = None
+            self.stop_workers()
+            if self.admission is not None:
+                self.admission.stop()
+            if self.render_cache is not None:
+                self.render_cache.save()
+        if finished:
+            self.render_done.emit()
+
+
+    def get_worker_count(self):
+        """
+            Returns:
+                int: The number of jobs the render pool runs at once, `render_workers` from the settings.
         """
+        return self.settings.render_workers
+
 
-        temp_file_paths = file_paths.copy()
+    def handle_job_finished(self, job, exit_code, elapsed_time):
+        """
+            Called by the render pool every time a job (a whole script or one chunk of it) finishes rendering.
 
-        for script in temp_file_paths:
-            if self.stop_flag:
-                return        
-            start_time = time.time()
-            self.external_error_code = self.render_nuke_script(script)
-            self.render_script_update.emit(script, self.external_error_code, time.time()-start_time)
-            time.sleep(1) #this is to give time for the GUI to tell the thread to stop
+            A failed chunk is handed back to the pool to render again if it has retries left. A script is reported
+            through `render_script_update` once all of its chunks have rendered, or as soon as one chunk fails for good.
+            The elapsed time reported is the wall time from the script's first chunk starting.
 
-        self.render_done.emit()
+            Args:
+                job (RenderJob): The job that finished.
+                exit_code (int): The exit code of the Nuke process.
+                elapsed_time (float): How long the job took to render, in seconds.
+
+            Returns:
+                list: The jobs to render again, empty if there are none.
+        """
+        script = job.script
+        if job.queue_index in self.failed_scripts:
+            return []
+
+        if exit_code != 0 and job.is_chunk():
+            if job.attempts <= self.settings.chunk_retries and self.error_obj.is_retryable(exit_code):
+                print(f"Chunk {job} failed with exit code {exit_code}, retrying")
+                #the frames of the failed attempt are rendered again
+                with self.process_lock:
+                    self.frames_done[job.queue_index] -= job.frames_done
+                    job.frames_done = 0
+                return [job]
+
+        if exit_code != 0 and job.is_chunk():
+            self.failed_scripts.add(job.queue_index)
+        else:
+            self.chunks_left[job.queue_index] -= 1
+            if self.chunks_left[job.queue_index] > 0:
+                return []
+
+        script_elapsed_time = time.time() - self.script_start_times.get(job.queue_index, time.time() - elapsed_time)
+        if exit_code == 0 and self.render_cache is not None:
+            self.record_render(self.render_keys.get(job.queue_index), script)
+        self.external_error_code = exit_code
+        self.render_script_update.emit(script, exit_code, script_elapsed_time)
+        if exit_code == 0:
+            self.scheduler.script_done(job.queue_index)
+        else:
+            self.fail_dependents(job.queue_index)
+        return []
+
+
+    def is_job_ready(self, job):
+        """
+            Called by the render pool for each waiting job.
+
+            Args:
+                job (RenderJob): A job waiting to start.
+
+            Returns:
+                bool: True if the scripts the job waits on have rendered. Jobs of a script that failed are always
+                    ready, as they are skipped straight away.
+        """
+        return job.queue_index in self.failed_scripts or self.scheduler.is_ready(job)
+
+
+    def fail_dependents(self, queue_index):
+        """
+            Reports every script waiting on a script that failed or was cancelled as failed, as it can not render
+            without it. Their jobs are skipped.
+
+            Args:
+                queue_index (int): The place in the queue of the script that did not render.
+
+            Emits:
+                render_script_update (str, int, float): Signal emitted for each script that can no longer render,
+                    with the ERROR_DEPENDENCY_FAILED exit code.
+        """
+        for dependent_index in self.scheduler.script_failed(queue_index):
+            with self.process_lock:
+                if dependent_index in self.failed_scripts:
+                    continue
+                self.failed_scripts.add(dependent_index)
+            script = self.queued_scripts[dependent_index]
+            print(f"{script} depends on {self.queued_scripts[queue_index]}, which did not render, skipping it")
+            self.render_script_update.emit(script, self.ERROR_DEPENDENCY_FAILED, 0.0)
+
+
+    def skip_cached_scripts(self, file_paths, force_render = False):
+        """
+            Works out the render cache key of every script and skips those that match a render whose output is still
+            on disk. With `incremental_render` on, the output frames of the other scripts are looked at too, and a
+            script whose frames are all up to date is skipped as well. The work is done in a pool of threads, as each
+            script is read and the folders of its Read nodes and output listed. The keys and frame ranges of the
+            scripts left are kept in `render_keys` and `frame_ranges` by their place in the list returned, so they can
+            be rendered and stored.
+
+            A script that waits on a script of the list that is not skipped reads inputs that are rendered again
+            first, so what is on disk now says nothing about it. It is never skipped and renders every frame, and its
+            key is only worked out once it has rendered, from `late_key_scripts`.
+
+            Args:
+                file_paths (list): List of file paths containing the Nuke scripts to render.
+                force_render (bool, optional): Skip nothing and render every frame, the keys are still worked out so
+                    the renders are stored. Defaults to False.
+
+            Emits:
+                script_cached (str): Signal emitted for each script skipped.
+
+            Returns:
+                list: The scripts that need rendering, in the order they were given.
+        """
+        #the GUI takes skipped scripts off its list, which may be the one passed in
+        file_paths = file_paths.copy()
+        self.render_keys = {}
+        self.frame_ranges = {}
+        self.late_key_scripts = set()
+        use_render_cache = self.render_cache is not None and self.settings.render_cache
+        use_incremental = self.stale_frame_finder is not None and self.settings.incremental_render and not force_render
+        if not use_render_cache and not use_incremental:
+            return file_paths
+
+        def get_cache_state(script):
+            key = None
+            cached = False
+            frame_ranges = None
+            if use_render_cache:
+                key = self.render_cache.get_key(script, self.settings.write_node_name, self.get_nuke_exe(script))
+                cached = not force_render and self.render_cache.is_cached(key)
+            if use_incremental and not cached:
+                frame_ranges = self.stale_frame_finder.find_frames_to_render(script, self.settings.write_node_name)
+            return key, cached, frame_ranges
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.settings.validation_workers) as executor:
+            cache_states = list(executor.map(get_cache_state, file_paths))
+
+        #a script waiting on a script of the list that renders was looked at with inputs that are about to change
+        self.scheduler.set_queue(file_paths, self.settings.write_node_name, self.script_priorities,
+                                 self.script_dependencies, self.settings.infer_dependencies == True)
+        script_order = self.scheduler.get_script_order()
+        script_order += [queue_index for queue_index in range(len(file_paths)) if queue_index not in script_order]
+        skipped = set()
+        waiting = set()
+        for queue_index in script_order:
+            key, cached, frame_ranges = cache_states[queue_index]
+            if self.scheduler.dependencies[queue_index] - skipped:
+                waiting.add(queue_index)
+            elif cached or frame_ranges == []:
+                skipped.add(queue_index)
+
+        scripts_to_render = []
+        for queue_index, (script, (key, cached, frame_ranges)) in enumerate(zip(file_paths, cache_states)):
+            if queue_index in waiting:
+                print(f"{script} reads what scripts rendering before it write, rendering it whole")
+                self.late_key_scripts.add(script)
+                scripts_to_render.append(script)
+            elif cached:
+                print(f"{script} has not changed since its last render, skipping it")
+                self.script_cached.emit(script)
+            elif frame_ranges == []:
+                print(f"Every output frame of {script} is up to date, skipping it")
+                if use_render_cache:
+                    self.render_cache.record(key, script, self.settings.write_node_name)
+                self.script_cached.emit(script)
+            else:
+                self.render_keys[len(scripts_to_render)] = key
+                if frame_ranges:
+                    self.frame_ranges[len(scripts_to_render)] = frame_ranges
+                scripts_to_render.append(script)
+        return scripts_to_render
+
+
+    def record_render(self, key, script):
+        """
+            Stores a successful render in the render cache. The key of a script in `late_key_scripts` is worked out
+            now, as the inputs it was rendered with were only written during the render.
+
+            Args:
+                key (str): The render cache key worked out before the render, None if there is none.
+                script (str): The path of the script that rendered.
+        """
+        if script in self.late_key_scripts:
+            key = self.render_cache.get_key(script, self.settings.write_node_name, self.get_nuke_exe(script))
+        self.render_cache.record(key, script, self.settings.write_node_name)
+
+
+    def get_frame_range(self, nuke_script_path):
+        """
+            Reads the frame range from the Root node of a Nuke script. It is taken from the script cache when there
+            is one, otherwise only the top of the file is read, as the Root node is always the first node in a script.
+
+            Args:
+                nuke_script_path (str): The path to the Nuke script.
+
+            Returns:
+                tuple: The (first_frame, last_frame) of the script, Nuke's default of (1, 100) if it is not set.
+                    None if the script could not be read, it is then rendered whole so Nuke reports the problem.
+        """
+        try:
+            if self.script_cache is not None:
+                return tuple(self.script_cache.get(nuke_script_path)["frame_range"])
+            parser = NukeScriptParser(nuke_script_path)
+            parser.parse(root_only=True)
+        except OSError:
+            return None
+        return parser.get_frame_range()
         
 
-    def render_nuke_script(self, nuke_script_path):
+    def render_nuke_script(self, job):
         """This method calls for nuke to render the project passed into it. It will render it by running the render script in 
-            the instance of nuke
+            the instance of nuke. A chunk job passes its frame range on to the render script.
 
         Args:
-            nuke_script_path (str): This is the path where the script will
+            job (RenderJob): The job holding the path of the script and the frame range to render
 
         Returns:
             str: it returns the exit code as a string (not bit) so that it can be read and interpreted 
         """
-        #this line is to make sure the packaged executable is able to keep RenderScript.py for use
+        if job.queue_index in self.failed_scripts:
+            return None
+        job.attempts += 1
+        job.start_time = time.time()
+        self.script_start_times.setdefault(job.queue_index, job.start_time)
+        if job.nuke_exe is None:
+            job.nuke_exe = self.get_nuke_exe(job.script)
+
+        if self.settings.persistent_workers:
+            return self.render_with_worker(job)
 
         """self.external_render_process = QProcess()
         self.external_render_process.readyReadStandardOutput.connect(self.handle_external_output)
         self.external_render_process.finished.connect(self.handle_external_finish)
         self.external_render_process.errorOccurred.connect(self.handle_error)""" 
         
-        try:
-            self.py_render_script = os.path.join(sys._MEIPASS, "RenderScript.py")
-        except AttributeError:
-            self.py_render_script = "./RenderScript.py"
+        self.py_render_script = self.get_bundled_script("RenderScript.py")
 
-        cmd = [self.settings.nuke_exe,
+        cmd = [job.nuke_exe,
                 '-ti',
                 "-V", "2", #this is verbose mode, level 2, https://learn.foundry.com/nuke/content/comp_environment/configuring_nuke/command_line_operations.html
                 self.py_render_script,
-                nuke_script_path,
+                job.script,
                 self.settings.write_node_name,
+                *job.get_frame_args()
                 ]
         print(cmd)
         #self.external_render_process.start(cmd[0], cmd[1:])
-        proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
-        stdout, stderr = proc.communicate()
+        #output is read a line at a time as it comes in, never buffered whole, as renders can print a lot
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        with self.process_lock:
+            self.running_processes[proc] = job
+        if self.admission is not None:
+            self.admission.job_started(job, lambda: proc.pid if proc.poll() is None else None)
+        parser = self.start_job_output(job)
+        for line in proc.stdout:
+            self.handle_output_line(job, parser, line)
+        proc.wait()
         exit_code = proc.returncode
-        #stderr = proc.communicate()[1]
-        #output = str(stderr.decode("utf-8"))
+        with self.process_lock:
+            self.running_processes.pop(proc, None)
+        usage = None
+        if self.admission is not None:
+            usage = self.admission.job_finished(job, exit_code)
+        self.finish_job_output(job, parser, exit_code, usage)
         return exit_code
 
 
+    def start_job_output(self, job):
+        """
+            Sets up the output parser for a job that is about to start.
+
+            Args:
+                job (RenderJob): The job about to start.
+
+            Returns:
+                RenderOutputParser: The parser to feed the job's output to.
+        """
+        parser = RenderOutputParser(job.get_frame_count())
+        job.frame_times = []
+        with self.process_lock:
+            self.running_parsers[job] = parser
+        return parser
+
+
+    def handle_output_line(self, job, parser, line):
+        """
+            Reads one line of a job's output and reports the script's frame progress if a frame was written.
+            Called from the pool's threads.
+
+            Args:
+                job (RenderJob): The job the output belongs to.
+                parser (RenderOutputParser): The job's output parser.
+                line (str or bytes): The line of output.
+        """
+        if not parser.feed(line):
+            return
+        queue_index = job.queue_index
+        with self.process_lock:
+            job.frames_done += 1
+            job.frame_times.append((parser.current_frame, parser.last_frame_time))
+            self.frames_written += 1
+            self.frames_done[queue_index] = self.frames_done.get(queue_index, 0) + 1
+            if not self.frames_total.get(queue_index):
+                self.frames_total[queue_index] = parser.total_frames
+            fps = sum(running_parser.get_fps() for running_job, running_parser in self.running_parsers.items()
+                      if running_job.queue_index == queue_index)
+            frames_done = self.frames_done[queue_index]
+            frames_total = self.frames_total[queue_index]
+        self.emit_frame_progress(job.script, frames_done, frames_total, fps)
+
+
+    def emit_frame_progress(self, script, frames_done, frames_total, fps):
+        """
+            Reports the frame progress of a script. The pool's threads are not Qt threads, so a signal emitted from
+            one would only reach the window once the list has rendered. While a list renders, the signal is handed to
+            the render pool to emit from the thread rendering the list, which it does as soon as it comes in.
+
+            Args:
+                script (str): The path of the script.
+                frames_done (int): The frames written.
+                frames_total (int): The frames to render, 0 if not known yet.
+                fps (float): The frames written per second.
+
+            Emits:
+                frame_progress (str, int, int, float): Signal emitted with the script's progress.
+        """
+        render_pool = self.render_pool
+        if render_pool is not None:
+            render_pool.post(self.frame_progress.emit, script, frames_done, frames_total, fps)
+        else:
+            self.frame_progress.emit(script, frames_done, frames_total, fps)
+
+
+    def finish_job_output(self, job, parser, exit_code, usage = None):
+        """
+            Drops the output parser of a finished job, printing the last of its output if it failed, and records the
+            job in the render history.
+
+            Args:
+                job (RenderJob): The finished job.
+                parser (RenderOutputParser): The job's output parser.
+                exit_code (int): The exit code of the job.
+                usage (dict, optional): What the job used, as measured by the admission controller. Defaults to None.
+        """
+        with self.process_lock:
+            self.running_parsers.pop(job, None)
+        if exit_code != 0:
+            print(f"{job} exited with {exit_code}, last output:\n{parser.get_recent_output()}")
+        workers = self.concurrency.worker_limit if self.concurrency is not None else self.get_worker_count()
+        self.record_job(job, exit_code, workers, usage)
+
+
+    def record_job(self, job, exit_code, workers, usage = None):
+        """
+            Adds a finished job and the times of its frames to the render history. A job that never got to run, with
+            no exit code, is left out.
+
+            Args:
+                job (RenderJob): The finished job.
+                exit_code (int): The exit code of the job.
+                workers (int): The number of jobs that could run at once while it rendered.
+                usage (dict, optional): What the job used, as measured by the admission controller. Defaults to None.
+        """
+        if self.render_history is None or exit_code is None:
+            return
+        usage = usage or {}
+        resource_history = self.admission.history if self.admission is not None else None
+        record = {"script": job.script, "shot": os.path.dirname(os.path.abspath(job.script)),
+                  "script_hash": resource_history.get_script_hash(job.script) if resource_history is not None else None,
+                  "host": socket.gethostname(), "nuke_version": RenderHistory.get_nuke_version(job.nuke_exe or self.settings.nuke_exe),
+                  "workers": workers, "first_frame": job.first_frame, "last_frame": job.last_frame,
+                  "frames": job.frames_done, "attempt": job.attempts, "exit_code": exit_code,
+                  "started": job.start_time, "elapsed_time": time.time() - job.start_time if job.start_time else None}
+        for field in ("peak_memory_mb", "cpu_cores", "read_mb", "written_mb"):
+            record[field] = usage.get(field)
+        try:
+            self.render_history.record_job(record, job.frame_times)
+        except sqlite3.Error as e:
+            print(f"Unable to record {job} in the render history: {e}")
+
+
+    def render_with_worker(self, job):
+        """
+            Renders a job in the persistent Nuke worker that belongs to the current pool thread, starting the worker
+            the first time the thread needs it. A worker running another Nuke version than the job needs is stopped
+            and one of the job's version started in its place, which the scheduler keeps rare by starting the jobs of
+            each version together. The workers are stopped once the whole list has rendered.
+
+            Args:
+                job (RenderJob): The job to render.
+
+            Returns:
+                int: The exit code of the job.
+        """
+        worker = getattr(self.thread_workers, "worker", None)
+        if worker is not None and worker.nuke_exe != job.nuke_exe:
+            with self.process_lock:
+                if worker in self.nuke_workers:
+                    self.nuke_workers.remove(worker)
+            worker.stop()
+            worker = None
+        if worker is None:
+            worker = NukeWorker(job.nuke_exe,
+                                self.get_bundled_script("NukeWorkerScript.py"),
+                                self.settings.worker_max_jobs,
+                                self.settings.worker_max_memory)
+            self.thread_workers.worker = worker
+            with self.process_lock:
+                self.nuke_workers.append(worker)
+
+        parser = self.start_job_output(job)
+        worker.on_output = lambda line: self.handle_output_line(job, parser, line)
+        with self.process_lock:
+            self.worker_jobs[worker] = job
+        if self.admission is not None:
+            #the worker's Nuke may be started or restarted for the job, so its process is looked up on each sample
+            self.admission.job_started(job, worker.get_pid)
+        exit_code = None
+        usage = None
+        try:
+            exit_code = worker.render(job, self.settings.write_node_name)
+        finally:
+            with self.process_lock:
+                self.worker_jobs.pop(worker, None)
+                #a worker the pool no longer needs would otherwise sit idle holding its memory and license
+                surplus = self.concurrency is not None and len(self.nuke_workers) > self.concurrency.worker_limit
+                if surplus:
+                    self.nuke_workers.remove(worker)
+            if surplus:
+                worker.stop()
+                self.thread_workers.worker = None
+            if self.admission is not None:
+                usage = self.admission.job_finished(job, exit_code)
+        self.finish_job_output(job, parser, exit_code, usage)
+        return exit_code
+
+
+    def stop_workers(self):
+        """
+            Stops every persistent Nuke worker.
+        """
+        with self.process_lock:
+            workers = self.nuke_workers
+            self.nuke_workers = []
+        for worker in workers:
+            worker.stop()
+
+
+    def get_nuke_exe(self, script):
+        """
+            Works out the Nuke executable to render a script with. With `match_nuke_version` on, it is the installed
+            Nuke closest to the version the script was saved with (see NukeLocator.choose_executable), looked up once
+            per script for each list. Scripts with no version, or that no installed Nuke can open, render with
+            `nuke_exe`, as does every script when rendering in a single Nuke instance. Called from the pool's threads.
+
+            Args:
+                script (str): The path of the script.
+
+            Returns:
+                str: The path of the Nuke executable.
+        """
+        #the single Nuke instance renders every script of the list in the one Nuke
+        if self.settings.match_nuke_version != True or self.settings.render_nuke_open == True:
+            return self.settings.nuke_exe
+        with self.process_lock:
+            if script in self.script_nuke_exes:
+                return self.script_nuke_exes[script]
+
+        try:
+            if self.script_cache is not None:
+                metadata = self.script_cache.get(script)
+                version_text, header = metadata["version"], metadata["header"]
+            else:
+                parser = NukeScriptParser(script)
+                parser.parse(root_only=True)
+                version_text, header = parser.version, parser.header
+        except OSError:
+            version_text, header = "", ""
+        #the version line says what saved the script, the header only which Nuke it was first opened with
+        version = NukeLocator.parse_version(version_text) or NukeLocator.parse_version(header)
+
+        nuke_exe = self.settings.nuke_exe
+        if version is not None:
+            nuke_exe = NukeLocator.choose_executable(version, self.get_nuke_executables()) or self.settings.nuke_exe
+            if nuke_exe != self.settings.nuke_exe:
+                print(f"{script} was saved with Nuke {NukeLocator.format_version(version)}, rendering it with {nuke_exe}")
+            elif NukeLocator.get_version(nuke_exe or "") != version:
+                print(f"{script} was saved with Nuke {NukeLocator.format_version(version)}, which is not installed, "
+                      f"rendering it with {nuke_exe}")
+        with self.process_lock:
+            self.script_nuke_exes[script] = nuke_exe
+        return nuke_exe
+
+
+    def get_nuke_executables(self):
+        """
+            Returns:
+                list: The (path, version) of each Nuke installed, looked up once per list. `nuke_exe` comes first so
+                    it is used over another install of the same version, and the folder it is installed in is
+                    searched as well as the usual ones.
+        """
+        with self.nuke_lock:
+            if self.nuke_executables is not None:
+                return self.nuke_executables
+
+            executables = []
+            extra_roots = []
+            nuke_exe = self.settings.nuke_exe
+            version = NukeLocator.get_version(nuke_exe) if nuke_exe else None
+            if version is not None:
+                executables.append((nuke_exe, version))
+                #the folder the install is in, such as ".../Nuke13.2v4", may hold other versions next to it
+                install_folder = os.path.dirname(os.path.abspath(nuke_exe))
+                while os.path.dirname(install_folder) != install_folder:
+                    if NukeLocator.parse_version(os.path.basename(install_folder)) is not None:
+                        extra_roots.append(os.path.dirname(install_folder))
+                        break
+                    install_folder = os.path.dirname(install_folder)
+            if self.nuke_locator is None or self.nuke_locator.roots[:len(extra_roots)] != extra_roots:
+                self.nuke_locator = NukeLocator(self.settings.nuke_cache_filepath, extra_roots)
+            executables += [executable for executable in self.nuke_locator.find_all() if executable[0] != nuke_exe]
+            self.nuke_executables = executables
+            return executables
+
+
+    def get_bundled_script(self, script_name):
+        """
+            Gets the path of a python script that is run in Nuke. This is to make sure the packaged executable
+            is able to keep the scripts for use.
+
+            Args:
+                script_name (str): The file name of the script, such as "RenderScript.py".
+
+            Returns:
+                str: The path to the script.
+        """
+        try:
+            return os.path.join(sys._MEIPASS, script_name)
+        except AttributeError:
+            #next to this file rather than the working folder, so BNRQ can be started from anywhere
+            return os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name)
+
+
     #opening 1 instance of nuke and open scripts from there render method
-    def render_script_list(self, file_paths):
+    def render_script_list(self, file_paths, force_render = False):
         """
             Render a list of Nuke scripts using an internal render process.
 
             This method opens an instance of Nuke and renders the scripts by running the RenderScriptList.py script.
-            It communicates with the internal render process and emits signals to update the GUI.
+            It communicates with the internal render process and emits signals to update the GUI. Scripts that have
+            not changed since their last successful render are skipped when the render cache is on. When
+            `incremental_render` is on the frame ranges to render of each script are passed on in a json file.
+
+            The scripts are rendered one after another, each after the scripts it depends on and otherwise highest
+            priority first. Scripts whose dependencies loop are reported as failed without rendering.
 
             Args:
                 file_paths (list): List of file paths containing the Nuke scripts to render.
+                force_render (bool, optional): Render every script, even those that have not changed. Defaults to False.
         """
-        try:
-            self.py_render_script = os.path.join(sys._MEIPASS, "RenderScriptList.py")
-        except AttributeError:
-            self.py_render_script = "./RenderScriptList.py"
+        file_paths = self.skip_cached_scripts(file_paths, force_render)
+        #the single nuke instance reports scripts by path, so the keys are looked up by path too
+        self.internal_render_keys = {script: self.render_keys.get(index) for index, script in enumerate(file_paths)}
+        blocked = self.scheduler.set_queue(file_paths, self.settings.write_node_name, self.script_priorities,
+                                           self.script_dependencies, self.settings.infer_dependencies == True)
+        for queue_index, cycle in blocked.items():
+            print(f"{file_paths[queue_index]} waits on scripts that wait on each other ({cycle}), skipping it")
+            self.render_script_update.emit(file_paths[queue_index], self.ERROR_DEPENDENCY_CYCLE, 0.0)
+        script_order = self.scheduler.get_script_order()
+        if not script_order:
+            if self.render_cache is not None:
+                self.render_cache.save()
+            self.render_done.emit()
+            return
+
+        frame_range_args = []
+        if self.frame_ranges:
+            frame_ranges_filepath = os.path.join(self.temp_folder, "frame_ranges.json")
+            try:
+                with open(frame_ranges_filepath, "w") as frame_ranges_file:
+                    json.dump({file_paths[index]: frame_ranges for index, frame_ranges in self.frame_ranges.items()},
+                              frame_ranges_file)
+                frame_range_args = ["--frame-ranges", frame_ranges_filepath]
+            except OSError:
+                print("Unable to save the frame ranges, rendering the scripts whole")
+
+        self.py_render_script = self.get_bundled_script("RenderScriptList.py")
+
+        self.internal_script = None
+        self.last_event_seq = 0
+        self.internal_parser = RenderOutputParser()
+        self.internal_output_buffer = b""
 
         self.internal_render_process = QProcess()
+        self.internal_render_process.setProcessChannelMode(QProcess.MergedChannels)
         self.internal_render_process.readyReadStandardOutput.connect(self.handle_internal_output)
         self.internal_render_process.finished.connect(self.handle_internal_finish)
         self.internal_render_process.errorOccurred.connect(self.handle_error)
@@ -205,9 +931,9 @@ class SeparateThread(QObject):
                 '-ti',
                 "-V", "2", #this is verbose mode, level 2, https://learn.foundry.com/nuke/content/comp_environment/configuring_nuke/command_line_operations.html
                 self.py_render_script,
-                *file_paths,
-                self.settings.write_node_name,
-                self.xml_filepath
+                *frame_range_args,
+                *[file_paths[queue_index] for queue_index in script_order],
+                self.settings.write_node_name
                 ]
         print(cmd)
         self.internal_render_process.start(cmd[0], cmd[1:])
@@ -228,12 +954,71 @@ class SeparateThread(QObject):
         """
             Handle the output from the internal render process.
 
-            This method is called when there is output from the internal render process.
-            It currently does not do anything.
+            This method is called when there is output from the internal render process. The output is split into
+            lines (keeping any unfinished line for the next call). Progress event lines from RenderScriptList.py are
+            handled as events, every other line is read for frame progress of the script being rendered.
+        """
+        self.internal_output_buffer += bytes(self.internal_render_process.readAllStandardOutput())
+        *lines, self.internal_output_buffer = self.internal_output_buffer.split(b"\n")
+
+        for line in lines:
+            self.handle_internal_line(line.decode("utf-8", errors="replace"))
+
+
+    def handle_internal_line(self, line):
+        """
+            Handles a single line of output from the internal render process.
+
+            Args:
+                line (str): The line of output.
+        """
+        if line.startswith(self.EVENT_PREFIX):
+            try:
+                event = json.loads(line[len(self.EVENT_PREFIX):])
+            except ValueError:
+                print(f"Unreadable progress event: {line}")
+                return
+            self.handle_internal_event(event)
+        elif self.internal_parser.feed(line) and self.internal_script is not None:
+            if self.internal_job is not None:
+                self.internal_job.frames_done += 1
+                self.internal_job.frame_times.append((self.internal_parser.current_frame,
+                                                      self.internal_parser.last_frame_time))
+            self.frame_progress.emit(self.internal_script, self.internal_parser.frames_done,
+                                     self.internal_parser.total_frames, self.internal_parser.get_fps())
+
+
+    def handle_internal_event(self, event):
+        """
+            Handles a progress event from RenderScriptList.py. Events carry a sequence number, so an event that was
+            already handled is dropped and a gap in the numbers is reported, making sure each script is counted once.
 
+            Args:
+                event (dict): The progress event.
         """
-        #TODO, do something with this output???
-        output = self.internal_render_process.readAllStandardOutput()
+        seq = event.get("seq", 0)
+        if seq <= self.last_event_seq:
+            return
+        if seq > self.last_event_seq + 1:
+            print(f"Missed progress events {self.last_event_seq + 1} to {seq - 1}")
+        self.last_event_seq = seq
+
+        if event.get("type") == "script_start":
+            self.internal_script = event.get("name")
+            self.internal_parser = RenderOutputParser()
+            self.internal_job = RenderJob(self.internal_script)
+            self.internal_job.attempts = 1
+            self.internal_job.start_time = time.time()
+        elif event.get("type") == "script_done":
+            self.internal_script = None
+            exit_code = event.get("exit_code")
+            if self.internal_job is not None:
+                self.record_job(self.internal_job, 0 if exit_code is None else exit_code, 1)
+                self.internal_job = None
+            if exit_code in (0, None) and self.render_cache is not None:
+                self.record_render(self.internal_render_keys.get(event.get("name")), event.get("name"))
+            self.render_script_update.emit(event.get("name"), 0 if exit_code is None else exit_code,
+                                           float(event.get("execute_time", 0)))
 
 
     def handle_internal_finish(self, exit_code, exit_status):
@@ -247,8 +1032,15 @@ class SeparateThread(QObject):
                 exit_code (int): The exit code of the internal render process.
                 exit_status (QProcess.ExitStatus): The exit status of the internal render process.
         """
+        #anything left over after the last new line is still a whole line now that the process is done
+        self.handle_internal_output()
+        if self.internal_output_buffer:
+            self.handle_internal_line(self.internal_output_buffer.decode("utf-8", errors="replace"))
+            self.internal_output_buffer = b""
         self.render_stopped.emit(exit_code if exit_status == QProcess.NormalExit else None)
         self.internal_render_process.close()
+        if self.render_cache is not None:
+            self.render_cache.save()
         self.render_done.emit()
 
     
@@ -256,12 +1048,12 @@ class SeparateThread(QObject):
         """
             Handle the output from the external render process.
 
-            This method is called when there is output from the external render process.
-            It currently does not do anything.
-
+            This method is called when there is output from the external render process. The external renders are
+            run through subprocess in `render_nuke_script`, which reads their output line by line itself, so this
+            is only used if the QProcess version of that method is brought back.
         """
-        #TODO, do something with this output???
-        output = self.external_render_process.readAllStandardOutput()
+        for line in bytes(self.external_render_process.readAllStandardOutput()).splitlines():
+            print(line.decode("utf-8", errors="replace"))
 
 
     def handle_external_finish(self, exit_code, exit_status):
@@ -306,6 +1098,61 @@ class SeparateThread(QObject):
             pass
 
 
+    def cancel_script(self, script):
+        """
+            Cancels one script of the list being rendered, leaving the others to carry on. Its chunks still waiting
+            are skipped and the Nuke processes rendering it are killed. A cancelled script is never reported through
+            `render_script_update`, the scripts waiting on it are reported as failed. It is safe to call from any
+            thread while a list is rendering.
+
+            Args:
+                script (str): The path of the script to cancel.
+
+            Returns:
+                bool: True if the script was in the list being rendered.
+        """
+        with self.process_lock:
+            queue_indexes = {queue_index for queue_index, queued_script in enumerate(self.queued_scripts)
+                             if queued_script == script}
+            if not queue_indexes:
+                return False
+            self.failed_scripts.update(queue_indexes)
+            for proc, job in self.running_processes.items():
+                if job.queue_index in queue_indexes:
+                    proc.terminate()
+            for worker, job in self.worker_jobs.items():
+                #the worker's Nuke is started again for its next job
+                if job.queue_index in queue_indexes:
+                    worker.terminate()
+        for queue_index in queue_indexes:
+            self.fail_dependents(queue_index)
+        return True
+
+
+    def stop_job(self, job):
+        """
+            Kills the Nuke process rendering one job, leaving the rest of the list running. The job then finishes
+            with the exit code of the killed process. It is safe to call from any thread.
+
+            Args:
+                job (RenderJob): The job to stop.
+
+            Returns:
+                bool: True if a process was rendering the job.
+        """
+        stopped = False
+        with self.process_lock:
+            for proc, running_job in self.running_processes.items():
+                if running_job is job:
+                    proc.terminate()
+                    stopped = True
+            for worker, running_job in self.worker_jobs.items():
+                if running_job is job:
+                    worker.terminate()
+                    stopped = True
+        return stopped
+
+
     def emit_update(self):
         """
             Emit the update_gui signal.
@@ -319,7 +1166,18 @@ class SeparateThread(QObject):
         """
             Stop the rendering process.
 
-            This method terminates the internal render process and emits the render_cancelled signal.
+            This method stops the render pool from starting new scripts, terminates every running render process
+            and emits the render_cancelled signal. It is safe to call from the GUI thread while a render is running.
         """
-        self.internal_render_process.terminate()
+        self.stop_flag = True
+        render_pool = self.render_pool
+        if render_pool is not None:
+            render_pool.stop()
+        if self.internal_render_process is not None:
+            self.internal_render_process.terminate()
+        with self.process_lock:
+            for proc in self.running_processes:
+                proc.terminate()
+            for worker in self.nuke_workers:
+                worker.terminate()
         self.render_cancelled.emit()
\ No newline at end of file
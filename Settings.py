@@ -6,6 +6,7 @@ import getpass
 import time
 
 #from SeparateBootupThread import SeparateBootupThread
+from NukeLocator import NukeLocator
 
 from PySide6 import QtCore, QtWidgets
 from PySide6.QtCore import(QSettings, QStandardPaths, Signal, QThread, QCoreApplication)
@@ -34,13 +35,48 @@ class Settings(QtCore.QSettings):
             username (str): The username of the current user.
             json_settings_filepath (str): The path to the JSON settings file.
             render_queue_folder (str): The path to the render queue folder.
+            script_cache_filepath (str): The path to the file the parsed script details are cached in.
+            nuke_cache_filepath (str): The path to the file the Nuke executables found on the machine are cached in.
             temp_folder (str): The path to the temporary folder.
-            xml_filepath (str): The path to the XML file containing current render script information.
             nuke_exe (str): The path to the Nuke executable.
             folder_search_start (str): The starting folder for searching Nuke executables.
             write_node_name (str): The name of the Write node.
             full_filepath_name (bool): Flag indicating whether to use the full filepath as the output filename.
             render_nuke_open (bool): Flag indicating whether to keep Nuke open after rendering.
+            render_workers (int): The number of Nuke processes allowed to render at the same time.
+            chunk_size (int): The number of frames per render chunk, 0 renders each script in one piece.
+            chunk_retries (int): How many times a failed chunk is rendered again before the script is failed.
+            persistent_workers (bool): Flag indicating whether to keep Nuke running between jobs in each worker.
+            worker_max_jobs (int): How many jobs a persistent worker renders before its Nuke is restarted, 0 for no limit.
+            worker_max_memory (int): The memory use in MB that gets a persistent worker's Nuke restarted, 0 for no limit.
+            script_cache_size (int): The most scripts to keep parsed details of in the script cache.
+            validation_workers (int): The number of scripts checked at the same time before a render.
+            render_cache (bool): Flag indicating whether scripts unchanged since their last successful render are skipped.
+            render_cache_filepath (str): The path to the manifest of successful renders.
+            job_store_filepath (str): The path to the database the render queue is kept in.
+            incremental_render (bool): Flag indicating whether only missing or out of date output frames are rendered.
+            render_daemon (bool): Flag indicating whether renders are handed to the render daemon, so they carry on
+                after the window closes.
+            daemon_store_filepath (str): The path to the database the render daemon keeps its queue in.
+            daemon_info_filepath (str): The path to the file the running render daemon writes its address to.
+            daemon_log_filepath (str): The path to the file the render daemon's output is written to.
+            admission_control (bool): Flag indicating whether a render waits for enough free memory and CPU before
+                it starts alongside others.
+            memory_headroom (int): The memory in MB kept free on top of what a render is expected to need.
+            max_cpu_load (int): The CPU load in percent from work other than the renders above which no new render
+                is started, 0 for no limit.
+            adaptive_workers (bool): Flag indicating whether the number of renders run at once follows the frames per
+                second the machine keeps up, starting from `render_workers`.
+            min_render_workers (int): The fewest renders run at once when `adaptive_workers` is on.
+            max_render_workers (int): The most renders run at once when `adaptive_workers` is on.
+            infer_dependencies (bool): Flag indicating whether a script waits for the scripts in the queue that write
+                the files it reads.
+            match_nuke_version (bool): Flag indicating whether each script is rendered with the installed Nuke that
+                matches the version it was saved with, rather than always with `nuke_exe`.
+            resource_history_filepath (str): The path to the file the memory and CPU use of past renders is kept in.
+            render_history_filepath (str): The path to the database every past render and its frame times are kept in.
+            farm_port (int): The port the render coordinator listens for render agents on.
+            farm_token (str): The shared secret render agents give the render coordinator, empty for one made per run.
 
         Methods:
             __init__(): Initializes the Settings object.
@@ -53,8 +89,10 @@ class Settings(QtCore.QSettings):
             handle_nuke_path_search_result(nuke_path): Handles the result of the Nuke executable path search.
             remove_appdata_contents(): Removes the application data folder.
             remove_temp_files(): Removes temporary files.
+            convert_number_settings(): Converts the number settings into ints.
+            to_int(value, default, minimum): Converts a stored number into an int.
             get_user(): Returns the username of the current user.
-            assign_json_paths(): Assigns paths for the JSON settings file and the render queue folder.
+            assign_json_paths(): Assigns paths for the JSON settings file, the script cache and the render queue folder.
     """
     #The QtCore.QSettings is wonky, I have made it so the application clears them on exit. 
     #For now, it is working as the settings are being taken from self. , unsure how this will affect if 
@@ -73,7 +111,7 @@ class Settings(QtCore.QSettings):
 
         This method sets up the initial state and configuration of the application.
         It assigns values to various instance variables, such as the application name, username,
-        file paths for JSON settings, render queue folder, temporary folder, XML file path,
+        file paths for JSON settings, render queue folder, temporary folder,
         Nuke executable, folder search start path, write node name, full file path flag, and
         render Nuke open flag. It also loads the application settings.
         """
@@ -84,17 +122,46 @@ class Settings(QtCore.QSettings):
         self.username = getpass.getuser()
         self.json_settings_filepath = None
         self.render_queue_folder = None
+        self.script_cache_filepath = None
+        self.nuke_cache_filepath = None
+        self.render_cache_filepath = None
+        self.job_store_filepath = None
+        self.daemon_store_filepath = None
+        self.daemon_info_filepath = None
+        self.daemon_log_filepath = None
+        self.resource_history_filepath = None
+        self.render_history_filepath = None
 
         self.assign_json_paths()
 
         self.temp_folder = os.path.join(self.render_queue_folder, "Temp")
-        self.xml_filepath = os.path.join(self.temp_folder, "CurrentRenderScriptInfo.xml")
 
         self.nuke_exe = None
         self.folder_search_start = "C:\\Users\\"
         self.write_node_name = "Write1"
         self.full_filepath_name = True
         self.render_nuke_open = False
+        self.render_workers = 1
+        self.chunk_size = 0
+        self.chunk_retries = 2
+        self.persistent_workers = False
+        self.worker_max_jobs = 50
+        self.worker_max_memory = 0
+        self.script_cache_size = 1000
+        self.validation_workers = 8
+        self.render_cache = True
+        self.incremental_render = True
+        self.render_daemon = False
+        self.admission_control = True
+        self.memory_headroom = 1024
+        self.max_cpu_load = 95
+        self.adaptive_workers = False
+        self.min_render_workers = 1
+        self.max_render_workers = 8
+        self.infer_dependencies = True
+        self.match_nuke_version = True
+        self.farm_port = 47810
+        self.farm_token = ""
 
         self.load_settings()
 
@@ -118,6 +185,27 @@ class Settings(QtCore.QSettings):
                 self.write_node_name = json_settings.get("write_name", self.write_node_name)
                 self.full_filepath_name = json_settings.get("full_filepath_name", self.full_filepath_name)
                 self.render_nuke_open = json_settings.get("render_nuke_open", self.render_nuke_open)
+                self.render_workers = json_settings.get("render_workers", self.render_workers)
+                self.chunk_size = json_settings.get("chunk_size", self.chunk_size)
+                self.chunk_retries = json_settings.get("chunk_retries", self.chunk_retries)
+                self.persistent_workers = json_settings.get("persistent_workers", self.persistent_workers)
+                self.worker_max_jobs = json_settings.get("worker_max_jobs", self.worker_max_jobs)
+                self.worker_max_memory = json_settings.get("worker_max_memory", self.worker_max_memory)
+                self.script_cache_size = json_settings.get("script_cache_size", self.script_cache_size)
+                self.validation_workers = json_settings.get("validation_workers", self.validation_workers)
+                self.render_cache = json_settings.get("render_cache", self.render_cache)
+                self.incremental_render = json_settings.get("incremental_render", self.incremental_render)
+                self.render_daemon = json_settings.get("render_daemon", self.render_daemon)
+                self.admission_control = json_settings.get("admission_control", self.admission_control)
+                self.memory_headroom = json_settings.get("memory_headroom", self.memory_headroom)
+                self.max_cpu_load = json_settings.get("max_cpu_load", self.max_cpu_load)
+                self.adaptive_workers = json_settings.get("adaptive_workers", self.adaptive_workers)
+                self.min_render_workers = json_settings.get("min_render_workers", self.min_render_workers)
+                self.max_render_workers = json_settings.get("max_render_workers", self.max_render_workers)
+                self.infer_dependencies = json_settings.get("infer_dependencies", self.infer_dependencies)
+                self.match_nuke_version = json_settings.get("match_nuke_version", self.match_nuke_version)
+                self.farm_port = json_settings.get("farm_port", self.farm_port)
+                self.farm_token = json_settings.get("farm_token", self.farm_token)
             
             #catch any true/false coming back as strings
             if isinstance(self.full_filepath_name, str) and self.full_filepath_name.lower() == "true":
@@ -134,6 +222,8 @@ class Settings(QtCore.QSettings):
             elif isinstance(self.render_nuke_open, str):
                 self.render_nuke_open = False
 
+            self.convert_number_settings()
+
         except (AttributeError, FileNotFoundError):
             print("Unable to load settings file")
 
@@ -157,7 +247,28 @@ class Settings(QtCore.QSettings):
             "search_start": self.folder_search_start,
             "write_name": self.write_node_name,
             "full_filepath_name": self.full_filepath_name,
-            "render_nuke_open": self.render_nuke_open
+            "render_nuke_open": self.render_nuke_open,
+            "render_workers": self.render_workers,
+            "chunk_size": self.chunk_size,
+            "chunk_retries": self.chunk_retries,
+            "persistent_workers": self.persistent_workers,
+            "worker_max_jobs": self.worker_max_jobs,
+            "worker_max_memory": self.worker_max_memory,
+            "script_cache_size": self.script_cache_size,
+            "validation_workers": self.validation_workers,
+            "render_cache": self.render_cache,
+            "incremental_render": self.incremental_render,
+            "render_daemon": self.render_daemon,
+            "admission_control": self.admission_control,
+            "memory_headroom": self.memory_headroom,
+            "max_cpu_load": self.max_cpu_load,
+            "adaptive_workers": self.adaptive_workers,
+            "min_render_workers": self.min_render_workers,
+            "max_render_workers": self.max_render_workers,
+            "infer_dependencies": self.infer_dependencies,
+            "match_nuke_version": self.match_nuke_version,
+            "farm_port": self.farm_port,
+            "farm_token": self.farm_token
         }
 
         try:
@@ -199,6 +310,27 @@ class Settings(QtCore.QSettings):
 
         settings.beginGroup("Performance")
         self.render_nuke_open = settings.value("render_nuke_open", self.render_nuke_open)
+        self.render_workers = settings.value("render_workers", self.render_workers)
+        self.chunk_size = settings.value("chunk_size", self.chunk_size)
+        self.chunk_retries = settings.value("chunk_retries", self.chunk_retries)
+        self.persistent_workers = settings.value("persistent_workers", self.persistent_workers)
+        self.worker_max_jobs = settings.value("worker_max_jobs", self.worker_max_jobs)
+        self.worker_max_memory = settings.value("worker_max_memory", self.worker_max_memory)
+        self.script_cache_size = settings.value("script_cache_size", self.script_cache_size)
+        self.validation_workers = settings.value("validation_workers", self.validation_workers)
+        self.render_cache = settings.value("render_cache", self.render_cache)
+        self.incremental_render = settings.value("incremental_render", self.incremental_render)
+        self.render_daemon = settings.value("render_daemon", self.render_daemon)
+        self.admission_control = settings.value("admission_control", self.admission_control)
+        self.memory_headroom = settings.value("memory_headroom", self.memory_headroom)
+        self.max_cpu_load = settings.value("max_cpu_load", self.max_cpu_load)
+        self.adaptive_workers = settings.value("adaptive_workers", self.adaptive_workers)
+        self.min_render_workers = settings.value("min_render_workers", self.min_render_workers)
+        self.max_render_workers = settings.value("max_render_workers", self.max_render_workers)
+        self.infer_dependencies = settings.value("infer_dependencies", self.infer_dependencies)
+        self.match_nuke_version = settings.value("match_nuke_version", self.match_nuke_version)
+        self.farm_port = settings.value("farm_port", self.farm_port)
+        self.farm_token = settings.value("farm_token", self.farm_token)
         settings.endGroup()
 
         if isinstance(self.full_filepath_name, str) and self.full_filepath_name.lower() == "true":
@@ -215,6 +347,8 @@ class Settings(QtCore.QSettings):
         elif isinstance(self.render_nuke_open, str):
             self.render_nuke_open = False
 
+        self.convert_number_settings()
+
 
     def save_settings(self):
         """
@@ -244,6 +378,27 @@ class Settings(QtCore.QSettings):
 
         settings.beginGroup("Performance")
         settings.setValue("render_nuke_open", self.render_nuke_open)
+        settings.setValue("render_workers", self.render_workers)
+        settings.setValue("chunk_size", self.chunk_size)
+        settings.setValue("chunk_retries", self.chunk_retries)
+        settings.setValue("persistent_workers", self.persistent_workers)
+        settings.setValue("worker_max_jobs", self.worker_max_jobs)
+        settings.setValue("worker_max_memory", self.worker_max_memory)
+        settings.setValue("script_cache_size", self.script_cache_size)
+        settings.setValue("validation_workers", self.validation_workers)
+        settings.setValue("render_cache", self.render_cache)
+        settings.setValue("incremental_render", self.incremental_render)
+        settings.setValue("render_daemon", self.render_daemon)
+        settings.setValue("admission_control", self.admission_control)
+        settings.setValue("memory_headroom", self.memory_headroom)
+        settings.setValue("max_cpu_load", self.max_cpu_load)
+        settings.setValue("adaptive_workers", self.adaptive_workers)
+        settings.setValue("min_render_workers", self.min_render_workers)
+        settings.setValue("max_render_workers", self.max_render_workers)
+        settings.setValue("infer_dependencies", self.infer_dependencies)
+        settings.setValue("match_nuke_version", self.match_nuke_version)
+        settings.setValue("farm_port", self.farm_port)
+        settings.setValue("farm_token", self.farm_token)
         settings.endGroup()
         
         self.save_settings_to_json()
@@ -260,12 +415,15 @@ class Settings(QtCore.QSettings):
 
         If `skip_json` is False, it calls the `load_settings_from_json` method to load settings from the JSON file.
 
-        It then retrieves the default Nuke path or uses the previously set Nuke executable. The basename of the
-        Nuke executable is emitted through the `latest_nuke` signal.
+        The basename of the Nuke executable, if one is set, is emitted through the `latest_nuke` signal. Nuke is not
+        looked for here, so the window is not held up by it on the first launch, the window looks for it in the
+        background instead.
 
         The current settings are saved by calling the `save_settings` method.
 
-        Finally, the `finished_launch` signal is emitted to indicate the completion of the launch process.
+        Finally, the settings move back to the thread of the application, so the window can go on using this
+        object rather than reading the settings again, and the `finished_launch` signal is emitted to indicate the
+        completion of the launch process.
         """
 
         skip_json = False #Switch this to True if you want to skip the json no matter what
@@ -277,43 +435,35 @@ class Settings(QtCore.QSettings):
         if not skip_json:
             self.load_settings_from_json()
         
-        if self.nuke_exe is None:
-            self.get_default_nuke_path()
-        else:
+        if self.nuke_exe:
             self.latest_nuke.emit(os.path.splitext(os.path.basename(self.nuke_exe))[0])
         self.save_settings()
+        app = QCoreApplication.instance()
+        if app is not None:
+            self.moveToThread(app.thread())
         self.finished_launch.emit()
 
 
-    #this should only be called on launch
+    #this searches on the calling thread, the window uses SeparateBootupThread to search in the background
     def get_default_nuke_path(self):
-        """ Find the latest version of Nuke executable installed. This is limited in it only searches the default
-                and common spot of C:/ProgramFiles
+        """ Find the latest version of Nuke executable installed. Only the common install folders are searched:
+                Program Files on Windows, /Applications on macOS and /usr/local and /opt on Linux.
 
         Emits:
             nuke_path_ready (str): Signal emitted when the latest Nuke executable path is found.
                 It provides the path in it so the path can be useable by the UI.
 
         Steps:
-            - The method searches for Nuke executable (by OS walking) in the "C:\Program Files\" directory and its subdirectories.
-            - It identifies Nuke executables by looking for files with "Nuke" in their name and ending with ".exe".
-            - The method determines the version of each found executable and keeps track of the latest version.
-            - Once the latest Nuke executable path is found, it is emitted via the `nuke_path_ready` signal.
+            - The method looks for Nuke executables in the folders Nuke is installed to (see NukeLocator), only going
+              into the folders named after Nuke or The Foundry.
+            - The folders searched before are taken from the cache unless something was installed to or removed from
+              them since, so after the first launch this takes a few stats.
+            - Versions are compared as (major, minor, patch), so Nuke13.10 is newer than Nuke13.2.
 
         """
-        nuke_path = None
-        max_ver = -1
-
-        for root, dirs, files in os.walk("C:\\Program Files\\"):
-            #QtWidgets.QApplication.processEvents() 
-            self.root_being_explored.emit(root)
-            for file in files:
-                if "Nuke" in file and file.endswith(".exe"):
-                    ver = float(file.split("Nuke")[1].split(".exe")[0])
-                    if ver > max_ver:
-                        max_ver = ver
-                        nuke_path = os.path.join(root, file)
-                        self.latest_nuke.emit(os.path.splitext(os.path.basename(nuke_path))[0])
+        nuke_path = NukeLocator(self.nuke_cache_filepath).find_latest(self.root_being_explored.emit)
+        if nuke_path:
+            self.latest_nuke.emit(os.path.splitext(os.path.basename(nuke_path))[0])
 
         self.handle_nuke_path_search_result(nuke_path)
 
@@ -329,7 +479,7 @@ class Settings(QtCore.QSettings):
             self.nuke_exe = nuke_path
         else:
             error_box = QMessageBox()
-            error_box.setIcon(QMessageBox.critical)
+            error_box.setIcon(QMessageBox.Critical)
             error_box.setText("No Nuke path found!")
             error_box.exec()
             self.nuke_exe = ""
@@ -353,6 +503,59 @@ class Settings(QtCore.QSettings):
                 os.remove(file_path)
 
 
+    def convert_number_settings(self):
+        """
+        Converts the number settings, which may have come back as strings from QSettings or the json, into ints.
+        Boolean flags that may come back as "true"/"false" strings are converted too.
+        """
+        self.render_workers = self.to_int(self.render_workers, 1, 1)
+        self.chunk_size = self.to_int(self.chunk_size, 0)
+        self.chunk_retries = self.to_int(self.chunk_retries, 2)
+        self.worker_max_jobs = self.to_int(self.worker_max_jobs, 50)
+        self.worker_max_memory = self.to_int(self.worker_max_memory, 0)
+        self.script_cache_size = self.to_int(self.script_cache_size, 1000, 1)
+        self.validation_workers = self.to_int(self.validation_workers, 8, 1)
+        self.memory_headroom = self.to_int(self.memory_headroom, 1024)
+        self.max_cpu_load = self.to_int(self.max_cpu_load, 95)
+        self.min_render_workers = self.to_int(self.min_render_workers, 1, 1)
+        self.max_render_workers = self.to_int(self.max_render_workers, 8, 1)
+        self.farm_port = self.to_int(self.farm_port, 47810)
+        if isinstance(self.persistent_workers, str):
+            self.persistent_workers = self.persistent_workers.lower() == "true"
+        if isinstance(self.render_cache, str):
+            self.render_cache = self.render_cache.lower() == "true"
+        if isinstance(self.incremental_render, str):
+            self.incremental_render = self.incremental_render.lower() == "true"
+        if isinstance(self.render_daemon, str):
+            self.render_daemon = self.render_daemon.lower() == "true"
+        if isinstance(self.admission_control, str):
+            self.admission_control = self.admission_control.lower() == "true"
+        if isinstance(self.adaptive_workers, str):
+            self.adaptive_workers = self.adaptive_workers.lower() == "true"
+        if isinstance(self.infer_dependencies, str):
+            self.infer_dependencies = self.infer_dependencies.lower() == "true"
+        if isinstance(self.match_nuke_version, str):
+            self.match_nuke_version = self.match_nuke_version.lower() == "true"
+
+
+    def to_int(self, value, default, minimum = 0):
+        """
+        Converts a stored number that may have come back as a string into an int.
+
+        Args:
+            value (int or str): The stored value.
+            default (int): The value to use if the stored value could not be read.
+            minimum (int, optional): The smallest value allowed. Defaults to 0.
+
+        Returns:
+            int: The stored value as an int of at least `minimum`, or the default if it could not be read.
+        """
+        try:
+            return max(minimum, int(value))
+        except (TypeError, ValueError):
+            return default
+
+
     def get_user(self):
         """
         Returns the username of the current user.
@@ -380,5 +583,14 @@ class Settings(QtCore.QSettings):
         #self.render_queue_folder = r"C:\Users\User\Desktop\BNRQ"
         
         self.json_settings_filepath = os.path.join(self.render_queue_folder, "settings.json")
+        self.script_cache_filepath = os.path.join(self.render_queue_folder, "script_cache.json")
+        self.nuke_cache_filepath = os.path.join(self.render_queue_folder, "nuke_cache.json")
+        self.render_cache_filepath = os.path.join(self.render_queue_folder, "render_cache.json")
+        self.job_store_filepath = os.path.join(self.render_queue_folder, "queue.db")
+        self.daemon_store_filepath = os.path.join(self.render_queue_folder, "daemon_queue.db")
+        self.daemon_info_filepath = os.path.join(self.render_queue_folder, "daemon.json")
+        self.daemon_log_filepath = os.path.join(self.render_queue_folder, "daemon.log")
+        self.resource_history_filepath = os.path.join(self.render_queue_folder, "resource_history.json")
+        self.render_history_filepath = os.path.join(self.render_queue_folder, "render_history.db")
         if not os.path.exists(self.render_queue_folder):
             os.mkdir(self.render_queue_folder)
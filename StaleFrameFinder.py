@@ -0,0 +1,177 @@
+import os
+import statistics
+
+from InputScanner import InputScanner
+
+
+class StaleFrameFinder():
+    """
+        Works out which output frames of a script need rendering again, so a render that died part way through (or
+        a script with a few changed inputs) only renders what is missing.
+
+        A frame needs rendering if it is not on disk, if it is truncated (empty, or less than `truncated_ratio` of
+        the median size of the frames around it), or if it is older than the script or any frame its Read nodes read.
+        The output folder is listed once and the frames are looked up in that listing, as is every Read folder. The
+        frames needing rendering are given as contiguous ranges, so each range is a single `nuke.execute` call.
+
+        Attributes:
+            script_cache (ScriptMetadataCache): The cache the script details are read from.
+            input_scanner (InputScanner): Lists the output and Read folders.
+            truncated_ratio (float): Frames smaller than this fraction of the median frame size are rendered again.
+
+        Methods:
+            __init__(script_cache, input_scanner, truncated_ratio): Initializes the StaleFrameFinder object.
+            find_frames_to_render(script_path, write_node_name): Returns the frame ranges that need rendering.
+            get_newest_input_time(script_path, metadata): Returns the modification time of the newest input.
+            get_output_stats(directory, basename, frames): Returns the size and modification time of each output frame.
+            to_ranges(frames): Groups frames into contiguous ranges.
+    """
+
+    def __init__(self, script_cache, input_scanner = None, truncated_ratio = 0.1):
+        """
+            Initialization method.
+
+            Args:
+                script_cache (ScriptMetadataCache): The cache to read the script details from.
+                input_scanner (InputScanner, optional): The scanner to list folders with. A new one is made if not
+                    given. Defaults to None.
+                truncated_ratio (float, optional): The fraction of the median frame size below which a frame counts
+                    as truncated. Defaults to 0.1.
+        """
+        self.script_cache = script_cache
+        self.input_scanner = input_scanner if input_scanner is not None else InputScanner()
+        self.truncated_ratio = truncated_ratio
+
+
+    def find_frames_to_render(self, script_path, write_node_name):
+        """
+            Works out which frames of the script's Root range need rendering.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                write_node_name (str): The name of the write node to render with.
+
+            Returns:
+                list: The [first_frame, last_frame] ranges to render, in order, empty if every frame is up to date.
+                    None if it can not be worked out (an output path with an expression, a movie file, an unreadable
+                    script), in which case the whole script should be rendered.
+        """
+        try:
+            metadata = self.script_cache.get(script_path)
+        except OSError:
+            return None
+        write_knobs = metadata["write_nodes"].get(write_node_name)
+        if not write_knobs or not write_knobs.get("file") or "[" in write_knobs["file"]:
+            return None
+        basename = os.path.basename(write_knobs["file"])
+        if not InputScanner.PADDING_PATTERN.search(basename):
+            return None
+
+        directory = os.path.dirname(write_knobs["file"])
+        if not os.path.isabs(directory):
+            directory = os.path.join(os.path.dirname(script_path), directory)
+        first_frame, last_frame = metadata["frame_range"]
+        frames = range(first_frame, last_frame + 1)
+
+        output_stats = self.get_output_stats(directory, basename, frames)
+        if output_stats is None:
+            return [[first_frame, last_frame]]
+        newest_input_time = self.get_newest_input_time(script_path, metadata)
+
+        sizes = [size for size, _ in output_stats.values() if size]
+        truncated_size = statistics.median(sizes) * self.truncated_ratio if sizes else 0
+        stale_frames = []
+        for frame in frames:
+            if frame not in output_stats:
+                stale_frames.append(frame)
+                continue
+            size, mtime = output_stats[frame]
+            if size == 0 or size < truncated_size or mtime < newest_input_time:
+                stale_frames.append(frame)
+        return self.to_ranges(stale_frames)
+
+
+    def get_newest_input_time(self, script_path, metadata):
+        """
+            Finds the modification time of the newest of the script and every frame its Read nodes read. Each Read
+            folder is listed once. Frames that are missing are left out, pre-flight reports those.
+
+            Args:
+                script_path (str): The path of the .nk script.
+                metadata (dict): The script details from the script cache.
+
+            Returns:
+                float: The newest modification time.
+        """
+        newest_time = os.path.getmtime(script_path)
+        base_directory = os.path.dirname(script_path)
+        listings = {}
+        for read in metadata["reads"]:
+            if not read["file"] or "[" in read["file"] or "%V" in read["file"] or "%v" in read["file"]:
+                continue
+            directory = os.path.dirname(read["file"])
+            if not os.path.isabs(directory):
+                directory = os.path.join(base_directory, directory)
+            if directory not in listings:
+                listings[directory] = self.input_scanner.list_directory(directory) or {}
+
+            basename = os.path.basename(read["file"])
+            if InputScanner.PADDING_PATTERN.search(basename):
+                frames = self.input_scanner.get_needed_frames(read, metadata["frame_range"])
+                names = [self.input_scanner.get_frame_name(basename, frame) for frame in frames]
+            else:
+                names = [basename]
+            for name in names:
+                entry = listings[directory].get(name)
+                if entry is None:
+                    continue
+                try:
+                    newest_time = max(newest_time, entry.stat().st_mtime)
+                except OSError:
+                    pass
+        return newest_time
+
+
+    def get_output_stats(self, directory, basename, frames):
+        """
+            Args:
+                directory (str): The folder the output frames are written to.
+                basename (str): The output file name with padding.
+                frames (range): The frames to look for.
+
+            Returns:
+                dict: The (size, mtime) of each output frame on disk, by frame number. None if the folder is missing.
+        """
+        listing = self.input_scanner.list_directory(directory)
+        if listing is None:
+            return None
+        output_stats = {}
+        for frame in frames:
+            entry = listing.get(self.input_scanner.get_frame_name(basename, frame))
+            if entry is None:
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            output_stats[frame] = (stat.st_size, stat.st_mtime)
+        return output_stats
+
+
+    @staticmethod
+    def to_ranges(frames):
+        """
+            Args:
+                frames (list): The frame numbers, in order.
+
+            Returns:
+                list: The frames grouped into contiguous [first_frame, last_frame] ranges.
+        """
+        frame_ranges = []
+        for frame in frames:
+            if frame_ranges and frame == frame_ranges[-1][1] + 1:
+                frame_ranges[-1][1] = frame
+            else:
+                frame_ranges.append([frame, frame])
+        return frame_ranges
+
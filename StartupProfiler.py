@@ -0,0 +1,60 @@
+import sys
+import time
+
+
+class StartupProfiler():
+    """
+        Times the phases of starting BNRQ's window, for `--profile-startup`. Each call to `mark` ends a phase that
+        started where the last one ended, so the phases add up to the whole start up. The times are printed to stderr
+        once the window is up, and nothing is timed when the profiler is not enabled.
+
+        Attributes:
+            enabled (bool): True if the phases are timed and printed.
+            start_time (float): When the profiler was made, the start of the first phase.
+            last_time (float): When the last phase ended.
+            phases (list): The (name, seconds) of each phase, in order.
+
+        Methods:
+            __init__(enabled): Initializes the StartupProfiler object.
+            mark(phase): Ends a phase.
+            report(): Prints the time of each phase and the total.
+    """
+
+    def __init__(self, enabled = False):
+        """
+            Initialization method.
+
+            Args:
+                enabled (bool, optional): Time the phases and print them. Defaults to False.
+        """
+        self.enabled = enabled
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.phases = []
+
+
+    def mark(self, phase):
+        """
+            Ends a phase, timing it from the end of the one before.
+
+            Args:
+                phase (str): The name of the phase that just ended.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last_time))
+        self.last_time = now
+
+
+    def report(self):
+        """
+            Prints the time of each phase in milliseconds, and the total from when the profiler was made.
+        """
+        if not self.enabled:
+            return
+        width = max((len(phase) for phase, _ in self.phases), default=0)
+        print("Startup time:", file=sys.stderr)
+        for phase, seconds in self.phases:
+            print(f"  {phase:<{width}}  {seconds * 1000:8.1f} ms", file=sys.stderr)
+        print(f"  {'total':<{width}}  {(self.last_time - self.start_time) * 1000:8.1f} ms", file=sys.stderr)
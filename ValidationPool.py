@@ -0,0 +1,174 @@
+import threading
+import concurrent.futures
+
+from PySide6.QtCore import QObject, Signal
+
+
+class ValidationPool(QObject):
+    """
+        Validates scripts in a pool of threads so the window never waits on the checks.
+
+        Checking a script is mostly waiting on the file system (stat-ing the script and its output folder, reading it
+        if it has changed), which is slow on a network drive but lets other threads run, so several scripts are
+        checked at once. The pool has a fixed number of threads, extra scripts wait their turn. Each result is sent
+        with `script_validated` as soon as it is ready, and `validation_done` is sent once every script asked for has
+        been checked. The signals are sent from the pool's threads, so slots on objects in the GUI thread are called
+        in the GUI thread.
+
+        A Read of the files another queued script writes is left to that script, so the files the queued scripts
+        write are found once for each request, in the first pool thread, and shared by the checks of the request.
+
+        Checks can be cancelled, for example when a script is taken off the queue. Checks that have not started are
+        dropped, and the results of those already running are thrown away when they finish.
+
+        Signals:
+            script_validated (str, dict): Signal emitted when a script has been checked. It provides the script path
+                and the result from ScriptValidator.validate.
+            validation_done: Signal emitted when there are no scripts left to check.
+
+        Attributes:
+            validator (ScriptValidator): The validator that checks each script.
+            executor (ThreadPoolExecutor): The threads the checks run in.
+            pending (dict): The futures of the checks waiting or running for each script.
+            lock (threading.Lock): Guards `pending` as it is changed from the pool's threads.
+
+        Methods:
+            __init__(validator, max_workers): Initializes the ValidationPool object.
+            validate(script_paths, write_node_name, queued_scripts): Starts checking scripts.
+            run_validation(script_path, write_node_name, queued_outputs, token): Checks one script in a pool thread.
+            cancel(script_paths): Cancels the checks of some or all scripts.
+            is_busy(): Returns whether there are scripts still being checked.
+            is_pending(script_path): Returns whether a script is still being checked.
+            shutdown(): Stops the pool's threads.
+    """
+
+    script_validated = Signal(str, object)
+    validation_done = Signal()
+
+
+    def __init__(self, validator, max_workers = 8):
+        """
+            Initialization method.
+
+            Args:
+                validator (ScriptValidator): The validator that checks each script.
+                max_workers (int, optional): The most scripts to check at once. Defaults to 8.
+        """
+        super().__init__()
+        self.validator = validator
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                                              thread_name_prefix="BNRQValidation")
+        self.pending = {}
+        self.lock = threading.Lock()
+
+
+    def validate(self, script_paths, write_node_name, queued_scripts = None):
+        """
+            Starts checking scripts. This returns straight away, the results come through the signals.
+
+            Args:
+                script_paths (list): The paths of the scripts to check.
+                write_node_name (str): The name of the write node the scripts will be rendered with.
+                queued_scripts (list, optional): Every script in the queue, whose outputs the scripts checked may
+                    read. Defaults to None.
+        """
+        if not script_paths:
+            if not self.is_busy():
+                self.validation_done.emit()
+            return
+        with self.lock:
+            #submitted first, so it is running before any check waits on it
+            queued_outputs = self.executor.submit(self.validator.get_queued_outputs, queued_scripts or [],
+                                                  write_node_name)
+            for script_path in script_paths:
+                #the token ties the result to this request, so a cancelled check can be told apart from a new one
+                token = object()
+                future = self.executor.submit(self.run_validation, script_path, write_node_name, queued_outputs,
+                                              token)
+                self.pending.setdefault(script_path, {})[token] = future
+
+
+    def run_validation(self, script_path, write_node_name, queued_outputs, token):
+        """
+            Checks one script in a pool thread and sends the result, unless the check was cancelled.
+
+            Args:
+                script_path (str): The path of the script to check.
+                write_node_name (str): The name of the write node the script will be rendered with.
+                queued_outputs (Future): Gives the files the queued scripts write, from
+                    ScriptValidator.get_queued_outputs.
+                token (object): Identifies this check in `pending`.
+        """
+        with self.lock:
+            if token not in self.pending.get(script_path, {}):
+                return
+
+        try:
+            result = self.validator.validate(script_path, write_node_name, queued_outputs.result())
+        except Exception as e:
+            print(f"Unable to validate {script_path}: {e}")
+            result = {"script": script_path, "status": self.validator.STATUS_ERROR,
+                      "errors": [f"Unable to validate the script: {e}"], "warnings": [], "frame_count": 0,
+                      "write_node": write_node_name, "mtime": None, "size": None, "queued_reads": []}
+
+        with self.lock:
+            script_checks = self.pending.get(script_path, {})
+            if token not in script_checks:
+                return
+            del script_checks[token]
+            if not script_checks:
+                del self.pending[script_path]
+            done = not self.pending
+
+        self.script_validated.emit(script_path, result)
+        if done:
+            self.validation_done.emit()
+
+
+    def cancel(self, script_paths = None):
+        """
+            Cancels the checks of some or all scripts. `validation_done` is sent if this leaves nothing to check.
+
+            Args:
+                script_paths (list, optional): The scripts to stop checking, None for every script. Defaults to None.
+        """
+        with self.lock:
+            if script_paths is None:
+                script_paths = list(self.pending)
+            cancelled = False
+            for script_path in script_paths:
+                for future in self.pending.pop(script_path, {}).values():
+                    future.cancel()
+                    cancelled = True
+            done = cancelled and not self.pending
+        if done:
+            self.validation_done.emit()
+
+
+    def is_busy(self):
+        """
+            Returns:
+                bool: True if there are scripts waiting to be checked or being checked.
+        """
+        with self.lock:
+            return bool(self.pending)
+
+
+    def is_pending(self, script_path):
+        """
+            Args:
+                script_path (str): The path of the script.
+
+            Returns:
+                bool: True if the script is waiting to be checked or being checked.
+        """
+        with self.lock:
+            return script_path in self.pending
+
+
+    def shutdown(self):
+        """
+            Cancels every check and stops the pool's threads once the checks already running have finished.
+        """
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
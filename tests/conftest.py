@@ -0,0 +1,75 @@
+"""
+Shared fixtures for the tests. Everything renders through HelperScripts/StubNuke.py, so no Nuke is needed.
+
+BNRQ keeps its settings, caches and queue next to the script it is started from (sys.argv[0]) and in QSettings
+under the home folder, so both are pointed at a temporary folder before anything is imported.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_NUKE = os.path.join(REPO_FOLDER, "HelperScripts", "StubNuke.py")
+
+TEST_HOME = tempfile.mkdtemp(prefix="bnrq-tests-")
+os.environ["HOME"] = TEST_HOME
+os.environ["XDG_CONFIG_HOME"] = os.path.join(TEST_HOME, ".config")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.argv[0] = os.path.join(TEST_HOME, "RenderQ.py")
+sys.path.insert(0, REPO_FOLDER)
+
+from PySide6.QtCore import QCoreApplication
+
+from Settings import Settings
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+        The Qt application the render engine's signals and timers need.
+    """
+    return QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+
+
+@pytest.fixture
+def settings(app, tmp_path, monkeypatch):
+    """
+        Settings that render with the stub Nuke, keeping every file BNRQ writes in the test's folder.
+    """
+    monkeypatch.setenv("STUB_NUKE_FRAME_TIME", "0.02")
+    settings = Settings()
+    settings.render_queue_folder = str(tmp_path / "BNRQ")
+    os.makedirs(settings.render_queue_folder, exist_ok=True)
+    for name in ("json_settings", "script_cache", "nuke_cache", "render_cache", "job_store", "daemon_store",
+                 "daemon_info", "daemon_log", "resource_history", "render_history"):
+        filepath = getattr(settings, f"{name}_filepath")
+        setattr(settings, f"{name}_filepath", os.path.join(settings.render_queue_folder, os.path.basename(filepath)))
+    settings.temp_folder = os.path.join(settings.render_queue_folder, "Temp")
+    settings.nuke_exe = STUB_NUKE
+    settings.render_workers = 1
+    settings.admission_control = False
+    settings.match_nuke_version = False
+    return settings
+
+
+@pytest.fixture
+def make_script(tmp_path):
+    """
+        Returns a function that writes a .nk script rendering `frames` frames from its Write1 into the test's folder.
+        `reads` names the scripts whose renders it reads, with printf padding where the writes use Nuke's.
+    """
+    os.makedirs(tmp_path / "renders", exist_ok=True)
+
+    def make_script(name, frames = 10, reads = ()):
+        script = tmp_path / f"{name}.nk"
+        text = f"Root {{\n inputs 0\n name {script}\n first_frame 1\n last_frame {frames}\n}}\n"
+        for index, read in enumerate(reads):
+            text += (f"Read {{\n inputs 0\n file {tmp_path / 'renders' / read}.%04d.exr\n first 1\n last {frames}\n"
+                     f" name Read{index + 1}\n}}\n")
+        text += f"Write {{\n file {tmp_path / 'renders' / name}.####.exr\n name Write1\n}}\n"
+        script.write_text(text)
+        return str(script)
+
+    return make_script
@@ -0,0 +1,38 @@
+from PySide6.QtCore import Qt
+
+from AdmissionController import AdmissionController
+from ResourceHistory import ResourceHistory
+from ResourceMonitor import ResourceMonitor
+from SeparateThread import SeparateThread
+
+
+def test_own_renders_do_not_count_as_cpu_load(settings):
+    monitor = ResourceMonitor()
+    monitor.available_memory_mb = 64000
+    monitor.cpu_load = 0.99
+    monitor.tracked_cpu_load = 0.97
+    admission = AdmissionController(settings, ResourceHistory(settings.resource_history_filepath), monitor)
+    assert admission.can_start(None)
+
+    monitor.tracked_cpu_load = 0.0
+    assert not admission.can_start(None)
+    assert admission.waiting_on == "cpu"
+
+
+def test_two_light_jobs_run_at_once(settings, make_script, monkeypatch):
+    monkeypatch.setenv("STUB_NUKE_FRAME_TIME", "0.1")
+    settings.admission_control = True
+    settings.render_workers = 2
+    scripts = [make_script("a", frames=20), make_script("b", frames=20)]
+    render_worker = SeparateThread(settings=settings)
+    events = []
+    render_worker.frame_progress.connect(lambda script, frames_done, frames_total, fps:
+                                         events.append(("progress", script)), Qt.DirectConnection)
+    render_worker.render_script_update.connect(lambda script, exit_code, elapsed_time:
+                                               events.append(("done", script, exit_code)), Qt.DirectConnection)
+    render_worker.render_list(scripts, force_render=True)
+
+    assert sorted(event for event in events if event[0] == "done") == [("done", scripts[0], 0), ("done", scripts[1], 0)]
+    #the second script was rendering before the first was done
+    first_done = next(index for index, event in enumerate(events) if event[0] == "done")
+    assert {event[1] for event in events[:first_done]} == set(scripts)
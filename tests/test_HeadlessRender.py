@@ -0,0 +1,56 @@
+import io
+import json
+
+from conftest import STUB_NUKE
+from HeadlessRender import HeadlessRender
+
+
+def run_headless(tmp_path, scripts, *options):
+    queue_filepath = tmp_path / "queue.json"
+    queue_filepath.write_text(json.dumps(scripts))
+    output = io.StringIO()
+    exit_code = HeadlessRender.run_command_line([str(queue_filepath), "--nuke-exe", STUB_NUKE, "--force", *options],
+                                                output)
+    return exit_code, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_progress_lines(tmp_path, make_script, monkeypatch):
+    monkeypatch.setenv("STUB_NUKE_FRAME_TIME", "0.05")
+    scripts = [make_script(name, frames=20) for name in ("a", "b", "c")]
+    exit_code, events = run_headless(tmp_path, scripts)
+
+    assert exit_code == HeadlessRender.EXIT_OK
+    assert events[-1]["event"] == "done" and events[-1]["rendered"] == 3
+    for script in scripts:
+        script_events = [event for event in events if event.get("script") == script]
+        progress = [event for event in script_events if event["event"] == "progress"]
+        assert progress, f"no progress lines for {script}"
+        assert progress[-1]["frames_done"] == 20 and progress[-1]["frames_total"] == 20
+        #every progress line comes while the script renders, before it is reported done
+        assert script_events[-1]["event"] == "script_done" and script_events[-1]["exit_code"] == 0
+        assert all(event["time"] <= script_events[-1]["time"] for event in progress)
+
+
+def test_dependency_skips(tmp_path, make_script):
+    scripts = [make_script("a", frames=2), make_script("b", frames=2)]
+    queue = [{"script": scripts[0], "after": [scripts[1]]}, {"script": scripts[1], "after": [scripts[0]]},
+             make_script("c", frames=2)]
+    exit_code, events = run_headless(tmp_path, queue)
+
+    assert exit_code == HeadlessRender.EXIT_RENDER_FAILED
+    results = {event["script"]: event["exit_code"] for event in events if event["event"] == "script_done"}
+    assert results[scripts[0]] == results[scripts[1]] == 208
+    assert results[str(tmp_path / "c.nk")] == 0
+
+
+def test_precomp_renders_before_comp(tmp_path, make_script):
+    comp = make_script("comp", frames=4, reads=["precomp"])
+    precomp = make_script("precomp", frames=4)
+    exit_code, events = run_headless(tmp_path, [comp, precomp])
+
+    assert exit_code == HeadlessRender.EXIT_OK
+    #the precomp's frames are not there when the comp is checked, but it renders them first
+    validated = {event["script"]: event for event in events if event["event"] == "validated"}
+    assert validated[comp]["status"] == "ok" and validated[comp]["errors"] == []
+    results = [(event["script"], event["exit_code"]) for event in events if event["event"] == "script_done"]
+    assert results == [(precomp, 0), (comp, 0)]
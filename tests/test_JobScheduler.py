@@ -0,0 +1,78 @@
+import os
+
+from PySide6.QtCore import Qt
+
+from JobScheduler import JobScheduler
+from RenderJob import RenderJob
+from ScriptMetadataCache import ScriptMetadataCache
+from SeparateThread import SeparateThread
+
+
+def make_job(queue_index, nuke_exe, first_frame = None):
+    job = RenderJob(f"script{queue_index}.nk", first_frame)
+    job.queue_index = queue_index
+    job.nuke_exe = nuke_exe
+    return job
+
+
+def test_file_key_padding():
+    base_directory = os.path.abspath("shots")
+    key = JobScheduler.get_file_key("renders/plate.####.exr", base_directory)
+    assert key == JobScheduler.get_file_key("renders/plate.%04d.exr", base_directory)
+    assert key == JobScheduler.get_file_key(os.path.join(base_directory, "renders", ".", "plate.%04d.exr"), "/elsewhere")
+    assert JobScheduler.get_file_key("plate.#.exr", base_directory) == JobScheduler.get_file_key("plate.%d.exr",
+                                                                                                   base_directory)
+    assert key != JobScheduler.get_file_key("renders/plate.###.exr", base_directory)
+    assert JobScheduler.get_file_key("", base_directory) is None
+    assert JobScheduler.get_file_key("renders/[value root.name].####.exr", base_directory) is None
+
+
+def test_inferred_dependencies(make_script):
+    grade = make_script("grade", reads=["comp"])
+    comp = make_script("comp", reads=["precomp"])
+    precomp = make_script("precomp")
+    other = make_script("other")
+    scheduler = JobScheduler(ScriptMetadataCache())
+
+    assert scheduler.set_queue([grade, comp, precomp, other], "Write1", {grade: 5}) == {}
+    assert scheduler.dependencies == {0: {1}, 1: {2}, 2: set(), 3: set()}
+    #the scripts the high priority grade waits on are raised to its priority
+    assert scheduler.priorities == {0: 5, 1: 5, 2: 5, 3: 0}
+    assert scheduler.get_script_order() == [2, 1, 0, 3]
+
+    scheduler.set_queue([grade, comp, precomp, other], "Write1", {grade: 5}, infer=False)
+    assert scheduler.dependencies == {0: set(), 1: set(), 2: set(), 3: set()}
+    assert scheduler.get_script_order() == [0, 1, 2, 3]
+
+
+def test_priority_order(make_script):
+    scripts = [make_script(name) for name in ("a", "b", "c", "d", "e")]
+    scheduler = JobScheduler()
+    scheduler.set_queue(scripts, "Write1", {scripts[3]: 2, scripts[4]: 1}, {scripts[1]: [scripts[4]]})
+
+    #b waits on e, which comes before it only as it has a higher priority
+    assert scheduler.get_script_order() == [3, 4, 0, 1, 2]
+    #jobs of the same priority rendering with the same Nuke are kept together from the first of them, and the chunks
+    #of a script keep their order
+    jobs = [make_job(0, "nuke13"), make_job(1, "nuke14"), make_job(2, "nuke13"), make_job(3, "nuke14", 1),
+            make_job(3, "nuke14", 51), make_job(4, "nuke13")]
+    order = [(job.queue_index, job.first_frame) for job in scheduler.sort_jobs(jobs)]
+    assert order == [(3, 1), (3, 51), (4, None), (0, None), (2, None), (1, None)]
+
+
+def test_failure_propagates(settings, make_script, monkeypatch):
+    monkeypatch.setenv("STUB_NUKE_FAIL_FRAME", "3")
+    grade = make_script("grade", frames=2, reads=["comp"])
+    comp = make_script("comp", frames=2, reads=["precomp"])
+    precomp = make_script("precomp", frames=4)
+    other = make_script("other", frames=2)
+    render_worker = SeparateThread(ScriptMetadataCache(), settings=settings)
+    results = {}
+    render_worker.render_script_update.connect(lambda script, exit_code, elapsed_time:
+                                               results.__setitem__(script, exit_code), Qt.DirectConnection)
+    render_worker.render_list([grade, comp, precomp, other], force_render=True)
+
+    assert results[precomp] not in (0, SeparateThread.ERROR_DEPENDENCY_FAILED)
+    assert results[comp] == results[grade] == SeparateThread.ERROR_DEPENDENCY_FAILED
+    assert results[other] == 0
+    assert not os.path.exists(os.path.join(os.path.dirname(comp), "renders", "comp.0001.exr"))
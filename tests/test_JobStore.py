@@ -0,0 +1,26 @@
+from JobStore import JobStore
+
+
+def test_recover_after_crash(tmp_path):
+    db_filepath = str(tmp_path / "jobs.db")
+    job_store = JobStore(db_filepath)
+    job_store.add_jobs(["a.nk", "b.nk", "c.nk", "d.nk"], "Write1")
+    job_store.set_script_state("a.nk", JobStore.STATE_RUNNING, [JobStore.STATE_QUEUED])
+    job_store.update_progress("a.nk", 40, 100)
+    job_store.set_script_state("b.nk", JobStore.STATE_RUNNING, [JobStore.STATE_QUEUED])
+    job_store.set_script_state("b.nk", JobStore.STATE_DONE, [JobStore.STATE_RUNNING], 0)
+    #BNRQ is killed without closing the database
+
+    recovered_store = JobStore(db_filepath)
+    try:
+        assert recovered_store.recover() == 1
+        assert recovered_store.get_queued_scripts() == ["a.nk", "c.nk", "d.nk"]
+        job = recovered_store.get_jobs([JobStore.STATE_QUEUED])[0]
+        #the frames it had written are kept, so an incremental render only picks up the rest
+        assert (job["script"], job["frames_done"], job["frames_total"], job["attempts"]) == ("a.nk", 40, 100, 1)
+        assert [job["state"] for job in recovered_store.get_jobs()] == [JobStore.STATE_QUEUED, JobStore.STATE_DONE,
+                                                                       JobStore.STATE_QUEUED, JobStore.STATE_QUEUED]
+        assert recovered_store.recover() == 0
+    finally:
+        recovered_store.close()
+        job_store.close()
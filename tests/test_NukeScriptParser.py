@@ -0,0 +1,62 @@
+import os
+
+from NukeScriptParser import NukeScriptParser
+
+COMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "comp.nk")
+
+
+def test_nodes_and_inputs():
+    parser = NukeScriptParser(COMP)
+    parser.parse()
+
+    assert [node.get_full_name() for node in parser.nodes[1:]] == [
+        "Read1", "Constant1", "Text1", "Merge1", "Group1", "Group1.Input1", "Group1.Blur1", "Group1.Output1",
+        "Dissolve1", "Blur2", "Write1"]
+    inputs = {node.get_full_name(): node.inputs for node in parser.nodes[1:]}
+    #Read and Constant have no inputs without an inputs knob, and `set [stack 1]` saved the Read under the Constant
+    assert inputs["Read1"] == [] and inputs["Constant1"] == []
+    assert inputs["Text1"] == ["Constant1"]
+    assert inputs["Merge1"] == ["Text1", "Read1"]
+    #the group is the top of the stack again after end_group, and `push 0` is an empty input
+    assert inputs["Group1"] == ["Merge1"]
+    assert inputs["Group1.Blur1"] == ["Group1.Input1"]
+    assert inputs["Group1.Output1"] == ["Group1.Blur1"]
+    assert inputs["Dissolve1"] == [None, "Group1"]
+    assert inputs["Blur2"] == ["Dissolve1"]
+    assert inputs["Write1"] == ["Read1"]
+
+
+def test_knobs():
+    parser = NukeScriptParser(COMP)
+    parser.parse()
+
+    assert parser.get_frame_range() == (1001, 1050)
+    #braces in a quoted value do not end the node
+    assert parser.get_node("Text1").knob("message") == 'closing "quoted" } brace {'
+    assert parser.get_node("Constant1").knob("color") == "0.1 0.2 0.3 1"
+    assert parser.get_node("Group1.Blur1").knob("size") == "{curve x1001 0 x1050 10}"
+    #a clone takes the class and knobs of the node it was set from
+    clone = parser.get_node("Blur2")
+    assert clone.node_class == "Blur" and clone.parent is None
+    assert clone.knob("size") == "{curve x1001 0 x1050 10}"
+    assert [node.get_full_name() for node in parser.get_nodes("Blur", top_level_only=True)] == ["Blur2"]
+    assert parser.get_node("Write1").knob("file") == "renders/comp.####.exr"
+
+
+def test_header_and_version():
+    parser = NukeScriptParser(COMP)
+    assert [node.node_class for node in parser.parse(root_only=True)] == ["Root"]
+
+    assert parser.header == "/usr/local/Nuke13.2v4/libnuke-13.2.4.so -nx"
+    assert parser.version == "13.2 v4"
+    assert parser.write_info["Write1"]["file"] == "renders/comp.####.exr"
+    assert parser.write_info["Write1"]["colorspace"] == "default (sRGB)"
+    assert parser.get_frame_range() == (1001, 1050)
+
+
+def test_count_braces():
+    parser = NukeScriptParser(COMP)
+    assert parser.count_braces('"a } b" {', 0) == 1
+    assert parser.count_braces(r"\{ {", 0) == 1
+    #inside braces quotes are plain characters
+    assert parser.count_braces('"}', 2) == 1
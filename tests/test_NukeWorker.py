@@ -0,0 +1,100 @@
+import os
+import threading
+
+from PySide6.QtCore import Qt
+
+from conftest import REPO_FOLDER, STUB_NUKE
+from NukeWorker import NukeWorker
+from RenderJob import RenderJob
+from RenderOutputParser import RenderOutputParser
+from SeparateThread import SeparateThread
+
+WORKER_SCRIPT = os.path.join(REPO_FOLDER, "NukeWorkerScript.py")
+
+
+def make_worker(max_jobs = 50):
+    worker = NukeWorker(STUB_NUKE, WORKER_SCRIPT, max_jobs)
+    worker.response_timeout = 30
+    return worker
+
+
+def test_render_prints_frames(make_script):
+    script = make_script("shot", frames=10)
+    worker = make_worker()
+    parser = RenderOutputParser(10)
+    frames = []
+    worker.on_output = lambda line: frames.append(line) if parser.feed(line) else None
+    try:
+        assert worker.render(RenderJob(script), "Write1") == 0
+        assert worker.render(RenderJob(script, 3, 5), "Write1") == 0
+    finally:
+        worker.stop()
+
+    #the frame lines are only printed by Nuke in verbose mode
+    assert len(frames) == 13
+    assert parser.frames_done == 13
+    assert os.path.isfile(os.path.join(os.path.dirname(script), "renders", "shot.0010.exr"))
+
+
+def test_render_errors(make_script):
+    script = make_script("shot", frames=2)
+    worker = make_worker()
+    try:
+        assert worker.render(RenderJob(script + ".missing"), "Write1") == 404
+        assert worker.render(RenderJob(script), "Write2") == 104
+        assert worker.ping()
+    finally:
+        worker.stop()
+    assert not worker.is_alive()
+
+
+def test_restart_after_max_jobs(make_script):
+    script = make_script("shot", frames=1)
+    worker = make_worker(max_jobs=1)
+    try:
+        assert worker.render(RenderJob(script), "Write1") == 0
+        first_pid = worker.get_pid()
+        assert worker.render(RenderJob(script), "Write1") == 0
+        assert worker.get_pid() not in (None, first_pid)
+    finally:
+        worker.stop()
+
+
+def test_terminate_while_stopping():
+    worker = make_worker()
+    assert worker.start()
+    errors = []
+
+    def keep_terminating():
+        try:
+            for _ in range(200):
+                worker.terminate()
+        except Exception as e:
+            errors.append(e)
+
+    terminate_thread = threading.Thread(target=keep_terminating)
+    terminate_thread.start()
+    worker.stop()
+    terminate_thread.join()
+    assert errors == []
+    assert worker.process is None
+    assert worker.get_pid() is None
+
+
+def test_persistent_workers_report_frames(settings, make_script):
+    settings.persistent_workers = True
+    settings.render_workers = 2
+    scripts = [make_script("a", frames=6), make_script("b", frames=4)]
+    render_worker = SeparateThread(settings=settings)
+    progress = {}
+    updates = []
+    render_worker.frame_progress.connect(lambda script, frames_done, frames_total, fps:
+                                         progress.__setitem__(script, (frames_done, frames_total)),
+                                         Qt.DirectConnection)
+    render_worker.render_script_update.connect(lambda script, exit_code, elapsed_time: updates.append(exit_code),
+                                               Qt.DirectConnection)
+    render_worker.render_list(scripts, force_render=True)
+
+    assert updates == [0, 0]
+    assert progress == {scripts[0]: (6, 6), scripts[1]: (4, 4)}
+    assert render_worker.frames_written == 10
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+from PySide6.QtCore import Qt
+
+from RenderAgent import RenderAgent
+from RenderCoordinator import RenderCoordinator
+
+TOKEN = "test-token"
+
+
+def start_agent(settings, port, name):
+    agent = RenderAgent(settings, "127.0.0.1", port, TOKEN, 1, name)
+    agent_thread = threading.Thread(target=agent.run, daemon=True)
+    agent_thread.start()
+    return agent, agent_thread
+
+
+def wait_for(condition, timeout):
+    end_time = time.time() + timeout
+    while not condition():
+        if time.time() > end_time:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_round_trip_with_truncate(settings, make_script, monkeypatch):
+    monkeypatch.setenv("STUB_NUKE_FRAME_TIME", "0.1")
+    script = make_script("shot", frames=60)
+    coordinator = RenderCoordinator(settings=settings)
+    assert coordinator.listen(0, TOKEN)
+    port = coordinator.server_socket.getsockname()[1]
+    updates = []
+    progress = []
+    coordinator.render_script_update.connect(lambda script, exit_code, elapsed_time:
+                                             updates.append((script, exit_code)), Qt.DirectConnection)
+    coordinator.frame_progress.connect(lambda script, frames_done, frames_total, fps:
+                                       progress.append((frames_done, frames_total)), Qt.DirectConnection)
+
+    agents = []
+    render_thread = threading.Thread(target=coordinator.render_list, args=([script], True))
+    try:
+        agents.append(start_agent(settings, port, "first"))
+        render_thread.start()
+        #the second agent joins with the whole range already handed out, so it can only get frames by a truncate
+        assert wait_for(lambda: progress, 30)
+        agents.append(start_agent(settings, port, "second"))
+        render_thread.join(60)
+        assert not render_thread.is_alive()
+    finally:
+        for agent, _ in agents:
+            agent.request_stop()
+            agent.stop_units()
+        coordinator.close()
+        for _, agent_thread in agents:
+            agent_thread.join(10)
+
+    assert updates == [(script, 0)]
+    assert progress[-1] == (60, 60)
+    renders_folder = os.path.join(os.path.dirname(script), "renders")
+    assert sorted(os.listdir(renders_folder)) == [f"shot.{frame:04d}.exr" for frame in range(1, 61)]
+    #both agents rendered part of the range, and no frame was rendered twice
+    frames_written = [agent.render_worker.frames_written for agent, _ in agents]
+    assert all(frames_written) and sum(frames_written) == 60
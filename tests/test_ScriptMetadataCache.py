@@ -0,0 +1,44 @@
+import os
+
+from ScriptMetadataCache import ScriptMetadataCache
+
+
+def test_changes_are_read_again(make_script):
+    script = make_script("shot", frames=10)
+    cache = ScriptMetadataCache()
+    metadata = cache.get(script)
+    assert metadata["frame_range"] == [1, 10]
+    assert cache.get(script) is metadata
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    #the same size with a new modification time
+    stat = os.stat(script)
+    make_script("shot", frames=20)
+    assert os.stat(script).st_size == stat.st_size
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert cache.get(script)["frame_range"] == [1, 20]
+
+    #a new size with the same modification time
+    stat = os.stat(script)
+    make_script("shot", frames=100)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(script)["frame_range"] == [1, 100]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_saved_entries_are_used(make_script, tmp_path):
+    script = make_script("shot", frames=10)
+    cache_filepath = str(tmp_path / "script_cache.json")
+    cache = ScriptMetadataCache(cache_filepath)
+    cache.get(script)
+    cache.save()
+
+    loaded_cache = ScriptMetadataCache(cache_filepath)
+    loaded_cache.load()
+    assert loaded_cache.get(script)["write_nodes"]["Write1"]["file"].endswith("shot.####.exr")
+    assert (loaded_cache.hits, loaded_cache.misses) == (1, 0)
+
+    make_script("shot", frames=5)
+    os.utime(script, ns=(0, os.stat(script).st_mtime_ns + 1000000000))
+    assert loaded_cache.get(script)["frame_range"] == [1, 5]
+    assert loaded_cache.misses == 1
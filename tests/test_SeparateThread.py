@@ -0,0 +1,96 @@
+import time
+
+from PySide6.QtCore import QEventLoop, QObject, Qt, QThread, QTimer
+
+from RenderCache import RenderCache
+from ScriptMetadataCache import ScriptMetadataCache
+from SeparateThread import SeparateThread
+
+
+class Receiver(QObject):
+    """
+        Records the render engine's signals in this thread, the way the window receives them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.event_loop = QEventLoop()
+
+    def handle_frame_progress(self, script, frames_done, frames_total, fps):
+        self.events.append(("progress", script, frames_done, time.time()))
+
+    def handle_render_update(self, script, exit_code, elapsed_time):
+        self.events.append(("done", script, exit_code, time.time()))
+
+    def handle_render_finish(self):
+        self.event_loop.quit()
+
+
+def render_in_thread(settings, scripts):
+    render_thread = QThread()
+    render_worker = SeparateThread(settings=settings)
+    render_worker.moveToThread(render_thread)
+    receiver = Receiver()
+    render_worker.frame_progress.connect(receiver.handle_frame_progress)
+    render_worker.render_script_update.connect(receiver.handle_render_update)
+    render_worker.render_done.connect(receiver.handle_render_finish)
+    render_thread.started.connect(lambda: render_worker.render_list(scripts, True))
+    QTimer.singleShot(60000, receiver.event_loop.quit)
+    render_thread.start()
+    receiver.event_loop.exec()
+    render_thread.quit()
+    render_thread.wait()
+    return receiver.events
+
+
+def test_frame_progress_arrives_while_rendering(settings, make_script, monkeypatch):
+    monkeypatch.setenv("STUB_NUKE_FRAME_TIME", "0.05")
+    settings.render_workers = 2
+    scripts = [make_script(name, frames=10) for name in ("a", "b", "c")]
+    events = render_in_thread(settings, scripts)
+
+    for script in scripts:
+        script_events = [event for event in events if event[1] == script]
+        assert [event[2] for event in script_events] == list(range(1, 11)) + [0]
+    #the first scripts' frames reach this thread before either of them is done
+    first_done = next(index for index, event in enumerate(events) if event[0] == "done")
+    assert sum(1 for event in events[:first_done] if event[0] == "progress") >= 10
+
+
+def test_persistent_worker_progress_arrives_while_rendering(settings, make_script):
+    settings.persistent_workers = True
+    scripts = [make_script("a", frames=5), make_script("b", frames=5)]
+    events = render_in_thread(settings, scripts)
+
+    assert [event[:3] for event in events] == ([("progress", scripts[0], frame) for frame in range(1, 6)]
+                                               + [("done", scripts[0], 0)]
+                                               + [("progress", scripts[1], frame) for frame in range(1, 6)]
+                                               + [("done", scripts[1], 0)])
+
+
+def render_with_cache(settings, script_cache, render_cache, scripts):
+    render_worker = SeparateThread(script_cache, render_cache, settings)
+    rendered = []
+    cached = []
+    render_worker.render_script_update.connect(lambda script, exit_code, elapsed_time: rendered.append(script),
+                                               Qt.DirectConnection)
+    render_worker.script_cached.connect(cached.append, Qt.DirectConnection)
+    render_worker.render_list(scripts)
+    return rendered, cached
+
+
+def test_comp_renders_again_after_its_precomp(settings, make_script):
+    script_cache = ScriptMetadataCache()
+    render_cache = RenderCache(settings.render_cache_filepath, script_cache)
+    comp = make_script("comp", frames=4, reads=["precomp"])
+    precomp = make_script("precomp", frames=4)
+    assert render_with_cache(settings, script_cache, render_cache, [comp, precomp]) == ([precomp, comp], [])
+    assert render_with_cache(settings, script_cache, render_cache, [comp, precomp]) == ([], [comp, precomp])
+
+    #the comp's inputs are only written again once the precomp renders, after the cache has been looked at
+    with open(precomp, "a") as precomp_file:
+        precomp_file.write("\n")
+    assert render_with_cache(settings, script_cache, render_cache, [comp, precomp]) == ([precomp, comp], [])
+    #the comp was stored with the inputs it rendered from
+    assert render_with_cache(settings, script_cache, render_cache, [comp, precomp]) == ([], [comp, precomp])
@@ -0,0 +1,61 @@
+import os
+import time
+
+from ScriptMetadataCache import ScriptMetadataCache
+from StaleFrameFinder import StaleFrameFinder
+
+NOW = time.time()
+
+
+def write_frames(tmp_path, name, frames, size = 1000, mtime = NOW):
+    for frame in frames:
+        frame_filepath = tmp_path / "renders" / f"{name}.{frame:04d}.exr"
+        frame_filepath.write_bytes(b"x" * size)
+        os.utime(frame_filepath, (mtime, mtime))
+
+
+def make_old_script(make_script, name, frames = 10, reads = ()):
+    script = make_script(name, frames, reads)
+    os.utime(script, (NOW - 1000, NOW - 1000))
+    return script
+
+
+def find_frames(script):
+    return StaleFrameFinder(ScriptMetadataCache()).find_frames_to_render(script, "Write1")
+
+
+def test_partial_output(make_script, tmp_path):
+    script = make_old_script(make_script, "shot")
+    assert find_frames(script) == [[1, 10]]
+    write_frames(tmp_path, "shot", [1, 2, 3, 4, 7, 9, 10])
+    assert find_frames(script) == [[5, 6], [8, 8]]
+    write_frames(tmp_path, "shot", [5, 6, 8])
+    assert find_frames(script) == []
+
+
+def test_empty_and_truncated_frames(make_script, tmp_path):
+    script = make_old_script(make_script, "shot")
+    write_frames(tmp_path, "shot", range(1, 11))
+    write_frames(tmp_path, "shot", [3], size=0)
+    #under a tenth of the median size counts as cut off, a little over does not
+    write_frames(tmp_path, "shot", [7], size=99)
+    write_frames(tmp_path, "shot", [8], size=101)
+    assert find_frames(script) == [[3, 3], [7, 7]]
+
+
+def test_newer_inputs(make_script, tmp_path):
+    script = make_old_script(make_script, "comp", reads=["plate"])
+    write_frames(tmp_path, "plate", range(1, 11), mtime=NOW - 100)
+    write_frames(tmp_path, "comp", range(1, 6), mtime=NOW - 200)
+    write_frames(tmp_path, "comp", range(6, 11), mtime=NOW)
+    assert find_frames(script) == [[1, 5]]
+
+    #a script saved after its output was written renders every frame again
+    os.utime(script, (NOW + 10, NOW + 10))
+    assert find_frames(script) == [[1, 10]]
+
+
+def test_to_ranges():
+    assert StaleFrameFinder.to_ranges([]) == []
+    assert StaleFrameFinder.to_ranges([4]) == [[4, 4]]
+    assert StaleFrameFinder.to_ranges([1, 2, 3, 5, 7, 8]) == [[1, 3], [5, 5], [7, 8]]